@@ -0,0 +1,72 @@
+import hashlib
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from ..cache.idempotency import IdempotencyStore, IdempotencyKeyReused, IdempotencyInProgress
+
+MAX_KEY_LENGTH = 255
+
+@lru_cache(maxsize=None)
+def _adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+def fingerprint(*parts) -> str:
+    """
+    Digest of the request body, so a key reused for a different request is caught
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+async def idempotent(
+    store: Optional[IdempotencyStore],
+    idempotency_key: Optional[str],
+    scope: str,
+    request_fingerprint: str,
+    call: Callable[[], Awaitable[Any]],
+    response_model,
+    status_code: int = status.HTTP_200_OK,
+):
+    """
+    Run a route body at most once per Idempotency-Key
+
+    Without a key (or with the store disabled) this is just `await call()`.
+    With one, the serialized response is stored and repeats of the request
+    get it back with `Idempotent-Replayed: true`. `scope` should include the
+    user and the route so keys never collide across either.
+    """
+    if store is None or idempotency_key is None:
+        return await call()
+    if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        )
+
+    adapter = _adapter(response_model)
+
+    async def serialized():
+        return adapter.dump_python(adapter.validate_python(await call()), mode="json")
+
+    try:
+        content, replayed = await store.run(scope, idempotency_key, request_fingerprint, serialized)
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    except IdempotencyInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed",
+            headers={"Retry-After": "1"}
+        )
+    return JSONResponse(
+        content=content,
+        status_code=status_code,
+        headers={"Idempotent-Replayed": "true" if replayed else "false"}
+    )
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from ...services.auth_service import AuthService
-from ...schemas.auth import UserCreate, UserLogin, UserResponse, Token
+from ...schemas.auth import UserCreate, UserLogin, UserResponse, Token, TokenPair, RefreshRequest
+from ...dependencies import get_auth_service
 
 router = APIRouter(prefix="/auth", tags=["auth"])
-auth_service = AuthService()
 
 @router.post("/register", response_model=UserResponse)
-async def register(user_data: UserCreate):
+async def register(
+    user_data: UserCreate,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Register a new user
     """
@@ -19,7 +22,10 @@ async def register(user_data: UserCreate):
     return user
 
 @router.post("/login", response_model=Token)
-async def login(user_login: UserLogin):
+async def login(
+    user_login: UserLogin,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Authenticate and get access token
     """
@@ -30,4 +36,41 @@ async def login(user_login: UserLogin):
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return token 
\ No newline at end of file
+    return token
+
+@router.post("/refresh", response_model=TokenPair)
+async def refresh(
+    request: RefreshRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
+    """
+    Exchange a refresh token for a new access token and refresh token
+    
+    The refresh token is single-use: store the new one from the response.
+    Reusing an old one revokes the whole session.
+    """
+    tokens = await auth_service.refresh_tokens(request.refresh_token)
+    if not tokens:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or revoked refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return tokens
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: RefreshRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
+    """
+    End the session of a refresh token; its access tokens stop working
+    within REVOCATION_SYNC_INTERVAL on every worker
+    """
+    if not await auth_service.logout(request.refresh_token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
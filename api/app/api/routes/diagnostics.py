@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends
+from typing import Optional
+from ...cache.task_cache import TaskCache
+from ...cache.idempotency import IdempotencyStore
+from ...cache.token_cache import TokenCache
+from ...cache.revocations import RevocationList
+from ...cache.rate_limit import RateLimiter
+from ...services.audio_capabilities import AudioCapabilities
+from ...services.scratch import ScratchSpace
+from ...services.audio_pool import AudioWorkerPool
+from ...dependencies import get_task_cache, get_idempotency_store, get_token_cache, get_revocation_list, get_voice_rate_limiter, get_audio_capabilities, get_scratch_space, get_audio_pool, require_diagnostics_token
+
+# Operator-only: every endpoint requires DIAGNOSTICS_TOKEN
+router = APIRouter(prefix="/diagnostics", tags=["diagnostics"], dependencies=[Depends(require_diagnostics_token)])
+
+@router.get("/cache")
+async def cache_stats(task_cache: Optional[TaskCache] = Depends(get_task_cache)):
+    """
+    Task read cache statistics for this worker, including the hit ratio
+    """
+    if task_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **task_cache.stats()}
+
+@router.get("/idempotency")
+async def idempotency_stats(store: Optional[IdempotencyStore] = Depends(get_idempotency_store)):
+    """
+    Idempotency-Key statistics for this worker: requests run vs. replayed
+    """
+    if store is None:
+        return {"enabled": False}
+    return {"enabled": True, **store.stats()}
+
+@router.get("/auth-cache")
+async def auth_cache_stats(
+    token_cache: Optional[TokenCache] = Depends(get_token_cache),
+    revocations: Optional[RevocationList] = Depends(get_revocation_list)
+):
+    """
+    Verified-token cache and session revocation list statistics for this worker
+    """
+    stats = {"enabled": False} if token_cache is None else {"enabled": True, **token_cache.stats()}
+    if revocations is not None:
+        stats["revocations"] = revocations.stats()
+    return stats
+
+@router.get("/rate-limits")
+async def rate_limit_stats(limiter: Optional[RateLimiter] = Depends(get_voice_rate_limiter)):
+    """
+    Voice endpoint rate limit budgets and counters for this worker
+    """
+    if limiter is None:
+        return {"enabled": False}
+    return {"enabled": True, **limiter.stats()}
+
+@router.get("/audio")
+async def audio_capabilities(capabilities: AudioCapabilities = Depends(get_audio_capabilities)):
+    """
+    Audio conversion tooling found on this worker's host at startup
+    (ffmpeg and its codecs, pydub, numpy) and the formats it can convert
+    """
+    return capabilities.report()
+
+@router.get("/scratch")
+async def scratch_stats(scratch: Optional[ScratchSpace] = Depends(get_scratch_space)):
+    """
+    Audio conversion scratch space quota use and reaper counters for this worker
+    """
+    if scratch is None:
+        return {"enabled": False}
+    return {"enabled": True, **scratch.stats()}
+
+@router.get("/audio-pool")
+async def audio_pool_stats(pool: Optional[AudioWorkerPool] = Depends(get_audio_pool)):
+    """
+    Audio worker process pool load, backpressure and timeout counters for this worker
+    """
+    if pool is None:
+        return {"enabled": False}
+    return {"enabled": True, **pool.stats()}
@@ -1,57 +1,318 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
-from ...services.task_service import TaskService
-from ...schemas.task import TaskCreate, TaskUpdate, TaskResponse
-from ...dependencies import get_current_user
+import hashlib
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from datetime import date
+from typing import List, Literal, Optional
+from ...services.task_service import TaskService, DEFAULT_SORT, SyncCursorExpired, parse_fields
+from ...schemas.task import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskPage, TaskPartial, TaskPartialPage, TaskSearchPage, TaskAgenda, TaskStats,
+    TaskChanges, TaskOperationBatch, TaskOperationResults, TaskSelection, TaskBulkUpdate, TaskBulkResult
+)
+from ...cache.idempotency import IdempotencyStore
+from ..idempotency import fingerprint, idempotent
+from ...dependencies import get_current_user, get_task_service, get_idempotency_store
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
-task_service = TaskService()
 
-@router.get("/", response_model=List[TaskResponse])
+def _sparse_response(model, content: dict) -> Response:
+    """
+    Serialize a sparse fieldset response, emitting only the fetched fields.
+    Validates against the lightweight model instead of the full response model.
+    """
+    return Response(
+        content=model.model_validate(content).model_dump_json(exclude_unset=True),
+        media_type="application/json"
+    )
+
+def _etag(version: str, *query) -> str:
+    """
+    Strong ETag for a read, from the user's task-set version and the
+    parameters that shape the response
+    """
+    digest = hashlib.sha1(json.dumps([version, *query], default=str).encode()).hexdigest()
+    return f'"{digest}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+@router.get("/", response_model=TaskPage, responses={200: {"model": TaskPartialPage, "description": "Sparse tasks when `fields` is given"}})
 async def get_tasks(
-    status: Optional[str] = None,
-    user_id: str = Depends(get_current_user)
+    response: Response,
+    task_status: Optional[str] = Query(None, alias="status"),
+    sort: str = DEFAULT_SORT,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
 ):
     """
-    Get all tasks for the authenticated user, optionally filtered by status
+    Get a page of tasks for the authenticated user, optionally filtered by status
+    
+    Responses carry a strong ETag; sending it back in If-None-Match returns
+    304 Not Modified without reading or serializing any tasks.
+    
+    Pass the returned next_cursor as `cursor` to fetch the following page.
+    `sort` is one of updated_at, created_at or due_date, prefixed with "-"
+    for descending order; `limit` is capped server-side.
+    `fields` is a comma-separated column list (e.g. id,title,status,due_date)
+    that limits what is fetched and returned.
     """
-    tasks = await task_service.get_tasks(user_id, status)
-    return tasks
+    try:
+        columns = parse_fields(fields)
+        # Read the version before the rows so the ETag is never newer than the content
+        version = await task_service.get_tasks_version(user_id)
+        etag = _etag(version, user_id, task_status, sort, limit, cursor, columns)
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+        page = await task_service.get_tasks_page(user_id, task_status, sort, limit, cursor, columns)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if columns:
+        response = _sparse_response(TaskPartialPage, page)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response if columns else page
 
-@router.get("/{task_id}", response_model=TaskResponse)
+@router.get("/search", response_model=TaskSearchPage)
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """
+    Full-text search over the current user's task titles and descriptions
+    
+    Results are ranked, best match first. Words are ANDed; "quoted phrases",
+    `or` and -excluded words are supported. Pass next_cursor back as
+    `cursor` (with the same `q`) for the next page.
+    """
+    try:
+        return await task_service.search_tasks(user_id, q, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/agenda", response_model=TaskAgenda)
+async def get_agenda(
+    start: date,
+    end: date,
+    timezone_offset: int = Query(0, ge=-840, le=720),
+    task_status: Optional[List[Literal["To Do", "In Progress", "Done"]]] = Query(None, alias="status"),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """
+    Tasks due from `start` to `end` (local dates, inclusive), grouped by
+    local day
+    
+    `timezone_offset` is the client's getTimezoneOffset() in minutes, as
+    sent to /voice/process. Each day is paginated on its own: pass a day's
+    next_cursor as `cursor` (with the same range and offset) to get only
+    that day's next page. Repeat `status` to filter, e.g. an overdue view
+    is a past range with status=To Do&status=In Progress.
+    """
+    try:
+        return await task_service.get_agenda(user_id, start, end, timezone_offset, task_status, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/stats", response_model=TaskStats)
+async def get_task_stats(
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """
+    Task counts per status, overdue count and completion rate for the
+    current user, read from maintained counters
+    """
+    return await task_service.get_stats(user_id)
+
+@router.get("/changes", response_model=TaskChanges)
+async def get_task_changes(
+    since: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """
+    Delta sync: tasks created or updated, and IDs of tasks deleted, since
+    the `since` cursor
+    
+    Omit `since` for an initial full sync. Store next_cursor and send it as
+    `since` next time; while has_more is true, call again immediately.
+    A 410 means the cursor is too old and the client must resync from scratch.
+    Recent changes and deletions can be sent again on the next sync; apply
+    them by task ID.
+    """
+    try:
+        return await task_service.get_changes(user_id, since, limit)
+    except SyncCursorExpired as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/sync", response_model=TaskOperationResults)
+async def sync_tasks(
+    batch: TaskOperationBatch,
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """
+    Replay a batch of offline create/update/delete operations in order
+    
+    Each operation carries a client-generated op_id; operations already
+    applied are skipped, so a batch can be retried safely. Conflicts are
+    resolved by updated_at and reported per operation.
+    """
+    try:
+        results = await task_service.apply_operations(user_id, batch.operations)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"results": results}
+
+@router.post("/bulk/update", response_model=TaskBulkResult)
+async def bulk_update_tasks(
+    request: TaskBulkUpdate,
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """
+    Apply the same changes to many tasks at once, e.g. mark every task in
+    `ids` as Done, or move every overdue task to a new due date
+    
+    Tasks are selected by `ids` and/or filters (status list, due_from,
+    due_to) and updated in a single statement. Set `returning` to get the
+    updated rows back.
+    """
+    try:
+        return await task_service.bulk_update_tasks(user_id, request, request.changes)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/bulk/delete", response_model=TaskBulkResult)
+async def bulk_delete_tasks(
+    request: TaskSelection,
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """
+    Delete many tasks at once, selected by `ids` and/or filters, in a
+    single statement. Set `returning` to get the deleted rows back.
+    """
+    try:
+        return await task_service.bulk_delete_tasks(user_id, request)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/{task_id}", response_model=TaskResponse, responses={200: {"model": TaskPartial, "description": "Sparse task when `fields` is given"}})
 async def get_task(
     task_id: str,
-    user_id: str = Depends(get_current_user)
+    response: Response,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
 ):
     """
-    Get a specific task by ID
+    Get a specific task by ID, optionally only the comma-separated `fields`
+    
+    Supports conditional requests with ETag / If-None-Match.
     """
-    task = await task_service.get_task(task_id, user_id)
+    try:
+        columns = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    version = await task_service.get_tasks_version(user_id)
+    etag = _etag(version, user_id, task_id, columns)
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    
+    task = await task_service.get_task(task_id, user_id, columns)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
-    return task
+    
+    if columns:
+        response = _sparse_response(TaskPartial, task)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response if columns else task
 
 @router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task_data: TaskCreate,
-    user_id: str = Depends(get_current_user)
+    idempotency_key: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service),
+    idempotency: Optional[IdempotencyStore] = Depends(get_idempotency_store)
 ):
     """
     Create a new task
+    
+    With an Idempotency-Key header, retrying the same request returns the
+    task created by the first attempt instead of creating another.
     """
-    task = await task_service.create_task(user_id, task_data)
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to create task"
-        )
-    return task
+    async def create():
+        task = await task_service.create_task(user_id, task_data)
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to create task"
+            )
+        return task
+    
+    return await idempotent(
+        idempotency, idempotency_key, f"{user_id}:tasks/create",
+        fingerprint(task_data.model_dump_json()), create, TaskResponse, status.HTTP_201_CREATED
+    )
 
 @router.post("/test-create", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-async def test_create_task():
+async def test_create_task(
+    task_service: TaskService = Depends(get_task_service)
+):
     """
     Test endpoint to create a task and verify Supabase integration
     Uses a test user account - no auth required
@@ -93,7 +354,8 @@ async def test_create_task():
 async def update_task(
     task_id: str,
     task_data: TaskUpdate,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
 ):
     """
     Update an existing task
@@ -109,7 +371,8 @@ async def update_task(
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
     task_id: str,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service)
 ):
     """
     Delete a task
@@ -1,17 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, Header, HTTPException, status, UploadFile, File, Form
 from typing import List, Optional
 from ...services.voice_service import VoiceService
 from ...services.task_service import TaskService
+from ...services.audio import audio_duration_seconds
+from ...services.scratch import ScratchQuotaExceeded
+from ...services.audio_pool import AudioPoolBusy
 from ...schemas.task import TaskCreate, TaskResponse
-from ...dependencies import get_current_user
+from ...cache.idempotency import IdempotencyStore
+from ...cache.rate_limit import RateLimitCostTooLarge, RateLimiter, RateLimitExceeded, retry_after_header
+from ..idempotency import fingerprint, idempotent
+from ...dependencies import get_current_user, get_task_service, get_idempotency_store, get_voice_rate_limiter, get_voice_service
 
 router = APIRouter(prefix="/voice", tags=["voice"])
-voice_service = VoiceService()
-task_service = TaskService()
+
+async def _charge(limiter: Optional[RateLimiter], user_id: str, **costs: float) -> None:
+    """
+    Charge the user's voice budgets, answering 429 with Retry-After when
+    one is spent, or 413 when the request alone exceeds a budget
+    """
+    if limiter is None:
+        return
+    try:
+        await limiter.check(user_id, **costs)
+    except RateLimitCostTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Recording exceeds the voice {e.budget.replace('_', ' ')} limit of {e.capacity:g}"
+        )
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Voice {e.budget.replace('_', ' ')} limit reached, try again later",
+            headers={"Retry-After": retry_after_header(e.retry_after)}
+        )
+
+async def _transcribe(voice_service: VoiceService, audio_content: bytes) -> Optional[str]:
+    """
+    Transcribe, answering 503 when the worker has no scratch space or
+    audio worker process left for the conversion fallbacks
+    """
+    try:
+        return await voice_service.transcribe_audio(audio_content)
+    except (ScratchQuotaExceeded, AudioPoolBusy) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Audio conversion is busy, try again shortly ({str(e)})",
+            headers={"Retry-After": "5"}
+        )
 
 @router.post("/transcribe-test", response_model=str)
 async def transcribe_audio_test(
-    audio: UploadFile = File(...)
+    audio: UploadFile = File(...),
+    voice_service: VoiceService = Depends(get_voice_service)
 ):
     """
     Test endpoint: Transcribe audio to text without authentication
@@ -54,7 +94,7 @@ async def transcribe_audio_test(
         )
     
     # Transcribe audio
-    transcription = await voice_service.transcribe_audio(audio_content)
+    transcription = await _transcribe(voice_service, audio_content)
     
     if not transcription:
         raise HTTPException(
@@ -66,7 +106,8 @@ async def transcribe_audio_test(
 
 @router.post("/extract-tasks-test", response_model=List[TaskCreate])
 async def extract_tasks_test(
-    transcription_data: dict
+    transcription_data: dict,
+    voice_service: VoiceService = Depends(get_voice_service)
 ):
     """
     Test endpoint: Extract tasks from transcribed text without authentication
@@ -93,7 +134,9 @@ async def extract_tasks_test(
 
 @router.post("/process-test", response_model=List[TaskResponse])
 async def process_voice_test(
-    audio: UploadFile = File(...)
+    audio: UploadFile = File(...),
+    task_service: TaskService = Depends(get_task_service),
+    voice_service: VoiceService = Depends(get_voice_service)
 ):
     """
     Test endpoint: Process voice audio into tasks without authentication
@@ -107,7 +150,7 @@ async def process_voice_test(
     print(f"Processing audio for test user, size: {len(audio_content)} bytes")
     
     # Transcribe audio
-    transcription = await voice_service.transcribe_audio(audio_content)
+    transcription = await _transcribe(voice_service, audio_content)
     print(f"Transcription result: {transcription}")
     
     if not transcription:
@@ -126,45 +169,59 @@ async def process_voice_test(
             detail="Failed to extract tasks from transcription"
         )
     
-    # Create tasks in database
-    created_tasks = []
-    for task_create in task_creates:
-        task = await task_service.create_task(test_user_id, task_create)
-        if task:
-            created_tasks.append(task)
+    # Create all tasks in database with a single insert
+    created_tasks = await task_service.create_tasks(test_user_id, task_creates)
     
     return created_tasks
 
 @router.post("/transcribe", response_model=str)
 async def transcribe_audio(
     audio: UploadFile = File(...),
-    user_id: str = Depends(get_current_user)
+    idempotency_key: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    idempotency: Optional[IdempotencyStore] = Depends(get_idempotency_store),
+    rate_limiter: Optional[RateLimiter] = Depends(get_voice_rate_limiter),
+    voice_service: VoiceService = Depends(get_voice_service)
 ):
     """
     Transcribe audio to text
+    
+    Send an Idempotency-Key header to make retries safe: a repeat of the
+    same upload returns the stored transcription instead of transcribing again.
+    Counts against the user's voice request and audio-seconds budgets
+    (429 with Retry-After when spent); replays are free.
     """
     # Read audio content
     audio_content = await audio.read()
     
-    # Transcribe audio
-    transcription = await voice_service.transcribe_audio(audio_content)
-    
-    if not transcription:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to transcribe audio"
-        )
+    async def transcribe():
+        await _charge(rate_limiter, user_id, audio_seconds=audio_duration_seconds(audio_content))
+        transcription = await _transcribe(voice_service, audio_content)
+        
+        if not transcription:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to transcribe audio"
+            )
+        
+        return transcription
     
-    return transcription
+    return await idempotent(
+        idempotency, idempotency_key, f"{user_id}:voice/transcribe",
+        fingerprint(audio_content), transcribe, str
+    )
 
 @router.post("/extract-tasks", response_model=List[TaskCreate])
 async def extract_tasks(
     transcription: str,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    rate_limiter: Optional[RateLimiter] = Depends(get_voice_rate_limiter),
+    voice_service: VoiceService = Depends(get_voice_service)
 ):
     """
     Extract tasks from transcribed text
     """
+    await _charge(rate_limiter, user_id)
     tasks = await voice_service.extract_tasks(transcription)
     
     if not tasks:
@@ -179,7 +236,12 @@ async def extract_tasks(
 async def process_voice(
     audio: UploadFile = File(...),
     timezone_offset: Optional[str] = Form(None),
-    user_id: str = Depends(get_current_user)
+    idempotency_key: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service),
+    idempotency: Optional[IdempotencyStore] = Depends(get_idempotency_store),
+    rate_limiter: Optional[RateLimiter] = Depends(get_voice_rate_limiter),
+    voice_service: VoiceService = Depends(get_voice_service)
 ):
     """
     Process voice audio into tasks
@@ -187,9 +249,18 @@ async def process_voice(
     2. Extract tasks from transcription
     3. Create tasks in database
     
+    Send an Idempotency-Key header to make retries safe: a retry that
+    arrives while the first attempt is still running waits for it, and a
+    repeat after it finished gets the same created tasks back. Neither
+    runs the pipeline again or creates duplicates.
+    
+    Each run counts against the user's voice request and audio-seconds
+    budgets; when either is spent the response is 429 with Retry-After.
+    
     Args:
         audio: Audio file to process
         timezone_offset: User's timezone offset in minutes (optional)
+        idempotency_key: Client-generated key, unique per recording (optional)
         user_id: Authenticated user ID
     """
     # Read audio content
@@ -204,29 +275,31 @@ async def process_voice(
         except ValueError:
             print(f"Invalid timezone offset: {timezone_offset}")
     
-    # Transcribe audio
-    transcription = await voice_service.transcribe_audio(audio_content)
-    
-    if not transcription:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to transcribe audio"
-        )
-    
-    # Extract tasks from transcription with timezone info
-    task_creates = await voice_service.extract_tasks(transcription, tz_offset_minutes)
-    
-    if not task_creates:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to extract tasks from transcription"
-        )
-    
-    # Create tasks in database
-    created_tasks = []
-    for task_create in task_creates:
-        task = await task_service.create_task(user_id, task_create)
-        if task:
-            created_tasks.append(task)
+    async def process():
+        await _charge(rate_limiter, user_id, audio_seconds=audio_duration_seconds(audio_content))
+        
+        # Transcribe audio
+        transcription = await _transcribe(voice_service, audio_content)
+        
+        if not transcription:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to transcribe audio"
+            )
+        
+        # Extract tasks from transcription with timezone info
+        task_creates = await voice_service.extract_tasks(transcription, tz_offset_minutes)
+        
+        if not task_creates:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to extract tasks from transcription"
+            )
+        
+        # Create all tasks in database with a single insert
+        return await task_service.create_tasks(user_id, task_creates)
     
-    return created_tasks 
\ No newline at end of file
+    return await idempotent(
+        idempotency, idempotency_key, f"{user_id}:voice/process",
+        fingerprint(audio_content, tz_offset_minutes), process, List[TaskResponse]
+    )
@@ -0,0 +1,143 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Set, Tuple
+
+class CacheBackend(ABC):
+    """
+    Minimal async key/value store used by the application caches.
+    Values are strings; entries may expire after `ttl` seconds and may be
+    evicted at any time.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Return the value for key, or None if missing or expired"""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store a value, optionally expiring after ttl seconds"""
+
+    @abstractmethod
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Store a value only if the key does not exist; True if stored"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove a key if present"""
+
+    def pin(self, key: str) -> None:
+        """Keep a key out of eviction until it is unpinned, deleted or expires"""
+
+    def unpin(self, key: str) -> None:
+        """Make a pinned key evictable again"""
+
+    async def close(self) -> None:
+        """Release any connections held by the backend"""
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU store bounded to `max_entries` keys; pinned keys are
+    skipped by eviction. Only visible to the current worker process.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+        self._pinned: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _live(self, key: str) -> Optional[Tuple[Optional[float], str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at = entry[0]
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            self._pinned.discard(key)
+            return None
+        return entry
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._live(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        now = time.monotonic()
+        while len(self._entries) > self.max_entries:
+            # Least recently used first; a pinned key only goes once expired
+            for victim, (victim_expires_at, _) in self._entries.items():
+                if victim not in self._pinned or (victim_expires_at is not None and victim_expires_at <= now):
+                    break
+            else:
+                return
+            del self._entries[victim]
+            self._pinned.discard(victim)
+            self.evictions += 1
+
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        if self._live(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._pinned.discard(key)
+
+    def pin(self, key: str) -> None:
+        if key in self._entries:
+            self._pinned.add(key)
+
+    def unpin(self, key: str) -> None:
+        self._pinned.discard(key)
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Store backed by Redis or any server speaking the Redis protocol,
+    shared by every worker. Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, client=None):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("The redis package is required for a redis:// cache URL (pip install redis)")
+            client = redis.from_url(url, decode_responses=True)
+        self.client = client
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return bool(await self.client.set(key, value, px=int(ttl * 1000) if ttl else None, nx=True))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+def create_cache_backend(url: str, max_entries: int = 10000) -> CacheBackend:
+    """
+    Build a cache backend from a URL: memory:// for the in-process LRU,
+    redis:// or rediss:// for a shared Redis-compatible server
+    """
+    if url.startswith("memory://"):
+        return MemoryCacheBackend(max_entries)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unsupported cache URL: {url}")
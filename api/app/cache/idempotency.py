@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from uuid import uuid4
+from ..config import settings
+from .backends import CacheBackend, create_cache_backend
+
+logger = logging.getLogger(__name__)
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used for a request with a different body"""
+
+class IdempotencyInProgress(Exception):
+    """The request holding the key did not finish within the wait timeout"""
+
+class IdempotencyStore:
+    """
+    Deduplicates retried requests that carry the same Idempotency-Key
+
+    The first request claims the key with a short-lived "pending" record
+    (an atomic add), runs, and replaces the record with its result for
+    `ttl` seconds. A retry that finds the result gets it back without
+    running anything; a retry that finds the key pending waits for the
+    in-flight request (on an in-process future when the owner is in this
+    worker, by polling the backend otherwise). Failed requests release the
+    key, so the next retry runs again. A request that succeeded but could
+    not store its result keeps its claim until `lock_ttl`, so a retry
+    cannot run it twice. `lock_ttl` also bounds how long a crashed worker's
+    claim can block the key. Pending claims are pinned in the backend so
+    LRU eviction cannot drop them.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: float = 86400,
+        lock_ttl: float = 300,
+        wait_timeout: float = 60,
+        poll_interval: float = 0.05,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.executions = 0
+        self.replays = 0
+        self.waits = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def _store_key(scope: str, key: str) -> str:
+        return "idem:" + hashlib.sha256(f"{scope}\n{key}".encode()).hexdigest()
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        call: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, bool]:
+        """
+        Run `call` once per (scope, key) and return (result, replayed).
+        The result must be JSON-serializable. Raises IdempotencyKeyReused if
+        the key was used with another fingerprint, IdempotencyInProgress if
+        the owning request is still running after the wait timeout.
+        """
+        store_key = self._store_key(scope, key)
+        deadline = time.monotonic() + self.wait_timeout
+        delay = self.poll_interval
+        while True:
+            owner = uuid4().hex
+            pending = json.dumps({"state": "pending", "fingerprint": fingerprint, "owner": owner})
+            if await self.backend.add(store_key, pending, self.lock_ttl):
+                self.backend.pin(store_key)
+                return await self._execute(store_key, owner, fingerprint, call), False
+
+            stored = await self.backend.get(store_key)
+            if stored is None:
+                continue  # released or expired since the add; try to claim again
+            record = json.loads(stored)
+            if record["fingerprint"] != fingerprint:
+                raise IdempotencyKeyReused()
+            if record["state"] == "done":
+                self.replays += 1
+                return record["result"], True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyInProgress()
+            self.waits += 1
+            future = self._inflight.get(store_key)
+            if future is not None:
+                await asyncio.wait({future}, timeout=remaining)
+            else:
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, 1.0)
+
+    async def _execute(self, store_key: str, owner: str, fingerprint: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[store_key] = future
+        self.executions += 1
+        try:
+            try:
+                result = await call()
+            except BaseException:
+                stored = await self.backend.get(store_key)
+                if stored is not None and json.loads(stored).get("owner") == owner:
+                    await self.backend.delete(store_key)
+                raise
+            record = {"state": "done", "fingerprint": fingerprint, "result": result}
+            try:
+                await self.backend.set(store_key, json.dumps(record), self.ttl)
+            except Exception:
+                # The request did run: leave the claim pending until lock_ttl
+                # rather than let a retry run it again
+                logger.exception("Could not store the result for an idempotency key; keeping its claim")
+            else:
+                self.backend.unpin(store_key)
+            return result
+        finally:
+            del self._inflight[store_key]
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        """
+        Execution/replay counters for this process
+        """
+        return {
+            "backend": type(self.backend).__name__,
+            "executions": self.executions,
+            "replays": self.replays,
+            "waits": self.waits,
+            "in_flight": len(self._inflight),
+        }
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+def create_idempotency_store() -> Optional[IdempotencyStore]:
+    """
+    Build the idempotency store from settings; None when disabled
+    """
+    if not settings.IDEMPOTENCY_CACHE_URL:
+        return None
+    backend = create_cache_backend(settings.IDEMPOTENCY_CACHE_URL, settings.IDEMPOTENCY_MAX_ENTRIES)
+    return IdempotencyStore(
+        backend,
+        ttl=settings.IDEMPOTENCY_TTL,
+        lock_ttl=settings.IDEMPOTENCY_LOCK_TTL,
+        wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT,
+    )
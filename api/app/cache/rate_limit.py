@@ -0,0 +1,203 @@
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+from ..config import settings
+
+class Budget(NamedTuple):
+    """A token bucket: holds up to `capacity` units and refills `rate` units per second"""
+    name: str
+    capacity: float
+    rate: float
+
+class RateLimitExceeded(Exception):
+    """A budget does not have enough tokens; retry after `retry_after` seconds"""
+
+    def __init__(self, budget: str, retry_after: float):
+        super().__init__(f"{budget} budget exhausted, retry after {retry_after:.1f}s")
+        self.budget = budget
+        self.retry_after = retry_after
+
+class RateLimitCostTooLarge(Exception):
+    """A single request costs more than a budget can ever hold; retrying will not help"""
+
+    def __init__(self, budget: str, cost: float, capacity: float):
+        super().__init__(f"Request costs {cost:g} {budget}, more than the budget of {capacity:g}")
+        self.budget = budget
+        self.cost = cost
+        self.capacity = capacity
+
+def take(
+    state: Optional[dict],
+    now: float,
+    budgets: Sequence[Budget],
+    costs: Dict[str, float],
+) -> Tuple[Optional[dict], Optional[Tuple[str, float]]]:
+    """
+    Token bucket arithmetic shared by the backends
+
+    Refills each budget for the time elapsed since the stored state, then
+    takes every cost at once or none of them. Returns the new state, or
+    None and the (budget, seconds to wait) of the budget that is furthest
+    short. A cost larger than a budget's capacity is never taken;
+    RateLimiter.check rejects it before reaching the backend.
+    """
+    stored = state or {}
+    elapsed = max(0.0, now - stored.get("t", now))
+    levels = {}
+    denied: Optional[Tuple[str, float]] = None
+    for budget in budgets:
+        level = min(budget.capacity, stored.get(budget.name, budget.capacity) + elapsed * budget.rate)
+        cost = costs.get(budget.name, 0.0)
+        if cost > level:
+            wait = (cost - level) / budget.rate
+            if denied is None or wait > denied[1]:
+                denied = (budget.name, wait)
+        levels[budget.name] = level - cost
+    if denied is not None:
+        return None, denied
+    return {**levels, "t": now}, None
+
+class RateLimiterBackend(ABC):
+    """
+    Storage for token bucket state, updated atomically per key
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, budgets: Sequence[Budget], costs: Dict[str, float]) -> Optional[Tuple[str, float]]:
+        """Take the costs from the key's buckets; None if taken, else (budget, retry_after)"""
+
+    async def close(self) -> None:
+        """Release any connections held by the backend"""
+
+class MemoryRateLimiter(RateLimiterBackend):
+    """
+    Buckets in this process, bounded to `max_keys` (least recently used
+    keys are dropped, which refills them). Each worker limits separately.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._states: "OrderedDict[str, dict]" = OrderedDict()
+
+    async def consume(self, key: str, budgets: Sequence[Budget], costs: Dict[str, float]) -> Optional[Tuple[str, float]]:
+        state, denied = take(self._states.get(key), time.time(), budgets, costs)
+        if state is not None:
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+        return denied
+
+class RedisRateLimiter(RateLimiterBackend):
+    """
+    Buckets in Redis (or any server speaking the protocol), shared by every
+    worker. Each update is an optimistic WATCH/MULTI/EXEC transaction on
+    the key, retried if another worker changed it in between. Requires the
+    optional `redis` package.
+    """
+
+    def __init__(self, url: str, client=None, max_retries: int = 10):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("The redis package is required for a redis:// rate limit URL (pip install redis)")
+            client = redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.max_retries = max_retries
+
+    async def consume(self, key: str, budgets: Sequence[Budget], costs: Dict[str, float]) -> Optional[Tuple[str, float]]:
+        from redis.exceptions import WatchError
+
+        # An untouched bucket is full again after this long, so the key can expire
+        ttl = max(budget.capacity / budget.rate for budget in budgets)
+        async with self.client.pipeline(transaction=True) as pipe:
+            for _ in range(self.max_retries):
+                try:
+                    await pipe.watch(key)
+                    stored = await pipe.get(key)
+                    state, denied = take(json.loads(stored) if stored else None, time.time(), budgets, costs)
+                    if state is None:
+                        await pipe.unwatch()
+                        return denied
+                    pipe.multi()
+                    pipe.set(key, json.dumps(state), px=int(ttl * 1000) + 1)
+                    await pipe.execute()
+                    return None
+                except WatchError:
+                    continue
+        raise RuntimeError(f"Rate limit state for {key} kept changing; gave up after {self.max_retries} attempts")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+class RateLimiter:
+    """
+    Per-user limits for one group of endpoints, e.g. the voice pipeline
+    """
+
+    def __init__(self, backend: RateLimiterBackend, budgets: Sequence[Budget], prefix: str = "rate"):
+        self.backend = backend
+        self.budgets = list(budgets)
+        self.prefix = prefix
+        self.allowed = 0
+        self.limited = 0
+
+    async def check(self, user_id: str, **costs: float) -> None:
+        """
+        Charge the user's budgets (the request budget is charged one per call)
+
+        Raises:
+            RateLimitCostTooLarge: If a cost exceeds a budget's capacity;
+                nothing is charged
+            RateLimitExceeded: If any budget is short; nothing is charged
+        """
+        costs.setdefault("requests", 1)
+        for budget in self.budgets:
+            if costs.get(budget.name, 0.0) > budget.capacity:
+                self.limited += 1
+                raise RateLimitCostTooLarge(budget.name, costs[budget.name], budget.capacity)
+        denied = await self.backend.consume(f"{self.prefix}:{user_id}", self.budgets, costs)
+        if denied is not None:
+            self.limited += 1
+            raise RateLimitExceeded(*denied)
+        self.allowed += 1
+
+    def stats(self) -> dict:
+        """
+        Allowed/limited counters for this process
+        """
+        return {
+            "backend": type(self.backend).__name__,
+            "budgets": [budget._asdict() for budget in self.budgets],
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+def retry_after_header(seconds: float) -> str:
+    """Retry-After value: whole seconds, rounded up, at least 1"""
+    return str(max(1, math.ceil(seconds)))
+
+def create_voice_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Build the voice endpoint limiter from settings; None when disabled
+    """
+    url = settings.VOICE_RATE_LIMIT_URL
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        backend = MemoryRateLimiter()
+    elif url.startswith(("redis://", "rediss://", "unix://")):
+        backend = RedisRateLimiter(url)
+    else:
+        raise ValueError(f"Unsupported rate limit URL: {url}")
+    return RateLimiter(backend, [
+        Budget("requests", settings.VOICE_REQUEST_BURST, settings.VOICE_REQUESTS_PER_MINUTE / 60),
+        Budget("audio_seconds", settings.VOICE_AUDIO_SECONDS_BURST, settings.VOICE_AUDIO_SECONDS_PER_HOUR / 3600),
+    ], prefix="rate:voice")
@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+from ..config import settings
+from ..repositories.base import TokenRevocationRepository
+
+# Re-read this far behind the newest revocation seen, so rows whose
+# transaction committed after a later-timestamped row are not missed
+_SYNC_OVERLAP = timedelta(seconds=30)
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _parse(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+class RevocationList:
+    """
+    Per-worker set of revoked login sessions
+
+    is_revoked() is a dict lookup with no I/O, so it can run on every
+    authenticated request. The set is filled from the token_revocations
+    table by sync(), which a background task calls every
+    REVOCATION_SYNC_INTERVAL seconds and which only reads rows newer than
+    the last sync; revocations made in this worker are added immediately.
+    Entries are dropped once every token they cover has expired.
+
+    `on_revoke(user_id)` is called for each newly revoked session, e.g. to
+    evict the user's entries from the verified-token cache.
+    """
+
+    def __init__(
+        self,
+        repository: Optional[TokenRevocationRepository] = None,
+        on_revoke: Optional[Callable[[str], object]] = None,
+        interval: float = 5,
+    ):
+        self.repository = repository
+        self.on_revoke = on_revoke
+        self.interval = interval
+        self.syncs = 0
+        self.sync_errors = 0
+        self.last_synced_at: Optional[datetime] = None
+        self._sessions: Dict[str, datetime] = {}
+        self._since: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def is_revoked(self, session_id: str) -> bool:
+        """True if the session was revoked (as of the last sync)"""
+        return session_id in self._sessions
+
+    def add(self, session_id: str, user_id: str, expires_at: datetime) -> None:
+        """Record a revoked session in this worker"""
+        if session_id in self._sessions:
+            return
+        self._sessions[session_id] = expires_at
+        if self.on_revoke is not None:
+            self.on_revoke(user_id)
+
+    def _expire(self, now: datetime) -> None:
+        expired = [session_id for session_id, expires_at in self._sessions.items() if expires_at <= now]
+        for session_id in expired:
+            del self._sessions[session_id]
+
+    async def sync(self) -> int:
+        """
+        Load session revocations created since the last sync; returns how
+        many were new to this worker
+        """
+        if self.repository is None:
+            return 0
+        async with self._lock:
+            now = _now()
+            since = (self._since - _SYNC_OVERLAP).isoformat() if self._since else None
+            rows = await self.repository.list_token_revocations("session", since, now.isoformat())
+            before = len(self._sessions)
+            for row in rows:
+                created_at = _parse(row["created_at"])
+                self._since = max(self._since, created_at) if self._since else created_at
+                self.add(row["token_id"], row["user_id"], _parse(row["expires_at"]))
+            added = len(self._sessions) - before
+            self._expire(now)
+            self.syncs += 1
+            self.last_synced_at = now
+            return added
+
+    async def _try_sync(self) -> None:
+        try:
+            await self.sync()
+        except Exception as e:
+            self.sync_errors += 1
+            print(f"Error syncing token revocations: {str(e)}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._try_sync()
+
+    async def start(self) -> None:
+        """
+        Load the current revocations, then keep syncing in the background.
+        A failed load does not block startup; the next sync retries.
+        """
+        if self._task is None and self.repository is not None:
+            await self._try_sync()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """
+        Size and sync counters for this process
+        """
+        return {
+            "revoked_sessions": len(self._sessions),
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+            "last_synced_at": self.last_synced_at.isoformat() if self.last_synced_at else None,
+        }
+
+def create_revocation_list(repository: TokenRevocationRepository, on_revoke=None) -> RevocationList:
+    """
+    Build the revocation list from settings
+    """
+    return RevocationList(repository, on_revoke, settings.REVOCATION_SYNC_INTERVAL)
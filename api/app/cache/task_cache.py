@@ -0,0 +1,96 @@
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Hashable, Optional
+from uuid import uuid4
+from ..config import settings
+from .backends import CacheBackend, MemoryCacheBackend, create_cache_backend
+
+class TaskCache:
+    """
+    Per-user read cache for task queries
+
+    Every cached entry is keyed by the user's current cache generation.
+    Invalidating a user replaces the generation, so all of that user's
+    entries (every list filter, page and single task) become unreachable in
+    one write and age out of the backend via LRU eviction or TTL. The
+    generation itself expires after several entry TTLs, so idle users'
+    generation keys do not pile up either; a lost generation just starts a
+    new one.
+    """
+
+    # Generation lifetime, in entry TTLs
+    GENERATION_TTL_FACTOR = 10
+
+    def __init__(self, backend: CacheBackend, ttl: float = 30):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _generation_key(user_id: str) -> str:
+        return f"tasks:{user_id}:gen"
+
+    async def _generation(self, user_id: str) -> str:
+        key = self._generation_key(user_id)
+        generation = await self.backend.get(key)
+        if generation is None:
+            # First read (or the generation was evicted): start a fresh one,
+            # which can never match an older entry
+            generation = uuid4().hex
+            if not await self.backend.add(key, generation, self.ttl * self.GENERATION_TTL_FACTOR):
+                generation = await self.backend.get(key) or generation
+        return generation
+
+    async def get_or_load(self, user_id: str, query: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached result of `query` for the user, calling `loader`
+        and caching its JSON-serializable result on a miss
+        """
+        digest = hashlib.sha1(json.dumps(query, default=str).encode()).hexdigest()
+        key = f"tasks:{user_id}:{await self._generation(user_id)}:{digest}"
+
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return json.loads(cached)
+
+        self.misses += 1
+        result = await loader()
+        await self.backend.set(key, json.dumps(result, default=str), self.ttl)
+        return result
+
+    async def invalidate(self, user_id: str) -> None:
+        """
+        Drop every cached entry for a user
+        """
+        await self.backend.set(self._generation_key(user_id), uuid4().hex, self.ttl * self.GENERATION_TTL_FACTOR)
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters for this process
+        """
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if isinstance(self.backend, MemoryCacheBackend):
+            stats["entries"] = len(self.backend)
+            stats["max_entries"] = self.backend.max_entries
+            stats["evictions"] = self.backend.evictions
+        return stats
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+def create_task_cache() -> Optional[TaskCache]:
+    """
+    Build the task cache from settings; None when caching is disabled
+    """
+    if not settings.TASK_CACHE_URL:
+        return None
+    backend = create_cache_backend(settings.TASK_CACHE_URL, settings.TASK_CACHE_MAX_ENTRIES)
+    return TaskCache(backend, settings.TASK_CACHE_TTL)
@@ -0,0 +1,107 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+from ..config import settings
+
+class TokenCache:
+    """
+    Per-worker cache of verified access tokens
+
+    Maps a SHA-256 digest of the raw token (never the token itself) to the
+    subject and expiry read from it, so a repeat of a token that already
+    passed signature and claim checks skips jwt.decode. Entries are only
+    served until the token's own `exp`, and the cache is an LRU bounded to
+    `max_entries`. revoke_token / revoke_subject evict entries so the next
+    request goes through full verification (and any revocation check) again.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+        self._by_subject: Dict[str, Set[bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[str]:
+        """Return the cached subject for a still-valid token, or None"""
+        key = self.digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, subject = entry
+        if expires_at <= time.time():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return subject
+
+    def set(self, token: str, subject: str, expires_at: Optional[float]) -> None:
+        """Remember a verified token; tokens without exp are not cached"""
+        if expires_at is None:
+            return
+        key = self.digest(token)
+        self._entries[key] = (float(expires_at), subject)
+        self._entries.move_to_end(key)
+        self._by_subject.setdefault(subject, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: bytes) -> None:
+        _, subject = self._entries.pop(key)
+        keys = self._by_subject.get(subject)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_subject[subject]
+
+    def revoke_token(self, token: str) -> None:
+        """Evict one token"""
+        key = self.digest(token)
+        if key in self._entries:
+            self._remove(key)
+
+    def revoke_subject(self, subject: str) -> int:
+        """Evict every cached token of a user; returns how many were dropped"""
+        keys = self._by_subject.pop(subject, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_subject.clear()
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters for this process
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+def create_token_cache() -> Optional[TokenCache]:
+    """
+    Build the verified-token cache from settings; None when disabled
+    """
+    if settings.AUTH_TOKEN_CACHE_MAX_ENTRIES <= 0:
+        return None
+    return TokenCache(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES)
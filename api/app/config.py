@@ -30,13 +30,145 @@ class Settings(BaseModel):
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
     
+    # Where task and user data lives: "supabase" (PostgREST over HTTP) or
+    # "postgres" (direct pooled connection to DATABASE_URL, for self-hosted
+    # deployments and local load testing). Auth always uses Supabase.
+    DATA_BACKEND: str = os.getenv("DATA_BACKEND", "supabase")
+    
+    # Direct Postgres connection string, used by the migration runner
+    # (python -m app.db.migrate) and the postgres data backend
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    
+    # Postgres backend connection pool (per worker) and per-connection
+    # prepared statement cache
+    POSTGRES_POOL_SIZE: int = int(os.getenv("POSTGRES_POOL_SIZE", "10"))
+    POSTGRES_POOL_MAX_OVERFLOW: int = int(os.getenv("POSTGRES_POOL_MAX_OVERFLOW", "10"))
+    POSTGRES_POOL_TIMEOUT: float = float(os.getenv("POSTGRES_POOL_TIMEOUT", "10"))
+    POSTGRES_POOL_RECYCLE: int = int(os.getenv("POSTGRES_POOL_RECYCLE", "1800"))
+    POSTGRES_STATEMENT_CACHE_SIZE: int = int(os.getenv("POSTGRES_STATEMENT_CACHE_SIZE", "256"))
+    
+    # Supabase HTTP connection pool settings (shared application-wide client)
+    SUPABASE_POOL_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "50"))
+    SUPABASE_POOL_MAX_KEEPALIVE: int = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "20"))
+    SUPABASE_KEEPALIVE_EXPIRY: float = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60"))
+    SUPABASE_TIMEOUT: float = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+    SUPABASE_CONNECT_TIMEOUT: float = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+    
+    # Task list pagination
+    TASKS_PAGE_SIZE_DEFAULT: int = int(os.getenv("TASKS_PAGE_SIZE_DEFAULT", "50"))
+    TASKS_PAGE_SIZE_MAX: int = int(os.getenv("TASKS_PAGE_SIZE_MAX", "200"))
+    
+    # Per-user task read cache: memory:// (in-process LRU, per worker),
+    # redis://host:port/db (shared), or empty to disable
+    TASK_CACHE_URL: str = os.getenv("TASK_CACHE_URL", "memory://")
+    TASK_CACHE_MAX_ENTRIES: int = int(os.getenv("TASK_CACHE_MAX_ENTRIES", "10000"))
+    TASK_CACHE_TTL: float = float(os.getenv("TASK_CACHE_TTL", "30"))
+    
+    # Idempotency-Key support for POST /tasks, /voice/process and
+    # /voice/transcribe: memory:// (per worker), redis://host:port/db (shared
+    # by all workers), or empty to ignore the header. Completed responses are
+    # replayed for IDEMPOTENCY_TTL seconds; a retry that arrives while the
+    # first request is running waits up to IDEMPOTENCY_WAIT_TIMEOUT seconds.
+    IDEMPOTENCY_CACHE_URL: str = os.getenv("IDEMPOTENCY_CACHE_URL", "memory://")
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+    IDEMPOTENCY_TTL: float = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+    IDEMPOTENCY_LOCK_TTL: float = float(os.getenv("IDEMPOTENCY_LOCK_TTL", "300"))
+    IDEMPOTENCY_WAIT_TIMEOUT: float = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "60"))
+    
+    # Per-user token buckets for the voice endpoints (they spend OpenAI quota
+    # and worker time): memory:// (per worker), redis://host:port/db (shared
+    # by all workers), or empty to disable. Requests and seconds of audio
+    # have separate budgets; each allows a burst and refills continuously.
+    # A recording longer than the audio burst is rejected outright (413).
+    VOICE_RATE_LIMIT_URL: str = os.getenv("VOICE_RATE_LIMIT_URL", "memory://")
+    VOICE_REQUEST_BURST: float = float(os.getenv("VOICE_REQUEST_BURST", "10"))
+    VOICE_REQUESTS_PER_MINUTE: float = float(os.getenv("VOICE_REQUESTS_PER_MINUTE", "6"))
+    VOICE_AUDIO_SECONDS_BURST: float = float(os.getenv("VOICE_AUDIO_SECONDS_BURST", "600"))
+    VOICE_AUDIO_SECONDS_PER_HOUR: float = float(os.getenv("VOICE_AUDIO_SECONDS_PER_HOUR", "1800"))
+    
+    # Scratch space for audio conversion fallbacks: one directory per
+    # request under SCRATCH_DIR (empty = /dev/shm when available, else the
+    # system temp dir), deleted when the request ends. Each worker keeps
+    # its reservations within SCRATCH_QUOTA_MB, making a request wait up to
+    # SCRATCH_WAIT_TIMEOUT seconds for room (then 503). A reaper removes
+    # directories left by crashed workers and ones older than
+    # SCRATCH_ORPHAN_AGE seconds, every SCRATCH_REAP_INTERVAL seconds.
+    SCRATCH_DIR: str = os.getenv("SCRATCH_DIR", "")
+    SCRATCH_QUOTA_MB: int = int(os.getenv("SCRATCH_QUOTA_MB", "256"))
+    SCRATCH_WAIT_TIMEOUT: float = float(os.getenv("SCRATCH_WAIT_TIMEOUT", "10"))
+    SCRATCH_ORPHAN_AGE: float = float(os.getenv("SCRATCH_ORPHAN_AGE", "600"))
+    SCRATCH_REAP_INTERVAL: float = float(os.getenv("SCRATCH_REAP_INTERVAL", "60"))
+    
+    # Process pool (per API worker) for CPU-heavy audio work: conversions
+    # run in AUDIO_POOL_WORKERS processes with up to AUDIO_POOL_MAX_QUEUE
+    # more waiting (beyond that voice requests get 503), each limited to
+    # AUDIO_POOL_TASK_TIMEOUT seconds. Uploads of AUDIO_POOL_SHM_THRESHOLD_KB
+    # or more reach the workers through shared memory.
+    AUDIO_POOL_WORKERS: int = int(os.getenv("AUDIO_POOL_WORKERS", "2"))
+    AUDIO_POOL_MAX_QUEUE: int = int(os.getenv("AUDIO_POOL_MAX_QUEUE", "8"))
+    AUDIO_POOL_TASK_TIMEOUT: float = float(os.getenv("AUDIO_POOL_TASK_TIMEOUT", "60"))
+    AUDIO_POOL_SHM_THRESHOLD_KB: int = int(os.getenv("AUDIO_POOL_SHM_THRESHOLD_KB", "256"))
+    
+    # /diagnostics/* endpoints (per-worker cache, auth, rate limit, audio
+    # tooling and pool internals) answer only requests carrying this value
+    # in an X-Diagnostics-Token header; empty = the endpoints are disabled.
+    DIAGNOSTICS_TOKEN: str = os.getenv("DIAGNOSTICS_TOKEN", "")
+    
+    # Production server (python run.py). WEB_CONCURRENCY worker processes
+    # (0 = one per CPU core, or 1 while any of TASK_CACHE_URL,
+    # IDEMPOTENCY_CACHE_URL and VOICE_RATE_LIMIT_URL is memory://; more
+    # than one worker with a memory:// store is refused). On SIGTERM a worker stops accepting
+    # connections and waits up to SERVER_GRACEFUL_TIMEOUT seconds for
+    # in-flight requests (a voice upload can spend a minute at OpenAI).
+    # SERVER_LIMIT_CONCURRENCY caps open connections per worker, beyond
+    # which requests get 503 (0 = no cap). SERVER_PRELOAD imports the app
+    # once before forking workers (requires gunicorn).
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8001"))
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "0"))
+    SERVER_KEEPALIVE_TIMEOUT: int = int(os.getenv("SERVER_KEEPALIVE_TIMEOUT", "5"))
+    SERVER_GRACEFUL_TIMEOUT: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "90"))
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+    SERVER_LIMIT_CONCURRENCY: int = int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0"))
+    SERVER_PRELOAD: bool = os.getenv("SERVER_PRELOAD", "").lower() in ("1", "true", "yes")
+    
+    # Delta sync: tombstones for deleted tasks are kept this long; older
+    # sync cursors are rejected and the client must do a full resync. Each
+    # worker purges expired tombstones every TASK_TOMBSTONE_PURGE_INTERVAL
+    # hours (0 = never, e.g. when pg_cron runs purge_task_tombstones()).
+    # Each sync re-reads the last TASK_SYNC_OVERLAP_SECONDS behind its
+    # cursor, so writes from transactions that commit late are not missed.
+    TASK_TOMBSTONE_RETENTION_DAYS: int = int(os.getenv("TASK_TOMBSTONE_RETENTION_DAYS", "30"))
+    TASK_TOMBSTONE_PURGE_INTERVAL: float = float(os.getenv("TASK_TOMBSTONE_PURGE_INTERVAL", "6"))
+    TASK_SYNC_OVERLAP_SECONDS: float = float(os.getenv("TASK_SYNC_OVERLAP_SECONDS", "30"))
+    
+    # Maximum number of offline operations accepted in one POST /tasks/sync
+    TASK_SYNC_MAX_OPERATIONS: int = int(os.getenv("TASK_SYNC_MAX_OPERATIONS", "500"))
+    
+    # Maximum number of explicit task IDs in one bulk update/delete
+    TASK_BULK_MAX_IDS: int = int(os.getenv("TASK_BULK_MAX_IDS", "500"))
+    
+    # Longest date range (in local days) one GET /tasks/agenda may cover
+    TASK_AGENDA_MAX_DAYS: int = int(os.getenv("TASK_AGENDA_MAX_DAYS", "31"))
+    
     # OpenAI settings for speech-to-text and task extraction
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "development_secret_key")
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # Access tokens are short-lived; clients renew them with the refresh
+    # token from login (POST /auth/refresh), which rotates on every use
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+    
+    # How often each worker loads newly revoked sessions (logouts, replayed
+    # refresh tokens) into its in-memory revocation list
+    REVOCATION_SYNC_INTERVAL: float = float(os.getenv("REVOCATION_SYNC_INTERVAL", "5"))
+    
+    # Verified access tokens remembered per worker (until their exp) so
+    # repeat requests skip signature verification; 0 disables the cache
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
 
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
 
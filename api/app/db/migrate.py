@@ -0,0 +1,177 @@
+"""
+Versioned schema migrations
+
+Migrations are plain SQL files in api/migrations named NNNN_description.sql
+and are applied in version order. Each one runs in its own transaction
+together with the row recording it in schema_migrations, so a failed
+migration leaves nothing half-applied. Concurrent runners (e.g. several
+workers starting at once) are serialized with an advisory lock.
+
+Run from the api/ directory:
+    python -m app.db.migrate                  # apply pending migrations
+    python -m app.db.migrate status           # list applied / pending versions
+    python -m app.db.migrate baseline 0004    # mark 0001-0004 as applied without
+                                              # running them (existing databases)
+
+The database is DATABASE_URL (Supabase: Project Settings > Database >
+Connection string) unless --database-url is given. Requires the optional
+`psycopg` package.
+"""
+import argparse
+import hashlib
+import re
+import sys
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+from ..config import settings
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+_LOCK_KEY = 7_310_455_018
+
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+SCHEMA_MIGRATIONS_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  version text PRIMARY KEY,
+  name text NOT NULL,
+  checksum text NOT NULL,
+  applied_at timestamp with time zone DEFAULT now() NOT NULL
+)
+"""
+
+class Migration(NamedTuple):
+    version: str
+    name: str
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode()).hexdigest()
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """
+    Read the migration files in version order
+
+    Raises:
+        ValueError: If a file name is malformed or a version is repeated
+    """
+    migrations = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILENAME.match(path.name)
+        if not match:
+            raise ValueError(f"Invalid migration file name: {path.name} (expected NNNN_description.sql)")
+        version, name = match.groups()
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}")
+        migrations[version] = Migration(version, name, path.read_text())
+    return [migrations[version] for version in sorted(migrations)]
+
+def connect(database_url: Optional[str] = None):
+    """Open a psycopg connection to the target database"""
+    try:
+        import psycopg
+    except ImportError:
+        raise RuntimeError("The psycopg package is required to run migrations (pip install 'psycopg[binary]')")
+    url = database_url or settings.DATABASE_URL
+    if not url:
+        raise RuntimeError("DATABASE_URL must be set to run migrations")
+    # Transactions are explicit, one per migration
+    return psycopg.connect(url, autocommit=True)
+
+def applied_migrations(conn) -> dict:
+    """Return {version: checksum} of the migrations recorded as applied"""
+    with conn.transaction():
+        conn.execute(SCHEMA_MIGRATIONS_SQL)
+        rows = conn.execute("SELECT version, checksum FROM schema_migrations").fetchall()
+    return dict(rows)
+
+def _check_applied(migrations: List[Migration], applied: dict) -> None:
+    known = {m.version: m for m in migrations}
+    for version, checksum in applied.items():
+        if version in known and known[version].checksum != checksum:
+            raise RuntimeError(f"Migration {version}_{known[version].name} was changed after it was applied")
+
+def migrate(conn, migrations: Optional[List[Migration]] = None, target: Optional[str] = None) -> List[str]:
+    """
+    Apply pending migrations up to `target` (all when None)
+
+    Returns:
+        The versions applied by this call
+
+    Raises:
+        RuntimeError: If an applied migration's file has since been edited
+    """
+    migrations = load_migrations() if migrations is None else migrations
+    _check_applied(migrations, applied_migrations(conn))
+
+    done = []
+    for migration in migrations:
+        if target is not None and migration.version > target:
+            break
+        with conn.transaction():
+            conn.execute("SELECT pg_advisory_xact_lock(%s)", (_LOCK_KEY,))
+            # Re-check under the lock; another runner may have applied it
+            if conn.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (migration.version,)).fetchone():
+                continue
+            conn.execute(migration.sql)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, migration.checksum)
+            )
+        done.append(migration.version)
+    return done
+
+def baseline(conn, target: str, migrations: Optional[List[Migration]] = None) -> List[str]:
+    """
+    Record migrations up to `target` as applied without running them, for
+    databases created from supabase_schema.sql before migrations existed
+    """
+    migrations = load_migrations() if migrations is None else migrations
+    applied = applied_migrations(conn)
+    marked = []
+    with conn.transaction():
+        conn.execute("SELECT pg_advisory_xact_lock(%s)", (_LOCK_KEY,))
+        for migration in migrations:
+            if migration.version > target:
+                break
+            if migration.version in applied:
+                continue
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, migration.checksum)
+            )
+            marked.append(migration.version)
+    return marked
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("command", nargs="?", default="up", choices=["up", "status", "baseline"])
+    parser.add_argument("version", nargs="?", help="Target version for up / baseline")
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL")
+    args = parser.parse_args(argv)
+
+    if args.command == "baseline" and not args.version:
+        parser.error("baseline requires a version")
+
+    migrations = load_migrations()
+    with connect(args.database_url) as conn:
+        if args.command == "status":
+            applied = applied_migrations(conn)
+            for migration in migrations:
+                state = "applied" if migration.version in applied else "pending"
+                print(f"{migration.version}_{migration.name:<30} {state}")
+        elif args.command == "baseline":
+            for version in baseline(conn, args.version, migrations):
+                print(f"Marked {version} as applied")
+        else:
+            done = migrate(conn, migrations, args.version)
+            for version in done:
+                print(f"Applied {version}")
+            if not done:
+                print("Database is up to date")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
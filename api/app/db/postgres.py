@@ -0,0 +1,75 @@
+from typing import Optional
+from ..config import settings
+
+# Application-scoped SQLAlchemy async engine for DATA_BACKEND=postgres,
+# created once in the FastAPI lifespan (see app.main). It holds a pool of
+# asyncpg connections; asyncpg prepares every statement once per
+# connection and reuses it, so repeated query shapes skip parse/plan.
+# Requires the optional `asyncpg` package and `sqlalchemy[asyncio]`.
+_engine = None
+
+def database_url(url: Optional[str] = None) -> str:
+    """
+    SQLAlchemy URL for the asyncpg driver from a plain postgres:// or
+    postgresql:// connection string (DATABASE_URL by default)
+    """
+    url = url or settings.DATABASE_URL
+    if not url:
+        raise ValueError("DATABASE_URL must be set in environment variables for the postgres backend")
+    scheme, sep, rest = url.partition("://")
+    if scheme in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+def create_postgres_engine(url: Optional[str] = None):
+    """
+    Build a pooled async engine on the asyncpg driver
+    """
+    try:
+        import asyncpg  # noqa: F401
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.engine import make_url
+    except ImportError:
+        raise RuntimeError(
+            "The asyncpg package and sqlalchemy[asyncio] are required for the postgres backend "
+            "(pip install asyncpg 'sqlalchemy[asyncio]')"
+        )
+
+    sa_url = make_url(database_url(url)).update_query_dict({
+        "prepared_statement_cache_size": str(settings.POSTGRES_STATEMENT_CACHE_SIZE)
+    })
+    return create_async_engine(
+        sa_url,
+        pool_size=settings.POSTGRES_POOL_SIZE,
+        max_overflow=settings.POSTGRES_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=False,
+    )
+
+def init_postgres():
+    """
+    Create the application-wide engine.
+    Safe to call more than once; later calls return the existing engine.
+    """
+    global _engine
+
+    if _engine is None:
+        _engine = create_postgres_engine()
+    return _engine
+
+def get_postgres_engine():
+    """
+    Return the application-wide engine, creating it on first use
+    """
+    return init_postgres()
+
+async def close_postgres() -> None:
+    """
+    Dispose of the engine and close its pooled connections
+    """
+    global _engine
+
+    engine, _engine = _engine, None
+    if engine is not None:
+        await engine.dispose()
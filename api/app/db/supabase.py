@@ -1,13 +1,125 @@
-from supabase import create_client, Client
+from typing import Optional
+import httpx
+from supabase import create_client, Client, ClientOptions, AsyncClient, AsyncClientOptions
 from ..config import settings
 
-def get_supabase_client() -> Client:
-    """
-    Returns a configured Supabase client
-    """
+# Application-scoped clients, created once in the FastAPI lifespan
+# (see app.main) and shared by every request through dependency injection.
+# Task and user data goes through the async client so queries never block
+# the event loop; Supabase Auth calls use a separate sync client.
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_supabase_client: Optional[AsyncClient] = None
+_auth_client: Optional[Client] = None
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+    )
+
+def _pool_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.SUPABASE_TIMEOUT,
+        connect=settings.SUPABASE_CONNECT_TIMEOUT,
+    )
+
+def _check_settings() -> None:
     if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
         raise ValueError(
             "Supabase URL and API key must be set in environment variables"
         )
-    
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY) 
\ No newline at end of file
+
+def create_http_client() -> httpx.Client:
+    """
+    Create a pooled sync HTTP client. Keeps connections alive between
+    requests so calls skip the TCP/TLS handshake.
+    """
+    return httpx.Client(limits=_pool_limits(), timeout=_pool_timeout())
+
+def create_async_http_client() -> httpx.AsyncClient:
+    """
+    Create the pooled async HTTP client used by the data client
+    """
+    return httpx.AsyncClient(limits=_pool_limits(), timeout=_pool_timeout())
+
+def create_supabase_client(http_client: Optional[httpx.Client] = None) -> Client:
+    """
+    Build a new sync Supabase client on top of the given HTTP client
+    """
+    _check_settings()
+
+    options = ClientOptions(
+        auto_refresh_token=False,
+        persist_session=False,
+        httpx_client=http_client,
+    )
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY, options)
+
+def create_async_supabase_client(http_client: Optional[httpx.AsyncClient] = None) -> AsyncClient:
+    """
+    Build a new async Supabase client on top of the given HTTP client
+    """
+    _check_settings()
+
+    options = AsyncClientOptions(
+        auto_refresh_token=False,
+        persist_session=False,
+        httpx_client=http_client,
+    )
+    return AsyncClient(settings.SUPABASE_URL, settings.SUPABASE_KEY, options)
+
+def init_supabase() -> AsyncClient:
+    """
+    Create the shared async HTTP pool and the application-wide data client.
+    Safe to call more than once; later calls return the existing client.
+    """
+    global _async_http_client, _supabase_client
+
+    if _supabase_client is None:
+        _check_settings()
+        _async_http_client = _async_http_client or create_async_http_client()
+        _supabase_client = create_async_supabase_client(_async_http_client)
+
+    return _supabase_client
+
+def get_supabase_client() -> AsyncClient:
+    """
+    Returns the shared, configured async Supabase data client
+    """
+    if _supabase_client is None:
+        return init_supabase()
+    return _supabase_client
+
+def get_supabase_auth_client() -> Client:
+    """
+    Returns the shared client used for Supabase Auth calls.
+
+    Signing a user in swaps the Authorization header of the client it runs
+    on, so auth calls get their own client instead of the data client.
+    """
+    global _http_client, _auth_client
+
+    if _auth_client is None:
+        _check_settings()
+        _http_client = _http_client or create_http_client()
+        _auth_client = create_supabase_client(_http_client)
+    return _auth_client
+
+async def close_supabase() -> None:
+    """
+    Drop the shared clients and close the pooled HTTP connections
+    """
+    global _http_client, _async_http_client, _supabase_client, _auth_client
+
+    http_client, async_http_client = _http_client, _async_http_client
+    _http_client = None
+    _async_http_client = None
+    _supabase_client = None
+    _auth_client = None
+
+    if async_http_client is not None:
+        await async_http_client.aclose()
+    if http_client is not None:
+        http_client.close()
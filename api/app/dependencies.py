@@ -1,17 +1,188 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+from typing import Optional
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from supabase import AsyncClient
 from .config import settings
 from .schemas.auth import TokenData
-from .db.supabase import get_supabase_client
+from .db.postgres import get_postgres_engine
+from .db.supabase import get_supabase_client, get_supabase_auth_client
+from .cache.task_cache import TaskCache
+from .cache.idempotency import IdempotencyStore
+from .cache.token_cache import TokenCache
+from .cache.revocations import RevocationList
+from .cache.rate_limit import RateLimiter
+from .repositories.base import TaskRepository, UserRepository
+from .repositories.cached import CachedTaskRepository
+from .repositories.factory import create_task_repository, create_user_repository, create_revocation_repository, data_backend
+from .services.task_service import TaskService
+from .services.user_service import UserService
+from .services.auth_service import AuthService, ACCESS_TOKEN_TYPE
+from .services.voice_service import VoiceService
+from .services.audio_capabilities import AudioCapabilities, init_audio_capabilities
+from .services.scratch import ScratchSpace
+from .services.audio_pool import AudioWorkerPool
 
 # OAuth2 password bearer token URL
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+def get_supabase(request: Request) -> AsyncClient:
+    """
+    Dependency returning the application-scoped async Supabase client
+    created in the app lifespan
+    """
+    supabase = getattr(request.app.state, "supabase", None)
+    if supabase is None:
+        supabase = get_supabase_client()
+    return supabase
+
+def get_postgres(request: Request):
+    """
+    Dependency returning the application-scoped SQLAlchemy engine
+    created in the app lifespan (DATA_BACKEND=postgres)
+    """
+    engine = getattr(request.app.state, "postgres", None)
+    if engine is None:
+        engine = get_postgres_engine()
+    return engine
+
+def get_data_client(request: Request):
+    """
+    Dependency returning the shared client of the configured data backend
+    """
+    if data_backend() == "postgres":
+        return get_postgres(request)
+    return get_supabase(request)
+
+def get_task_cache(request: Request) -> Optional[TaskCache]:
+    """
+    Dependency returning the application-scoped task read cache, if enabled
+    """
+    return getattr(request.app.state, "task_cache", None)
+
+def get_idempotency_store(request: Request) -> Optional[IdempotencyStore]:
+    """
+    Dependency returning the application-scoped Idempotency-Key store, if enabled
+    """
+    return getattr(request.app.state, "idempotency", None)
+
+def get_token_cache(request: Request) -> Optional[TokenCache]:
+    """
+    Dependency returning the application-scoped verified-token cache, if enabled
+    """
+    return getattr(request.app.state, "token_cache", None)
+
+def get_revocation_list(request: Request) -> Optional[RevocationList]:
+    """
+    Dependency returning the application-scoped list of revoked sessions
+    """
+    return getattr(request.app.state, "revocations", None)
+
+def get_voice_rate_limiter(request: Request) -> Optional[RateLimiter]:
+    """
+    Dependency returning the application-scoped voice endpoint rate limiter, if enabled
+    """
+    return getattr(request.app.state, "voice_rate_limiter", None)
+
+def get_audio_capabilities(request: Request) -> AudioCapabilities:
+    """
+    Dependency returning the audio tooling probed in the app lifespan
+    """
+    capabilities = getattr(request.app.state, "audio_capabilities", None)
+    if capabilities is None:
+        capabilities = init_audio_capabilities()
+    return capabilities
+
+def get_scratch_space(request: Request) -> Optional[ScratchSpace]:
+    """
+    Dependency returning the worker's audio conversion scratch space
+    """
+    return getattr(request.app.state, "scratch", None)
+
+def get_audio_pool(request: Request) -> Optional[AudioWorkerPool]:
+    """
+    Dependency returning the worker's process pool for CPU-heavy audio work
+    """
+    return getattr(request.app.state, "audio_pool", None)
+
+def require_diagnostics_token(x_diagnostics_token: Optional[str] = Header(None)) -> None:
+    """
+    Dependency guarding the diagnostics endpoints: 404 unless
+    DIAGNOSTICS_TOKEN is set, 401 without the matching X-Diagnostics-Token
+    """
+    if not settings.DIAGNOSTICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_diagnostics_token is None or not hmac.compare_digest(x_diagnostics_token.encode(), settings.DIAGNOSTICS_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid diagnostics token")
+
+def get_voice_service(request: Request) -> VoiceService:
+    """
+    Dependency returning the application-scoped VoiceService created in
+    the app lifespan (its OpenAI client is created on first use)
+    """
+    voice_service = getattr(request.app.state, "voice_service", None)
+    if voice_service is None:
+        voice_service = request.app.state.voice_service = VoiceService()
+    return voice_service
+
+def get_task_repository(
+    client = Depends(get_data_client),
+    task_cache: Optional[TaskCache] = Depends(get_task_cache)
+) -> TaskRepository:
+    """
+    Dependency providing the task data access backend,
+    behind the read cache when one is configured
+    """
+    repository = create_task_repository(client)
+    if task_cache is not None:
+        return CachedTaskRepository(repository, task_cache)
+    return repository
+
+def get_user_repository(client = Depends(get_data_client)) -> UserRepository:
+    """
+    Dependency providing the user data access backend
+    """
+    return create_user_repository(client)
+
+def get_task_service(repository: TaskRepository = Depends(get_task_repository)) -> TaskService:
+    """
+    Dependency providing a TaskService bound to the shared client
+    """
+    return TaskService(repository)
+
+def get_user_service(repository: UserRepository = Depends(get_user_repository)) -> UserService:
+    """
+    Dependency providing a UserService bound to the shared client
+    """
+    return UserService(repository)
+
+def get_auth_service(
+    client = Depends(get_data_client),
+    revocations: Optional[RevocationList] = Depends(get_revocation_list)
+) -> AuthService:
+    """
+    Dependency providing an AuthService bound to the shared auth client
+    """
+    return AuthService(get_supabase_auth_client(), create_revocation_repository(client), revocations)
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    token_cache: Optional[TokenCache] = Depends(get_token_cache),
+    revocations: Optional[RevocationList] = Depends(get_revocation_list)
+):
     """
     Dependency to get the current authenticated user from the token
+    
+    Tokens that already verified in this worker are answered from the
+    token cache until they expire; revoking a session evicts its user's
+    cached tokens. The revocation check is in memory, with no I/O.
     """
+    if token_cache is not None:
+        user_id = token_cache.get(token)
+        if user_id is not None:
+            return user_id
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -30,12 +201,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         if user_id is None:
             raise credentials_exception
         
+        # Refresh tokens only work at /auth/refresh
+        if payload.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
+            raise credentials_exception
+        
+        session_id = payload.get("sid")
+        if revocations is not None and session_id and revocations.is_revoked(session_id):
+            raise credentials_exception
+        
         token_data = TokenData(sub=user_id, exp=payload.get("exp"))
     except JWTError:
         raise credentials_exception
     
-    # Get user information from Supabase (optional)
-    # This is useful if you need user details beyond the ID
-    supabase = get_supabase_client()
-    
+    if token_cache is not None:
+        token_cache.set(token, user_id, token_data.exp)
     return user_id  # Return user ID for now 
\ No newline at end of file
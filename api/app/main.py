@@ -1,12 +1,88 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
-from .api.routes import tasks, voice, auth
+from .db.postgres import init_postgres, close_postgres
+from .db.supabase import init_supabase, close_supabase
+from .repositories.factory import create_revocation_repository, create_task_repository, data_backend
+from .cache.task_cache import create_task_cache
+from .cache.idempotency import create_idempotency_store
+from .cache.token_cache import create_token_cache
+from .cache.revocations import create_revocation_list
+from .cache.rate_limit import create_voice_rate_limiter
+from .services.voice_service import VoiceService
+from .services.audio_capabilities import init_audio_capabilities
+from .services.scratch import create_scratch_space
+from .services.audio_pool import create_audio_pool
+from .services.tombstones import create_tombstone_purger
+from .api.routes import tasks, voice, auth, diagnostics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create application-scoped clients on startup and release them on shutdown
+    """
+    if data_backend() == "postgres":
+        app.state.supabase = None
+        app.state.postgres = init_postgres()
+    else:
+        app.state.supabase = init_supabase()
+        app.state.postgres = None
+    app.state.task_cache = create_task_cache()
+    app.state.idempotency = create_idempotency_store()
+    app.state.token_cache = create_token_cache()
+    app.state.voice_rate_limiter = create_voice_rate_limiter()
+    # ffmpeg/pydub/numpy are probed once here so voice requests never pay for it
+    app.state.audio_capabilities = await asyncio.to_thread(init_audio_capabilities)
+    app.state.scratch = create_scratch_space()
+    await app.state.scratch.start()
+    app.state.audio_pool = create_audio_pool()
+    app.state.voice_service = VoiceService(
+        capabilities=app.state.audio_capabilities,
+        scratch=app.state.scratch,
+        pool=app.state.audio_pool
+    )
+    app.state.revocations = create_revocation_list(
+        create_revocation_repository(app.state.postgres or app.state.supabase),
+        app.state.token_cache.revoke_subject if app.state.token_cache is not None else None
+    )
+    await app.state.revocations.start()
+    app.state.tombstone_purger = create_tombstone_purger(create_task_repository(app.state.postgres or app.state.supabase))
+    await app.state.tombstone_purger.start()
+    try:
+        yield
+    finally:
+        await app.state.tombstone_purger.stop()
+        app.state.tombstone_purger = None
+        await app.state.revocations.stop()
+        app.state.revocations = None
+        if app.state.task_cache is not None:
+            await app.state.task_cache.close()
+        app.state.task_cache = None
+        if app.state.idempotency is not None:
+            await app.state.idempotency.close()
+        app.state.idempotency = None
+        app.state.token_cache = None
+        if app.state.voice_rate_limiter is not None:
+            await app.state.voice_rate_limiter.close()
+        app.state.voice_rate_limiter = None
+        app.state.voice_service.close()
+        app.state.voice_service = None
+        await app.state.audio_pool.close()
+        app.state.audio_pool = None
+        await app.state.scratch.stop()
+        app.state.scratch = None
+        app.state.supabase = None
+        app.state.postgres = None
+        await close_supabase()
+        await close_postgres()
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set CORS middleware with more permissive settings for development
@@ -24,6 +100,7 @@ app.add_middleware(
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}", tags=["auth"])
 app.include_router(tasks.router, prefix=f"{settings.API_V1_STR}", tags=["tasks"])
 app.include_router(voice.router, prefix=f"{settings.API_V1_STR}", tags=["voice"])
+app.include_router(diagnostics.router, prefix=f"{settings.API_V1_STR}", tags=["diagnostics"])
 
 @app.get("/", tags=["health"])
 async def health_check():
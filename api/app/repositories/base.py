@@ -0,0 +1,220 @@
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Sequence, Tuple
+
+# Sort columns that can hold NULL. The others are declared NOT NULL, so
+# they need no NULLS LAST clause and their keyset can be range-bounded,
+# which lets Postgres walk the (user_id, column, id) index in either
+# direction instead of sorting.
+NULLABLE_SORT_COLUMNS = {"due_date"}
+
+# Columns of a task row as the repositories return it. Selected explicitly
+# rather than with `*` so internal columns (the full-text search_vector)
+# stay out of API payloads and cached rows.
+TASK_COLUMNS = ("id", "user_id", "title", "status", "description", "due_date", "priority", "created_at", "updated_at")
+
+class TaskRepository(ABC):
+    """
+    Data access interface for the tasks table.
+    All methods are coroutines and must not block the event loop.
+    """
+
+    @abstractmethod
+    async def list_tasks(self, user_id: str, status: Optional[str] = None) -> List[dict]:
+        """Return all tasks for a user, optionally filtered by status"""
+
+    @abstractmethod
+    async def list_tasks_page(
+        self,
+        user_id: str,
+        status: Optional[str],
+        sort: str,
+        descending: bool,
+        limit: int,
+        after: Optional[Tuple[Any, str]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[dict]:
+        """
+        Return up to `limit` tasks ordered by (sort, id), NULL sort values
+        last, starting strictly after the `after` (sort value, id) key.
+        Only `columns` are fetched when given.
+        """
+
+    @abstractmethod
+    async def list_tasks_due(
+        self,
+        user_id: str,
+        windows: Sequence[Tuple[str, str, Optional[Tuple[str, str]]]],
+        limit: int,
+        status: Optional[Sequence[str]] = None,
+    ) -> List[List[dict]]:
+        """
+        For each (due_from, due_to, after) window, return up to `limit`
+        tasks with due_from <= due_date < due_to ordered by (due_date, id),
+        starting strictly after the `after` (due_date, id) key when given.
+        Results are returned in window order.
+        """
+
+    @abstractmethod
+    async def list_tombstones(
+        self,
+        user_id: str,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+        descending: bool = False,
+    ) -> List[dict]:
+        """
+        Return up to `limit` tombstones ({"task_id", "deleted_at"}) of the
+        user's deleted tasks ordered by (deleted_at, task_id), starting
+        strictly after the `after` (deleted_at, task_id) key
+        """
+
+    @abstractmethod
+    async def purge_tombstones(self, retention_days: int) -> int:
+        """Delete every user's tombstones older than `retention_days`; returns how many"""
+
+    @abstractmethod
+    async def search_tasks(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        after: Optional[Tuple[float, str]] = None,
+    ) -> List[dict]:
+        """
+        Return up to `limit` of the user's tasks matching the full-text
+        `query` (websearch syntax) over title and description, each with a
+        "rank", ordered by rank descending then id, starting strictly after
+        the `after` (rank, id) key
+        """
+
+    @abstractmethod
+    async def get_tasks_version(self, user_id: str) -> dict:
+        """
+        Return {"count", "updated_at"}: the number of the user's tasks and
+        their latest updated_at. Changes whenever any of them changes.
+        """
+
+    @abstractmethod
+    async def get_task_stats(self, user_id: str) -> dict:
+        """
+        Return {"status_counts": {status: count}, "overdue": count} from
+        the maintained counters: the user's tasks per status and the open
+        (not Done) tasks due before now
+        """
+
+    @abstractmethod
+    async def get_task(self, task_id: str, user_id: str, columns: Optional[Sequence[str]] = None) -> Optional[dict]:
+        """Return a single task owned by the user, or None"""
+
+    @abstractmethod
+    async def insert_task(self, data: dict) -> Optional[dict]:
+        """Insert a task row and return the stored representation"""
+
+    @abstractmethod
+    async def insert_tasks(self, rows: List[dict]) -> List[dict]:
+        """Insert several task rows in one atomic statement and return them"""
+
+    @abstractmethod
+    async def get_tasks_by_ids(self, user_id: str, task_ids: Sequence[str]) -> List[dict]:
+        """Return the user's tasks among `task_ids`, in any order, read fresh"""
+
+    @abstractmethod
+    async def insert_new_tasks(self, rows: List[dict]) -> List[dict]:
+        """
+        Insert several task rows in one statement, skipping any whose id
+        already exists (whoever owns it), and return the rows inserted
+        """
+
+    @abstractmethod
+    async def update_task_rows(self, user_id: str, rows: List[dict]) -> List[dict]:
+        """
+        Write several task rows (keyed by id) over the user's existing
+        tasks and return the updated rows. Rows whose id is not one of the
+        user's tasks are skipped. Every row must carry the same columns.
+        """
+
+    @abstractmethod
+    async def update_tasks(
+        self,
+        user_id: str,
+        data: dict,
+        ids: Optional[Sequence[str]] = None,
+        status: Optional[Sequence[str]] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        returning: bool = False,
+    ) -> Tuple[int, List[dict]]:
+        """
+        Apply `data` to every task of the user matching all given criteria
+        (ids, any of the statuses, due_from <= due_date < due_to) in one
+        statement. Returns the affected count and, if `returning`, the rows.
+        """
+
+    @abstractmethod
+    async def delete_tasks(
+        self,
+        user_id: str,
+        ids: Optional[Sequence[str]] = None,
+        status: Optional[Sequence[str]] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        returning: bool = False,
+    ) -> Tuple[int, List[dict]]:
+        """
+        Delete every task of the user matching all given criteria (as for
+        update_tasks) in one statement. Returns the deleted count and, if
+        `returning`, the deleted rows.
+        """
+
+    @abstractmethod
+    async def list_operations(self, user_id: str, op_ids: Sequence[str]) -> List[dict]:
+        """Return the already-applied offline operations among `op_ids`"""
+
+    @abstractmethod
+    async def insert_operations(self, rows: List[dict]) -> None:
+        """Record applied offline operations ({"user_id", "op_id", "task_id", "status"})"""
+
+    @abstractmethod
+    async def update_task(self, task_id: str, user_id: str, data: dict) -> Optional[dict]:
+        """Update a task owned by the user and return the new row, or None"""
+
+    @abstractmethod
+    async def delete_task(self, task_id: str, user_id: str) -> bool:
+        """Delete a task owned by the user; True if a row was removed"""
+
+class UserRepository(ABC):
+    """
+    Data access interface for the users table
+    """
+
+    @abstractmethod
+    async def get_user(self, user_id: str) -> Optional[dict]:
+        """Return a user row by ID, or None"""
+
+    @abstractmethod
+    async def insert_user(self, data: dict) -> Optional[dict]:
+        """Insert a user row and return the stored representation"""
+
+    @abstractmethod
+    async def update_user(self, user_id: str, data: dict) -> Optional[dict]:
+        """Update a user row and return the new row, or None"""
+
+class TokenRevocationRepository(ABC):
+    """
+    Data access interface for the token_revocations table
+    """
+
+    @abstractmethod
+    async def revoke_tokens(self, rows: List[dict]) -> List[str]:
+        """
+        Record revocations ({"token_id", "kind", "user_id", "expires_at"}),
+        skipping IDs that are already revoked. Returns the IDs this call
+        inserted, so a caller can tell whether it was first.
+        """
+
+    @abstractmethod
+    async def list_token_revocations(self, kind: str, since: Optional[str], now: str) -> List[dict]:
+        """
+        Return revocations of `kind` created after `since` (all when None)
+        that have not expired at `now`, oldest first
+        """
@@ -0,0 +1,170 @@
+from typing import Any, List, Optional, Sequence, Tuple
+from ..cache.task_cache import TaskCache
+from .base import TaskRepository
+
+class CachedTaskRepository(TaskRepository):
+    """
+    Read-through cache in front of another task repository
+
+    Reads are served from the per-user TaskCache; every write invalidates
+    the writing user's entries, whether or not the write succeeded.
+    """
+
+    def __init__(self, repository: TaskRepository, cache: TaskCache):
+        self.repository = repository
+        self.cache = cache
+
+    async def list_tasks(self, user_id: str, status: Optional[str] = None) -> List[dict]:
+        return await self.cache.get_or_load(
+            user_id, ("list", status),
+            lambda: self.repository.list_tasks(user_id, status)
+        )
+
+    async def list_tasks_page(
+        self,
+        user_id: str,
+        status: Optional[str],
+        sort: str,
+        descending: bool,
+        limit: int,
+        after: Optional[Tuple[Any, str]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[dict]:
+        return await self.cache.get_or_load(
+            user_id, ("page", status, sort, descending, limit, after, columns),
+            lambda: self.repository.list_tasks_page(user_id, status, sort, descending, limit, after, columns)
+        )
+
+    async def list_tasks_due(
+        self,
+        user_id: str,
+        windows: Sequence[Tuple[str, str, Optional[Tuple[str, str]]]],
+        limit: int,
+        status: Optional[Sequence[str]] = None,
+    ) -> List[List[dict]]:
+        return await self.cache.get_or_load(
+            user_id, ("due", tuple(windows), limit, tuple(status) if status else None),
+            lambda: self.repository.list_tasks_due(user_id, windows, limit, status)
+        )
+
+    async def list_tombstones(
+        self,
+        user_id: str,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+        descending: bool = False,
+    ) -> List[dict]:
+        return await self.cache.get_or_load(
+            user_id, ("tombstones", limit, after, descending),
+            lambda: self.repository.list_tombstones(user_id, limit, after, descending)
+        )
+
+    async def purge_tombstones(self, retention_days: int) -> int:
+        # Purged tombstones are older than any cursor still accepted
+        return await self.repository.purge_tombstones(retention_days)
+
+    async def get_tasks_version(self, user_id: str) -> dict:
+        return await self.cache.get_or_load(
+            user_id, ("version",),
+            lambda: self.repository.get_tasks_version(user_id)
+        )
+
+    async def get_task_stats(self, user_id: str) -> dict:
+        # Writes invalidate it; tasks turning overdue show up within the cache TTL
+        return await self.cache.get_or_load(
+            user_id, ("stats",),
+            lambda: self.repository.get_task_stats(user_id)
+        )
+
+    async def get_task(self, task_id: str, user_id: str, columns: Optional[Sequence[str]] = None) -> Optional[dict]:
+        return await self.cache.get_or_load(
+            user_id, ("task", task_id, columns),
+            lambda: self.repository.get_task(task_id, user_id, columns)
+        )
+
+    async def insert_task(self, data: dict) -> Optional[dict]:
+        try:
+            return await self.repository.insert_task(data)
+        finally:
+            await self.cache.invalidate(data["user_id"])
+
+    async def insert_tasks(self, rows: List[dict]) -> List[dict]:
+        try:
+            return await self.repository.insert_tasks(rows)
+        finally:
+            for user_id in {row["user_id"] for row in rows}:
+                await self.cache.invalidate(user_id)
+
+    async def search_tasks(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        after: Optional[Tuple[float, str]] = None,
+    ) -> List[dict]:
+        # Free-text queries rarely repeat; caching them would only churn the cache
+        return await self.repository.search_tasks(user_id, query, limit, after)
+
+    async def get_tasks_by_ids(self, user_id: str, task_ids: Sequence[str]) -> List[dict]:
+        # Used to resolve write conflicts, so never served from the cache
+        return await self.repository.get_tasks_by_ids(user_id, task_ids)
+
+    async def insert_new_tasks(self, rows: List[dict]) -> List[dict]:
+        try:
+            return await self.repository.insert_new_tasks(rows)
+        finally:
+            for user_id in {row["user_id"] for row in rows}:
+                await self.cache.invalidate(user_id)
+
+    async def update_task_rows(self, user_id: str, rows: List[dict]) -> List[dict]:
+        try:
+            return await self.repository.update_task_rows(user_id, rows)
+        finally:
+            await self.cache.invalidate(user_id)
+
+    async def update_tasks(
+        self,
+        user_id: str,
+        data: dict,
+        ids: Optional[Sequence[str]] = None,
+        status: Optional[Sequence[str]] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        returning: bool = False,
+    ) -> Tuple[int, List[dict]]:
+        try:
+            return await self.repository.update_tasks(user_id, data, ids, status, due_from, due_to, returning)
+        finally:
+            await self.cache.invalidate(user_id)
+
+    async def delete_tasks(
+        self,
+        user_id: str,
+        ids: Optional[Sequence[str]] = None,
+        status: Optional[Sequence[str]] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        returning: bool = False,
+    ) -> Tuple[int, List[dict]]:
+        try:
+            return await self.repository.delete_tasks(user_id, ids, status, due_from, due_to, returning)
+        finally:
+            await self.cache.invalidate(user_id)
+
+    async def list_operations(self, user_id: str, op_ids: Sequence[str]) -> List[dict]:
+        return await self.repository.list_operations(user_id, op_ids)
+
+    async def insert_operations(self, rows: List[dict]) -> None:
+        await self.repository.insert_operations(rows)
+
+    async def update_task(self, task_id: str, user_id: str, data: dict) -> Optional[dict]:
+        try:
+            return await self.repository.update_task(task_id, user_id, data)
+        finally:
+            await self.cache.invalidate(user_id)
+
+    async def delete_task(self, task_id: str, user_id: str) -> bool:
+        try:
+            return await self.repository.delete_task(task_id, user_id)
+        finally:
+            await self.cache.invalidate(user_id)
@@ -0,0 +1,49 @@
+from ..config import settings
+from ..db.postgres import get_postgres_engine
+from ..db.supabase import get_supabase_client
+from .base import TaskRepository, TokenRevocationRepository, UserRepository
+from .supabase import SupabaseTaskRepository, SupabaseTokenRevocationRepository, SupabaseUserRepository
+
+# The postgres repositories are imported only when that backend is
+# selected, so the default deployment never loads SQLAlchemy
+DATA_BACKENDS = ("supabase", "postgres")
+
+def data_backend() -> str:
+    """
+    The configured DATA_BACKEND
+
+    Raises:
+        ValueError: If DATA_BACKEND is not a known backend
+    """
+    backend = settings.DATA_BACKEND.lower()
+    if backend not in DATA_BACKENDS:
+        raise ValueError(f"Unknown DATA_BACKEND '{settings.DATA_BACKEND}'. Must be one of: {', '.join(DATA_BACKENDS)}")
+    return backend
+
+def create_task_repository(client=None) -> TaskRepository:
+    """
+    Task repository for the configured backend on the given client
+    (Supabase AsyncClient or SQLAlchemy engine), the shared one by default
+    """
+    if data_backend() == "postgres":
+        from .postgres import PostgresTaskRepository
+        return PostgresTaskRepository(client or get_postgres_engine())
+    return SupabaseTaskRepository(client or get_supabase_client())
+
+def create_user_repository(client=None) -> UserRepository:
+    """
+    User repository for the configured backend on the given client
+    """
+    if data_backend() == "postgres":
+        from .postgres import PostgresUserRepository
+        return PostgresUserRepository(client or get_postgres_engine())
+    return SupabaseUserRepository(client or get_supabase_client())
+
+def create_revocation_repository(client=None) -> TokenRevocationRepository:
+    """
+    Token revocation repository for the configured backend on the given client
+    """
+    if data_backend() == "postgres":
+        from .postgres import PostgresTokenRevocationRepository
+        return PostgresTokenRevocationRepository(client or get_postgres_engine())
+    return SupabaseTokenRevocationRepository(client or get_supabase_client())
@@ -0,0 +1,367 @@
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import BigInteger, Boolean, Column, FetchedValue, Float, MetaData, Table, Text, Uuid, column, func, literal, literal_column, or_, select, text, tuple_, union_all
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.types import DateTime, TypeDecorator
+from .base import NULLABLE_SORT_COLUMNS, TaskRepository, TokenRevocationRepository, UserRepository
+
+class _Timestamp(TypeDecorator):
+    """
+    timestamptz that accepts ISO strings and returns them, so rows look
+    exactly like the PostgREST JSON the services and cache already handle
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if isinstance(value, datetime) and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+    def process_result_value(self, value, dialect):
+        return value.isoformat() if value is not None else None
+
+metadata = MetaData()
+
+tasks = Table(
+    "tasks", metadata,
+    Column("id", Uuid(as_uuid=False), primary_key=True, server_default=FetchedValue()),
+    Column("user_id", Uuid(as_uuid=False), nullable=False),
+    Column("title", Text, nullable=False),
+    Column("status", Text, nullable=False),
+    Column("description", Text),
+    Column("due_date", _Timestamp),
+    Column("priority", Text),
+    Column("created_at", _Timestamp, nullable=False),
+    Column("updated_at", _Timestamp, nullable=False),
+)
+
+task_tombstones = Table(
+    "task_tombstones", metadata,
+    Column("task_id", Uuid(as_uuid=False), primary_key=True),
+    Column("user_id", Uuid(as_uuid=False), nullable=False),
+    Column("deleted_at", _Timestamp, nullable=False),
+)
+
+task_operations = Table(
+    "task_operations", metadata,
+    Column("user_id", Uuid(as_uuid=False), primary_key=True),
+    Column("op_id", Text, primary_key=True),
+    Column("task_id", Uuid(as_uuid=False)),
+    Column("status", Text, nullable=False),
+    Column("applied_at", _Timestamp),
+)
+
+users = Table(
+    "users", metadata,
+    Column("id", Uuid(as_uuid=False), primary_key=True),
+    Column("email", Text, nullable=False),
+    Column("full_name", Text),
+    Column("created_at", _Timestamp),
+    Column("updated_at", _Timestamp),
+    Column("is_test_user", Boolean),
+)
+
+token_revocations = Table(
+    "token_revocations", metadata,
+    Column("token_id", Text, primary_key=True),
+    Column("kind", Text, nullable=False),
+    Column("user_id", Uuid(as_uuid=False), nullable=False),
+    Column("expires_at", _Timestamp, nullable=False),
+    Column("created_at", _Timestamp, nullable=False, server_default=FetchedValue()),
+)
+
+# Ranking lives in the search_tasks SQL function (migration 0007), shared
+# with the PostgREST backend; Postgres inlines it into this statement.
+_search = text(
+    "SELECT * FROM search_tasks(CAST(:user_id AS uuid), CAST(:query AS text), CAST(:limit AS integer),"
+    " CAST(:after_rank AS real), CAST(:after_id AS uuid))"
+).columns(*tasks.c, column("rank", Float))
+
+# Counter-backed stats from the task_stats SQL function (migration 0008)
+_stats = text("SELECT * FROM task_stats(CAST(:user_id AS uuid))").columns(
+    column("status_counts", JSONB), column("overdue", BigInteger)
+)
+
+# purge_task_tombstones SQL function (migration 0003)
+_purge_tombstones = text("SELECT purge_task_tombstones(make_interval(days => CAST(:days AS integer))) AS purged")
+
+def _columns(table: Table, names: Optional[Sequence[str]]):
+    return [table.c[name] for name in names] if names else [table]
+
+def _keyset(query, table: Table, sort: str, descending: bool, after: Optional[Tuple[Any, str]], id_column: str = "id"):
+    """
+    Apply a keyset position and the matching (sort, id) order, NULL sort
+    values last. Uses a row comparison, which Postgres turns into an
+    index range on (user_id, sort, id).
+    """
+    column, key = table.c[sort], table.c[id_column]
+    nullable = sort in NULLABLE_SORT_COLUMNS
+    if after is not None:
+        value, last_id = after
+        if value is None:
+            query = query.where(column.is_(None), key < last_id if descending else key > last_id)
+        else:
+            row, bound = tuple_(column, key), tuple_(literal(value, column.type), literal(last_id, key.type))
+            position = row < bound if descending else row > bound
+            query = query.where(or_(position, column.is_(None)) if nullable else position)
+    order = column.desc() if descending else column.asc()
+    return query.order_by(order.nulls_last() if nullable else order, key.desc() if descending else key.asc())
+
+def _filter_tasks(query, user_id: str, ids, status, due_from, due_to):
+    """Scope a set-based task update/delete to the user and the given criteria"""
+    query = query.where(tasks.c.user_id == user_id)
+    if ids is not None:
+        query = query.where(tasks.c.id.in_(list(ids)))
+    if status:
+        query = query.where(tasks.c.status.in_(list(status)))
+    if due_from:
+        query = query.where(tasks.c.due_date >= due_from)
+    if due_to:
+        query = query.where(tasks.c.due_date < due_to)
+    return query
+
+class PostgresTaskRepository(TaskRepository):
+    """
+    Task repository talking directly to Postgres through a pooled
+    SQLAlchemy async engine (asyncpg, prepared statements)
+
+    Connects with the DATABASE_URL role, which bypasses RLS like the
+    service key does; every query is scoped by user_id explicitly.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def _all(self, statement) -> List[dict]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(statement)
+            return [dict(row) for row in result.mappings()]
+
+    async def _write(self, statement) -> List[dict]:
+        async with self.engine.begin() as conn:
+            result = await conn.execute(statement)
+            return [dict(row) for row in result.mappings()] if result.returns_rows else []
+
+    async def list_tasks(self, user_id: str, status: Optional[str] = None) -> List[dict]:
+        query = select(tasks).where(tasks.c.user_id == user_id)
+        if status:
+            query = query.where(tasks.c.status == status)
+        return await self._all(query)
+
+    async def list_tasks_page(
+        self,
+        user_id: str,
+        status: Optional[str],
+        sort: str,
+        descending: bool,
+        limit: int,
+        after: Optional[Tuple[Any, str]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[dict]:
+        query = select(*_columns(tasks, columns)).where(tasks.c.user_id == user_id)
+        if status:
+            query = query.where(tasks.c.status == status)
+        return await self._all(_keyset(query, tasks, sort, descending, after).limit(limit))
+
+    async def list_tasks_due(
+        self,
+        user_id: str,
+        windows: Sequence[Tuple[str, str, Optional[Tuple[str, str]]]],
+        limit: int,
+        status: Optional[Sequence[str]] = None,
+    ) -> List[List[dict]]:
+        if not windows:
+            return []
+        # One round trip: a UNION ALL of per-window range scans, each
+        # stopping after `limit` rows of the (user_id, due_date, id) index
+        parts = []
+        for index, (due_from, due_to, after) in enumerate(windows):
+            query = select(literal(index).label("window"), tasks).where(
+                tasks.c.user_id == user_id,
+                tasks.c.due_date >= (after[0] if after is not None else due_from),
+                tasks.c.due_date < due_to,
+            )
+            if status:
+                query = query.where(tasks.c.status.in_(list(status)))
+            parts.append(_keyset(query, tasks, "due_date", False, after).limit(limit))
+        combined = union_all(*parts).subquery()
+        statement = select(combined).order_by(combined.c.window, combined.c.due_date, combined.c.id)
+
+        results: List[List[dict]] = [[] for _ in windows]
+        for row in await self._all(statement):
+            results[row.pop("window")].append(row)
+        return results
+
+    async def list_tombstones(
+        self,
+        user_id: str,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+        descending: bool = False,
+    ) -> List[dict]:
+        query = select(task_tombstones.c.task_id, task_tombstones.c.deleted_at).where(task_tombstones.c.user_id == user_id)
+        return await self._all(_keyset(query, task_tombstones, "deleted_at", descending, after, id_column="task_id").limit(limit))
+
+    async def purge_tombstones(self, retention_days: int) -> int:
+        [row] = await self._write(_purge_tombstones.bindparams(days=retention_days))
+        return row["purged"]
+
+    async def search_tasks(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        after: Optional[Tuple[float, str]] = None,
+    ) -> List[dict]:
+        after_rank, after_id = after if after is not None else (None, None)
+        return await self._all(_search.bindparams(
+            user_id=user_id, query=query, limit=limit, after_rank=after_rank, after_id=after_id
+        ))
+
+    async def get_tasks_version(self, user_id: str) -> dict:
+        query = select(func.count().label("count"), func.max(tasks.c.updated_at).label("updated_at")).where(tasks.c.user_id == user_id)
+        [row] = await self._all(query)
+        return {"count": row["count"], "updated_at": row["updated_at"]}
+
+    async def get_task_stats(self, user_id: str) -> dict:
+        [row] = await self._all(_stats.bindparams(user_id=user_id))
+        return {"status_counts": row["status_counts"], "overdue": row["overdue"]}
+
+    async def get_task(self, task_id: str, user_id: str, columns: Optional[Sequence[str]] = None) -> Optional[dict]:
+        query = select(*_columns(tasks, columns)).where(tasks.c.id == task_id, tasks.c.user_id == user_id).limit(1)
+        rows = await self._all(query)
+        return rows[0] if rows else None
+
+    async def insert_task(self, data: dict) -> Optional[dict]:
+        rows = await self._write(insert(tasks).values(**data).returning(tasks))
+        return rows[0] if rows else None
+
+    async def insert_tasks(self, rows: List[dict]) -> List[dict]:
+        return await self._write(insert(tasks).values(rows).returning(tasks))
+
+    async def get_tasks_by_ids(self, user_id: str, task_ids: Sequence[str]) -> List[dict]:
+        if not task_ids:
+            return []
+        return await self._all(select(tasks).where(tasks.c.user_id == user_id, tasks.c.id.in_(list(task_ids))))
+
+    async def insert_new_tasks(self, rows: List[dict]) -> List[dict]:
+        statement = insert(tasks).values(rows).on_conflict_do_nothing(index_elements=[tasks.c.id])
+        return await self._write(statement.returning(tasks))
+
+    async def update_task_rows(self, user_id: str, rows: List[dict]) -> List[dict]:
+        # One UPDATE ... FROM over the rows decoded into the tasks row type
+        names = [name for name in rows[0] if name not in ("id", "user_id")]
+        source = func.jsonb_populate_recordset(literal_column("NULL::tasks"), literal(rows, JSONB)).table_valued(
+            "id", *names
+        ).alias("source")
+        statement = (
+            tasks.update()
+            .values({name: source.c[name] for name in names})
+            .where(tasks.c.id == source.c.id, tasks.c.user_id == user_id)
+            .returning(tasks)
+        )
+        return await self._write(statement)
+
+    async def update_tasks(
+        self,
+        user_id: str,
+        data: dict,
+        ids: Optional[Sequence[str]] = None,
+        status: Optional[Sequence[str]] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        returning: bool = False,
+    ) -> Tuple[int, List[dict]]:
+        statement = _filter_tasks(tasks.update().values(**data), user_id, ids, status, due_from, due_to)
+        rows = await self._write(statement.returning(tasks if returning else tasks.c.id))
+        return len(rows), rows if returning else []
+
+    async def delete_tasks(
+        self,
+        user_id: str,
+        ids: Optional[Sequence[str]] = None,
+        status: Optional[Sequence[str]] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        returning: bool = False,
+    ) -> Tuple[int, List[dict]]:
+        statement = _filter_tasks(tasks.delete(), user_id, ids, status, due_from, due_to)
+        rows = await self._write(statement.returning(tasks if returning else tasks.c.id))
+        return len(rows), rows if returning else []
+
+    async def list_operations(self, user_id: str, op_ids: Sequence[str]) -> List[dict]:
+        if not op_ids:
+            return []
+        query = select(task_operations.c.op_id, task_operations.c.task_id, task_operations.c.status).where(
+            task_operations.c.user_id == user_id, task_operations.c.op_id.in_(list(op_ids))
+        )
+        return await self._all(query)
+
+    async def insert_operations(self, rows: List[dict]) -> None:
+        await self._write(insert(task_operations).values(rows).on_conflict_do_nothing())
+
+    async def update_task(self, task_id: str, user_id: str, data: dict) -> Optional[dict]:
+        statement = tasks.update().values(**data).where(tasks.c.id == task_id, tasks.c.user_id == user_id).returning(tasks)
+        rows = await self._write(statement)
+        return rows[0] if rows else None
+
+    async def delete_task(self, task_id: str, user_id: str) -> bool:
+        statement = tasks.delete().where(tasks.c.id == task_id, tasks.c.user_id == user_id).returning(tasks.c.id)
+        return bool(await self._write(statement))
+
+class PostgresUserRepository(UserRepository):
+    """
+    User repository talking directly to Postgres through the shared engine
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def get_user(self, user_id: str) -> Optional[dict]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(select(users).where(users.c.id == user_id).limit(1))
+            row = result.mappings().first()
+        return dict(row) if row else None
+
+    async def insert_user(self, data: dict) -> Optional[dict]:
+        async with self.engine.begin() as conn:
+            row = (await conn.execute(insert(users).values(**data).returning(users))).mappings().first()
+        return dict(row) if row else None
+
+    async def update_user(self, user_id: str, data: dict) -> Optional[dict]:
+        async with self.engine.begin() as conn:
+            statement = users.update().values(**data).where(users.c.id == user_id).returning(users)
+            row = (await conn.execute(statement)).mappings().first()
+        return dict(row) if row else None
+
+class PostgresTokenRevocationRepository(TokenRevocationRepository):
+    """
+    Token revocation repository talking directly to Postgres through the shared engine
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def revoke_tokens(self, rows: List[dict]) -> List[str]:
+        statement = (
+            insert(token_revocations).values(rows)
+            .on_conflict_do_nothing(index_elements=["token_id"])
+            .returning(token_revocations.c.token_id)
+        )
+        async with self.engine.begin() as conn:
+            return list((await conn.execute(statement)).scalars())
+
+    async def list_token_revocations(self, kind: str, since: Optional[str], now: str) -> List[dict]:
+        table = token_revocations
+        statement = (
+            select(table.c.token_id, table.c.user_id, table.c.expires_at, table.c.created_at)
+            .where(table.c.kind == kind, table.c.expires_at > literal(now, table.c.expires_at.type))
+            .order_by(table.c.created_at)
+        )
+        if since is not None:
+            statement = statement.where(table.c.created_at > literal(since, table.c.created_at.type))
+        async with self.engine.connect() as conn:
+            return [dict(row) for row in (await conn.execute(statement)).mappings()]
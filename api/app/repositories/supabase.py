@@ -0,0 +1,305 @@
+import asyncio
+from typing import Any, List, Optional, Sequence, Tuple
+from postgrest import CountMethod, ReturnMethod
+from supabase import AsyncClient
+from .base import NULLABLE_SORT_COLUMNS, TASK_COLUMNS, TaskRepository, TokenRevocationRepository, UserRepository
+
+def _first(response) -> Optional[dict]:
+    if response.data and len(response.data) > 0:
+        return response.data[0]
+    return None
+
+def _select(columns: Optional[Sequence[str]]) -> str:
+    return ",".join(columns or TASK_COLUMNS)
+
+def _keyset_filter(sort: str, descending: bool, value: Any, last_id: str, id_column: str = "id") -> str:
+    """
+    PostgREST `or` filter selecting rows after the (value, id) keyset
+    position, for an ordering with NULL sort values last
+    """
+    op = "lt" if descending else "gt"
+    if value is None:
+        return f"and({sort}.is.null,{id_column}.{op}.{last_id})"
+    condition = f'{sort}.{op}."{value}",and({sort}.eq."{value}",{id_column}.{op}.{last_id})'
+    if sort in NULLABLE_SORT_COLUMNS:
+        condition += f",{sort}.is.null"
+    return condition
+
+def _keyset(query, sort: str, descending: bool, after: Optional[Tuple[Any, str]], id_column: str = "id"):
+    """Apply a keyset position and the matching (sort, id) order to a query"""
+    if after is not None:
+        value = after[0]
+        if value is not None and sort not in NULLABLE_SORT_COLUMNS:
+            # Redundant with the `or` filter but usable as an index range bound
+            query = query.lte(sort, value) if descending else query.gte(sort, value)
+        query = query.or_(_keyset_filter(sort, descending, *after, id_column=id_column))
+    nullsfirst = False if sort in NULLABLE_SORT_COLUMNS else None
+    return query.order(sort, desc=descending, nullsfirst=nullsfirst).order(id_column, desc=descending)
+
+def _returning(rows: bool) -> ReturnMethod:
+    return ReturnMethod.representation if rows else ReturnMethod.minimal
+
+def _filter_tasks(query, user_id: str, ids, status, due_from, due_to):
+    """Scope a set-based task update/delete to the user and the given criteria"""
+    query = query.eq("user_id", user_id)
+    if ids is not None:
+        query = query.in_("id", list(ids))
+    if status:
+        query = query.in_("status", list(status))
+    if due_from:
+        query = query.gte("due_date", due_from)
+    if due_to:
+        query = query.lt("due_date", due_to)
+    return query
+
+class SupabaseTaskRepository(TaskRepository):
+    """
+    Task repository backed by the async Supabase (PostgREST) client
+    """
+
+    def __init__(self, supabase: AsyncClient):
+        self.supabase = supabase
+        self.table = "tasks"
+
+    async def list_tasks(self, user_id: str, status: Optional[str] = None) -> List[dict]:
+        query = self.supabase.table(self.table).select(_select(None)).eq("user_id", user_id)
+
+        if status:
+            query = query.eq("status", status)
+
+        response = await query.execute()
+        return response.data
+
+    async def list_tasks_page(
+        self,
+        user_id: str,
+        status: Optional[str],
+        sort: str,
+        descending: bool,
+        limit: int,
+        after: Optional[Tuple[Any, str]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[dict]:
+        query = self.supabase.table(self.table).select(_select(columns)).eq("user_id", user_id)
+
+        if status:
+            query = query.eq("status", status)
+
+        response = await _keyset(query, sort, descending, after).limit(limit).execute()
+        return response.data
+
+    async def list_tasks_due(
+        self,
+        user_id: str,
+        windows: Sequence[Tuple[str, str, Optional[Tuple[str, str]]]],
+        limit: int,
+        status: Optional[Sequence[str]] = None,
+    ) -> List[List[dict]]:
+        async def window(due_from: str, due_to: str, after: Optional[Tuple[str, str]]) -> List[dict]:
+            query = self.supabase.table(self.table).select(_select(None)).eq("user_id", user_id).lt("due_date", due_to)
+            if status:
+                query = query.in_("status", list(status))
+            if after is not None:
+                # The cursor's due_date is the tighter lower bound of the index range
+                query = query.gte("due_date", after[0]).or_(_keyset_filter("due_date", False, *after))
+            else:
+                query = query.gte("due_date", due_from)
+            response = await query.order("due_date").order("id").limit(limit).execute()
+            return response.data or []
+
+        # PostgREST takes one range per request; the windows go out concurrently
+        return list(await asyncio.gather(*(window(*w) for w in windows)))
+
+    async def list_tombstones(
+        self,
+        user_id: str,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+        descending: bool = False,
+    ) -> List[dict]:
+        query = self.supabase.table("task_tombstones").select("task_id,deleted_at").eq("user_id", user_id)
+
+        response = await _keyset(query, "deleted_at", descending, after, id_column="task_id").limit(limit).execute()
+        return response.data
+
+    async def purge_tombstones(self, retention_days: int) -> int:
+        response = await self.supabase.rpc("purge_task_tombstones", {"retention": f"{retention_days} days"}).execute()
+        return response.data or 0
+
+    async def search_tasks(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        after: Optional[Tuple[float, str]] = None,
+    ) -> List[dict]:
+        after_rank, after_id = after if after is not None else (None, None)
+        response = await self.supabase.rpc("search_tasks", {
+            "p_user_id": user_id,
+            "p_query": query,
+            "p_limit": limit,
+            "p_after_rank": after_rank,
+            "p_after_id": after_id,
+        }).execute()
+        return response.data or []
+
+    async def get_tasks_version(self, user_id: str) -> dict:
+        response = await (
+            self.supabase.table(self.table)
+            .select("updated_at", count=CountMethod.exact)
+            .eq("user_id", user_id)
+            .order("updated_at", desc=True)
+            .limit(1)
+            .execute()
+        )
+        latest = _first(response)
+        return {"count": response.count or 0, "updated_at": latest["updated_at"] if latest else None}
+
+    async def get_task_stats(self, user_id: str) -> dict:
+        response = await self.supabase.rpc("task_stats", {"p_user_id": user_id}).execute()
+        [row] = response.data
+        return {"status_counts": row["status_counts"], "overdue": row["overdue"]}
+
+    async def get_task(self, task_id: str, user_id: str, columns: Optional[Sequence[str]] = None) -> Optional[dict]:
+        response = await self.supabase.table(self.table).select(_select(columns)).eq("id", task_id).eq("user_id", user_id).limit(1).execute()
+        return _first(response)
+
+    async def insert_task(self, data: dict) -> Optional[dict]:
+        response = await self.supabase.table(self.table).insert(data).select(*TASK_COLUMNS).execute()
+        return _first(response)
+
+    async def insert_tasks(self, rows: List[dict]) -> List[dict]:
+        response = await self.supabase.table(self.table).insert(rows).select(*TASK_COLUMNS).execute()
+        return response.data or []
+
+    async def get_tasks_by_ids(self, user_id: str, task_ids: Sequence[str]) -> List[dict]:
+        if not task_ids:
+            return []
+        response = await self.supabase.table(self.table).select(_select(None)).eq("user_id", user_id).in_("id", list(task_ids)).execute()
+        return response.data
+
+    async def insert_new_tasks(self, rows: List[dict]) -> List[dict]:
+        response = await (
+            self.supabase.table(self.table)
+            .upsert(rows, on_conflict="id", ignore_duplicates=True)
+            .select(*TASK_COLUMNS)
+            .execute()
+        )
+        return response.data or []
+
+    async def update_task_rows(self, user_id: str, rows: List[dict]) -> List[dict]:
+        async def update(row: dict) -> List[dict]:
+            data = {name: value for name, value in row.items() if name not in ("id", "user_id")}
+            query = self.supabase.table(self.table).update(data).eq("id", row["id"]).eq("user_id", user_id)
+            response = await query.select(*TASK_COLUMNS).execute()
+            return response.data or []
+
+        # PostgREST has no multi-row update with per-row values; the updates go out concurrently
+        return [task for updated in await asyncio.gather(*(update(row) for row in rows)) for task in updated]
+
+    async def update_tasks(
+        self,
+        user_id: str,
+        data: dict,
+        ids: Optional[Sequence[str]] = None,
+        status: Optional[Sequence[str]] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        returning: bool = False,
+    ) -> Tuple[int, List[dict]]:
+        query = self.supabase.table(self.table).update(data, count=CountMethod.exact, returning=_returning(returning))
+        if returning:
+            query = query.select(*TASK_COLUMNS)
+        response = await _filter_tasks(query, user_id, ids, status, due_from, due_to).execute()
+        return response.count or 0, response.data if returning else []
+
+    async def delete_tasks(
+        self,
+        user_id: str,
+        ids: Optional[Sequence[str]] = None,
+        status: Optional[Sequence[str]] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        returning: bool = False,
+    ) -> Tuple[int, List[dict]]:
+        query = self.supabase.table(self.table).delete(count=CountMethod.exact, returning=_returning(returning))
+        if returning:
+            query = query.select(*TASK_COLUMNS)
+        response = await _filter_tasks(query, user_id, ids, status, due_from, due_to).execute()
+        return response.count or 0, response.data if returning else []
+
+    async def list_operations(self, user_id: str, op_ids: Sequence[str]) -> List[dict]:
+        if not op_ids:
+            return []
+        response = await (
+            self.supabase.table("task_operations")
+            .select("op_id,task_id,status")
+            .eq("user_id", user_id)
+            .in_("op_id", list(op_ids))
+            .execute()
+        )
+        return response.data
+
+    async def insert_operations(self, rows: List[dict]) -> None:
+        await self.supabase.table("task_operations").upsert(rows, on_conflict="user_id,op_id", ignore_duplicates=True).execute()
+
+    async def update_task(self, task_id: str, user_id: str, data: dict) -> Optional[dict]:
+        response = await (
+            self.supabase.table(self.table)
+            .update(data)
+            .eq("id", task_id)
+            .eq("user_id", user_id)
+            .select(*TASK_COLUMNS)
+            .execute()
+        )
+        return _first(response)
+
+    async def delete_task(self, task_id: str, user_id: str) -> bool:
+        response = await self.supabase.table(self.table).delete().eq("id", task_id).eq("user_id", user_id).select("id").execute()
+        return bool(response.data)
+
+class SupabaseUserRepository(UserRepository):
+    """
+    User repository backed by the async Supabase (PostgREST) client
+    """
+
+    def __init__(self, supabase: AsyncClient):
+        self.supabase = supabase
+        self.table = "users"
+
+    async def get_user(self, user_id: str) -> Optional[dict]:
+        response = await self.supabase.table(self.table).select("*").eq("id", user_id).limit(1).execute()
+        return _first(response)
+
+    async def insert_user(self, data: dict) -> Optional[dict]:
+        response = await self.supabase.table(self.table).insert(data).execute()
+        return _first(response)
+
+    async def update_user(self, user_id: str, data: dict) -> Optional[dict]:
+        response = await self.supabase.table(self.table).update(data).eq("id", user_id).execute()
+        return _first(response)
+
+class SupabaseTokenRevocationRepository(TokenRevocationRepository):
+    """
+    Token revocation repository backed by the async Supabase (PostgREST) client
+    """
+
+    def __init__(self, supabase: AsyncClient):
+        self.supabase = supabase
+        self.table = "token_revocations"
+
+    async def revoke_tokens(self, rows: List[dict]) -> List[str]:
+        response = await (
+            self.supabase.table(self.table)
+            .upsert(rows, on_conflict="token_id", ignore_duplicates=True)
+            .select("token_id")
+            .execute()
+        )
+        return [row["token_id"] for row in response.data]
+
+    async def list_token_revocations(self, kind: str, since: Optional[str], now: str) -> List[dict]:
+        query = self.supabase.table(self.table).select("token_id,user_id,expires_at,created_at").eq("kind", kind).gt("expires_at", now)
+        if since is not None:
+            query = query.gt("created_at", since)
+        response = await query.order("created_at").execute()
+        return response.data
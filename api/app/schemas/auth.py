@@ -23,12 +23,21 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
-class Token(BaseModel):
-    """Token response model"""
+class TokenPair(BaseModel):
+    """Access and refresh token pair"""
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # Access token lifetime in seconds
+
+class Token(TokenPair):
+    """Token response model"""
     user: UserResponse
 
+class RefreshRequest(BaseModel):
+    """Refresh token exchange (or revocation on logout)"""
+    refresh_token: str
+
 class TokenData(BaseModel):
     """Token payload data"""
     sub: str  # User ID
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Literal
+from datetime import date, datetime
 from uuid import UUID
 
 class TaskBase(BaseModel):
@@ -31,4 +31,116 @@ class TaskResponse(TaskBase):
     updated_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class TaskPage(BaseModel):
+    """A page of tasks with an opaque cursor for the next page"""
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = None
+
+class TaskSearchResult(TaskResponse):
+    """A task matching a full-text search, with its relevance score"""
+    rank: float
+
+class TaskSearchPage(BaseModel):
+    """A page of search results, best match first"""
+    items: List[TaskSearchResult]
+    next_cursor: Optional[str] = None
+
+class TaskAgendaDay(BaseModel):
+    """Tasks due on one local day, with a cursor for more of that day"""
+    date: date
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = None
+
+class TaskAgenda(BaseModel):
+    """Tasks grouped by local due day"""
+    days: List[TaskAgendaDay]
+    timezone_offset: int
+
+class TaskStats(BaseModel):
+    """Counts over all of a user's tasks"""
+    total: int
+    by_status: Dict[str, int]
+    overdue: int
+    completion_rate: float
+
+class TaskPartial(BaseModel):
+    """
+    Lightweight task response for sparse fieldsets (`fields=`);
+    only the requested columns are present
+    """
+    id: UUID
+    user_id: Optional[UUID] = None
+    title: Optional[str] = None
+    status: Optional[Literal["To Do", "In Progress", "Done"]] = None
+    description: Optional[str] = None
+    due_date: Optional[datetime] = None
+    priority: Optional[Literal['low', 'medium', 'high']] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class TaskPartialPage(BaseModel):
+    """A page of sparse tasks with an opaque cursor for the next page"""
+    items: List[TaskPartial]
+    next_cursor: Optional[str] = None
+
+class TaskTombstone(BaseModel):
+    """A deleted task, as reported by delta sync"""
+    id: UUID
+    deleted_at: datetime
+
+class TaskChanges(BaseModel):
+    """Tasks changed and deleted since a sync cursor"""
+    changes: List[TaskResponse]
+    deleted: List[TaskTombstone]
+    next_cursor: str
+    has_more: bool = False
+
+class TaskOperation(BaseModel):
+    """
+    One queued offline edit. `updated_at` is when the edit was made on the
+    device; it decides conflicts against the server's updated_at.
+    """
+    op_id: str = Field(..., min_length=1, max_length=128)
+    type: Literal["create", "update", "delete"]
+    task_id: Optional[UUID] = None
+    data: Optional[Dict[str, Any]] = None
+    updated_at: Optional[datetime] = None
+
+class TaskOperationBatch(BaseModel):
+    """An ordered batch of offline edits to replay"""
+    operations: List[TaskOperation]
+
+class TaskOperationResult(BaseModel):
+    """Outcome of one replayed operation"""
+    op_id: str
+    status: Literal["applied", "conflict", "not_found", "invalid"]
+    task_id: Optional[UUID] = None
+    task: Optional[TaskResponse] = None
+    detail: Optional[str] = None
+    replayed: bool = False
+
+class TaskOperationResults(BaseModel):
+    """Per-operation results, in request order"""
+    results: List[TaskOperationResult]
+
+class TaskSelection(BaseModel):
+    """
+    Tasks targeted by a bulk operation: the given IDs and/or every task
+    matching the filters (any of `status`, due_from <= due_date < due_to)
+    """
+    ids: Optional[List[UUID]] = None
+    status: Optional[List[Literal["To Do", "In Progress", "Done"]]] = None
+    due_from: Optional[datetime] = None
+    due_to: Optional[datetime] = None
+    returning: bool = False
+
+class TaskBulkUpdate(TaskSelection):
+    """Apply the same changes (e.g. mark done, reschedule) to many tasks"""
+    changes: TaskUpdate
+
+class TaskBulkResult(BaseModel):
+    """Number of affected tasks, and the affected rows when requested"""
+    count: int
+    tasks: Optional[List[TaskResponse]] = None
@@ -0,0 +1,160 @@
+"""
+Production launcher: python run.py [port] [options]
+
+Runs the API in WEB_CONCURRENCY worker processes with uvicorn's fastest
+available event loop and HTTP parser (uvloop and httptools, installed
+with uvicorn[standard]). --reload runs a single auto-reloading worker
+for development instead.
+"""
+import argparse
+import importlib.util
+import os
+from pathlib import Path
+from typing import List, Optional
+from .config import settings
+
+APP = "app.main:app"
+# The directory containing the `app` package, so the launcher works from any cwd
+APP_DIR = str(Path(__file__).resolve().parent.parent)
+
+def cpu_count() -> int:
+    """CPU cores this process may run on (respects affinity/cpusets)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the VoiceTask AI API server")
+    parser.add_argument("port", nargs="?", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY,
+                        help="Worker processes (default: WEB_CONCURRENCY, 0 = one per CPU core)")
+    parser.add_argument("--reload", action="store_true",
+                        help="Development: one worker that restarts when code changes")
+    parser.add_argument("--preload", action="store_true", default=settings.SERVER_PRELOAD,
+                        help="Import the app once before forking workers (requires gunicorn)")
+    parser.add_argument("--keepalive", type=int, default=settings.SERVER_KEEPALIVE_TIMEOUT,
+                        help="Seconds an idle keep-alive connection stays open")
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT,
+                        help="Seconds to let in-flight requests finish on shutdown")
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG,
+                        help="Pending connections queued by the kernel")
+    parser.add_argument("--limit-concurrency", type=int, default=settings.SERVER_LIMIT_CONCURRENCY,
+                        help="Open connections per worker before answering 503 (0 = no limit)")
+    return parser.parse_args(argv)
+
+def worker_count(args: argparse.Namespace) -> int:
+    """
+    Worker processes to run: the --workers/WEB_CONCURRENCY value, else one
+    per core. memory:// stores are not shared between workers (stale task
+    lists and ETags, idempotent retries running twice, rate limits
+    multiplied by the worker count), so while any is configured the
+    default is one worker and asking for more is refused.
+
+    Raises:
+        ValueError: If more than one worker is requested with a memory:// store
+    """
+    if args.reload:
+        return 1
+    per_worker = per_worker_caches()
+    if not args.workers:
+        return 1 if per_worker else cpu_count()
+    if args.workers > 1 and per_worker:
+        raise ValueError(f"{', '.join(per_worker)} must be shared (redis://) or disabled "
+                         f"to run {args.workers} workers; each worker would keep its own copy")
+    return args.workers
+
+def server_options(args: argparse.Namespace) -> dict:
+    """
+    uvicorn.run() keyword arguments for the parsed command line
+
+    Raises:
+        ValueError: If the worker count is not safe with the configured stores
+    """
+    workers = worker_count(args)
+    return {
+        "host": args.host,
+        "port": args.port,
+        "workers": workers,
+        "reload": args.reload,
+        # "auto" picks uvloop/httptools when installed, else asyncio/h11
+        "loop": "auto",
+        "http": "auto",
+        "timeout_keep_alive": args.keepalive,
+        "timeout_graceful_shutdown": args.graceful_timeout,
+        "backlog": args.backlog,
+        "limit_concurrency": args.limit_concurrency or None,
+    }
+
+def per_worker_caches() -> List[str]:
+    """
+    Settings whose memory:// backend keeps separate state in every worker
+    """
+    urls = {
+        "TASK_CACHE_URL": settings.TASK_CACHE_URL,
+        "IDEMPOTENCY_CACHE_URL": settings.IDEMPOTENCY_CACHE_URL,
+        "VOICE_RATE_LIMIT_URL": settings.VOICE_RATE_LIMIT_URL,
+    }
+    return [name for name, url in urls.items() if url.startswith("memory://")]
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+def _run_gunicorn(options: dict) -> None:
+    """
+    Serve through gunicorn with uvicorn workers, importing the app once in
+    the master so workers share its memory copy-on-write. Clients are still
+    created per worker, by the lifespan handler after the fork.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+        from uvicorn.workers import UvicornWorker
+    except ImportError:
+        raise RuntimeError("The gunicorn package is required for --preload (pip install gunicorn)")
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": options["loop"],
+            "http": options["http"],
+            "timeout_graceful_shutdown": options["timeout_graceful_shutdown"],
+            "limit_concurrency": options["limit_concurrency"],
+        }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{options['host']}:{options['port']}")
+            self.cfg.set("workers", options["workers"])
+            self.cfg.set("worker_class", Worker)
+            self.cfg.set("preload_app", True)
+            self.cfg.set("keepalive", options["timeout_keep_alive"])
+            # The master kills workers that are still draining after this long
+            self.cfg.set("graceful_timeout", options["timeout_graceful_shutdown"] + 5)
+            self.cfg.set("backlog", options["backlog"])
+
+        def load(self):
+            from .main import app
+            return app
+
+    Application().run()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    try:
+        options = server_options(args)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+
+    loop = "uvloop" if _available("uvloop") else "asyncio"
+    parser = "httptools" if _available("httptools") else "h11"
+    print(f"Starting Voice-to-Task AI API server on {args.host}:{args.port}")
+    print(f"Workers: {options['workers']}, event loop: {loop}, HTTP parser: {parser}")
+    if not args.reload and not args.workers and per_worker_caches():
+        print(f"Running 1 worker because {', '.join(per_worker_caches())} is memory://; "
+              "use redis:// to run one per core")
+
+    if args.preload and not args.reload:
+        _run_gunicorn(options)
+        return
+
+    import uvicorn
+    uvicorn.run(APP, app_dir=APP_DIR, **options)
@@ -0,0 +1,82 @@
+import struct
+from typing import Optional
+
+# Used when the container does not say how long the recording is: 64 kbit/s
+# is at the low end for the AAC/Opus voice memos the app records, so the
+# estimate errs towards charging more seconds rather than fewer
+FALLBACK_BYTES_PER_SECOND = 8000
+
+# The densest audio a WAV header can plausibly describe: 48 kHz stereo
+# 32-bit float PCM. Header fields are client-controlled, so a WAV is never
+# charged fewer seconds than its size at this rate, and one claiming a
+# higher (or zero) byte rate is not trusted at all
+MAX_PLAUSIBLE_BYTES_PER_SECOND = 48000 * 2 * 4
+
+def _wav_duration(content: bytes) -> Optional[float]:
+    """Duration from the RIFF fmt and data chunks"""
+    if len(content) < 12 or content[:4] != b"RIFF" or content[8:12] != b"WAVE":
+        return None
+    position, byte_rate = 12, None
+    while position + 8 <= len(content):
+        chunk_id, size = content[position:position + 4], struct.unpack_from("<I", content, position + 4)[0]
+        body = position + 8
+        if chunk_id == b"fmt " and size >= 12:
+            byte_rate = struct.unpack_from("<I", content, body + 8)[0]
+            if not 0 < byte_rate <= MAX_PLAUSIBLE_BYTES_PER_SECOND:
+                return None
+        elif chunk_id == b"data" and byte_rate:
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF; trust the bytes we have
+            available = len(content) - body
+            return min(size, available) / byte_rate if 0 < size < 0xFFFFFFFF else available / byte_rate
+        position = body + size + (size & 1)
+    return None
+
+def _mp4_duration(content: bytes) -> Optional[float]:
+    """Duration from the movie header (moov/mvhd) of an MP4/M4A/MOV file"""
+    def boxes(start: int, end: int):
+        position = start
+        while position + 8 <= end:
+            size, kind = struct.unpack_from(">I4s", content, position)
+            header = 8
+            if size == 1 and position + 16 <= end:
+                size, header = struct.unpack_from(">Q", content, position + 8)[0], 16
+            elif size == 0:
+                size = end - position
+            if size < header:
+                return
+            yield kind, position + header, min(position + size, end)
+            position += size
+
+    if content[4:8] != b"ftyp":
+        return None
+    for kind, start, end in boxes(0, len(content)):
+        if kind != b"moov":
+            continue
+        for inner, body, inner_end in boxes(start, end):
+            if inner != b"mvhd" or inner_end - body < 20:
+                continue
+            if content[body] == 1:
+                if inner_end - body < 32:
+                    return None
+                timescale, duration = struct.unpack_from(">IQ", content, body + 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", content, body + 12)
+            return duration / timescale if timescale and duration else None
+    return None
+
+def audio_duration_seconds(content: bytes) -> float:
+    """
+    Length of a recording in seconds, read from the WAV or MP4/M4A header
+    when possible (no decoding), otherwise estimated from the size. Never
+    less than the size at MAX_PLAUSIBLE_BYTES_PER_SECOND for a WAV, or at
+    FALLBACK_BYTES_PER_SECOND for compressed audio, whatever the header
+    claims.
+    """
+    for parse, rate in ((_wav_duration, MAX_PLAUSIBLE_BYTES_PER_SECOND), (_mp4_duration, FALLBACK_BYTES_PER_SECOND)):
+        try:
+            duration = parse(content)
+        except struct.error:
+            duration = None
+        if duration is not None:
+            return max(duration, len(content) / rate)
+    return len(content) / FALLBACK_BYTES_PER_SECOND
@@ -0,0 +1,146 @@
+import importlib.metadata
+import importlib.util
+import shutil
+import subprocess
+import time
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+
+# Codecs ffmpeg needs a decoder for, by the extension the voice service
+# picks from the upload's header; unknown extensions are not filtered
+_CODECS_BY_EXTENSION = {
+    ".m4a": ("aac", "alac"),
+    ".mp4": ("aac", "alac"),
+    ".mp3": ("mp3", "mp3float"),
+    ".ogg": ("opus", "libopus", "vorbis", "libvorbis"),
+    ".webm": ("opus", "libopus", "vorbis", "libvorbis"),
+}
+# Whisper gets converted audio as 16-bit PCM WAV
+WAV_ENCODER = "pcm_s16le"
+
+_PROBE_TIMEOUT = 5
+
+class AudioCapabilities(NamedTuple):
+    """
+    Audio tooling found on this host by probe_audio_capabilities()
+    """
+    ffmpeg: Optional[str] = None
+    ffmpeg_version: Optional[str] = None
+    decoders: FrozenSet[str] = frozenset()
+    encoders: FrozenSet[str] = frozenset()
+    pydub: Optional[str] = None
+    numpy: Optional[str] = None
+    errors: Tuple[str, ...] = ()
+    probe_seconds: float = 0.0
+
+    def ffmpeg_can_convert(self, file_ext: str) -> bool:
+        """True if ffmpeg can turn a file with this extension into PCM WAV"""
+        if self.ffmpeg is None or WAV_ENCODER not in self.encoders:
+            return False
+        codecs = _CODECS_BY_EXTENSION.get(file_ext)
+        return codecs is None or any(codec in self.decoders for codec in codecs)
+
+    def report(self) -> dict:
+        return {
+            "ffmpeg": {
+                "available": self.ffmpeg is not None,
+                "path": self.ffmpeg,
+                "version": self.ffmpeg_version,
+                "audio_decoders": sorted(self.decoders),
+                "audio_encoders": sorted(self.encoders),
+            },
+            "pydub": {"available": self.pydub is not None, "version": self.pydub},
+            "numpy": {"available": self.numpy is not None, "version": self.numpy},
+            "conversions": {ext: self.ffmpeg_can_convert(ext) for ext in sorted(_CODECS_BY_EXTENSION)},
+            "errors": list(self.errors),
+            "probe_seconds": round(self.probe_seconds, 4),
+        }
+
+def conversion_strategies(capabilities: AudioCapabilities, file_ext: str) -> List[str]:
+    """
+    Fallback conversions worth trying for an upload Whisper rejected, in
+    order. pydub decodes compressed audio through ffmpeg too, so it is only
+    offered when ffmpeg can handle the format; wrapping the raw bytes in a
+    WAV header needs no tools and is always last.
+    """
+    strategies = []
+    if capabilities.ffmpeg_can_convert(file_ext):
+        strategies.append("ffmpeg")
+        if capabilities.pydub is not None:
+            strategies.append("pydub")
+    strategies.append("basic_wav")
+    return strategies
+
+def _package_version(name: str) -> Optional[str]:
+    """Installed version of a package, without importing it; None if missing"""
+    if importlib.util.find_spec(name) is None:
+        return None
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+def _ffmpeg_codecs(ffmpeg: str, kind: str) -> FrozenSet[str]:
+    """Audio codec names from `ffmpeg -decoders` / `ffmpeg -encoders`"""
+    output = subprocess.run(
+        [ffmpeg, "-hide_banner", f"-{kind}"],
+        capture_output=True, text=True, timeout=_PROBE_TIMEOUT, check=True,
+    ).stdout
+    _, _, table = output.partition("------")
+    codecs = set()
+    for line in table.splitlines():
+        fields = line.split()
+        if len(fields) >= 2 and fields[0].startswith("A"):
+            codecs.add(fields[1])
+    return frozenset(codecs)
+
+def probe_audio_capabilities(ffmpeg: Optional[str] = None) -> AudioCapabilities:
+    """
+    Look for ffmpeg (version and audio codecs), pydub and numpy. Runs a few
+    short subprocesses, so call it once at startup rather than per request.
+    """
+    start = time.perf_counter()
+    ffmpeg = ffmpeg or shutil.which("ffmpeg")
+    version, decoders, encoders, errors = None, frozenset(), frozenset(), []
+    if ffmpeg is not None:
+        try:
+            banner = subprocess.run(
+                [ffmpeg, "-hide_banner", "-version"],
+                capture_output=True, text=True, timeout=_PROBE_TIMEOUT, check=True,
+            ).stdout.split()
+            version = banner[2] if len(banner) > 2 and banner[1] == "version" else None
+            decoders = _ffmpeg_codecs(ffmpeg, "decoders")
+            encoders = _ffmpeg_codecs(ffmpeg, "encoders")
+        except (OSError, subprocess.SubprocessError) as e:
+            errors.append(f"ffmpeg at {ffmpeg} is not usable: {str(e)}")
+            ffmpeg = None
+    return AudioCapabilities(
+        ffmpeg=ffmpeg,
+        ffmpeg_version=version,
+        decoders=decoders,
+        encoders=encoders,
+        pydub=_package_version("pydub"),
+        numpy=_package_version("numpy"),
+        errors=tuple(errors),
+        probe_seconds=time.perf_counter() - start,
+    )
+
+# Probed once per worker, in the FastAPI lifespan (see app.main)
+_capabilities: Optional[AudioCapabilities] = None
+
+def init_audio_capabilities() -> AudioCapabilities:
+    """
+    Probe the host once; later calls return the first result
+    """
+    global _capabilities
+
+    if _capabilities is None:
+        _capabilities = probe_audio_capabilities()
+        for error in _capabilities.errors:
+            print(f"Audio capability probe: {error}")
+    return _capabilities
+
+def get_audio_capabilities() -> AudioCapabilities:
+    """
+    Returns the probed capabilities, probing now if startup did not
+    """
+    return _capabilities or init_audio_capabilities()
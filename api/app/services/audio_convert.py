@@ -0,0 +1,93 @@
+"""
+Audio conversions that run in the audio worker processes (see
+app/services/audio_pool.py), off the event loop
+
+Each function takes plain, picklable arguments (paths, command lines) and
+writes its output into the request's scratch directory. A function given
+the upload itself receives it as a buffer (a memoryview of shared memory
+for large uploads) and must not keep a reference to it after returning.
+"""
+import os
+import subprocess
+import time
+from typing import List, Optional, Tuple
+
+# 16 kHz mono 16-bit PCM, what the converters produce for Whisper
+WAV_SAMPLE_RATE = 16000
+WAV_BYTES_PER_SECOND = WAV_SAMPLE_RATE * 2
+
+def wav_header(data_size: int, sample_rate: int = WAV_SAMPLE_RATE) -> bytes:
+    """44-byte RIFF header for mono 16-bit PCM"""
+    header = bytearray()
+
+    # RIFF header
+    header.extend(b'RIFF')
+    header.extend((data_size + 36).to_bytes(4, 'little'))  # File size - 8
+    header.extend(b'WAVE')
+
+    # Format chunk
+    header.extend(b'fmt ')
+    header.extend((16).to_bytes(4, 'little'))  # Chunk size
+    header.extend((1).to_bytes(2, 'little'))   # Audio format (1 = PCM)
+    header.extend((1).to_bytes(2, 'little'))   # Num channels
+    header.extend((sample_rate).to_bytes(4, 'little'))  # Sample rate
+    header.extend((sample_rate * 2).to_bytes(4, 'little'))  # Byte rate
+    header.extend((2).to_bytes(2, 'little'))   # Block align
+    header.extend((16).to_bytes(2, 'little'))  # Bits per sample
+
+    # Data chunk
+    header.extend(b'data')
+    header.extend((data_size).to_bytes(4, 'little'))  # Chunk size
+    return bytes(header)
+
+def write_basic_wav(audio: memoryview, out_path: str) -> str:
+    """Wrap the raw upload bytes in a WAV header, as if they were 16 kHz PCM"""
+    with open(out_path, "wb") as f:
+        f.write(wav_header(len(audio)))
+        f.write(audio)
+    return out_path
+
+def run_ffmpeg(commands: List[List[str]], deadline: float) -> Tuple[int, str]:
+    """
+    Run ffmpeg command lines in order, stopping at the first failure;
+    returns the last (returncode, stderr). Each command gets whatever is
+    left until `deadline` (a time.time() value shared by every command of
+    the conversion) and is killed when it runs out.
+    """
+    returncode, stderr = 0, ""
+    for cmd in commands:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return -1, "ffmpeg conversion ran out of time"
+        try:
+            process = subprocess.run(cmd, capture_output=True, text=True, timeout=remaining, check=False)
+        except subprocess.TimeoutExpired:
+            return -1, f"ffmpeg timed out after {remaining:.1f}s"
+        returncode, stderr = process.returncode, process.stderr
+        if returncode != 0:
+            break
+    return returncode, stderr
+
+def pydub_to_wav(in_path: str, out_path: str) -> Optional[str]:
+    """Decode with pydub (m4a, else raw 16 kHz PCM) and export 16 kHz mono WAV"""
+    from pydub import AudioSegment
+
+    try:
+        audio = AudioSegment.from_file(in_path, format="m4a")
+    except Exception as pydub_error:
+        print(f"Pydub conversion failed: {str(pydub_error)}")
+
+        # Try raw format as fallback
+        try:
+            print("Trying pydub with raw format...")
+            audio = AudioSegment.from_file(in_path, format="raw",
+                                           frame_rate=WAV_SAMPLE_RATE, channels=1, sample_width=2)
+        except Exception as raw_error:
+            print(f"Pydub raw conversion failed: {str(raw_error)}")
+            return None
+
+    # Export as 16 kHz mono WAV, the same as the ffmpeg path (Whisper
+    # resamples to that anyway), so the output size stays bounded
+    audio.set_frame_rate(WAV_SAMPLE_RATE).set_channels(1).export(out_path, format="wav")
+    print(f"Pydub conversion successful, output size: {os.path.getsize(out_path)} bytes")
+    return out_path
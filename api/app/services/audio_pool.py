@@ -0,0 +1,193 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Optional
+from ..config import settings
+
+class AudioPoolBusy(Exception):
+    """Every worker process is busy and the queue is full"""
+
+class AudioPoolTimeout(Exception):
+    """A task ran past its timeout; its worker processes were replaced"""
+
+def _context():
+    """
+    forkserver where available: workers are forked from a small, clean
+    server process rather than from the threaded API worker
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+def _call(fn: Callable, payload, args: tuple):
+    """
+    Runs in the worker process: attach the shared memory block (if the
+    buffer came that way) and call fn(buffer, *args), or fn(*args) with no buffer
+    """
+    if isinstance(payload, tuple):
+        name, size = payload
+        shm = SharedMemory(name=name)
+        view = shm.buf[:size]
+        try:
+            return fn(view, *args)
+        finally:
+            view.release()
+            shm.close()
+    if payload is None:
+        return fn(*args)
+    return fn(payload, *args)
+
+class AudioWorkerPool:
+    """
+    Bounded process pool for CPU-heavy audio work (WAV building, pydub
+    decoding, ffmpeg runs, and later resampling or VAD), so it never runs
+    on the event loop thread
+
+    - Backpressure: at most `max_workers` tasks run and `max_queue` more
+      wait; beyond that run() raises AudioPoolBusy at once instead of
+      queueing without bound.
+    - Timeouts: a task that runs past its timeout raises AudioPoolTimeout.
+      Tasks wait for a free process before they are submitted, so only
+      running time counts. A running task cannot be cancelled, so the
+      pool's processes are terminated and replaced; other tasks running on
+      them fail too, tasks still waiting are unaffected.
+    - Buffers of `shm_threshold` bytes or more are handed over in a
+      shared memory block that the worker reads in place, instead of being
+      pickled through the pool's pipe.
+
+    Processes are started on first use, not at startup.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue: int = 8,
+        task_timeout: float = 60,
+        shm_threshold: int = 256 * 1024,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.task_timeout = task_timeout
+        self.shm_threshold = shm_threshold
+        self.in_flight = 0
+        self.tasks = 0
+        self.shared_memory = 0
+        self.busy = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # One per process: held from submission until the task is done
+        self._slots = asyncio.Semaphore(max_workers)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=_context())
+        return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Kill a pool whose task overran; the next run() starts a new one"""
+        if self._executor is executor:
+            self._executor = None
+        self.recycled += 1
+        # ProcessPoolExecutor has no public way to stop a running task
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable, *args, data: Optional[bytes] = None, timeout: Optional[float] = None):
+        """
+        Run fn(*args) in a worker process, or fn(data, *args) when `data`
+        is given, and return its result. `fn` must be a module-level function.
+
+        Raises:
+            AudioPoolBusy: If the pool and its queue are full
+            AudioPoolTimeout: If the task runs longer than `timeout` (default task_timeout)
+        """
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.busy += 1
+            raise AudioPoolBusy(f"Audio worker pool is full ({self.in_flight} tasks)")
+        self.in_flight += 1
+        # Queue here rather than in the executor, so the timeout below
+        # starts when a process is free to run the task
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self.in_flight -= 1
+            raise
+        shm = None
+        try:
+            payload = data
+            if data is not None and len(data) >= self.shm_threshold:
+                shm = SharedMemory(create=True, size=len(data))
+                shm.buf[:len(data)] = data
+                payload = (shm.name, len(data))
+                self.shared_memory += 1
+            executor = self._get_executor()
+            future = executor.submit(_call, fn, payload, args)
+        except BaseException:
+            self._release(shm)
+            raise
+        self.tasks += 1
+        # The slot, the in-flight count and the shared memory belong to the
+        # task, not the caller: they are freed when the worker is done with
+        # them, even if the caller is cancelled first
+        done = asyncio.wrap_future(future)
+        done.add_done_callback(functools.partial(self._finished, shm))
+        limit = timeout or self.task_timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(done), limit)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            # A task no process picked up yet is simply dropped
+            if not future.cancel():
+                self._recycle(executor)
+            raise AudioPoolTimeout(f"{getattr(fn, '__name__', fn)} did not finish within {limit}s")
+
+    def _release(self, shm: Optional[SharedMemory]) -> None:
+        self._slots.release()
+        self.in_flight -= 1
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    def _finished(self, shm: Optional[SharedMemory], done: asyncio.Future) -> None:
+        """Free what the task held once it has really finished"""
+        self._release(shm)
+        if not done.cancelled():
+            done.exception()  # retrieved here if the caller stopped waiting
+
+    async def close(self) -> None:
+        """Wait for running tasks and stop the worker processes"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """
+        Pool size, load and counters for this API worker
+        """
+        return {
+            "started": self._executor is not None,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "task_timeout": self.task_timeout,
+            "in_flight": self.in_flight,
+            "tasks": self.tasks,
+            "shared_memory_handoffs": self.shared_memory,
+            "busy": self.busy,
+            "timeouts": self.timeouts,
+            "recycled": self.recycled,
+        }
+
+def create_audio_pool() -> AudioWorkerPool:
+    """
+    Build the audio worker pool from settings
+    """
+    return AudioWorkerPool(
+        settings.AUDIO_POOL_WORKERS,
+        settings.AUDIO_POOL_MAX_QUEUE,
+        settings.AUDIO_POOL_TASK_TIMEOUT,
+        settings.AUDIO_POOL_SHM_THRESHOLD_KB * 1024,
+    )
@@ -1,13 +1,28 @@
-from datetime import datetime, timedelta
-from jose import jwt
-from ..db.supabase import get_supabase_client
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from jose import JWTError, jwt
+from supabase import Client
+from ..db.supabase import get_supabase_auth_client
 from ..config import settings
-from ..schemas.auth import UserCreate, UserLogin, UserResponse, Token
+from ..cache.revocations import RevocationList
+from ..repositories.base import TokenRevocationRepository
+from ..schemas.auth import UserCreate, UserLogin, UserResponse, Token, TokenPair
 from typing import Optional
 
+# Value of the "type" claim; refresh tokens are never accepted as access tokens
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
 class AuthService:
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(
+        self,
+        supabase: Optional[Client] = None,
+        revocation_repository: Optional[TokenRevocationRepository] = None,
+        revocations: Optional[RevocationList] = None,
+    ):
+        self.supabase = supabase or get_supabase_auth_client()
+        self.revocation_repository = revocation_repository
+        self.revocations = revocations
     
     async def register_user(self, user_data: UserCreate) -> Optional[UserResponse]:
         """
@@ -84,11 +99,11 @@ class AuthService:
                     full_name=user_metadata.get("full_name", "")
                 )
                 
-                # Create access token with JWT
-                access_token = self._create_access_token(str(user_response.id))
+                # Start a new session with an access and refresh token pair
+                tokens = self._issue_tokens(str(user_response.id), uuid4().hex)
                 
                 return Token(
-                    access_token=access_token,
+                    **tokens.model_dump(),
                     user=user_response
                 )
             return None
@@ -96,10 +111,94 @@ class AuthService:
             print(f"Error authenticating user: {str(e)}")
             return None
     
-    def _create_access_token(self, subject: str) -> str:
+    async def refresh_tokens(self, refresh_token: str) -> Optional[TokenPair]:
+        """
+        Exchange a refresh token for a new access and refresh token pair
+        
+        Each refresh token works once. Presenting one that was already
+        exchanged means it was copied, so the whole session is revoked and
+        None is returned, as for an invalid, expired or revoked token.
+        """
+        claims = self._decode_refresh_token(refresh_token)
+        if claims is None:
+            return None
+        subject, session_id = claims["sub"], claims["sid"]
+        
+        if self.revocations is not None:
+            # Pick up logouts from other workers before trusting the session
+            await self.revocations.sync()
+            if self.revocations.is_revoked(session_id):
+                return None
+        
+        first_use = await self.revocation_repository.revoke_tokens([{
+            "token_id": claims["jti"],
+            "kind": REFRESH_TOKEN_TYPE,
+            "user_id": subject,
+            "expires_at": datetime.fromtimestamp(claims["exp"], timezone.utc).isoformat(),
+        }])
+        if not first_use:
+            print(f"Refresh token reused, revoking session {session_id}")
+            await self.revoke_session(subject, session_id)
+            return None
+        
+        return self._issue_tokens(subject, session_id)
+    
+    async def logout(self, refresh_token: str) -> bool:
+        """
+        Revoke the session of a refresh token, invalidating its access tokens
+        """
+        claims = self._decode_refresh_token(refresh_token)
+        if claims is None:
+            return False
+        await self.revoke_session(claims["sub"], claims["sid"])
+        return True
+    
+    async def revoke_session(self, subject: str, session_id: str) -> None:
+        """
+        Revoke every token of a session, in this worker at once and in the
+        others at their next revocation sync
+        """
+        # Refresh tokens slide, so cover any one issued up to now
+        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        await self.revocation_repository.revoke_tokens([{
+            "token_id": session_id,
+            "kind": "session",
+            "user_id": subject,
+            "expires_at": expires_at.isoformat(),
+        }])
+        if self.revocations is not None:
+            self.revocations.add(session_id, subject, expires_at)
+    
+    def _issue_tokens(self, subject: str, session_id: str) -> TokenPair:
+        return TokenPair(
+            access_token=self._create_access_token(subject, session_id),
+            refresh_token=self._create_refresh_token(subject, session_id),
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        )
+    
+    def _create_access_token(self, subject: str, session_id: Optional[str] = None) -> str:
         """
         Create a JWT access token
         """
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        to_encode = {"sub": subject, "exp": expire}
-        return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM) 
\ No newline at end of file
+        to_encode = {"sub": subject, "exp": expire, "type": ACCESS_TOKEN_TYPE}
+        if session_id:
+            to_encode["sid"] = session_id
+        return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    
+    def _create_refresh_token(self, subject: str, session_id: str) -> str:
+        """
+        Create a single-use JWT refresh token for a session
+        """
+        expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        to_encode = {"sub": subject, "exp": expire, "type": REFRESH_TOKEN_TYPE, "sid": session_id, "jti": uuid4().hex}
+        return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    
+    def _decode_refresh_token(self, token: str) -> Optional[dict]:
+        try:
+            claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        if claims.get("type") != REFRESH_TOKEN_TYPE or not all(claims.get(k) for k in ("sub", "sid", "jti", "exp")):
+            return None
+        return claims
\ No newline at end of file
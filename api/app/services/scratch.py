@@ -0,0 +1,252 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+from ..config import settings
+
+# Directory under the scratch root shared by every worker on the host
+_BASE_NAME = "voicetask-scratch"
+_WORKER_PREFIX = "worker-"
+
+class ScratchQuotaExceeded(Exception):
+    """The scratch quota stayed full for the whole wait, or a request outgrew its reservation"""
+
+def default_scratch_root() -> str:
+    """
+    /dev/shm (tmpfs) when it is available and writable, so conversions do
+    no disk I/O; otherwise the system temp directory
+    """
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK | os.X_OK):
+        return shm
+    return tempfile.gettempdir()
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _remove(path: Path) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+
+class ScratchDir:
+    """
+    One request's working directory; everything in it is deleted when the
+    request's scratch() block exits
+    """
+
+    def __init__(self, path: Path, reserved: int):
+        self.path = path
+        self.reserved = reserved
+
+    def file(self, name: str) -> str:
+        """Path for a file in this directory (for tools that write their own output)"""
+        return str(self.path / name)
+
+    def write(self, name: str, content: bytes) -> str:
+        """Write a file, checking the result still fits the reservation"""
+        path = self.file(name)
+        with open(path, "wb") as f:
+            f.write(content)
+        self.enforce()
+        return path
+
+    def usage(self) -> int:
+        return sum(entry.stat().st_size for entry in self.path.iterdir() if entry.is_file())
+
+    def remaining(self) -> int:
+        """Bytes still free in the reservation (e.g. for ffmpeg -fs)"""
+        return max(0, self.reserved - self.usage())
+
+    def enforce(self) -> None:
+        """
+        Raises:
+            ScratchQuotaExceeded: If the files written so far exceed the reservation
+        """
+        used = self.usage()
+        if used > self.reserved:
+            raise ScratchQuotaExceeded(f"Scratch directory holds {used} bytes, {self.reserved} reserved")
+
+class ScratchSpace:
+    """
+    Per-worker scratch space for audio conversions
+
+    Each request gets its own directory under
+    <root>/voicetask-scratch/worker-<pid>/, removed when the request ends,
+    whether it succeeded, failed or was cancelled. A request reserves its
+    expected size up front; reservations share `quota_bytes`, and a request
+    that does not fit waits up to `wait_timeout` seconds for others to
+    finish, so concurrent conversions cannot fill the disk (or RAM, on
+    tmpfs) however hard the worker is loaded.
+
+    A background reaper removes what a crash leaves behind: directories of
+    workers that are no longer running (or stopped touching their
+    directory), and request directories older than `orphan_age`.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        quota_bytes: int = 256 * 1024 * 1024,
+        wait_timeout: float = 10,
+        orphan_age: float = 600,
+        reap_interval: float = 60,
+    ):
+        self.base = Path(root or default_scratch_root()) / _BASE_NAME
+        self.worker_dir = self.base / f"{_WORKER_PREFIX}{os.getpid()}"
+        self.quota_bytes = quota_bytes
+        self.wait_timeout = wait_timeout
+        self.orphan_age = orphan_age
+        self.reap_interval = reap_interval
+        self.reserved = 0
+        self.active = 0
+        self.requests = 0
+        self.waits = 0
+        self.rejected = 0
+        self.reaped = 0
+        self._available = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _reserve(self, size: int) -> None:
+        if size > self.quota_bytes:
+            self.rejected += 1
+            raise ScratchQuotaExceeded(f"{size} bytes of scratch space requested, the quota is {self.quota_bytes}")
+        async with self._available:
+            if self.reserved + size > self.quota_bytes:
+                self.waits += 1
+                try:
+                    await asyncio.wait_for(
+                        self._available.wait_for(lambda: self.reserved + size <= self.quota_bytes),
+                        self.wait_timeout
+                    )
+                except asyncio.TimeoutError:
+                    self.rejected += 1
+                    raise ScratchQuotaExceeded("Scratch space quota is full, try again later")
+            self.reserved += size
+
+    async def _release(self, size: int) -> None:
+        async with self._available:
+            self.reserved -= size
+            self._available.notify_all()
+
+    @asynccontextmanager
+    async def request(self, size: int):
+        """
+        Reserve `size` bytes and yield a fresh ScratchDir, deleted on exit
+
+        Raises:
+            ScratchQuotaExceeded: If the reservation does not fit within wait_timeout
+        """
+        await self._reserve(size)
+        path = self.worker_dir / uuid.uuid4().hex
+        try:
+            path.mkdir(parents=True)
+            self.active += 1
+            self.requests += 1
+            try:
+                yield ScratchDir(path, size)
+            finally:
+                self.active -= 1
+                _remove(path)
+        finally:
+            await self._release(size)
+
+    def reap(self) -> int:
+        """
+        Remove orphaned scratch directories; returns how many were removed
+        """
+        removed = 0
+        now = time.time()
+        self.worker_dir.mkdir(parents=True, exist_ok=True)
+        # Heartbeat: other workers treat a worker directory untouched for
+        # longer than orphan_age as abandoned, even if its pid was reused
+        os.utime(self.worker_dir)
+        for entry in self.base.iterdir():
+            if entry == self.worker_dir or not entry.name.startswith(_WORKER_PREFIX):
+                continue
+            try:
+                pid = int(entry.name[len(_WORKER_PREFIX):])
+                stale = now - entry.stat().st_mtime > max(self.orphan_age, 3 * self.reap_interval)
+            except (ValueError, OSError):
+                continue
+            if stale or not _pid_alive(pid):
+                _remove(entry)
+                removed += 1
+        for entry in self.worker_dir.iterdir():
+            try:
+                if now - entry.stat().st_mtime > self.orphan_age:
+                    _remove(entry)
+                    removed += 1
+            except OSError:
+                continue
+        self.reaped += removed
+        return removed
+
+    async def _try_reap(self) -> None:
+        try:
+            await asyncio.to_thread(self.reap)
+        except Exception as e:
+            print(f"Error reaping scratch space: {str(e)}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            await self._try_reap()
+
+    async def start(self) -> None:
+        """
+        Clear what crashed workers left behind, then keep reaping in the background
+        """
+        if self._task is None:
+            await self._try_reap()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the reaper and remove this worker's directory
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        _remove(self.worker_dir)
+
+    def stats(self) -> dict:
+        """
+        Quota use and counters for this worker
+        """
+        return {
+            "root": str(self.base),
+            "tmpfs": str(self.base).startswith("/dev/shm"),
+            "quota_bytes": self.quota_bytes,
+            "reserved_bytes": self.reserved,
+            "active": self.active,
+            "requests": self.requests,
+            "waits": self.waits,
+            "rejected": self.rejected,
+            "reaped": self.reaped,
+        }
+
+def create_scratch_space() -> ScratchSpace:
+    """
+    Build the worker's scratch space from settings
+    """
+    return ScratchSpace(
+        settings.SCRATCH_DIR or None,
+        settings.SCRATCH_QUOTA_MB * 1024 * 1024,
+        settings.SCRATCH_WAIT_TIMEOUT,
+        settings.SCRATCH_ORPHAN_AGE,
+        settings.SCRATCH_REAP_INTERVAL,
+    )
@@ -1,68 +1,435 @@
-from typing import List, Optional
-from uuid import UUID
-from ..db.supabase import get_supabase_client
-from ..schemas.task import TaskCreate, TaskUpdate, TaskResponse
+import base64
+import json
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple, Union
+from uuid import UUID, uuid4
+from pydantic import ValidationError
+from ..config import settings
+from ..repositories.base import TaskRepository
+from ..repositories.factory import create_task_repository
+from ..schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskOperation, TaskSelection
+
+logger = logging.getLogger(__name__)
+
+TASK_STATUSES = ("To Do", "In Progress", "Done")
+
+# Columns GET /tasks can be sorted by; prefix with "-" for descending.
+# Ties are broken by id so the (sort, id) pair is a unique keyset position.
+SORT_FIELDS = ("updated_at", "created_at", "due_date")
+DEFAULT_SORT = "-updated_at"
+
+def _parse_sort(sort: str) -> Tuple[str, bool]:
+    field = sort.lstrip("-")
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Invalid sort '{sort}'. Must be one of: {', '.join(SORT_FIELDS)} (prefix with '-' for descending)")
+    return field, sort.startswith("-")
+
+def _b64_json(payload: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def _from_b64_json(cursor: str, error: str = "Invalid cursor") -> dict:
+    """Decode a cursor made by _b64_json; ValueError(error) if it is not one"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode((cursor + "=" * (-len(cursor) % 4)).encode()))
+    except (ValueError, TypeError):
+        raise ValueError(error)
+    if not isinstance(payload, dict):
+        raise ValueError(error)
+    return payload
+
+def _encode_cursor(sort: str, task: dict) -> str:
+    field, _ = _parse_sort(sort)
+    return _b64_json({"s": sort, "v": task.get(field), "id": str(task["id"])})
+
+def _decode_cursor(sort: str, cursor: str) -> Tuple[Optional[str], str]:
+    payload = _from_b64_json(cursor)
+    try:
+        value, last_id = payload["v"], str(UUID(payload["id"]))
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if payload.get("s") != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    return value, last_id
+
+class SyncCursorExpired(ValueError):
+    """The sync cursor predates the tombstone retention window"""
+
+def _encode_sync_cursor(updated: Optional[list], deleted: Optional[list], issued_at: datetime) -> str:
+    return _b64_json({"u": updated, "d": deleted, "t": int(issued_at.timestamp())})
+
+def _decode_sync_cursor(cursor: str) -> Tuple[Optional[Tuple[str, str]], Optional[Tuple[str, str]], datetime]:
+    payload = _from_b64_json(cursor, "Invalid sync cursor")
+    try:
+        updated = (payload["u"][0], str(UUID(payload["u"][1]))) if payload["u"] else None
+        deleted = (payload["d"][0], str(UUID(payload["d"][1]))) if payload["d"] else None
+        issued_at = datetime.fromtimestamp(payload["t"], timezone.utc)
+    except (ValueError, KeyError, TypeError, IndexError, OverflowError):
+        raise ValueError("Invalid sync cursor")
+    return updated, deleted, issued_at
+
+# Keyset position before every task id, for a sync mark that is only a time
+_NIL_ID = "00000000-0000-0000-0000-000000000000"
+
+def _rewind(mark: Optional[Tuple[str, str]], floor: datetime) -> Tuple[str, str]:
+    """The earlier of a sync high-water mark and (floor, before any id)"""
+    if mark is not None and _parse_timestamp(mark[0]) <= floor:
+        return mark
+    return (floor.isoformat(), _NIL_ID)
+
+def _encode_search_cursor(query: str, task: dict) -> str:
+    return _b64_json({"q": query, "r": task["rank"], "id": str(task["id"])})
+
+def _decode_search_cursor(query: str, cursor: str) -> Tuple[float, str]:
+    payload = _from_b64_json(cursor)
+    try:
+        rank, last_id = float(payload["r"]), str(UUID(payload["id"]))
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if payload.get("q") != query:
+        raise ValueError("Cursor was issued for a different search query")
+    return rank, last_id
+
+def local_timezone(timezone_offset_minutes: Optional[int]) -> timezone:
+    """
+    Fixed-offset timezone from a JavaScript getTimezoneOffset() value
+    (minutes behind UTC, so 420 is UTC-7), as sent to /voice/process
+    """
+    return timezone(timedelta(minutes=-(timezone_offset_minutes or 0)))
+
+def _encode_agenda_cursor(day: date, timezone_offset_minutes: int, task: dict) -> str:
+    return _b64_json({"d": day.isoformat(), "o": timezone_offset_minutes, "v": task["due_date"], "id": str(task["id"])})
+
+def _decode_agenda_cursor(cursor: str) -> Tuple[date, int, Tuple[str, str]]:
+    payload = _from_b64_json(cursor)
+    try:
+        day, offset = date.fromisoformat(payload["d"]), int(payload["o"])
+        after = (str(payload["v"]), str(UUID(payload["id"])))
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    return day, offset, after
+
+def _parse_timestamp(value: Union[str, datetime]) -> datetime:
+    timestamp = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+# Columns written when replaying offline operations. A bulk upsert needs
+# the same keys on every row; timestamps are left to the database.
+SYNC_COLUMNS = ("id", "user_id", "title", "status", "description", "due_date", "priority")
+
+# Columns a client may request with `fields=` (sparse fieldsets)
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated `fields` parameter into a column list.
+    Returns None (all columns) when no fields are given.
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in TASK_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Must be among: {', '.join(TASK_FIELDS)}")
+    # The id is always returned so sparse tasks stay addressable
+    return list(dict.fromkeys(["id"] + requested))
 
 class TaskService:
-    def __init__(self):
-        self.supabase = get_supabase_client()
-        self.table = "tasks"
+    def __init__(self, repository: Optional[TaskRepository] = None):
+        self.repository = repository or create_task_repository()
     
     async def get_tasks(self, user_id: str, status: Optional[str] = None) -> List[dict]:
         """
         Get all tasks for a user, optionally filtered by status
         """
-        query = self.supabase.table(self.table).select("*").eq("user_id", user_id)
+        return await self.repository.list_tasks(user_id, status)
+    
+    async def get_tasks_page(
+        self,
+        user_id: str,
+        status: Optional[str] = None,
+        sort: str = DEFAULT_SORT,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> dict:
+        """
+        Get one page of a user's tasks using keyset pagination
         
-        if status:
-            query = query.eq("status", status)
+        Args:
+            user_id: The user's UUID
+            status: Optional status filter
+            sort: Sort column, prefixed with "-" for descending order
+            limit: Page size, capped at TASKS_PAGE_SIZE_MAX
+            cursor: Opaque cursor from a previous page's next_cursor
+            fields: Columns to fetch (see parse_fields); all when None
             
-        response = query.execute()
-        return response.data
+        Returns:
+            Dict with "items" and "next_cursor" (None on the last page)
+            
+        Raises:
+            ValueError: If the sort or cursor is invalid
+        """
+        field, descending = _parse_sort(sort)
+        after = _decode_cursor(sort, cursor) if cursor else None
+        limit = min(limit or settings.TASKS_PAGE_SIZE_DEFAULT, settings.TASKS_PAGE_SIZE_MAX)
+        
+        # The sort column is needed to build the cursor even when not requested
+        columns = list(dict.fromkeys(fields + [field])) if fields else None
+        
+        # Fetch one extra row to learn whether another page exists
+        tasks = await self.repository.list_tasks_page(user_id, status, field, descending, limit + 1, after, columns)
+        
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = _encode_cursor(sort, tasks[-1])
+        
+        if fields and field not in fields:
+            for task in tasks:
+                task.pop(field, None)
+        
+        return {"items": tasks, "next_cursor": next_cursor}
     
-    async def get_task(self, task_id: str, user_id: str) -> Optional[dict]:
+    async def search_tasks(
+        self,
+        user_id: str,
+        query: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> dict:
         """
-        Get a specific task by ID for a user
+        Full-text search over the user's task titles and descriptions
+        
+        Matching and ranking run in the database against the GIN-indexed
+        search_vector column; title matches rank above description matches.
+        The query uses web search syntax: words are ANDed, "quoted phrases",
+        `or` and -excluded words are supported, and English stemming
+        applies ("dentists" finds "dentist").
+        
+        Args:
+            user_id: The user's UUID
+            query: The search text
+            limit: Page size, capped at TASKS_PAGE_SIZE_MAX
+            cursor: Opaque cursor from a previous page's next_cursor
+            
+        Returns:
+            Dict with "items" (best match first, each with its "rank") and
+            "next_cursor" (None on the last page)
+            
+        Raises:
+            ValueError: If the query is blank or the cursor is invalid
         """
-        response = self.supabase.table(self.table).select("*").eq("id", task_id).eq("user_id", user_id).limit(1).execute()
+        query = query.strip()
+        if not query:
+            raise ValueError("Search query must not be empty")
+        after = _decode_search_cursor(query, cursor) if cursor else None
+        limit = min(limit or settings.TASKS_PAGE_SIZE_DEFAULT, settings.TASKS_PAGE_SIZE_MAX)
         
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        return None
+        # Fetch one extra row to learn whether another page exists
+        tasks = await self.repository.search_tasks(user_id, query, limit + 1, after)
+        
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = _encode_search_cursor(query, tasks[-1])
+        
+        return {"items": tasks, "next_cursor": next_cursor}
     
-    async def _ensure_user_exists(self, user_id: str) -> bool:
-        """
-        Check if user exists in the users table, create if not
+    async def get_agenda(
+        self,
+        user_id: str,
+        start: date,
+        end: date,
+        timezone_offset_minutes: Optional[int] = None,
+        status: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> dict:
         """
-        # First check if user exists
-        response = self.supabase.table("users").select("*").eq("id", user_id).limit(1).execute()
+        Get the user's tasks due between two local dates, grouped by local day
         
-        if response.data and len(response.data) > 0:
-            return True
+        Each local day is a [midnight, next midnight) range of due_date in
+        UTC, read with a range scan on the (user_id, due_date, id) index and
+        paginated on its own. Without a cursor every day of the range is
+        returned (empty days included) with its first page; a day's
+        next_cursor, sent with the same range and offset, returns only that
+        day's next page.
+        
+        Args:
+            user_id: The user's UUID
+            start: First local date, inclusive
+            end: Last local date, inclusive
+            timezone_offset_minutes: getTimezoneOffset() of the client
+                (same convention as /voice/process); UTC when None
+            status: Only tasks with one of these statuses
+            limit: Page size per day, capped at TASKS_PAGE_SIZE_MAX
+            cursor: A day's next_cursor from a previous call
             
-        # For testing purposes, create the user if it doesn't exist
-        try:
-            user_data = {
-                "id": user_id,
-                "email": f"auto-created-{user_id[:8]}@example.com",
-                "created_at": "now()",
-                "updated_at": "now()"
-            }
+        Returns:
+            Dict with "days" (each {"date", "items", "next_cursor"}, in date
+            order) and the "timezone_offset" used
             
-            self.supabase.table("users").insert(user_data).execute()
-            return True
-        except Exception as e:
-            print(f"Error creating user: {e}")
-            return False
+        Raises:
+            ValueError: If the range is empty or longer than
+                TASK_AGENDA_MAX_DAYS, or the cursor does not belong to it
+        """
+        offset = timezone_offset_minutes or 0
+        if end < start:
+            raise ValueError("end must not be before start")
+        if (end - start).days + 1 > settings.TASK_AGENDA_MAX_DAYS:
+            raise ValueError(f"Date range too long; at most {settings.TASK_AGENDA_MAX_DAYS} days")
+        limit = min(limit or settings.TASKS_PAGE_SIZE_DEFAULT, settings.TASKS_PAGE_SIZE_MAX)
+        
+        if cursor:
+            day, cursor_offset, after = _decode_agenda_cursor(cursor)
+            if cursor_offset != offset or not start <= day <= end:
+                raise ValueError("Cursor was issued for a different date range or timezone")
+            days = [(day, after)]
+        else:
+            days = [(start + timedelta(days=i), None) for i in range((end - start).days + 1)]
+        
+        tz = local_timezone(offset)
+        def utc_midnight(day: date) -> str:
+            return datetime.combine(day, time.min, tzinfo=tz).astimezone(timezone.utc).isoformat()
+        
+        # Fetch one extra row per day to learn whether another page exists
+        windows = tuple((utc_midnight(day), utc_midnight(day + timedelta(days=1)), after) for day, after in days)
+        pages = await self.repository.list_tasks_due(user_id, windows, limit + 1, status)
+        
+        result = []
+        for (day, _), tasks in zip(days, pages):
+            next_cursor = None
+            if len(tasks) > limit:
+                tasks = tasks[:limit]
+                next_cursor = _encode_agenda_cursor(day, offset, tasks[-1])
+            result.append({"date": day, "items": tasks, "next_cursor": next_cursor})
+        
+        return {"days": result, "timezone_offset": offset}
     
-    async def create_task(self, user_id: str, task_data: TaskCreate) -> Optional[dict]:
+    async def get_changes(self, user_id: str, since: Optional[str] = None, limit: Optional[int] = None) -> dict:
         """
-        Create a new task for a user
+        Get the tasks changed and deleted since a sync cursor (delta sync)
+        
+        The cursor holds two high-water marks: the last (updated_at, id) of
+        changed tasks and the last (deleted_at, task_id) of tombstones. Both
+        are keyset range scans, so a sync costs O(changes) rather than
+        O(all tasks). Without `since` every task is returned (paged) and
+        existing tombstones are skipped, since the client has nothing to
+        delete yet.
+        
+        Rows are stamped before they commit (updated_at is the transaction
+        start), so a row can become visible behind a mark already handed
+        out. The last page of a sync therefore rewinds both marks to
+        TASK_SYNC_OVERLAP_SECONDS before the call, and the next sync
+        re-reads that window: clients must apply changes and deletions by
+        id, as repeats are expected. Within one response a task is never
+        both changed and deleted.
+        
+        Args:
+            user_id: The user's UUID
+            since: next_cursor from a previous call, or None for a full sync
+            limit: Maximum number of changed tasks and of deletions per call
+            
+        Returns:
+            Dict with "changes" (task rows), "deleted" (tombstones),
+            "next_cursor" and "has_more" (call again with next_cursor
+            right away when True)
+            
+        Raises:
+            SyncCursorExpired: If the cursor is older than the tombstone
+                retention window; the client must resync from scratch
+            ValueError: If the cursor is malformed
         """
-        # Make sure the user exists first
-        # await self._ensure_user_exists(user_id)
+        limit = min(limit or settings.TASKS_PAGE_SIZE_DEFAULT, settings.TASKS_PAGE_SIZE_MAX)
+        issued_at = datetime.now(timezone.utc)
+        overlap = timedelta(seconds=settings.TASK_SYNC_OVERLAP_SECONDS)
+        
+        if since:
+            updated_mark, deleted_mark, since_issued = _decode_sync_cursor(since)
+            # The next sync reads tombstones from the overlap window before
+            # the cursor was issued; those must not have been purged yet
+            horizon = timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS, seconds=-overlap.total_seconds())
+            if issued_at - since_issued > horizon:
+                raise SyncCursorExpired("Sync cursor has expired; resync from scratch")
+            deleted = await self.repository.list_tombstones(user_id, limit + 1, deleted_mark)
+        else:
+            updated_mark = None
+            latest = await self.repository.list_tombstones(user_id, 1, descending=True)
+            deleted_mark = (latest[0]["deleted_at"], str(latest[0]["task_id"])) if latest else None
+            deleted = []
         
-        data = {
+        # Fetch one extra row of each to learn whether more remain
+        changes = await self.repository.list_tasks_page(user_id, None, "updated_at", False, limit + 1, updated_mark)
+        has_more = len(changes) > limit or len(deleted) > limit
+        changes, deleted = changes[:limit], deleted[:limit]
+        
+        if changes:
+            updated_mark = (changes[-1]["updated_at"], str(changes[-1]["id"]))
+        if deleted:
+            deleted_mark = (deleted[-1]["deleted_at"], str(deleted[-1]["task_id"]))
+        if not has_more:
+            updated_mark = _rewind(updated_mark, issued_at - overlap)
+            deleted_mark = _rewind(deleted_mark, issued_at - overlap)
+        
+        # A task that exists now was recreated after any tombstone of its id
+        live = {str(task["id"]) for task in changes}
+        return {
+            "changes": changes,
+            "deleted": [{"id": t["task_id"], "deleted_at": t["deleted_at"]} for t in deleted if str(t["task_id"]) not in live],
+            "next_cursor": _encode_sync_cursor(
+                list(updated_mark) if updated_mark else None,
+                list(deleted_mark) if deleted_mark else None,
+                issued_at
+            ),
+            "has_more": has_more
+        }
+    
+    async def get_stats(self, user_id: str) -> dict:
+        """
+        Get dashboard statistics for the user's tasks
+        
+        Served from per-user counters that database triggers keep current
+        on every create, update and delete, so the cost does not depend on
+        how many tasks the user has.
+        
+        Returns:
+            Dict with "total", "by_status" (every status, zero if none),
+            "overdue" (open tasks due before now) and "completion_rate"
+            (Done / total, 0.0 with no tasks)
+        """
+        stats = await self.repository.get_task_stats(user_id)
+        by_status = {status: 0 for status in TASK_STATUSES}
+        by_status.update({status: int(count) for status, count in stats["status_counts"].items()})
+        total = sum(by_status.values())
+        return {
+            "total": total,
+            "by_status": by_status,
+            "overdue": int(stats["overdue"]),
+            "completion_rate": by_status.get("Done", 0) / total if total else 0.0
+        }
+    
+    async def get_tasks_version(self, user_id: str) -> str:
+        """
+        Get a version token for the user's whole task set, derived from the
+        task count and the latest updated_at. Any create, update or delete
+        changes it, so it can back ETags without reading task rows.
+        """
+        version = await self.repository.get_tasks_version(user_id)
+        return f"{version['count']}:{version['updated_at']}"
+    
+    async def get_task(self, task_id: str, user_id: str, fields: Optional[List[str]] = None) -> Optional[dict]:
+        """
+        Get a specific task by ID for a user, optionally only the given fields
+        """
+        return await self.repository.get_task(task_id, user_id, fields)
+    
+    @staticmethod
+    def _task_row(user_id: str, task_data: TaskCreate) -> dict:
+        """
+        Build the database row for a new task
+        """
+        return {
             "user_id": user_id,
             "title": task_data.title,
             "status": task_data.status,
@@ -70,18 +437,264 @@ class TaskService:
             "due_date": task_data.due_date.isoformat() if task_data.due_date else None,
             "priority": task_data.priority
         }
+    
+    async def create_task(self, user_id: str, task_data: TaskCreate) -> Optional[dict]:
+        """
+        Create a new task for a user
+        """
+        data = self._task_row(user_id, task_data)
         
         print(f"[TaskService] Attempting to create task in Supabase with data: {data}") # Log before insert
         
-        response = self.supabase.table(self.table).insert(data).execute()
+        task = await self.repository.insert_task(data)
         
-        if response.data and len(response.data) > 0:
-            print(f"[TaskService] Successfully created task in Supabase. Response: {response.data[0]}") # Log success
-            return response.data[0]
+        if task:
+            print(f"[TaskService] Successfully created task in Supabase. Response: {task}") # Log success
+            return task
         else:
-            print(f"[TaskService] Failed to create task in Supabase. Response: {response}") # Log failure/empty response
+            print(f"[TaskService] Failed to create task in Supabase. Response: {task}") # Log failure/empty response
             return None
     
+    async def create_tasks(self, user_id: str, tasks: Sequence[Union[TaskCreate, dict]]) -> List[dict]:
+        """
+        Create several tasks for a user in a single insert (e.g. all tasks
+        extracted from one voice note)
+        
+        Returns the created rows in the same order as the input.
+        
+        Failure semantics (all-or-nothing):
+        - Every item is validated before anything is written; if any item is
+          invalid a ValueError naming the offending indexes is raised and no
+          task is created.
+        - The insert is a single statement, so a database error creates no
+          tasks and propagates to the caller.
+        - An empty input returns an empty list without a database call.
+        """
+        task_creates = []
+        errors = []
+        for index, item in enumerate(tasks):
+            try:
+                task_creates.append(item if isinstance(item, TaskCreate) else TaskCreate.model_validate(item))
+            except ValidationError as e:
+                errors.append(f"task {index}: {e.errors()[0]['msg']}")
+        
+        if errors:
+            raise ValueError(f"Invalid tasks, nothing was created: {'; '.join(errors)}")
+        
+        if not task_creates:
+            return []
+        
+        # Assign IDs up front so the returned rows can be matched back to
+        # their input position regardless of the order the database uses
+        rows = []
+        for task_create in task_creates:
+            row = self._task_row(user_id, task_create)
+            row["id"] = str(uuid4())
+            rows.append(row)
+        
+        logger.debug("Creating %d tasks in one insert", len(rows))
+        
+        created = await self.repository.insert_tasks(rows)
+        created_by_id = {str(task["id"]): task for task in created}
+        ordered = [created_by_id[row["id"]] for row in rows if row["id"] in created_by_id]
+        
+        if len(ordered) != len(rows):
+            logger.warning("Insert returned %d of %d tasks", len(ordered), len(rows))
+        
+        return ordered
+    
+    async def apply_operations(self, user_id: str, operations: Sequence[TaskOperation]) -> List[dict]:
+        """
+        Replay an ordered batch of offline create/update/delete operations
+        
+        The batch costs at most six round trips whatever its size: look up
+        already-applied op IDs, read the referenced tasks, delete, insert
+        creates, update edited tasks, and record the applied op IDs.
+        Operations are resolved in order against an in-memory copy of the
+        tasks, so later operations see the effect of earlier ones.
+        
+        Conflict rules (last writer wins by updated_at):
+        - update/delete apply only if the server's updated_at is not newer
+          than the operation's updated_at (the device edit time; now if
+          omitted), otherwise the result is "conflict" with the server task
+        - update/delete of a missing task is "not_found"
+        - create with a client task_id that already exists is "conflict",
+          whoever owns the existing task; it is never overwritten
+        - update of a task deleted while the batch ran is "not_found"; it
+          is not recreated
+        - an operation with invalid data is "invalid"; it does not stop
+          the rest of the batch
+        
+        Operations whose op_id was already applied are skipped and report
+        their original status with replayed=True. If a write fails the
+        error propagates and no op IDs are recorded, so the client retries
+        the whole batch.
+        
+        Returns:
+            One result dict per operation, in request order
+            
+        Raises:
+            ValueError: If the batch is larger than TASK_SYNC_MAX_OPERATIONS
+        """
+        if len(operations) > settings.TASK_SYNC_MAX_OPERATIONS:
+            raise ValueError(f"Too many operations; at most {settings.TASK_SYNC_MAX_OPERATIONS} per batch")
+        if not operations:
+            return []
+        
+        op_ids = list(dict.fromkeys(op.op_id for op in operations))
+        seen = {op["op_id"]: op for op in await self.repository.list_operations(user_id, op_ids)}
+        
+        task_ids = {str(op.task_id) for op in operations if op.task_id and op.op_id not in seen}
+        server = {str(task["id"]): task for task in await self.repository.get_tasks_by_ids(user_id, list(task_ids))}
+        
+        state = dict(server)
+        touched = set()
+        results = []
+        for op in operations:
+            if op.op_id in seen:
+                prior = seen[op.op_id]
+                results.append({"op_id": op.op_id, "status": prior["status"], "task_id": prior.get("task_id"), "replayed": True})
+                continue
+            result = self._apply_operation(user_id, op, state)
+            if result["status"] == "applied" and op.type != "delete":
+                touched.add(result["task_id"])
+            # A repeated op_id within the batch is a replay of the first
+            seen[op.op_id] = result
+            results.append(result)
+        
+        deleted = [task_id for task_id in server if state.get(task_id) is None]
+        written = [task_id for task_id in touched if state.get(task_id) is not None]
+        creates = [{column: state[task_id].get(column) for column in SYNC_COLUMNS} for task_id in written if task_id not in server]
+        updates = [{column: state[task_id].get(column) for column in SYNC_COLUMNS} for task_id in written if task_id in server]
+        
+        if deleted:
+            await self.repository.delete_tasks(user_id, ids=deleted)
+        # Creates never overwrite an existing row and updates only touch the
+        # user's own rows, so rows missing from `stored` were not written
+        stored = {}
+        if creates:
+            stored.update({str(task["id"]): task for task in await self.repository.insert_new_tasks(creates)})
+        if updates:
+            stored.update({str(task["id"]): task for task in await self.repository.update_task_rows(user_id, updates)})
+        lost_creates = {row["id"] for row in creates} - stored.keys()
+        lost_updates = {row["id"] for row in updates} - stored.keys()
+        
+        # Current task for each result: written rows, else untouched server rows
+        current = {task_id: task for task_id, task in state.items() if task is not None and task_id not in touched}
+        current.update(stored)
+        
+        applied = []
+        for result in results:
+            if result.get("replayed"):
+                continue
+            if result["status"] == "applied" and result["task_id"] in lost_creates:
+                result.update(status="conflict", detail="Task already exists")
+            elif result["status"] == "applied" and result["task_id"] in lost_updates:
+                result.update(status="not_found", detail="Task not found")
+            result["task"] = current.get(result["task_id"]) if result["task_id"] else None
+            applied.append({"user_id": user_id, "op_id": result["op_id"], "task_id": result["task_id"], "status": result["status"]})
+        
+        if applied:
+            await self.repository.insert_operations(list({row["op_id"]: row for row in applied}.values()))
+        
+        return results
+    
+    def _apply_operation(self, user_id: str, op: TaskOperation, state: dict) -> dict:
+        """
+        Resolve one operation against the in-memory task state, updating it
+        """
+        result = {"op_id": op.op_id, "status": "applied", "task_id": str(op.task_id) if op.task_id else None}
+        edited_at = _parse_timestamp(op.updated_at) if op.updated_at else datetime.now(timezone.utc)
+        
+        if op.type != "create" and not op.task_id:
+            return {**result, "status": "invalid", "detail": "task_id is required"}
+        
+        try:
+            if op.type == "create":
+                changes = TaskCreate.model_validate(op.data or {})
+            elif op.type == "update":
+                changes = TaskUpdate.model_validate(op.data or {})
+        except ValidationError as e:
+            return {**result, "status": "invalid", "detail": e.errors()[0]["msg"]}
+        
+        if op.type == "create":
+            task_id = result["task_id"] or str(uuid4())
+            if state.get(task_id) is not None:
+                return {**result, "task_id": task_id, "status": "conflict", "detail": "Task already exists"}
+            row = self._task_row(user_id, changes)
+            row.update({"id": task_id, "updated_at": edited_at.isoformat()})
+            state[task_id] = row
+            return {**result, "task_id": task_id}
+        
+        task = state.get(result["task_id"])
+        if task is None:
+            return {**result, "status": "not_found", "detail": "Task not found"}
+        if _parse_timestamp(task["updated_at"]) > edited_at:
+            return {**result, "status": "conflict", "detail": "Task was changed more recently on the server"}
+        
+        if op.type == "delete":
+            state[result["task_id"]] = None
+        else:
+            task = {**task, **changes.model_dump(mode="json", exclude_unset=True), "updated_at": edited_at.isoformat()}
+            state[result["task_id"]] = task
+        return result
+    
+    @staticmethod
+    def _selection_criteria(selection: TaskSelection) -> dict:
+        """
+        Repository criteria for a bulk selection. An empty selection is
+        rejected rather than treated as "every task".
+        """
+        if selection.ids is None and not (selection.status or selection.due_from or selection.due_to):
+            raise ValueError("Give task ids or at least one filter (status, due_from, due_to)")
+        if selection.ids is not None and len(selection.ids) > settings.TASK_BULK_MAX_IDS:
+            raise ValueError(f"Too many ids; at most {settings.TASK_BULK_MAX_IDS} per request")
+        return {
+            "ids": [str(task_id) for task_id in selection.ids] if selection.ids is not None else None,
+            "status": selection.status,
+            "due_from": selection.due_from.isoformat() if selection.due_from else None,
+            "due_to": selection.due_to.isoformat() if selection.due_to else None,
+            "returning": selection.returning
+        }
+    
+    async def bulk_update_tasks(self, user_id: str, selection: TaskSelection, changes: TaskUpdate) -> dict:
+        """
+        Apply the same changes to every selected task in one set-based update
+        
+        Returns:
+            Dict with "count" and, if selection.returning, "tasks"
+            
+        Raises:
+            ValueError: If the selection is empty or too large, or there
+                are no changes
+        """
+        criteria = self._selection_criteria(selection)
+        data = changes.model_dump(mode="json", exclude_unset=True)
+        if not data:
+            raise ValueError("No changes given")
+        if criteria["ids"] == []:
+            return {"count": 0, "tasks": [] if selection.returning else None}
+        
+        count, tasks = await self.repository.update_tasks(user_id, data, **criteria)
+        return {"count": count, "tasks": tasks if selection.returning else None}
+    
+    async def bulk_delete_tasks(self, user_id: str, selection: TaskSelection) -> dict:
+        """
+        Delete every selected task in one set-based delete
+        
+        Returns:
+            Dict with "count" and, if selection.returning, the deleted "tasks"
+            
+        Raises:
+            ValueError: If the selection is empty or too large
+        """
+        criteria = self._selection_criteria(selection)
+        if criteria["ids"] == []:
+            return {"count": 0, "tasks": [] if selection.returning else None}
+        
+        count, tasks = await self.repository.delete_tasks(user_id, **criteria)
+        return {"count": count, "tasks": tasks if selection.returning else None}
+    
     async def update_task(self, task_id: str, user_id: str, task_data: TaskUpdate) -> Optional[dict]:
         """
         Update an existing task
@@ -93,17 +706,11 @@ class TaskService:
             # If no data to update, just return the current task
             return await self.get_task(task_id, user_id)
             
-        response = self.supabase.table(self.table).update(update_data).eq("id", task_id).eq("user_id", user_id).execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        return None
+        return await self.repository.update_task(task_id, user_id, update_data)
     
     async def delete_task(self, task_id: str, user_id: str) -> bool:
         """
         Delete a task by ID
         """
-        response = self.supabase.table(self.table).delete().eq("id", task_id).eq("user_id", user_id).execute()
-        
         # Return True if at least one row was deleted
-        return response.data and len(response.data) > 0 
\ No newline at end of file
+        return await self.repository.delete_task(task_id, user_id) 
\ No newline at end of file
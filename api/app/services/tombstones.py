@@ -0,0 +1,62 @@
+import asyncio
+from typing import Optional
+from ..config import settings
+from ..repositories.base import TaskRepository
+
+class TombstonePurger:
+    """
+    Deletes delta-sync tombstones older than the retention window every
+    `interval` seconds, in the background
+
+    Sync cursors older than the window are already rejected (the client
+    resyncs from scratch), so purged tombstones are never needed again.
+    Every worker runs one; the purge is a single idempotent DELETE, so
+    overlapping runs are harmless. The first purge runs one interval after
+    startup, keeping it off the startup path.
+    """
+
+    def __init__(self, repository: TaskRepository, retention_days: int = 30, interval: float = 6 * 3600):
+        self.repository = repository
+        self.retention_days = retention_days
+        self.interval = interval
+        self.purged = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def purge(self) -> int:
+        """Delete expired tombstones now; returns how many were deleted"""
+        purged = await self.repository.purge_tombstones(self.retention_days)
+        self.purged += purged
+        return purged
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.purge()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error purging task tombstones: {str(e)}")
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+def create_tombstone_purger(repository: TaskRepository) -> TombstonePurger:
+    """
+    Build the tombstone purger from settings
+    """
+    return TombstonePurger(
+        repository,
+        settings.TASK_TOMBSTONE_RETENTION_DAYS,
+        settings.TASK_TOMBSTONE_PURGE_INTERVAL * 3600,
+    )
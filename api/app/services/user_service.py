@@ -1,20 +1,16 @@
 from typing import List, Optional, Dict
-from ..db.supabase import get_supabase_client
+from ..repositories.base import UserRepository
+from ..repositories.factory import create_user_repository
 
 class UserService:
-    def __init__(self):
-        self.supabase = get_supabase_client()
-        self.table = "users"
+    def __init__(self, repository: Optional[UserRepository] = None):
+        self.repository = repository or create_user_repository()
     
     async def get_user(self, user_id: str) -> Optional[dict]:
         """
         Get user information by ID
         """
-        response = self.supabase.table(self.table).select("*").eq("id", user_id).limit(1).execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        return None
+        return await self.repository.get_user(user_id)
     
     async def update_user(self, user_id: str, user_data: Dict) -> Optional[dict]:
         """
@@ -31,11 +27,7 @@ class UserService:
         if not update_data:
             return await self.get_user(user_id)
         
-        response = self.supabase.table(self.table).update(update_data).eq("id", user_id).execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        return None
+        return await self.repository.update_user(user_id, update_data)
     
     async def ensure_user_exists(self, user_id: str, email: str) -> Optional[dict]:
         """
@@ -56,8 +48,4 @@ class UserService:
         
         print(f"Creating test user with data: {user_data}")
         
-        response = self.supabase.table(self.table).insert(user_data).execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        return None 
\ No newline at end of file
+        return await self.repository.insert_user(user_data) 
\ No newline at end of file
@@ -1,16 +1,27 @@
+import asyncio
 import os
-import tempfile
 import json
+import time
 import traceback
 from typing import Optional, List
 from datetime import datetime, timedelta, timezone
 import re
-from openai import OpenAI
 from ..config import settings
 from ..schemas.task import TaskCreate
+from .audio import audio_duration_seconds
+from .audio_capabilities import AudioCapabilities, conversion_strategies, get_audio_capabilities
+from .audio_convert import WAV_BYTES_PER_SECOND, pydub_to_wav, run_ffmpeg, write_basic_wav
+from .audio_pool import AudioPoolBusy, AudioWorkerPool, create_audio_pool
+from .scratch import ScratchDir, ScratchQuotaExceeded, ScratchSpace, create_scratch_space
 
-# Initialize OpenAI client
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+def _scratch_bytes(audio_content: bytes) -> int:
+    """
+    Scratch space to reserve for converting one upload: the input, an
+    intermediate copy of the same size (ffmpeg's codec copy) and the WAV
+    output, which is never smaller than the raw bytes wrapped in a header
+    """
+    wav_bytes = int(audio_duration_seconds(audio_content) * WAV_BYTES_PER_SECOND)
+    return 2 * len(audio_content) + max(wav_bytes, len(audio_content)) + 64 * 1024
 
 def parse_date_from_text(text: str, timezone_offset_minutes: Optional[int] = None) -> Optional[datetime]:
     """
@@ -168,11 +179,68 @@ def parse_date_from_text(text: str, timezone_offset_minutes: Optional[int] = Non
     return final_datetime_utc
 
 class VoiceService:
+    """
+    Speech-to-text and task extraction through the OpenAI API
+
+    The OpenAI client is created on first use rather than at import: the
+    openai package takes about half a second to import, and a missing
+    OPENAI_API_KEY should only fail voice requests, not application startup.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        capabilities: Optional[AudioCapabilities] = None,
+        scratch: Optional[ScratchSpace] = None,
+        pool: Optional[AudioWorkerPool] = None
+    ):
+        self._client = client
+        self._capabilities = capabilities
+        self._scratch = scratch
+        self._pool = pool
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._client
+
+    @property
+    def capabilities(self) -> AudioCapabilities:
+        return self._capabilities or get_audio_capabilities()
+
+    @property
+    def scratch(self) -> ScratchSpace:
+        if self._scratch is None:
+            self._scratch = create_scratch_space()
+        return self._scratch
+
+    @property
+    def pool(self) -> AudioWorkerPool:
+        if self._pool is None:
+            self._pool = create_audio_pool()
+        return self._pool
+
+    def close(self) -> None:
+        """Close the OpenAI client's connections, if it was ever created"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
     async def transcribe_audio(self, audio_content: bytes) -> Optional[str]:
         """
         Transcribe audio file using OpenAI Whisper API
+
+        The upload is sent straight from memory. Only when Whisper rejects
+        it is it written to a scratch directory for the conversion
+        fallbacks; that directory and everything the converters wrote in it
+        is removed before this returns.
+
+        Raises:
+            ScratchQuotaExceeded: If the worker's scratch space stayed full
+            AudioPoolBusy: If the audio worker pool is saturated
         """
-        temp_filename = None
         try:
             # Print debugging information
             print(f"Starting transcription. Audio content length: {len(audio_content)} bytes")
@@ -201,326 +269,180 @@ class VoiceService:
                 print("Detected WEBM format from file header")
             else:
                 print("Could not detect audio format from header, using default .wav extension")
-                
-            # Create a temporary file with the appropriate extension
-            with tempfile.NamedTemporaryFile(suffix=file_ext, delete=False) as temp_audio:
-                temp_filename = temp_audio.name
-                # Write audio content to the temporary file
-                temp_audio.write(audio_content)
-            
-            print(f"Created temporary file: {temp_filename}")
-            print(f"Temporary file size: {os.path.getsize(temp_filename)} bytes")
             
             # Transcribe using OpenAI's Whisper API
-            with open(temp_filename, "rb") as audio_file:
-                print("Calling OpenAI API for transcription...")
-                try:
-                    transcription = client.audio.transcriptions.create(
-                        model="whisper-1", 
-                        file=audio_file
-                    )
-                    print(f"Transcription response received: {transcription}")
-                    
-                    # Clean up temporary file
-                    if os.path.exists(temp_filename):
-                        os.unlink(temp_filename)
-                        print(f"Cleaned up temporary file: {temp_filename}")
-                    
-                    # Return the transcribed text
-                    return transcription.text
-                except Exception as api_error:
-                    print(f"OpenAI API error: {str(api_error)}")
-                    # CONVERSION FALLBACK APPROACHES:
-                    print("Starting audio conversion fallback process...")
-                    # Use multiple fallback approaches to try and convert the audio
-                    
-                    # 1. Try ffmpeg with various formats
-                    print("Approach 1: Using ffmpeg with various format options")
-                    wav_temp = await self._try_ffmpeg_conversion(temp_filename)
-                    if wav_temp and os.path.exists(wav_temp):
-                        # Try to transcribe the converted file
-                        try:
-                            print(f"Transcribing converted file: {wav_temp}")
-                            with open(wav_temp, "rb") as wav_file:
-                                transcription = client.audio.transcriptions.create(
-                                    model="whisper-1", 
-                                    file=wav_file
-                                )
-                                print(f"Transcription successful from converted file!")
-                                
-                                # Clean up temporary files
-                                os.unlink(wav_temp)
-                                if os.path.exists(temp_filename):
-                                    os.unlink(temp_filename)
-                                
-                                return transcription.text
-                        except Exception as wav_error:
-                            print(f"Error transcribing converted file: {str(wav_error)}")
-                    
-                    # 2. Try the pydub approach if available
-                    print("Approach 2: Using pydub for conversion")
-                    pydub_wav = await self._try_pydub_conversion(audio_content)
-                    if pydub_wav and os.path.exists(pydub_wav):
-                        # Try to transcribe the pydub converted file
-                        try:
-                            print(f"Transcribing pydub converted file: {pydub_wav}")
-                            with open(pydub_wav, "rb") as wav_file:
-                                transcription = client.audio.transcriptions.create(
-                                    model="whisper-1", 
-                                    file=wav_file
-                                )
-                                print(f"Transcription successful from pydub converted file!")
-                                
-                                # Clean up temporary files
-                                os.unlink(pydub_wav)
-                                if os.path.exists(temp_filename):
-                                    os.unlink(temp_filename)
-                                
-                                return transcription.text
-                        except Exception as pydub_error:
-                            print(f"Error transcribing pydub converted file: {str(pydub_error)}")
-                    
-                    # 3. Last resort - try directly creating a basic WAV from raw bytes
-                    print("Approach 3: Creating a basic WAV file")
-                    raw_wav = await self._create_basic_wav(audio_content)
-                    if raw_wav and os.path.exists(raw_wav):
-                        # Try to transcribe the basic WAV file
-                        try:
-                            print(f"Transcribing basic WAV file: {raw_wav}")
-                            with open(raw_wav, "rb") as wav_file:
-                                transcription = client.audio.transcriptions.create(
-                                    model="whisper-1", 
-                                    file=wav_file
-                                )
-                                print(f"Transcription successful from basic WAV file!")
-                                
-                                # Clean up temporary files
-                                os.unlink(raw_wav)
-                                if os.path.exists(temp_filename):
-                                    os.unlink(temp_filename)
-                                
-                                return transcription.text
-                        except Exception as raw_error:
-                            print(f"Error transcribing basic WAV file: {str(raw_error)}")
-                        
+            print("Calling OpenAI API for transcription...")
+            try:
+                # The SDK client is synchronous; keep the upload off the event loop
+                transcription = await asyncio.to_thread(
+                    self.client.audio.transcriptions.create,
+                    model="whisper-1", 
+                    file=(f"audio{file_ext}", audio_content)
+                )
+                print(f"Transcription response received: {transcription}")
+                
+                # Return the transcribed text
+                return transcription.text
+            except Exception as api_error:
+                print(f"OpenAI API error: {str(api_error)}")
+                text = await self._transcribe_converted(audio_content, file_ext)
+                if text is None:
                     # If all approaches failed, raise the original error
                     print("All conversion approaches failed")
                     raise
+                return text
         
+        except (ScratchQuotaExceeded, AudioPoolBusy):
+            raise
         except Exception as e:
             print(f"Error transcribing audio: {str(e)}")
             print(f"Error type: {type(e).__name__}")
             print(f"Error traceback: {traceback.format_exc()}")
-            
-            # Clean up temp file if it exists
-            if temp_filename and os.path.exists(temp_filename):
-                try:
-                    os.unlink(temp_filename)
-                    print(f"Cleaned up temporary file: {temp_filename}")
-                except Exception as cleanup_error:
-                    print(f"Error cleaning up temporary file: {str(cleanup_error)}")
-            
             return None
 
-    async def _try_ffmpeg_conversion(self, input_file: str) -> Optional[str]:
+    async def _transcribe_converted(self, audio_content: bytes, file_ext: str) -> Optional[str]:
+        """
+        Convert the upload with each fallback the host's tools allow and
+        transcribe the first conversion Whisper accepts
+        """
+        # Only the approaches the tools probed at startup can carry out
+        strategies = conversion_strategies(self.capabilities, file_ext)
+        print(f"Starting audio conversion fallback process: {', '.join(strategies)}")
+        
+        async with self.scratch.request(_scratch_bytes(audio_content)) as workdir:
+            input_file = workdir.write(f"input{file_ext}", audio_content)
+            converters = {
+                "ffmpeg": lambda: self._try_ffmpeg_conversion(input_file, workdir),
+                "pydub": lambda: self._try_pydub_conversion(input_file, workdir),
+                "basic_wav": lambda: self._create_basic_wav(audio_content, workdir),
+            }
+            for strategy in strategies:
+                print(f"Conversion approach: {strategy}")
+                wav_path = await converters[strategy]()
+                if not wav_path or not os.path.exists(wav_path):
+                    continue
+                workdir.enforce()
+                try:
+                    print(f"Transcribing converted file: {wav_path}")
+                    with open(wav_path, "rb") as wav_file:
+                        transcription = await asyncio.to_thread(
+                            self.client.audio.transcriptions.create,
+                            model="whisper-1", 
+                            file=wav_file
+                        )
+                    print(f"Transcription successful from {strategy} converted file!")
+                    return transcription.text
+                except Exception as wav_error:
+                    print(f"Error transcribing {strategy} converted file: {str(wav_error)}")
+        return None
+
+    async def _try_ffmpeg_conversion(self, input_file: str, workdir: ScratchDir) -> Optional[str]:
         """Attempt to convert audio using ffmpeg with multiple approaches"""
         try:
-            import subprocess
-            
-            # First, try to get info about the file
-            print("Running ffmpeg to get file info:")
-            info_cmd = ["ffmpeg", "-i", input_file, "-f", "null", "-"]
-            try:
-                subprocess.run(info_cmd, stderr=subprocess.PIPE, text=True, check=False)
-            except Exception as info_error:
-                print(f"Info command failed (this is just diagnostic): {str(info_error)}")
-            
+            # The binary the startup probe found, which need not be on PATH
+            ffmpeg = self.capabilities.ffmpeg or "ffmpeg"
             # List of conversion approaches to try
             approaches = [
                 # 1. Standard PCM conversion
                 {
                     "name": "Standard PCM",
                     "cmd": [
-                        "ffmpeg", "-nostdin", "-y", "-i", input_file, 
+                        ffmpeg, "-nostdin", "-y", "-i", input_file, 
                         "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
-                        f"{input_file}_1.wav"
+                        workdir.file("ffmpeg_1.wav")
                     ]
                 },
                 # 2. Force format approach
                 {
                     "name": "Force format",
                     "cmd": [
-                        "ffmpeg", "-nostdin", "-y", "-f", "m4a", "-i", input_file,
+                        ffmpeg, "-nostdin", "-y", "-f", "m4a", "-i", input_file,
                         "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
-                        f"{input_file}_2.wav"
+                        workdir.file("ffmpeg_2.wav")
                     ]
                 },
                 # 3. Copy codec approach
                 {
                     "name": "Copy codec",
                     "cmd": [
-                        "ffmpeg", "-nostdin", "-y", "-i", input_file,
-                        "-c:a", "copy", f"{input_file}_temp.m4a"
+                        ffmpeg, "-nostdin", "-y", "-i", input_file,
+                        "-c:a", "copy", workdir.file("ffmpeg_temp.m4a")
                     ],
                     "second_cmd": [
-                        "ffmpeg", "-nostdin", "-y", "-i", f"{input_file}_temp.m4a",
+                        ffmpeg, "-nostdin", "-y", "-i", workdir.file("ffmpeg_temp.m4a"),
                         "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
-                        f"{input_file}_3.wav"
+                        workdir.file("ffmpeg_3.wav")
                     ]
                 }
             ]
             
+            # One deadline for every command of every approach, set before the
+            # first reaches the pool: ffmpeg is killed a little before the
+            # pool's own timeout would abandon the worker process running it
+            deadline = time.time() + self.pool.task_timeout * 0.9
+            
             # Try each approach
             for i, approach in enumerate(approaches):
+                if time.time() >= deadline:
+                    print("ffmpeg conversion ran out of time")
+                    break
                 print(f"Trying conversion approach {i+1}: {approach['name']}")
+                commands = [approach["cmd"]] + ([approach["second_cmd"]] if "second_cmd" in approach else [])
+                output_file = commands[-1][-1]
                 
                 try:
-                    # Run the command
-                    process = subprocess.run(
-                        approach["cmd"],
-                        stderr=subprocess.PIPE,
-                        stdout=subprocess.PIPE,
-                        text=True,
-                        check=False
-                    )
-                    
-                    # For approaches with a second command
-                    if process.returncode == 0 and "second_cmd" in approach:
-                        process = subprocess.run(
-                            approach["second_cmd"],
-                            stderr=subprocess.PIPE,
-                            stdout=subprocess.PIPE,
-                            text=True,
-                            check=False
-                        )
-                    
-                    output_file = approach["cmd"][-1]
-                    if "second_cmd" in approach:
-                        output_file = approach["second_cmd"][-1]
+                    # -fs stops ffmpeg once the output would overrun the scratch reservation
+                    limited = [cmd[:-1] + ["-fs", str(workdir.remaining()), cmd[-1]] for cmd in commands]
+                    returncode, stderr = await self.pool.run(run_ffmpeg, limited, deadline)
                     
                     # Check if the output file exists and has content
-                    if process.returncode == 0 and os.path.exists(output_file) and os.path.getsize(output_file) > 1000:
+                    if returncode == 0 and os.path.exists(output_file) and os.path.getsize(output_file) > 1000:
                         print(f"Approach {i+1} successful! Created file: {output_file}")
                         return output_file
                     else:
-                        print(f"Approach {i+1} failed with code {process.returncode}")
-                        print(f"Error output: {process.stderr}")
-                        
-                        # Clean up any temporary files
-                        if "second_cmd" in approach and os.path.exists(f"{input_file}_temp.m4a"):
-                            os.unlink(f"{input_file}_temp.m4a")
+                        print(f"Approach {i+1} failed with code {returncode}")
+                        print(f"Error output: {stderr}")
                 
+                except AudioPoolBusy:
+                    raise
                 except Exception as e:
                     print(f"Error in approach {i+1}: {str(e)}")
+                
+                # Drop what the failed approach wrote before trying the next one
+                for cmd in commands:
+                    if os.path.exists(cmd[-1]):
+                        os.unlink(cmd[-1])
             
             # If all approaches failed, return None
             return None
             
+        except AudioPoolBusy:
+            raise
         except Exception as e:
             print(f"Error in ffmpeg conversion: {str(e)}")
             return None
     
-    async def _try_pydub_conversion(self, audio_content: bytes) -> Optional[str]:
-        """Attempt to convert audio using pydub"""
+    async def _try_pydub_conversion(self, input_file: str, workdir: ScratchDir) -> Optional[str]:
+        """Attempt to convert audio using pydub (only planned when the startup probe found it)"""
         try:
-            # Try to import pydub
-            try:
-                from pydub import AudioSegment
-                print("Successfully imported pydub")
-            except ImportError:
-                print("pydub not available, installing...")
-                import subprocess
-                subprocess.check_call(["pip", "install", "pydub"])
-                from pydub import AudioSegment
-                print("pydub successfully installed")
-            
-            # Create temporary files
-            in_file = tempfile.NamedTemporaryFile(suffix=".m4a", delete=False)
-            out_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-            
-            try:
-                # Write audio content to the temp file
-                in_file.write(audio_content)
-                in_file.close()
-                
-                # Try to convert with pydub
-                try:
-                    print(f"Converting with pydub: {in_file.name} -> {out_file.name}")
-                    audio = AudioSegment.from_file(in_file.name, format="m4a")
-                    
-                    # Export as WAV
-                    audio.export(out_file.name, format="wav")
-                    print(f"Pydub conversion successful, output size: {os.path.getsize(out_file.name)} bytes")
-                    return out_file.name
-                    
-                except Exception as pydub_error:
-                    print(f"Pydub conversion failed: {str(pydub_error)}")
-                    
-                    # Try raw format as fallback
-                    try:
-                        print("Trying pydub with raw format...")
-                        audio = AudioSegment.from_file(in_file.name, format="raw", 
-                                                    frame_rate=16000, channels=1, sample_width=2)
-                        audio.export(out_file.name, format="wav")
-                        print(f"Pydub raw conversion successful, output size: {os.path.getsize(out_file.name)} bytes")
-                        return out_file.name
-                    except Exception as raw_error:
-                        print(f"Pydub raw conversion failed: {str(raw_error)}")
-                        return None
-            finally:
-                # Cleanup
-                if os.path.exists(in_file.name):
-                    os.unlink(in_file.name)
-                
-                # Don't delete the output file as we need to return it
-            
+            out_file = workdir.file("pydub.wav")
+            print(f"Converting with pydub: {input_file} -> {out_file}")
+            return await self.pool.run(pydub_to_wav, input_file, out_file)
+        except AudioPoolBusy:
+            raise
         except Exception as e:
             print(f"Error in pydub conversion: {str(e)}")
             return None
             
-    async def _create_basic_wav(self, audio_content: bytes) -> Optional[str]:
+    async def _create_basic_wav(self, audio_content: bytes, workdir: ScratchDir) -> Optional[str]:
         """Create a basic WAV file from raw audio bytes"""
         try:
-            # Create WAV file
-            wav_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-            
-            try:
-                # Simple WAV header for 16kHz mono PCM
-                header = bytearray()
-                
-                # RIFF header
-                header.extend(b'RIFF')
-                header.extend((len(audio_content) + 36).to_bytes(4, 'little'))  # File size - 8
-                header.extend(b'WAVE')
-                
-                # Format chunk
-                header.extend(b'fmt ')
-                header.extend((16).to_bytes(4, 'little'))  # Chunk size
-                header.extend((1).to_bytes(2, 'little'))   # Audio format (1 = PCM)
-                header.extend((1).to_bytes(2, 'little'))   # Num channels
-                header.extend((16000).to_bytes(4, 'little'))  # Sample rate
-                header.extend((32000).to_bytes(4, 'little'))  # Byte rate
-                header.extend((2).to_bytes(2, 'little'))   # Block align
-                header.extend((16).to_bytes(2, 'little'))  # Bits per sample
-                
-                # Data chunk
-                header.extend(b'data')
-                header.extend((len(audio_content)).to_bytes(4, 'little'))  # Chunk size
-                
-                # Write header and data
-                wav_file.write(header)
-                wav_file.write(audio_content)
-                wav_file.close()
-                
-                print(f"Created basic WAV file: {wav_file.name}, size: {os.path.getsize(wav_file.name)} bytes")
-                return wav_file.name
-                
-            except Exception as wav_error:
-                print(f"Error creating basic WAV: {str(wav_error)}")
-                if os.path.exists(wav_file.name):
-                    os.unlink(wav_file.name)
-                return None
-                
+            wav_file = await self.pool.run(write_basic_wav, workdir.file("basic.wav"), data=audio_content)
+            workdir.enforce()
+            print(f"Created basic WAV file: {wav_file}, size: {os.path.getsize(wav_file)} bytes")
+            return wav_file
+        except AudioPoolBusy:
+            raise
         except Exception as e:
             print(f"Error in basic WAV creation: {str(e)}")
             return None
@@ -566,7 +488,8 @@ class VoiceService:
             - Status should be "To Do" unless explicitly stated as completed
             """
 
-            response = client.chat.completions.create(
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that extracts structured task information from voice transcriptions. Always return valid JSON."},
@@ -0,0 +1,97 @@
+"""
+Benchmark: event-loop lag while audio conversions run, on the loop vs.
+in the audio worker pool
+
+A monitor task sleeps 5 ms at a time and records how late it wakes up;
+that lateness is what every other request on the worker waits on top of
+its own work. Meanwhile `concurrency` uploads are converted at once, each
+building the fallback WAV from an 8 MB upload (handed to the pool through
+shared memory) and running a CPU-bound pass over its samples, a stand-in
+for the resampling/VAD work the pool exists for.
+
+Run from the api/ directory:
+    python -m benchmarks.bench_audio_pool [concurrency] [rounds]
+"""
+import array
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from app.services.audio_convert import write_basic_wav
+from app.services.audio_pool import AudioWorkerPool
+
+UPLOAD_BYTES = 8 * 1024 * 1024
+TICK = 0.005
+
+def speech_frames(audio: memoryview, frame_samples: int = 320) -> int:
+    """
+    Energy-based voice activity count over 16-bit samples in pure Python:
+    the kind of per-sample loop that would otherwise hold the event loop
+    """
+    samples = array.array("h", bytes(audio[:len(audio) // 8 * 2]))
+    active = 0
+    for start in range(0, len(samples), frame_samples):
+        frame = samples[start:start + frame_samples]
+        if sum(abs(s) for s in frame) > 500 * len(frame):
+            active += 1
+    return active
+
+async def _monitor(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append((time.perf_counter() - start - TICK) * 1000)
+
+async def _convert_inline(upload: bytes, out_path: str) -> None:
+    write_basic_wav(memoryview(upload), out_path)
+    speech_frames(memoryview(upload))
+
+async def _convert_pooled(pool: AudioWorkerPool, upload: bytes, out_path: str) -> None:
+    await pool.run(write_basic_wav, out_path, data=upload)
+    await pool.run(speech_frames, data=upload)
+
+async def _scenario(mode: str, concurrency: int, rounds: int, upload: bytes, workdir: str):
+    pool = AudioWorkerPool(max_workers=min(concurrency, os.cpu_count() or 1), max_queue=concurrency)
+    if mode == "pool":
+        await pool.run(os.getpid)  # start the processes outside the measurement
+    lags, stop = [], asyncio.Event()
+    monitor = asyncio.create_task(_monitor(lags, stop))
+    start = time.perf_counter()
+    try:
+        for _ in range(rounds):
+            jobs = []
+            for i in range(concurrency):
+                out_path = os.path.join(workdir, f"{mode}-{i}.wav")
+                if mode == "pool":
+                    jobs.append(_convert_pooled(pool, upload, out_path))
+                else:
+                    jobs.append(_convert_inline(upload, out_path))
+            await asyncio.gather(*jobs)
+        elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        await monitor
+        await pool.close()
+    return elapsed, lags
+
+def run(concurrency: int, rounds: int) -> None:
+    upload = os.urandom(UPLOAD_BYTES)
+    print(f"{concurrency} concurrent conversions x {rounds} rounds, {UPLOAD_BYTES // (1024 * 1024)} MB uploads, "
+          f"{os.cpu_count()} CPUs; event-loop lag in ms ({TICK * 1000:.0f} ms sleeps)")
+    with tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None) as workdir:
+        for mode in ("inline", "pool"):
+            elapsed, lags = asyncio.run(_scenario(mode, concurrency, rounds, upload, workdir))
+            lags.sort()
+            p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+            print(f"  {mode:6}  total {elapsed:6.2f} s   lag p50 {statistics.median(lags):7.2f}   "
+                  f"p99 {p99:7.2f}   max {lags[-1]:7.2f}   ({len(lags)} ticks)")
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    run(concurrency, rounds)
+
+if __name__ == "__main__":
+    main()
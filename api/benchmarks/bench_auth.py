@@ -0,0 +1,87 @@
+"""
+Benchmark: per-request authentication overhead, with and without the
+verified-token cache
+
+Times get_current_user for the mobile app's pattern (one token reused on
+every call): full jwt.decode each time vs. a token cache hit, and the
+in-memory session revocation check with 100k revoked sessions loaded.
+Also times a whole authenticated request through the ASGI app with a
+route that does no data access, so the difference is the auth cost
+relative to the rest of the framework overhead.
+
+Run from the api/ directory:
+    python -m benchmarks.bench_auth [iterations]
+"""
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+import httpx
+from fastapi import Depends, FastAPI
+
+def _per_call_us(call, iterations: int) -> float:
+    rounds = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            call()
+        rounds.append((time.perf_counter() - start) / iterations)
+    return statistics.median(rounds) * 1e6
+
+async def _per_request_us(token_cache, token: str, iterations: int) -> float:
+    from app.dependencies import get_current_user, get_token_cache
+
+    app = FastAPI()
+
+    @app.get("/whoami")
+    async def whoami(user_id: str = Depends(get_current_user)):
+        return user_id
+
+    app.dependency_overrides[get_token_cache] = lambda: token_cache
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = {"Authorization": f"Bearer {token}"}
+        await client.get("/whoami", headers=headers)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await client.get("/whoami", headers=headers)
+        return (time.perf_counter() - start) / iterations * 1e6
+
+def run(iterations: int) -> None:
+    from datetime import datetime, timedelta, timezone
+    from app.cache.revocations import RevocationList
+    from app.cache.token_cache import TokenCache
+    from app.dependencies import get_current_user
+    from app.services.auth_service import AuthService
+
+    token = AuthService(supabase=object())._create_access_token(str(uuid.uuid4()), uuid.uuid4().hex)
+    cache = TokenCache()
+    revocations = RevocationList()
+    expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+    for _ in range(100_000):
+        revocations.add(uuid.uuid4().hex, "user", expires_at)
+    loop = asyncio.new_event_loop()
+    try:
+        uncached = _per_call_us(lambda: loop.run_until_complete(get_current_user(token, None, None)), iterations)
+        checked = _per_call_us(lambda: loop.run_until_complete(get_current_user(token, None, revocations)), iterations)
+        cached = _per_call_us(lambda: loop.run_until_complete(get_current_user(token, cache, revocations)), iterations)
+    finally:
+        loop.close()
+
+    print(f"get_current_user, same token, {iterations} calls x 5 rounds (median of rounds, includes run_until_complete)")
+    print(f"  jwt.decode every call:  {uncached:8.2f} us")
+    print(f"  + revocation check:     {checked:8.2f} us  ({len(revocations)} revoked sessions)")
+    print(f"  token cache hit:        {cached:8.2f} us")
+
+    requests = max(iterations // 10, 100)
+    print(f"Authenticated ASGI request with no data access, {requests} requests")
+    print(f"  jwt.decode every call:  {asyncio.run(_per_request_us(None, token, requests)):8.1f} us")
+    print(f"  token cache hit:        {asyncio.run(_per_request_us(TokenCache(), token, requests)):8.1f} us")
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    run(iterations)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Load test: concurrent GET /tasks on a single worker, blocking vs. async data access
+
+Both runs drive the real FastAPI app in one event loop against the local
+PostgREST stand-in, which adds a fixed latency to every query. With the
+old blocking client the requests run one after another; with the async
+repository they overlap.
+
+Run from the api/ directory:
+    python -m benchmarks.bench_concurrent_tasks [concurrency] [latency_ms]
+"""
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+import httpx
+from jose import jwt
+from .standin import PostgrestStandIn
+
+def _configure(url: str) -> None:
+    from app.config import settings
+    settings.SUPABASE_URL = url
+    settings.SUPABASE_KEY = "benchmark-key"
+
+def _token(user_id: str) -> str:
+    from app.config import settings
+    expire = datetime.utcnow() + timedelta(minutes=5)
+    return jwt.encode({"sub": user_id, "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def _blocking_repository():
+    """The pre-async data access path: sync PostgREST calls inside coroutines"""
+    from app.db.supabase import create_http_client, create_supabase_client
+    from app.repositories.base import TaskRepository
+
+    class BlockingTaskRepository(TaskRepository):
+        def __init__(self):
+            self.supabase = create_supabase_client(create_http_client())
+
+        async def list_tasks(self, user_id: str, status: Optional[str] = None) -> List[dict]:
+            query = self.supabase.table("tasks").select("*").eq("user_id", user_id)
+            if status:
+                query = query.eq("status", status)
+            return query.execute().data
+
+        async def list_tasks_page(self, user_id, status, sort, descending, limit, after=None, columns=None):
+            query = self.supabase.table("tasks").select("*").eq("user_id", user_id)
+            if status:
+                query = query.eq("status", status)
+            query = query.order(sort, desc=descending, nullsfirst=False).order("id", desc=descending)
+            return query.limit(limit).execute().data
+
+        async def list_tombstones(self, user_id, limit, after=None, descending=False):
+            raise NotImplementedError
+
+        async def get_tasks_version(self, user_id):
+            response = (
+                self.supabase.table("tasks").select("updated_at", count="exact").eq("user_id", user_id)
+                .order("updated_at", desc=True).limit(1).execute()
+            )
+            return {"count": response.count, "updated_at": response.data[0]["updated_at"] if response.data else None}
+
+        async def get_task(self, task_id, user_id, columns=None):
+            raise NotImplementedError
+
+        async def insert_task(self, data):
+            raise NotImplementedError
+
+        async def insert_tasks(self, rows):
+            raise NotImplementedError
+
+        async def get_tasks_by_ids(self, user_id, task_ids):
+            raise NotImplementedError
+
+        async def purge_tombstones(self, retention_days):
+            raise NotImplementedError
+
+        async def search_tasks(self, user_id, query, limit, after=None):
+            raise NotImplementedError
+
+        async def list_tasks_due(self, user_id, windows, limit, status=None):
+            raise NotImplementedError
+
+        async def get_task_stats(self, user_id):
+            raise NotImplementedError
+
+        async def insert_new_tasks(self, rows):
+            raise NotImplementedError
+
+        async def update_task_rows(self, user_id, rows):
+            raise NotImplementedError
+
+        async def update_tasks(self, user_id, data, ids=None, status=None, due_from=None, due_to=None, returning=False):
+            raise NotImplementedError
+
+        async def delete_tasks(self, user_id, ids=None, status=None, due_from=None, due_to=None, returning=False):
+            raise NotImplementedError
+
+        async def list_operations(self, user_id, op_ids):
+            raise NotImplementedError
+
+        async def insert_operations(self, rows):
+            raise NotImplementedError
+
+        async def update_task(self, task_id, user_id, data):
+            raise NotImplementedError
+
+        async def delete_task(self, task_id, user_id):
+            raise NotImplementedError
+
+    return BlockingTaskRepository()
+
+async def _run(app, concurrency: int, user_id: str) -> float:
+    headers = {"Authorization": f"Bearer {_token(user_id)}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up connections before timing
+        await client.get("/api/v1/tasks/", headers=headers)
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.get("/api/v1/tasks/", headers=headers) for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+    return elapsed
+
+async def run(concurrency: int, latency: float):
+    user_id = str(uuid.uuid4())
+
+    with PostgrestStandIn(latency=latency) as standin:
+        standin.seed("tasks", [
+            {"id": str(uuid.uuid4()), "user_id": user_id, "title": f"Task {i}", "status": "To Do"}
+            for i in range(20)
+        ])
+        _configure(standin.url)
+
+        from app.main import app
+        from app.db.supabase import close_supabase
+        from app.dependencies import get_task_repository
+
+        blocking = _blocking_repository()
+        app.dependency_overrides[get_task_repository] = lambda: blocking
+        blocking_elapsed = await _run(app, concurrency, user_id)
+        app.dependency_overrides.clear()
+
+        async_elapsed = await _run(app, concurrency, user_id)
+        await close_supabase()
+
+    print(f"{concurrency} concurrent GET /tasks, {latency * 1000:.0f} ms simulated query latency")
+    print(f"  blocking client   {blocking_elapsed * 1000:8.1f} ms total")
+    print(f"  async repository  {async_elapsed * 1000:8.1f} ms total")
+    print(f"  speedup           {blocking_elapsed / async_elapsed:8.1f}x")
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(run(concurrency, latency_ms / 1000))
+
+if __name__ == "__main__":
+    main()
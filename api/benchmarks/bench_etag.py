@@ -0,0 +1,64 @@
+"""
+Benchmark: unconditional GET /tasks vs. conditional GET with If-None-Match
+
+Polls a page of tasks the way the mobile app does and reports bytes on the
+wire, wall time and process CPU time per request, plus how many queries
+reached the data store. The app runs with its lifespan, so the task cache
+is active as in production.
+
+Run from the api/ directory:
+    python -m benchmarks.bench_etag [page_size] [iterations]
+"""
+import asyncio
+import sys
+import time
+import uuid
+import httpx
+from .bench_concurrent_tasks import _configure, _token
+from .standin import PostgrestStandIn
+
+async def _poll(client: httpx.AsyncClient, headers: dict, params: dict, iterations: int, conditional: bool):
+    etag = (await client.get("/api/v1/tasks/", params=params, headers=headers)).headers["ETag"]
+    request_headers = {**headers, "If-None-Match": etag} if conditional else headers
+
+    size = 0
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(iterations):
+        response = await client.get("/api/v1/tasks/", params=params, headers=request_headers)
+        assert response.status_code == (304 if conditional else 200)
+        size += len(response.content) + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+    return size / iterations, (time.perf_counter() - wall) / iterations, (time.process_time() - cpu) / iterations
+
+async def run(page_size: int, iterations: int):
+    user_id = str(uuid.uuid4())
+
+    with PostgrestStandIn() as standin:
+        standin.seed("tasks", [
+            {"user_id": user_id, "title": f"Task {i}", "status": "To Do", "description": "Notes from the voice memo. " * 4}
+            for i in range(page_size)
+        ])
+        _configure(standin.url)
+
+        from app.main import app
+
+        headers = {"Authorization": f"Bearer {_token(user_id)}"}
+        params = {"limit": page_size}
+        results = {}
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for label, conditional in (("unconditional 200", False), ("If-None-Match 304", True)):
+                    queries = standin.request_count
+                    results[label] = (*await _poll(client, headers, params, iterations, conditional), standin.request_count - queries)
+
+    print(f"Polling GET /tasks (page of {page_size}), {iterations} requests each")
+    for label, (size, wall, cpu, queries) in results.items():
+        print(f"  {label:<18} {size:9.0f} bytes  {wall * 1000:7.3f} ms wall  {cpu * 1000:7.3f} ms CPU  {queries:4d} store queries")
+
+def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(run(page_size, iterations))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: per-query latency of the direct Postgres backend
+
+Runs the hot repository queries against a migrated local database with
+seeded tasks, with asyncpg's prepared statement cache enabled (the
+default) and disabled (parse/plan on every call). The same queries over
+the PostgREST stand-in are shown as a reference for the extra HTTP hop;
+the stand-in keeps rows in memory, so its numbers are a lower bound for
+PostgREST rather than a like-for-like comparison.
+
+Run from the api/ directory (needs psycopg, asyncpg, and pgserver or TEST_DATABASE_URL):
+    python -m benchmarks.bench_postgres_backend [tasks] [iterations]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from app.db import migrate
+from .local_postgres import local_postgres, scratch_database
+from .standin import PostgrestStandIn
+
+USER_ID = "00000000-0000-4000-8000-000000000001"
+
+SEED_SQL = """
+INSERT INTO auth.users (id) VALUES ('{user_id}');
+
+INSERT INTO tasks (user_id, title, status, due_date, created_at, updated_at)
+SELECT '{user_id}', 'Task ' || i, (ARRAY['To Do', 'In Progress', 'Done'])[1 + i % 3],
+  now() + (i % 60 - 30) * interval '1 day', now() - i * interval '1 second', now() - i * interval '1 second'
+FROM generate_series(1, {tasks}) i;
+
+ANALYZE;
+"""
+
+def _queries(repository, task_id: str) -> dict:
+    return {
+        "first page": lambda: repository.list_tasks_page(USER_ID, None, "updated_at", True, 51),
+        "page by status": lambda: repository.list_tasks_page(USER_ID, "Done", "due_date", False, 51),
+        "get_task": lambda: repository.get_task(task_id, USER_ID),
+        "version": lambda: repository.get_tasks_version(USER_ID),
+    }
+
+async def measure(repository, task_id: str, iterations: int) -> dict:
+    """Per query: (p50 ms, p99 ms) after a warm-up call"""
+    results = {}
+    for name, query in _queries(repository, task_id).items():
+        await query()
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await query()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        results[name] = (statistics.median(timings) * 1000, timings[int(len(timings) * 0.99) - 1] * 1000)
+    return results
+
+async def _postgres(url: str, cache_size: int, iterations: int) -> dict:
+    from app.config import settings
+    from app.db.postgres import create_postgres_engine
+    from app.repositories.postgres import PostgresTaskRepository
+
+    settings.POSTGRES_STATEMENT_CACHE_SIZE = cache_size
+    settings.POSTGRES_POOL_SIZE = 1
+    engine = create_postgres_engine(url)
+    try:
+        repository = PostgresTaskRepository(engine)
+        [task] = await repository.list_tasks_page(USER_ID, None, "updated_at", True, 1)
+        return await measure(repository, task["id"], iterations)
+    finally:
+        await engine.dispose()
+
+async def _standin(tasks: int, iterations: int) -> dict:
+    from app.config import settings
+    from app.db.supabase import create_async_supabase_client
+    from app.repositories.supabase import SupabaseTaskRepository
+
+    with PostgrestStandIn() as standin:
+        rows = standin.seed("tasks", [
+            {"user_id": USER_ID, "title": f"Task {i}", "status": ("To Do", "In Progress", "Done")[i % 3]}
+            for i in range(min(tasks, 5_000))
+        ])
+        settings.SUPABASE_URL, settings.SUPABASE_KEY = standin.url, "benchmark-key"
+        client = create_async_supabase_client()
+        try:
+            return await measure(SupabaseTaskRepository(client), rows[0]["id"], iterations)
+        finally:
+            await client.postgrest.aclose()
+
+def run(tasks: int, iterations: int) -> None:
+    import psycopg
+
+    with local_postgres() as server, scratch_database(server) as url:
+        with psycopg.connect(url, autocommit=True) as conn:
+            migrate.migrate(conn)
+            conn.execute(SEED_SQL.format(user_id=USER_ID, tasks=int(tasks)))
+
+        results = {
+            "asyncpg, prepared": asyncio.run(_postgres(url, 256, iterations)),
+            "asyncpg, no cache": asyncio.run(_postgres(url, 0, iterations)),
+            "REST stand-in": asyncio.run(_standin(tasks, iterations)),
+        }
+
+    print(f"{tasks} tasks for one user, {iterations} calls per query")
+    print(f"{'query':<16} {'backend':<20} {'p50 ms':>8} {'p99 ms':>8}")
+    for name in _queries(None, ""):
+        for backend, result in results.items():
+            p50, p99 = result[name]
+            print(f"{name:<16} {backend:<20} {p50:8.3f} {p99:8.3f}")
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    run(tasks, iterations)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark: task RLS policies with per-row subqueries vs. migration 0006
+
+Builds the tasks table with the migrations, installs the original
+user_setup.sql policies (a correlated users lookup per row), seeds
+100k tasks and runs typical reads as a non-owner role so RLS applies.
+Then applies migration 0006 and runs the same reads again.
+
+Run from the api/ directory (needs psycopg, and pgserver or TEST_DATABASE_URL):
+    python -m benchmarks.bench_rls_policies [tasks] [users]
+"""
+import json
+import statistics
+import sys
+import time
+from app.db import migrate
+from .local_postgres import local_postgres, scratch_database
+
+ROLE = "voicetask_rls_bench"
+
+# The task policies as shipped in user_setup.sql before migration 0006
+LEGACY_POLICIES_SQL = """
+CREATE TABLE public.users (
+  id UUID PRIMARY KEY,
+  email TEXT UNIQUE NOT NULL,
+  full_name TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+  is_test_user BOOLEAN DEFAULT FALSE
+);
+ALTER TABLE public.users ENABLE ROW LEVEL SECURITY;
+CREATE POLICY user_select_own ON public.users
+  FOR SELECT USING (auth.uid() = id OR is_test_user = TRUE);
+
+DROP POLICY "Users can only access their own tasks" ON public.tasks;
+CREATE POLICY task_select_own ON public.tasks
+  FOR SELECT USING (auth.uid() = user_id OR (SELECT is_test_user FROM public.users WHERE id = user_id));
+CREATE POLICY task_insert_own ON public.tasks
+  FOR INSERT WITH CHECK (auth.uid() = user_id OR (SELECT is_test_user FROM public.users WHERE id = user_id));
+CREATE POLICY task_update_own ON public.tasks
+  FOR UPDATE USING (auth.uid() = user_id OR (SELECT is_test_user FROM public.users WHERE id = user_id));
+CREATE POLICY task_delete_own ON public.tasks
+  FOR DELETE USING (auth.uid() = user_id OR (SELECT is_test_user FROM public.users WHERE id = user_id));
+"""
+
+def _user_id(n: int) -> str:
+    return f"00000000-0000-4000-8000-{n:012d}"
+
+SEED_SQL = """
+INSERT INTO auth.users (id)
+SELECT ('00000000-0000-4000-8000-' || lpad(u::text, 12, '0'))::uuid FROM generate_series(1, {users}) u;
+
+-- The last user is a test user, visible to everyone
+INSERT INTO public.users (id, email, is_test_user)
+SELECT ('00000000-0000-4000-8000-' || lpad(u::text, 12, '0'))::uuid, 'user' || u || '@example.com', u = {users}
+FROM generate_series(1, {users}) u;
+
+INSERT INTO tasks (user_id, title, status, due_date, created_at, updated_at)
+SELECT
+  ('00000000-0000-4000-8000-' || lpad((1 + i % {users})::text, 12, '0'))::uuid,
+  'Task ' || i,
+  (ARRAY['To Do', 'In Progress', 'Done'])[1 + i % 3],
+  now() + (i % 60 - 30) * interval '1 day',
+  now() - i * interval '1 second',
+  now() - i * interval '1 second'
+FROM generate_series(1, {tasks}) i;
+
+ANALYZE;
+"""
+
+ROLE_SQL = f"""
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = '{ROLE}') THEN
+    CREATE ROLE {ROLE} NOLOGIN;
+  END IF;
+END
+$$;
+GRANT USAGE ON SCHEMA public, auth TO {ROLE};
+GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA public TO {ROLE};
+GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA public, auth TO {ROLE};
+"""
+
+QUERIES = {
+    "count all visible": "SELECT count(*) FROM tasks",
+    "first page": "SELECT * FROM tasks ORDER BY updated_at DESC, id DESC LIMIT 50",
+    "status filter": "SELECT * FROM tasks WHERE status = 'Done'",
+}
+
+def _explain(conn, sql: str) -> dict:
+    [(plan,)] = conn.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}").fetchall()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+def _nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+def measure(conn, user_id: str, repeat: int = 20) -> dict:
+    """Per query: median wall ms, planner-reported ms, buffers touched, rows, subplan loops"""
+    results = {}
+    with conn.transaction():
+        conn.execute(f"SET LOCAL ROLE {ROLE}")
+        conn.execute("SELECT set_config('request.jwt.claim.sub', %s, true)", (user_id,))
+        for name, sql in QUERIES.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(sql).fetchall()
+                timings.append(time.perf_counter() - start)
+            plan = _explain(conn, sql)
+            nodes = list(_nodes(plan["Plan"]))
+            results[name] = {
+                "ms": statistics.median(timings) * 1000,
+                "execution_ms": plan["Execution Time"],
+                "buffers": plan["Plan"].get("Shared Hit Blocks", 0) + plan["Plan"].get("Shared Read Blocks", 0),
+                "rows": plan["Plan"]["Actual Rows"],
+                "subplan_loops": sum(n.get("Actual Loops", 0) for n in nodes if n.get("Parent Relationship") == "SubPlan"),
+            }
+    return results
+
+def run(tasks: int, users: int) -> None:
+    with local_postgres() as server, scratch_database(server) as url:
+        import psycopg
+        with psycopg.connect(url, autocommit=True) as conn:
+            migrate.migrate(conn, target="0005")
+            conn.execute(LEGACY_POLICIES_SQL)
+            conn.execute(SEED_SQL.format(tasks=int(tasks), users=int(users)))
+            conn.execute(ROLE_SQL)
+
+            before = measure(conn, _user_id(1))
+            migrate.migrate(conn, target="0006")
+            conn.execute("ANALYZE")
+            after = measure(conn, _user_id(1))
+
+    print(f"{tasks} tasks, {users} users, reads as user 1 (own tasks + the test user's)")
+    print(f"{'query':<20} {'policy':<10} {'median ms':>10} {'exec ms':>9} {'buffers':>8} {'rows':>6} {'subplan loops':>14}")
+    for name in QUERIES:
+        for label, result in (("per-row", before[name]), ("0006", after[name])):
+            print(
+                f"{name:<20} {label:<10} {result['ms']:10.2f} {result['execution_ms']:9.2f} "
+                f"{result['buffers']:8d} {result['rows']:6d} {result['subplan_loops']:14d}"
+            )
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    run(tasks, users)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: full task pages vs. sparse fieldsets (`fields=`) on GET /tasks
+
+Reports response size and server time per page for the mobile list view's
+columns against full rows.
+
+Run from the api/ directory:
+    python -m benchmarks.bench_sparse_fields [page_size] [iterations]
+"""
+import asyncio
+import sys
+import time
+import uuid
+import httpx
+from .bench_concurrent_tasks import _configure, _token
+from .standin import PostgrestStandIn
+
+LIST_VIEW_FIELDS = "id,title,status,due_date"
+
+async def _measure(client: httpx.AsyncClient, params: dict, headers: dict, iterations: int):
+    response = await client.get("/api/v1/tasks/", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await client.get("/api/v1/tasks/", params=params, headers=headers)
+    return len(response.content), (time.perf_counter() - start) / iterations
+
+async def run(page_size: int, iterations: int):
+    user_id = str(uuid.uuid4())
+
+    with PostgrestStandIn() as standin:
+        standin.seed("tasks", [
+            {
+                "user_id": user_id,
+                "title": f"Task {i}",
+                "status": "To Do",
+                "description": "Longer free-form notes captured from the voice memo. " * 4,
+                "due_date": "2025-06-01T17:00:00+00:00",
+                "priority": "medium",
+            }
+            for i in range(page_size)
+        ])
+        _configure(standin.url)
+
+        from app.main import app
+        from app.db.supabase import close_supabase
+
+        headers = {"Authorization": f"Bearer {_token(user_id)}"}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            full = await _measure(client, {"limit": page_size}, headers, iterations)
+            sparse = await _measure(client, {"limit": page_size, "fields": LIST_VIEW_FIELDS}, headers, iterations)
+        await close_supabase()
+
+    print(f"GET /tasks page of {page_size} tasks")
+    for label, (size, elapsed) in (("full rows", full), (f"fields={LIST_VIEW_FIELDS}", sparse)):
+        print(f"  {label:<36} {size:8d} bytes   {elapsed * 1000:7.2f} ms/request")
+
+def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(run(page_size, iterations))
+
+if __name__ == "__main__":
+    main()
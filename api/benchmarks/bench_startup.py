@@ -0,0 +1,111 @@
+"""
+Benchmark: cold start of the API
+
+Measures, in fresh interpreters:
+  - `python -X importtime -c "import app.main"`: total import time and the
+    slowest top-level imports (cumulative)
+  - time to first response: from launching `python run.py --workers 1`
+    until GET / answers, which adds uvicorn startup and the lifespan
+    (client construction, initial revocation sync) to the imports
+
+Runs against the local PostgREST stand-in with no OPENAI_API_KEY, which
+is also how tests/test_startup.py checks that startup needs neither.
+
+Run from the api/ directory:
+    python -m benchmarks.bench_startup [runs]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+import httpx
+from benchmarks.standin import PostgrestStandIn
+
+API_DIR = Path(__file__).resolve().parent.parent
+
+def startup_env(supabase_url: Optional[str] = None) -> dict:
+    """The current environment without optional credentials"""
+    env = {name: value for name, value in os.environ.items() if name != "OPENAI_API_KEY"}
+    if supabase_url:
+        env.update(SUPABASE_URL=supabase_url, SUPABASE_KEY="bench-key")
+    return env
+
+def import_profile(module: str = "app.main", env: Optional[dict] = None) -> List[Tuple[int, str, int]]:
+    """
+    (nesting depth, module, cumulative microseconds) for every module
+    loaded by importing `module` in a fresh interpreter
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=API_DIR, env=env or startup_env(), capture_output=True, text=True, check=True,
+    )
+    profile = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        profile.append((depth, name.strip(), int(cumulative)))
+    return profile
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def time_to_first_response(env: dict, timeout: float = 30) -> float:
+    """
+    Seconds from starting a one-worker server until GET / returns 200
+    """
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "run.py", str(port), "--host", "127.0.0.1", "--workers", "1"],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode} before answering")
+            time.sleep(0.01)
+        raise RuntimeError(f"Server did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+def run(runs: int) -> None:
+    with PostgrestStandIn() as standin:
+        env = startup_env(standin.url)
+        samples = [import_profile(env=env) for _ in range(runs)]
+        totals = [next(us for _, name, us in profile if name == "app.main") / 1000 for profile in samples]
+        print(f"import app.main, {runs} fresh interpreters")
+        print(f"  median {statistics.median(totals):8.1f} ms   min {min(totals):8.1f} ms")
+
+        print("  slowest imports under app.main (cumulative, last run):")
+        direct = [(us, name) for depth, name, us in samples[-1] if depth in (1, 2)]
+        for us, name in sorted(direct, reverse=True)[:8]:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+        loaded = {name for _, name, _ in samples[-1]}
+        heavy = [name for name in ("openai", "pydub", "sqlalchemy") if name in loaded]
+        print(f"  deferred packages loaded at import: {', '.join(heavy) or 'none'}")
+
+        ttfr = [time_to_first_response(env) * 1000 for _ in range(runs)]
+        print(f"Time to first response (python run.py --workers 1), {runs} runs")
+        print(f"  median {statistics.median(ttfr):8.1f} ms   min {min(ttfr):8.1f} ms")
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    run(runs)
+
+if __name__ == "__main__":
+    main()
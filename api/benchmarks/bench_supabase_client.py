@@ -0,0 +1,52 @@
+"""
+Benchmark: per-request Supabase client construction vs. the shared pooled client
+
+Run from the api/ directory:
+    python -m benchmarks.bench_supabase_client [iterations]
+"""
+import asyncio
+import sys
+import time
+import uuid
+from .standin import PostgrestStandIn
+
+def _configure(url: str) -> None:
+    from app.config import settings
+    settings.SUPABASE_URL = url
+    settings.SUPABASE_KEY = "benchmark-key"
+
+def _report(label: str, elapsed: float, iterations: int, connections: int) -> None:
+    print(f"{label:<28} {elapsed / iterations * 1000:8.3f} ms/query   {connections:5d} connections")
+
+async def run(iterations: int):
+    user_id = str(uuid.uuid4())
+
+    with PostgrestStandIn() as standin:
+        standin.seed("tasks", [{"id": str(uuid.uuid4()), "user_id": user_id, "title": "Benchmark task", "status": "To Do"}])
+        _configure(standin.url)
+        from app.db.supabase import init_supabase, close_supabase, create_async_supabase_client
+
+        # Old behaviour: a fresh client (and connection) for every query
+        standin.connection_count = 0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            client = create_async_supabase_client()
+            await client.table("tasks").select("*").eq("user_id", user_id).execute()
+            await client.postgrest.aclose()
+        _report("create_client per request", time.perf_counter() - start, iterations, standin.connection_count)
+
+        # New behaviour: the application-scoped client with a keep-alive pool
+        standin.connection_count = 0
+        client = init_supabase()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await client.table("tasks").select("*").eq("user_id", user_id).execute()
+        _report("shared pooled client", time.perf_counter() - start, iterations, standin.connection_count)
+        await close_supabase()
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    asyncio.run(run(iterations))
+
+if __name__ == "__main__":
+    main()
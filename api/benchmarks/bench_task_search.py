@@ -0,0 +1,107 @@
+"""
+Benchmark: GET /tasks/search vs. downloading every task and filtering
+
+Seeds one user with 100k tasks (plus other users' tasks, so user scoping
+matters), then times TaskService.search_tasks on the postgres backend for
+queries of different selectivity, against the previous client-side
+approach: fetch all of the user's tasks and filter them in Python.
+
+Ranking has to score every match, so cost grows with the number of the
+user's tasks a query matches; selective queries (the typical "that thing
+about the dentist") stay in the low milliseconds.
+
+Run from the api/ directory (needs psycopg, asyncpg, and pgserver or TEST_DATABASE_URL):
+    python -m benchmarks.bench_task_search [tasks per user] [iterations]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from app.db import migrate
+from .local_postgres import local_postgres, scratch_database
+
+USER_ID = "00000000-0000-4000-8000-000000000001"
+OTHER_USERS = 4
+
+# 1 in 1000 tasks mentions the dentist; verbs and objects repeat often
+SEED_SQL = """
+INSERT INTO auth.users (id)
+SELECT ('00000000-0000-4000-8000-' || lpad(u::text, 12, '0'))::uuid FROM generate_series(1, {users}) u;
+
+INSERT INTO tasks (user_id, title, description, status, created_at, updated_at)
+SELECT
+  ('00000000-0000-4000-8000-' || lpad((1 + i % {users})::text, 12, '0'))::uuid,
+  (ARRAY['Call', 'Email', 'Buy', 'Book', 'Pay', 'Fix', 'Plan', 'Review'])[1 + i % 8] || ' ' ||
+  (ARRAY['groceries', 'mom', 'report', 'car', 'rent', 'flight', 'taxes', 'garden', 'invoice', 'meeting'])[1 + (i / 8) % 10],
+  CASE WHEN i / {users} % 1000 = 0 THEN 'Ask the dentist about the appointment' ELSE 'Note ' || md5(i::text) END,
+  (ARRAY['To Do', 'In Progress', 'Done'])[1 + i % 3],
+  now() - i * interval '1 second',
+  now() - i * interval '1 second'
+FROM generate_series(1, {tasks}) i;
+"""
+
+QUERIES = ["dentist", "dentist appointment", '"call mom"', "invoice -pay", "groceries", "xyzzy"]
+
+def _words(text):
+    return (text or "").lower().split()
+
+async def _time(call, iterations: int):
+    result = await call()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return result, statistics.median(timings) * 1000, timings[int(len(timings) * 0.99) - 1] * 1000
+
+async def run_async(url: str, iterations: int) -> None:
+    from app.db.postgres import create_postgres_engine
+    from app.repositories.postgres import PostgresTaskRepository
+    from app.services.task_service import TaskService
+
+    engine = create_postgres_engine(url)
+    try:
+        service = TaskService(PostgresTaskRepository(engine))
+        print(f"{'query':<22} {'matches':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for query in QUERIES:
+            async def count_matches(query=query):
+                total, cursor = 0, None
+                while True:
+                    page = await service.search_tasks(USER_ID, query, limit=200, cursor=cursor)
+                    total += len(page["items"])
+                    cursor = page["next_cursor"]
+                    if cursor is None:
+                        return total
+            matches = await count_matches()
+            _, p50, p99 = await _time(lambda: service.search_tasks(USER_ID, query, limit=20), iterations)
+            print(f"{query:<22} {matches:8d} {p50:8.2f} {p99:8.2f}")
+
+        # Before: the client downloads every task and filters locally
+        async def download_and_filter():
+            tasks = await service.get_tasks(USER_ID)
+            return [t for t in tasks if "dentist" in _words(t["title"]) + _words(t["description"])]
+        rows, p50, p99 = await _time(download_and_filter, max(iterations // 20, 3))
+        print(f"{'download all + filter':<22} {len(rows):8d} {p50:8.2f} {p99:8.2f}")
+    finally:
+        await engine.dispose()
+
+def run(tasks_per_user: int, iterations: int) -> None:
+    import psycopg
+
+    users = OTHER_USERS + 1
+    with local_postgres() as server, scratch_database(server) as url:
+        with psycopg.connect(url, autocommit=True) as conn:
+            migrate.migrate(conn)
+            conn.execute(SEED_SQL.format(tasks=int(tasks_per_user) * users, users=users))
+            conn.execute("VACUUM ANALYZE tasks")
+        print(f"{tasks_per_user} tasks per user, {users} users, search limit 20, {iterations} calls per query")
+        asyncio.run(run_async(url, iterations))
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    run(tasks, iterations)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: GET /tasks/stats from trigger-maintained counters vs. a scan
+
+Seeds one user with 100k tasks spread over a year of due dates, then
+times TaskService.get_stats on the postgres backend (task_stats() reads
+one counter row per status and one per past due day) against counting
+the user's tasks with GROUP BY on every request. Also reports what the
+statement-level triggers add to a 1k-row bulk update.
+
+Run from the api/ directory (needs psycopg, asyncpg, and pgserver or TEST_DATABASE_URL):
+    python -m benchmarks.bench_task_stats [tasks per user] [iterations]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from app.db import migrate
+from .local_postgres import local_postgres, scratch_database
+
+USER_ID = "00000000-0000-4000-8000-000000000001"
+
+SEED_SQL = """
+INSERT INTO auth.users (id) VALUES ('{user_id}');
+
+INSERT INTO tasks (user_id, title, status, due_date)
+SELECT '{user_id}', 'Task ' || i,
+  (ARRAY['To Do', 'In Progress', 'Done'])[1 + i % 3],
+  CASE WHEN i % 4 = 0 THEN NULL ELSE now() + (i % 365 - 182) * interval '1 day' + i * interval '1 second' END
+FROM generate_series(1, {tasks}) i;
+"""
+
+SCAN_SQL = """
+SELECT status, count(*), count(*) FILTER (WHERE status <> 'Done' AND due_date < now())
+FROM tasks WHERE user_id = %s GROUP BY status
+"""
+
+BULK_UPDATE_SQL = """
+UPDATE tasks SET status = CASE status WHEN 'Done' THEN 'To Do' ELSE 'Done' END
+WHERE id IN (SELECT id FROM tasks WHERE user_id = %s ORDER BY id LIMIT 1000)
+"""
+
+def _median_ms(call, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+async def _stats_ms(url: str, iterations: int) -> float:
+    from app.db.postgres import create_postgres_engine
+    from app.repositories.postgres import PostgresTaskRepository
+    from app.services.task_service import TaskService
+
+    engine = create_postgres_engine(url)
+    try:
+        service = TaskService(PostgresTaskRepository(engine))
+        await service.get_stats(USER_ID)
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await service.get_stats(USER_ID)
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+    finally:
+        await engine.dispose()
+
+def run(tasks: int, iterations: int) -> None:
+    import psycopg
+
+    with local_postgres() as server, scratch_database(server) as url:
+        with psycopg.connect(url, autocommit=True) as conn:
+            migrate.migrate(conn)
+            conn.execute(SEED_SQL.format(user_id=USER_ID, tasks=int(tasks)))
+            conn.execute("VACUUM ANALYZE tasks")
+            print(f"{tasks} tasks, {iterations} calls each (median)")
+            print(f"  stats from counters:     {asyncio.run(_stats_ms(url, iterations)):8.2f} ms")
+            scan = _median_ms(lambda: conn.execute(SCAN_SQL, (USER_ID,)).fetchall(), max(iterations // 10, 3))
+            print(f"  GROUP BY scan:           {scan:8.2f} ms")
+
+            with_triggers = _median_ms(lambda: conn.execute(BULK_UPDATE_SQL, (USER_ID,)), 10)
+            conn.execute("ALTER TABLE tasks DISABLE TRIGGER count_task_updates")
+            without_triggers = _median_ms(lambda: conn.execute(BULK_UPDATE_SQL, (USER_ID,)), 10)
+            conn.execute("ALTER TABLE tasks ENABLE TRIGGER count_task_updates")
+            conn.execute("SELECT reconcile_task_counts()")
+            print(f"  1k-row update, counted:  {with_triggers:8.2f} ms")
+            print(f"  1k-row update, bare:     {without_triggers:8.2f} ms")
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    run(tasks, iterations)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Local Postgres for the EXPLAIN tests and the database benchmarks.
+
+Uses the server at TEST_DATABASE_URL when set; otherwise starts a
+throwaway server from the optional `pgserver` package, which bundles
+Postgres binaries. Each user of the server works in a scratch database
+that is dropped afterwards. Requires the optional `psycopg` package.
+"""
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+from urllib.parse import urlsplit, urlunsplit
+
+@contextmanager
+def local_postgres() -> Iterator[str]:
+    """Yield the connection URL of a local Postgres server"""
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        yield url
+        return
+
+    import pgserver
+    with tempfile.TemporaryDirectory(prefix="voicetask-pg-") as data_dir:
+        server = pgserver.get_server(data_dir, cleanup_mode="stop")
+        try:
+            yield server.get_uri()
+        finally:
+            server.cleanup()
+
+@contextmanager
+def scratch_database(server_url: str) -> Iterator[str]:
+    """Create an empty database on the server; yield its URL, then drop it"""
+    import psycopg
+
+    name = f"voicetask_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(server_url, autocommit=True) as conn:
+        conn.execute(f'CREATE DATABASE "{name}"')
+    try:
+        yield urlunsplit(urlsplit(server_url)._replace(path=f"/{name}"))
+    finally:
+        with psycopg.connect(server_url, autocommit=True) as conn:
+            conn.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
@@ -0,0 +1,204 @@
+"""
+Local stand-in for a Redis server used by the tests and benchmarks.
+
+Speaks enough of the RESP2/RESP3 protocol for the shared cache, idempotency and
+rate-limit backends (strings with expiry, counters, and WATCH/MULTI/EXEC
+optimistic transactions). Everything lives in memory in this process;
+there is no persistence or eviction.
+"""
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+class RedisStandIn:
+    """
+    In-memory Redis-compatible server on a local TCP port
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        # Bumped on every write, so EXEC can tell whether a WATCHed key changed
+        self.versions: Dict[str, int] = {}
+        self.command_count = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "RedisStandIn":
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "RedisStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # Commands
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry[1]
+
+    def _expiry(self, key: str) -> Optional[float]:
+        entry = self.data.get(key)
+        return entry[0] if entry else None
+
+    def _touch(self, *keys: str) -> None:
+        for key in keys:
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+    def execute(self, args: List[bytes]):
+        name = args[0].decode().upper()
+        keys = [a.decode() for a in args[1:]]
+        if name in ("SET", "DEL", "INCR", "INCRBY", "DECR", "DECRBY", "EXPIRE", "PEXPIRE"):
+            self._touch(*(keys if name == "DEL" else keys[:1]))
+
+        if name == "PING":
+            return "+PONG"
+        if name == "HELLO":
+            protocol = int(keys[0]) if keys else 2
+            return {"server": "redis-standin", "version": "7.0.0", "proto": protocol}
+        if name in ("CLIENT", "SELECT"):
+            return "+OK"
+        if name == "GET":
+            return self._live(keys[0])
+        if name == "SET":
+            key, value = keys[0], args[2]
+            options = [k.upper() for k in keys[2:]]
+            expires_at = None
+            for flag, scale in (("EX", 1), ("PX", 0.001)):
+                if flag in options:
+                    expires_at = time.monotonic() + int(options[options.index(flag) + 1]) * scale
+            if "NX" in options and self._live(key) is not None:
+                return None
+            if "XX" in options and self._live(key) is None:
+                return None
+            self.data[key] = (expires_at, value)
+            return "+OK"
+        if name == "DEL":
+            removed = sum(1 for key in keys if self._live(key) is not None)
+            for key in keys:
+                self.data.pop(key, None)
+            return removed
+        if name in ("INCR", "INCRBY", "DECR", "DECRBY"):
+            key = keys[0]
+            step = int(keys[1]) if name.endswith("BY") else 1
+            if name.startswith("DECR"):
+                step = -step
+            value = int(self._live(key) or 0) + step
+            self.data[key] = (self._expiry(key), str(value).encode())
+            return value
+        if name in ("EXPIRE", "PEXPIRE"):
+            key = keys[0]
+            value = self._live(key)
+            if value is None:
+                return 0
+            scale = 1 if name == "EXPIRE" else 0.001
+            self.data[key] = (time.monotonic() + int(keys[1]) * scale, value)
+            return 1
+        if name == "PTTL":
+            if self._live(keys[0]) is None:
+                return -2
+            expires_at = self._expiry(keys[0])
+            return -1 if expires_at is None else int((expires_at - time.monotonic()) * 1000)
+        if name == "EXISTS":
+            return sum(1 for key in keys if self._live(key) is not None)
+        return Exception(f"ERR unknown command '{name}'")
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            disable_nagle_algorithm = True
+            protocol = 2
+
+            def _read_command(self) -> Optional[List[bytes]]:
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                if not line.startswith(b"*"):
+                    return line.split()
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+            def _encode(self, reply) -> bytes:
+                if reply is None:
+                    return b"_\r\n" if self.protocol == 3 else b"$-1\r\n"
+                if isinstance(reply, Exception):
+                    return f"-{reply}\r\n".encode()
+                if isinstance(reply, str):
+                    return f"{reply}\r\n".encode()
+                if isinstance(reply, int):
+                    return f":{reply}\r\n".encode()
+                if isinstance(reply, list):
+                    return b"*%d\r\n%s" % (len(reply), b"".join(self._encode(item) for item in reply))
+                if isinstance(reply, dict):
+                    items = b"".join(
+                        self._encode(str(k).encode()) + self._encode(v if isinstance(v, int) else str(v).encode())
+                        for k, v in reply.items()
+                    )
+                    return b"%%%d\r\n%s" % (len(reply), items)
+                return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+            def _transaction(self, args: List[bytes]):
+                """WATCH/MULTI/EXEC/DISCARD state for this connection, or NotImplemented"""
+                name = args[0].decode().upper()
+                if name == "WATCH":
+                    self.watched.update({k.decode(): standin.versions.get(k.decode(), 0) for k in args[1:]})
+                    return "+OK"
+                if name == "UNWATCH":
+                    self.watched = {}
+                    return "+OK"
+                if name == "MULTI":
+                    self.queued = []
+                    return "+OK"
+                if name == "DISCARD":
+                    self.queued, self.watched = None, {}
+                    return "+OK"
+                if name == "EXEC":
+                    queued, watched = self.queued or [], self.watched
+                    self.queued, self.watched = None, {}
+                    if any(standin.versions.get(key, 0) != version for key, version in watched.items()):
+                        return None  # a watched key changed: abort
+                    return [standin.execute(command) for command in queued]
+                if self.queued is not None:
+                    self.queued.append(args)
+                    return "+QUEUED"
+                return NotImplemented
+
+            def handle(self):
+                self.watched: Dict[str, int] = {}
+                self.queued: Optional[List[List[bytes]]] = None
+                while True:
+                    args = self._read_command()
+                    if not args:
+                        return
+                    with standin._lock:
+                        standin.command_count += 1
+                        reply = self._transaction(args)
+                        if reply is NotImplemented:
+                            reply = standin.execute(args)
+                    if isinstance(reply, dict) and "proto" in reply:
+                        self.protocol = reply["proto"]
+                    self.wfile.write(self._encode(reply))
+
+        return Handler
@@ -0,0 +1,361 @@
+"""
+Local stand-in for the Supabase REST (PostgREST) API used by the benchmarks.
+
+Serves an in-memory table store over plain HTTP with an optional artificial
+per-request latency, so client-side costs (client construction, connection
+setup, event-loop blocking) can be measured without a real Supabase project.
+Only the subset of PostgREST the services use is implemented.
+"""
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import cmp_to_key
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _coerce(value: str):
+    if value == "null":
+        return None
+    if value in ("true", "false"):
+        return value == "true"
+    return value
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+def _matches(row: dict, column: str, expression: str) -> bool:
+    operator, _, raw = expression.partition(".")
+    raw = _unquote(raw)
+    value = row.get(column)
+    if operator == "eq":
+        return str(value) == raw
+    if operator == "neq":
+        return str(value) != raw
+    if operator == "is":
+        return value is _coerce(raw)
+    if operator == "in":
+        return str(value) in [_unquote(v) for v in raw.strip("()").split(",")]
+    if value is None:
+        return False
+    if operator == "gt":
+        return str(value) > raw
+    if operator == "gte":
+        return str(value) >= raw
+    if operator == "lt":
+        return str(value) < raw
+    if operator == "lte":
+        return str(value) <= raw
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+def _split_conditions(text: str) -> List[str]:
+    """Split a PostgREST logic expression on top-level commas"""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+def _matches_logic(row: dict, operator: str, expression: str) -> bool:
+    results = []
+    for condition in _split_conditions(expression.strip()[1:-1]):
+        if condition.startswith(("and(", "or(")):
+            nested, _, rest = condition.partition("(")
+            results.append(_matches_logic(row, nested, "(" + rest))
+        else:
+            column, _, rest = condition.partition(".")
+            results.append(_matches(row, column, rest))
+    return any(results) if operator == "or" else all(results)
+
+def _compare_rows(order: List[tuple], a: dict, b: dict) -> int:
+    for column, descending, nulls_first in order:
+        x, y = a.get(column), b.get(column)
+        if x == y:
+            continue
+        if x is None or y is None:
+            return (-1 if x is None else 1) * (1 if nulls_first else -1)
+        result = -1 if str(x) < str(y) else 1
+        return -result if descending else result
+    return 0
+
+_STOP_WORDS = {"a", "an", "the", "to", "of", "and", "or", "for", "about", "with", "on", "in", "at", "what", "was", "that", "is"}
+
+def _search_terms(text: Optional[str]) -> List[str]:
+    return [word for word in re.findall(r"\w+", (text or "").lower()) if word not in _STOP_WORDS]
+
+class PostgrestStandIn:
+    """
+    In-memory PostgREST-compatible server
+
+    Args:
+        latency: Seconds to sleep before answering each request, to model
+            the network round trip to a hosted database
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.tables: Dict[str, List[dict]] = {"tasks": [], "users": [], "task_tombstones": []}
+        self.request_count = 0
+        self.queries: List[tuple] = []
+        self.connection_count = 0
+        self.functions = {"search_tasks": self._search_tasks, "task_stats": self._task_stats}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "PostgrestStandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "PostgrestStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def seed(self, table: str, rows: List[dict]) -> List[dict]:
+        with self._lock:
+            return self._insert(table, rows)
+
+    # Query evaluation
+
+    def _select(self, table: str, params: List[tuple]) -> Tuple[List[dict], int]:
+        """Return the selected rows and the total match count before limit/offset"""
+        rows = self.tables.setdefault(table, [])
+        columns = None
+        order = None
+        limit = None
+        offset = 0
+        filters = []
+        for key, value in params:
+            if key == "select":
+                columns = None if value == "*" else value.split(",")
+            elif key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif key not in ("on_conflict", "columns"):
+                filters.append((key, value))
+
+        def keep(row: dict) -> bool:
+            for column, expression in filters:
+                if column in ("or", "and"):
+                    if not _matches_logic(row, column, expression):
+                        return False
+                elif not _matches(row, column, expression):
+                    return False
+            return True
+
+        result = [row for row in rows if keep(row)]
+        if order:
+            spec = []
+            for part in order.split(","):
+                column, direction, *nulls = part.split(".")
+                descending = direction == "desc"
+                # PostgreSQL default: NULLS LAST for ASC, NULLS FIRST for DESC
+                nulls_first = nulls[0] == "nullsfirst" if nulls else descending
+                spec.append((column, descending, nulls_first))
+            result.sort(key=cmp_to_key(lambda a, b: _compare_rows(spec, a, b)))
+        total = len(result)
+        result = result[offset:]
+        if limit is not None:
+            result = result[:limit]
+        if columns is not None:
+            result = [{c: row.get(c) for c in columns} for row in result]
+        return result, total
+
+    def _insert(self, table: str, payload, merge_key: Optional[str] = None, ignore_duplicates: bool = False) -> List[dict]:
+        """
+        Insert rows; with a merge key (comma-separated columns), rows matching
+        an existing key update it (upsert) or, with ignore_duplicates, are skipped
+        """
+        records = payload if isinstance(payload, list) else [payload]
+        rows = self.tables.setdefault(table, [])
+        key_columns = merge_key.split(",") if merge_key else []
+        existing = {tuple(row.get(c) for c in key_columns): row for row in rows} if merge_key else {}
+        created = []
+        for record in records:
+            values = {k: v for k, v in record.items() if v != "now()"}
+            current = existing.get(tuple(values.get(c) for c in key_columns)) if merge_key else None
+            if current is not None and ignore_duplicates:
+                continue
+            if current is not None:
+                current.update(values)
+                current["updated_at"] = _now()
+                created.append(dict(current))
+                continue
+            row = {"id": str(uuid.uuid4()), "created_at": _now(), "updated_at": _now()}
+            row.update(values)
+            rows.append(row)
+            if merge_key:
+                existing[tuple(row.get(c) for c in key_columns)] = row
+            created.append(row)
+        return created
+
+    def _search_tasks(self, args: dict) -> List[dict]:
+        """
+        search_tasks RPC: every query word must appear in the title or
+        description; rank weighs title matches above description matches.
+        A rough model of the Postgres function, without stemming.
+        """
+        terms = set(_search_terms(args["p_query"]))
+        after_rank, after_id = args.get("p_after_rank"), args.get("p_after_id")
+        hits = []
+        for row in self.tables["tasks"]:
+            if row["user_id"] != args["p_user_id"]:
+                continue
+            title, description = _search_terms(row.get("title")), _search_terms(row.get("description"))
+            if not terms or not terms <= set(title) | set(description):
+                continue
+            rank = sum(title.count(t) for t in terms) * 1.0 + sum(description.count(t) for t in terms) * 0.4
+            if after_rank is not None and not (rank < after_rank or (rank == after_rank and row["id"] > after_id)):
+                continue
+            hits.append({**row, "rank": rank})
+        hits.sort(key=lambda hit: hit["id"])
+        hits.sort(key=lambda hit: hit["rank"], reverse=True)
+        return hits[:args.get("p_limit", 20)]
+
+    def _task_stats(self, args: dict) -> List[dict]:
+        """task_stats RPC, computed from the rows rather than counters"""
+        now = _now()
+        counts: Dict[str, int] = {}
+        overdue = 0
+        for row in self.tables["tasks"]:
+            if row["user_id"] != args["p_user_id"]:
+                continue
+            counts[row["status"]] = counts.get(row["status"], 0) + 1
+            if row["status"] != "Done" and row.get("due_date") and row["due_date"] < now:
+                overdue += 1
+        return [{"status_counts": counts, "overdue": overdue}]
+
+    def _update(self, table: str, params: List[tuple], payload: dict) -> List[dict]:
+        matched, _ = self._select(table, [p for p in params if p[0] != "select"])
+        ids = {row["id"] for row in matched}
+        updated = []
+        for row in self.tables[table]:
+            if row["id"] in ids:
+                row.update(payload)
+                row["updated_at"] = _now()
+                updated.append(dict(row))
+        return updated
+
+    def _delete(self, table: str, params: List[tuple]) -> List[dict]:
+        matched, _ = self._select(table, [p for p in params if p[0] != "select"])
+        ids = {row["id"] for row in matched}
+        self.tables[table] = [row for row in self.tables[table] if row["id"] not in ids]
+        if table == "tasks":
+            # Mirrors the record_task_deletion trigger
+            tombstones = self.tables.setdefault("task_tombstones", [])
+            tombstones[:] = [t for t in tombstones if t["task_id"] not in ids]
+            tombstones.extend(
+                {"task_id": row["id"], "user_id": row["user_id"], "deleted_at": _now()} for row in matched
+            )
+        return matched
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with standin._lock:
+                    standin.connection_count += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _handle(self, method: str):
+                if standin.latency:
+                    time.sleep(standin.latency)
+
+                parts = urlsplit(self.path)
+                table = parts.path.rstrip("/").rsplit("/", 1)[-1]
+                params = parse_qsl(parts.query, keep_blank_values=True)
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length)) if length else None
+
+                total = None
+                with standin._lock:
+                    standin.request_count += 1
+                    standin.queries.append((method, table, params))
+                    if "/rpc/" in parts.path:
+                        result = standin.functions[table](payload or {})
+                    elif method == "GET":
+                        result, total = standin._select(table, params)
+                    elif method == "POST":
+                        prefer = self.headers.get("Prefer") or ""
+                        ignore = "resolution=ignore-duplicates" in prefer
+                        merge = ignore or "resolution=merge-duplicates" in prefer
+                        merge_key = (dict(params).get("on_conflict") or "id") if merge else None
+                        result = standin._insert(table, payload, merge_key, ignore)
+                    elif method == "PATCH":
+                        result = standin._update(table, params, payload)
+                    else:
+                        result = standin._delete(table, params)
+
+                columns = dict(params).get("select")
+                if method != "GET" and columns and columns != "*":
+                    result = [{c: row.get(c) for c in columns.split(",")} for row in result]
+
+                prefer = self.headers.get("Prefer") or ""
+                if total is None and method in ("PATCH", "DELETE"):
+                    total = len(result)
+                minimal = "return=minimal" in prefer
+                body = b"" if minimal else json.dumps(result).encode()
+                self.send_response(204 if minimal else 201 if method == "POST" and "/rpc/" not in parts.path else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if total is not None and "count=" in prefer:
+                    end = f"0-{len(result) - 1}" if result and not minimal else "*"
+                    self.send_header("Content-Range", f"{end}/{total}")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PATCH(self):
+                self._handle("PATCH")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+        return Handler
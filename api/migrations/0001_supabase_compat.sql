@@ -0,0 +1,32 @@
+-- Objects Supabase provides out of the box, created only when missing so
+-- the same migrations also run against a plain local Postgres
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'uuid-ossp') THEN
+    CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+  ELSIF to_regprocedure('uuid_generate_v4()') IS NULL THEN
+    -- Builds without contrib modules: same result from the built-in generator
+    CREATE FUNCTION uuid_generate_v4() RETURNS uuid
+    LANGUAGE sql VOLATILE
+    AS 'SELECT gen_random_uuid()';
+  END IF;
+END
+$$;
+
+CREATE SCHEMA IF NOT EXISTS auth;
+
+CREATE TABLE IF NOT EXISTS auth.users (
+  id uuid PRIMARY KEY,
+  email text
+);
+
+DO $$
+BEGIN
+  IF to_regprocedure('auth.uid()') IS NULL THEN
+    -- Same contract as Supabase's auth.uid(): the JWT subject of the request
+    CREATE FUNCTION auth.uid() RETURNS uuid
+    LANGUAGE sql STABLE
+    AS 'SELECT nullif(current_setting(''request.jwt.claim.sub'', true), '''')::uuid';
+  END IF;
+END
+$$;
@@ -0,0 +1,44 @@
+-- Tombstones for deleted tasks, read by delta sync (GET /tasks/changes)
+CREATE TABLE IF NOT EXISTS task_tombstones (
+  task_id uuid PRIMARY KEY,
+  user_id uuid NOT NULL,
+  deleted_at timestamp with time zone DEFAULT clock_timestamp() NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS task_tombstones_user_deleted_idx
+ON task_tombstones (user_id, deleted_at, task_id);
+
+ALTER TABLE task_tombstones ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can only read their own tombstones"
+ON task_tombstones
+FOR SELECT
+USING (auth.uid() = user_id);
+
+-- Record a tombstone for every deleted task, whichever path deleted it
+CREATE OR REPLACE FUNCTION record_task_deletion()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO task_tombstones (task_id, user_id)
+  VALUES (OLD.id, OLD.user_id)
+  ON CONFLICT (task_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+  RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER record_task_deletion
+AFTER DELETE ON tasks
+FOR EACH ROW
+EXECUTE FUNCTION record_task_deletion();
+
+-- Drop tombstones older than the sync retention window (run periodically)
+CREATE OR REPLACE FUNCTION purge_task_tombstones(retention interval DEFAULT interval '30 days')
+RETURNS integer AS $$
+DECLARE
+  purged integer;
+BEGIN
+  DELETE FROM task_tombstones WHERE deleted_at < now() - retention;
+  GET DIAGNOSTICS purged = ROW_COUNT;
+  RETURN purged;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,16 @@
+-- Client operation IDs already applied by the offline mutation push
+-- (POST /tasks/sync), so replayed batches are skipped
+CREATE TABLE IF NOT EXISTS task_operations (
+  user_id uuid NOT NULL,
+  op_id text NOT NULL,
+  task_id uuid,
+  status text NOT NULL,
+  applied_at timestamp with time zone DEFAULT now() NOT NULL,
+  PRIMARY KEY (user_id, op_id)
+);
+
+ALTER TABLE task_operations ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can only access their own operations"
+ON task_operations
+USING (auth.uid() = user_id);
@@ -0,0 +1,18 @@
+-- Composite indexes for the TaskService query shapes. Every query is
+-- scoped to one user, so user_id leads each index.
+
+-- Status filters, optionally with a due-date range (list, bulk update/delete)
+CREATE INDEX IF NOT EXISTS tasks_user_status_due_idx
+ON tasks (user_id, status, due_date);
+
+-- Keyset pages sorted by updated_at, delta sync and the ETag version
+CREATE INDEX IF NOT EXISTS tasks_user_updated_idx
+ON tasks (user_id, updated_at, id);
+
+-- Keyset pages sorted by created_at
+CREATE INDEX IF NOT EXISTS tasks_user_created_idx
+ON tasks (user_id, created_at, id);
+
+-- Keyset pages sorted by due_date and due-date ranges across statuses
+CREATE INDEX IF NOT EXISTS tasks_user_due_idx
+ON tasks (user_id, due_date, id);
@@ -0,0 +1,62 @@
+-- Task RLS without per-row subqueries
+--
+-- The policies from user_setup.sql evaluated
+-- (SELECT is_test_user FROM public.users WHERE id = user_id) for every
+-- row, a correlated lookup per task. Test users are now fetched once per
+-- statement through a stable security-definer function, and auth.uid()
+-- is wrapped in a scalar subquery, so both become InitPlans and the
+-- predicate reduces to user_id = $1 OR user_id = ANY($2): an index scan.
+
+-- Users table from user_setup.sql, for databases that never ran it
+CREATE TABLE IF NOT EXISTS public.users (
+  id UUID PRIMARY KEY,
+  email TEXT UNIQUE NOT NULL,
+  full_name TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+  is_test_user BOOLEAN DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS users_test_user_idx
+ON public.users (id) WHERE is_test_user;
+
+-- IDs of the test users, readable regardless of the caller's users RLS
+CREATE OR REPLACE FUNCTION public.test_user_ids()
+RETURNS uuid[]
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT coalesce(array_agg(id), '{}') FROM public.users WHERE is_test_user
+$$;
+
+ALTER TABLE public.tasks ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can only access their own tasks" ON public.tasks;
+DROP POLICY IF EXISTS task_select_own ON public.tasks;
+DROP POLICY IF EXISTS task_insert_own ON public.tasks;
+DROP POLICY IF EXISTS task_update_own ON public.tasks;
+DROP POLICY IF EXISTS task_delete_own ON public.tasks;
+
+CREATE POLICY task_select_own ON public.tasks
+  FOR SELECT USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+CREATE POLICY task_insert_own ON public.tasks
+  FOR INSERT WITH CHECK ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+CREATE POLICY task_update_own ON public.tasks
+  FOR UPDATE USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+CREATE POLICY task_delete_own ON public.tasks
+  FOR DELETE USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+-- Same InitPlan form for the sync tables
+DROP POLICY IF EXISTS "Users can only read their own tombstones" ON task_tombstones;
+CREATE POLICY "Users can only read their own tombstones"
+ON task_tombstones
+FOR SELECT
+USING ((SELECT auth.uid()) = user_id);
+
+DROP POLICY IF EXISTS "Users can only access their own operations" ON task_operations;
+CREATE POLICY "Users can only access their own operations"
+ON task_operations
+USING ((SELECT auth.uid()) = user_id);
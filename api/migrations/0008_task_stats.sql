@@ -0,0 +1,199 @@
+-- Per-user task counters for GET /tasks/stats
+--
+-- task_status_counts holds the number of tasks per status.
+-- task_due_counts holds the number of open (not Done) tasks per UTC due
+-- day, so the overdue count is a sum over past days plus a range scan of
+-- today's tasks rather than a scan of every task.
+--
+-- Statement-level triggers keep both tables current. They read the
+-- transition tables, so a bulk insert, update or delete applies one
+-- aggregated upsert per counter table, not one per row.
+-- reconcile_task_counts() rebuilds the counters from the tasks table.
+CREATE TABLE IF NOT EXISTS task_status_counts (
+  user_id uuid NOT NULL,
+  status text NOT NULL,
+  task_count bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, status)
+);
+
+CREATE TABLE IF NOT EXISTS task_due_counts (
+  user_id uuid NOT NULL,
+  due_day date NOT NULL,
+  open_count bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, due_day)
+);
+
+ALTER TABLE task_status_counts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE task_due_counts ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can only read their own status counts"
+ON task_status_counts
+FOR SELECT
+USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+CREATE POLICY "Users can only read their own due counts"
+ON task_due_counts
+FOR SELECT
+USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'task_count_delta') THEN
+    CREATE TYPE public.task_count_delta AS (user_id uuid, status text, due_date timestamp with time zone, delta integer);
+  END IF;
+END
+$$;
+
+-- Add a batch of +1 (new row) / -1 (old row) changes to the counters
+CREATE OR REPLACE FUNCTION public.apply_task_count_deltas(deltas public.task_count_delta[])
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  INSERT INTO task_status_counts AS c (user_id, status, task_count)
+  SELECT d.user_id, d.status, sum(d.delta)
+  FROM unnest(deltas) AS d
+  GROUP BY d.user_id, d.status
+  HAVING sum(d.delta) <> 0
+  ON CONFLICT (user_id, status) DO UPDATE SET task_count = c.task_count + EXCLUDED.task_count;
+
+  INSERT INTO task_due_counts AS c (user_id, due_day, open_count)
+  SELECT d.user_id, (d.due_date AT TIME ZONE 'UTC')::date, sum(d.delta)
+  FROM unnest(deltas) AS d
+  WHERE d.status <> 'Done' AND d.due_date IS NOT NULL
+  GROUP BY 1, 2
+  HAVING sum(d.delta) <> 0
+  ON CONFLICT (user_id, due_day) DO UPDATE SET open_count = c.open_count + EXCLUDED.open_count;
+
+  -- Keep the per-day buckets to days that still have open tasks
+  DELETE FROM task_due_counts
+  WHERE open_count = 0 AND user_id IN (SELECT DISTINCT d.user_id FROM unnest(deltas) AS d);
+$$;
+
+CREATE OR REPLACE FUNCTION public.count_task_changes()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM public.apply_task_count_deltas(array_agg((n.user_id, n.status, n.due_date, 1)::public.task_count_delta))
+    FROM new_rows AS n;
+  ELSIF TG_OP = 'UPDATE' THEN
+    PERFORM public.apply_task_count_deltas(array_agg(d))
+    FROM (
+      SELECT (n.user_id, n.status, n.due_date, 1)::public.task_count_delta AS d FROM new_rows AS n
+      UNION ALL
+      SELECT (o.user_id, o.status, o.due_date, -1)::public.task_count_delta FROM old_rows AS o
+    ) AS changes;
+  ELSE
+    PERFORM public.apply_task_count_deltas(array_agg((o.user_id, o.status, o.due_date, -1)::public.task_count_delta))
+    FROM old_rows AS o;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS count_task_inserts ON tasks;
+CREATE TRIGGER count_task_inserts
+AFTER INSERT ON tasks
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.count_task_changes();
+
+DROP TRIGGER IF EXISTS count_task_updates ON tasks;
+CREATE TRIGGER count_task_updates
+AFTER UPDATE ON tasks
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.count_task_changes();
+
+DROP TRIGGER IF EXISTS count_task_deletes ON tasks;
+CREATE TRIGGER count_task_deletes
+AFTER DELETE ON tasks
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.count_task_changes();
+
+-- Rebuild the counters from the tasks table, for one user or everyone.
+-- Run after restoring data or anything that bypasses triggers (TRUNCATE,
+-- session_replication_role = replica); returns the number of users fixed.
+CREATE OR REPLACE FUNCTION public.reconcile_task_counts(p_user_id uuid DEFAULT NULL)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  fixed integer;
+BEGIN
+  CREATE TEMP TABLE stale_users AS
+  WITH actual AS (
+    SELECT user_id, status, count(*) AS task_count FROM tasks
+    WHERE p_user_id IS NULL OR user_id = p_user_id
+    GROUP BY user_id, status
+  ), stored AS (
+    SELECT user_id, status, task_count FROM task_status_counts
+    WHERE (p_user_id IS NULL OR user_id = p_user_id) AND task_count <> 0
+  ), actual_due AS (
+    SELECT user_id, (due_date AT TIME ZONE 'UTC')::date AS due_day, count(*) AS open_count FROM tasks
+    WHERE (p_user_id IS NULL OR user_id = p_user_id) AND status <> 'Done' AND due_date IS NOT NULL
+    GROUP BY 1, 2
+  ), stored_due AS (
+    SELECT user_id, due_day, open_count FROM task_due_counts
+    WHERE (p_user_id IS NULL OR user_id = p_user_id) AND open_count <> 0
+  )
+  SELECT coalesce(a.user_id, s.user_id) AS user_id
+  FROM actual AS a FULL JOIN stored AS s USING (user_id, status)
+  WHERE a.task_count IS DISTINCT FROM s.task_count
+  UNION
+  SELECT coalesce(a.user_id, s.user_id)
+  FROM actual_due AS a FULL JOIN stored_due AS s USING (user_id, due_day)
+  WHERE a.open_count IS DISTINCT FROM s.open_count;
+
+  DELETE FROM task_status_counts WHERE user_id IN (SELECT user_id FROM stale_users);
+  DELETE FROM task_due_counts WHERE user_id IN (SELECT user_id FROM stale_users);
+
+  INSERT INTO task_status_counts (user_id, status, task_count)
+  SELECT user_id, status, count(*) FROM tasks
+  WHERE user_id IN (SELECT user_id FROM stale_users)
+  GROUP BY user_id, status;
+
+  INSERT INTO task_due_counts (user_id, due_day, open_count)
+  SELECT user_id, (due_date AT TIME ZONE 'UTC')::date, count(*) FROM tasks
+  WHERE user_id IN (SELECT user_id FROM stale_users) AND status <> 'Done' AND due_date IS NOT NULL
+  GROUP BY 1, 2;
+
+  SELECT count(*) INTO fixed FROM stale_users;
+  DROP TABLE stale_users;
+  RETURN fixed;
+END;
+$$;
+
+-- Backfill for existing tasks
+SELECT public.reconcile_task_counts();
+
+-- Counts per status and the number of open tasks due before p_now, for
+-- one user. Reads at most one row per status, one per past day with open
+-- tasks, and today's open tasks through the (user_id, due_date) index.
+CREATE OR REPLACE FUNCTION public.task_stats(p_user_id uuid, p_now timestamp with time zone DEFAULT now())
+RETURNS TABLE (status_counts jsonb, overdue bigint)
+LANGUAGE sql STABLE
+AS $$
+  SELECT
+    coalesce((
+      SELECT jsonb_object_agg(c.status, c.task_count) FROM task_status_counts AS c
+      WHERE c.user_id = p_user_id AND c.task_count <> 0
+    ), '{}'::jsonb),
+    coalesce((
+      SELECT sum(d.open_count) FROM task_due_counts AS d
+      WHERE d.user_id = p_user_id AND d.due_day < (p_now AT TIME ZONE 'UTC')::date
+    ), 0)::bigint + (
+      SELECT count(*) FROM tasks AS t
+      WHERE t.user_id = p_user_id AND t.status <> 'Done'
+        AND t.due_date >= date_trunc('day', p_now AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        AND t.due_date < p_now
+    )
+$$;
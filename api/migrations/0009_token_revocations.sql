@@ -0,0 +1,37 @@
+-- Revoked sessions and used refresh tokens (POST /auth/refresh, /auth/logout)
+--
+-- kind = 'session': every token of a login session is revoked (logout, or
+-- a refresh token replayed after rotation). API workers keep these in
+-- memory and poll for new rows, so access-token checks never query here.
+-- kind = 'refresh': a rotated refresh token; inserting its ID is what
+-- makes it single-use.
+--
+-- Rows are only needed until expires_at (the longest any affected token
+-- can live). Only the API server, using the service role key, reads and
+-- writes this table.
+CREATE TABLE IF NOT EXISTS token_revocations (
+  token_id text PRIMARY KEY,
+  kind text NOT NULL CHECK (kind IN ('session', 'refresh')),
+  user_id uuid NOT NULL,
+  expires_at timestamp with time zone NOT NULL,
+  created_at timestamp with time zone DEFAULT clock_timestamp() NOT NULL
+);
+
+-- Incremental sync: session revocations newer than the last one seen
+CREATE INDEX IF NOT EXISTS token_revocations_session_created_idx
+ON token_revocations (created_at)
+WHERE kind = 'session';
+
+ALTER TABLE token_revocations ENABLE ROW LEVEL SECURITY;
+
+-- Drop revocations of tokens that have expired anyway (run periodically)
+CREATE OR REPLACE FUNCTION purge_token_revocations()
+RETURNS integer AS $$
+DECLARE
+  purged integer;
+BEGIN
+  DELETE FROM token_revocations WHERE expires_at < now();
+  GET DIAGNOSTICS purged = ROW_COUNT;
+  RETURN purged;
+END;
+$$ LANGUAGE plpgsql;
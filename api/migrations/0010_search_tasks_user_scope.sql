@@ -0,0 +1,40 @@
+-- Scope search_tasks() to the user by user_id as well as by the owner
+-- lexeme in the index
+--
+-- 0007 matched rows only on the user-id lexeme inside the indexed
+-- tsvector. The postgres backend and the service key bypass RLS, so that
+-- relied on no title or description ever tokenizing to another user's id.
+-- The explicit predicate is a filter on the rows the same GIN scan
+-- returns, so selective searches keep their plan.
+CREATE OR REPLACE FUNCTION public.search_tasks(
+  p_user_id uuid,
+  p_query text,
+  p_limit integer DEFAULT 20,
+  p_after_rank real DEFAULT NULL,
+  p_after_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  user_id uuid,
+  title text,
+  status text,
+  description text,
+  due_date timestamp with time zone,
+  priority text,
+  created_at timestamp with time zone,
+  updated_at timestamp with time zone,
+  rank real
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT t.id, t.user_id, t.title, t.status, t.description, t.due_date, t.priority,
+         t.created_at, t.updated_at, r.rank
+  FROM websearch_to_tsquery('english'::regconfig, p_query) AS q,
+       tasks AS t,
+       LATERAL (SELECT ts_rank(t.search_vector, q) AS rank) AS r
+  WHERE (t.search_vector || array_to_tsvector(ARRAY[t.user_id::text])) @@ (q && format('%L', p_user_id)::tsquery)
+    AND t.user_id = p_user_id
+    AND (p_after_rank IS NULL OR r.rank < p_after_rank OR (r.rank = p_after_rank AND t.id > p_after_id))
+  ORDER BY r.rank DESC, t.id
+  LIMIT p_limit
+$$;
@@ -1,9 +1,15 @@
--- Tasks Table
+-- Generated from api/migrations (0002 onwards); prefer `python -m app.db.migrate`.
+-- Keep in sync when adding a migration.
+
+-- Tasks table
 CREATE TABLE IF NOT EXISTS tasks (
   id uuid DEFAULT uuid_generate_v4() PRIMARY KEY,
   user_id uuid REFERENCES auth.users NOT NULL,
   title text NOT NULL,
   status text NOT NULL DEFAULT 'To Do',
+  description text NULL,
+  due_date timestamp with time zone NULL,
+  priority text NULL,
   created_at timestamp with time zone DEFAULT now() NOT NULL,
   updated_at timestamp with time zone DEFAULT now() NOT NULL
 );
@@ -12,9 +18,9 @@ CREATE TABLE IF NOT EXISTS tasks (
 ALTER TABLE tasks ENABLE ROW LEVEL SECURITY;
 
 -- Create policy for users to see only their own tasks
-CREATE POLICY "Users can only access their own tasks" 
-ON tasks 
-FOR ALL 
+CREATE POLICY "Users can only access their own tasks"
+ON tasks
+FOR ALL
 USING (auth.uid() = user_id);
 
 -- Function to automatically set updated_at timestamp
@@ -30,4 +36,444 @@ $$ LANGUAGE plpgsql;
 CREATE TRIGGER set_timestamp
 BEFORE UPDATE ON tasks
 FOR EACH ROW
-EXECUTE FUNCTION trigger_set_timestamp(); 
\ No newline at end of file
+EXECUTE FUNCTION trigger_set_timestamp();
+
+-- Tombstones for deleted tasks, read by delta sync (GET /tasks/changes)
+CREATE TABLE IF NOT EXISTS task_tombstones (
+  task_id uuid PRIMARY KEY,
+  user_id uuid NOT NULL,
+  deleted_at timestamp with time zone DEFAULT clock_timestamp() NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS task_tombstones_user_deleted_idx
+ON task_tombstones (user_id, deleted_at, task_id);
+
+ALTER TABLE task_tombstones ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can only read their own tombstones"
+ON task_tombstones
+FOR SELECT
+USING (auth.uid() = user_id);
+
+-- Record a tombstone for every deleted task, whichever path deleted it
+CREATE OR REPLACE FUNCTION record_task_deletion()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO task_tombstones (task_id, user_id)
+  VALUES (OLD.id, OLD.user_id)
+  ON CONFLICT (task_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+  RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER record_task_deletion
+AFTER DELETE ON tasks
+FOR EACH ROW
+EXECUTE FUNCTION record_task_deletion();
+
+-- Drop tombstones older than the sync retention window (run periodically)
+CREATE OR REPLACE FUNCTION purge_task_tombstones(retention interval DEFAULT interval '30 days')
+RETURNS integer AS $$
+DECLARE
+  purged integer;
+BEGIN
+  DELETE FROM task_tombstones WHERE deleted_at < now() - retention;
+  GET DIAGNOSTICS purged = ROW_COUNT;
+  RETURN purged;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Client operation IDs already applied by the offline mutation push
+-- (POST /tasks/sync), so replayed batches are skipped
+CREATE TABLE IF NOT EXISTS task_operations (
+  user_id uuid NOT NULL,
+  op_id text NOT NULL,
+  task_id uuid,
+  status text NOT NULL,
+  applied_at timestamp with time zone DEFAULT now() NOT NULL,
+  PRIMARY KEY (user_id, op_id)
+);
+
+ALTER TABLE task_operations ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can only access their own operations"
+ON task_operations
+USING (auth.uid() = user_id);
+
+-- Composite indexes for the TaskService query shapes. Every query is
+-- scoped to one user, so user_id leads each index.
+
+-- Status filters, optionally with a due-date range (list, bulk update/delete)
+CREATE INDEX IF NOT EXISTS tasks_user_status_due_idx
+ON tasks (user_id, status, due_date);
+
+-- Keyset pages sorted by updated_at, delta sync and the ETag version
+CREATE INDEX IF NOT EXISTS tasks_user_updated_idx
+ON tasks (user_id, updated_at, id);
+
+-- Keyset pages sorted by created_at
+CREATE INDEX IF NOT EXISTS tasks_user_created_idx
+ON tasks (user_id, created_at, id);
+
+-- Keyset pages sorted by due_date and due-date ranges across statuses
+CREATE INDEX IF NOT EXISTS tasks_user_due_idx
+ON tasks (user_id, due_date, id);
+
+-- Task RLS without per-row subqueries
+--
+-- The policies from user_setup.sql evaluated
+-- (SELECT is_test_user FROM public.users WHERE id = user_id) for every
+-- row, a correlated lookup per task. Test users are now fetched once per
+-- statement through a stable security-definer function, and auth.uid()
+-- is wrapped in a scalar subquery, so both become InitPlans and the
+-- predicate reduces to user_id = $1 OR user_id = ANY($2): an index scan.
+
+-- Users table from user_setup.sql, for databases that never ran it
+CREATE TABLE IF NOT EXISTS public.users (
+  id UUID PRIMARY KEY,
+  email TEXT UNIQUE NOT NULL,
+  full_name TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+  is_test_user BOOLEAN DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS users_test_user_idx
+ON public.users (id) WHERE is_test_user;
+
+-- IDs of the test users, readable regardless of the caller's users RLS
+CREATE OR REPLACE FUNCTION public.test_user_ids()
+RETURNS uuid[]
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT coalesce(array_agg(id), '{}') FROM public.users WHERE is_test_user
+$$;
+
+ALTER TABLE public.tasks ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can only access their own tasks" ON public.tasks;
+DROP POLICY IF EXISTS task_select_own ON public.tasks;
+DROP POLICY IF EXISTS task_insert_own ON public.tasks;
+DROP POLICY IF EXISTS task_update_own ON public.tasks;
+DROP POLICY IF EXISTS task_delete_own ON public.tasks;
+
+CREATE POLICY task_select_own ON public.tasks
+  FOR SELECT USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+CREATE POLICY task_insert_own ON public.tasks
+  FOR INSERT WITH CHECK ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+CREATE POLICY task_update_own ON public.tasks
+  FOR UPDATE USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+CREATE POLICY task_delete_own ON public.tasks
+  FOR DELETE USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+-- Same InitPlan form for the sync tables
+DROP POLICY IF EXISTS "Users can only read their own tombstones" ON task_tombstones;
+CREATE POLICY "Users can only read their own tombstones"
+ON task_tombstones
+FOR SELECT
+USING ((SELECT auth.uid()) = user_id);
+
+DROP POLICY IF EXISTS "Users can only access their own operations" ON task_operations;
+CREATE POLICY "Users can only access their own operations"
+ON task_operations
+USING ((SELECT auth.uid()) = user_id);
+
+-- Full-text search over task titles and descriptions (GET /tasks/search)
+--
+-- The search document is a stored generated column so matching and
+-- ranking read a precomputed tsvector instead of parsing the text of
+-- every candidate row. Titles weigh more than descriptions in the ranking.
+-- Repositories select task columns explicitly, so the column never
+-- reaches API payloads. Adding it rewrites the table once.
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (
+  setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') ||
+  setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')
+) STORED;
+
+-- The index also holds the owner's id as an extra lexeme, so a search is
+-- one GIN scan for "query terms AND this user". GIN skips through the
+-- user's large posting list using the rarer query terms, where a separate
+-- btree on user_id would be read in full (100k entries) and ANDed.
+CREATE INDEX IF NOT EXISTS tasks_search_idx
+ON tasks USING gin ((search_vector || array_to_tsvector(ARRAY[user_id::text])));
+
+-- Ranked, keyset-paginated search for one user, called through PostgREST
+-- RPC and directly by the postgres backend. SECURITY INVOKER (the
+-- default), so task RLS still applies to API callers; as a
+-- single-statement SQL function it is inlined into the calling query.
+-- Pages continue after (p_after_rank, p_after_id): rank descending, then
+-- id ascending.
+CREATE OR REPLACE FUNCTION public.search_tasks(
+  p_user_id uuid,
+  p_query text,
+  p_limit integer DEFAULT 20,
+  p_after_rank real DEFAULT NULL,
+  p_after_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  user_id uuid,
+  title text,
+  status text,
+  description text,
+  due_date timestamp with time zone,
+  priority text,
+  created_at timestamp with time zone,
+  updated_at timestamp with time zone,
+  rank real
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT t.id, t.user_id, t.title, t.status, t.description, t.due_date, t.priority,
+         t.created_at, t.updated_at, r.rank
+  FROM websearch_to_tsquery('english'::regconfig, p_query) AS q,
+       tasks AS t,
+       LATERAL (SELECT ts_rank(t.search_vector, q) AS rank) AS r
+  WHERE (t.search_vector || array_to_tsvector(ARRAY[t.user_id::text])) @@ (q && format('%L', p_user_id)::tsquery)
+    AND (p_after_rank IS NULL OR r.rank < p_after_rank OR (r.rank = p_after_rank AND t.id > p_after_id))
+  ORDER BY r.rank DESC, t.id
+  LIMIT p_limit
+$$;
+
+-- Per-user task counters for GET /tasks/stats
+--
+-- task_status_counts holds the number of tasks per status.
+-- task_due_counts holds the number of open (not Done) tasks per UTC due
+-- day, so the overdue count is a sum over past days plus a range scan of
+-- today's tasks rather than a scan of every task.
+--
+-- Statement-level triggers keep both tables current. They read the
+-- transition tables, so a bulk insert, update or delete applies one
+-- aggregated upsert per counter table, not one per row.
+-- reconcile_task_counts() rebuilds the counters from the tasks table.
+CREATE TABLE IF NOT EXISTS task_status_counts (
+  user_id uuid NOT NULL,
+  status text NOT NULL,
+  task_count bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, status)
+);
+
+CREATE TABLE IF NOT EXISTS task_due_counts (
+  user_id uuid NOT NULL,
+  due_day date NOT NULL,
+  open_count bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, due_day)
+);
+
+ALTER TABLE task_status_counts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE task_due_counts ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can only read their own status counts"
+ON task_status_counts
+FOR SELECT
+USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+CREATE POLICY "Users can only read their own due counts"
+ON task_due_counts
+FOR SELECT
+USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'task_count_delta') THEN
+    CREATE TYPE public.task_count_delta AS (user_id uuid, status text, due_date timestamp with time zone, delta integer);
+  END IF;
+END
+$$;
+
+-- Add a batch of +1 (new row) / -1 (old row) changes to the counters
+CREATE OR REPLACE FUNCTION public.apply_task_count_deltas(deltas public.task_count_delta[])
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  INSERT INTO task_status_counts AS c (user_id, status, task_count)
+  SELECT d.user_id, d.status, sum(d.delta)
+  FROM unnest(deltas) AS d
+  GROUP BY d.user_id, d.status
+  HAVING sum(d.delta) <> 0
+  ON CONFLICT (user_id, status) DO UPDATE SET task_count = c.task_count + EXCLUDED.task_count;
+
+  INSERT INTO task_due_counts AS c (user_id, due_day, open_count)
+  SELECT d.user_id, (d.due_date AT TIME ZONE 'UTC')::date, sum(d.delta)
+  FROM unnest(deltas) AS d
+  WHERE d.status <> 'Done' AND d.due_date IS NOT NULL
+  GROUP BY 1, 2
+  HAVING sum(d.delta) <> 0
+  ON CONFLICT (user_id, due_day) DO UPDATE SET open_count = c.open_count + EXCLUDED.open_count;
+
+  -- Keep the per-day buckets to days that still have open tasks
+  DELETE FROM task_due_counts
+  WHERE open_count = 0 AND user_id IN (SELECT DISTINCT d.user_id FROM unnest(deltas) AS d);
+$$;
+
+CREATE OR REPLACE FUNCTION public.count_task_changes()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM public.apply_task_count_deltas(array_agg((n.user_id, n.status, n.due_date, 1)::public.task_count_delta))
+    FROM new_rows AS n;
+  ELSIF TG_OP = 'UPDATE' THEN
+    PERFORM public.apply_task_count_deltas(array_agg(d))
+    FROM (
+      SELECT (n.user_id, n.status, n.due_date, 1)::public.task_count_delta AS d FROM new_rows AS n
+      UNION ALL
+      SELECT (o.user_id, o.status, o.due_date, -1)::public.task_count_delta FROM old_rows AS o
+    ) AS changes;
+  ELSE
+    PERFORM public.apply_task_count_deltas(array_agg((o.user_id, o.status, o.due_date, -1)::public.task_count_delta))
+    FROM old_rows AS o;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS count_task_inserts ON tasks;
+CREATE TRIGGER count_task_inserts
+AFTER INSERT ON tasks
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.count_task_changes();
+
+DROP TRIGGER IF EXISTS count_task_updates ON tasks;
+CREATE TRIGGER count_task_updates
+AFTER UPDATE ON tasks
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.count_task_changes();
+
+DROP TRIGGER IF EXISTS count_task_deletes ON tasks;
+CREATE TRIGGER count_task_deletes
+AFTER DELETE ON tasks
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.count_task_changes();
+
+-- Rebuild the counters from the tasks table, for one user or everyone.
+-- Run after restoring data or anything that bypasses triggers (TRUNCATE,
+-- session_replication_role = replica); returns the number of users fixed.
+CREATE OR REPLACE FUNCTION public.reconcile_task_counts(p_user_id uuid DEFAULT NULL)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  fixed integer;
+BEGIN
+  CREATE TEMP TABLE stale_users AS
+  WITH actual AS (
+    SELECT user_id, status, count(*) AS task_count FROM tasks
+    WHERE p_user_id IS NULL OR user_id = p_user_id
+    GROUP BY user_id, status
+  ), stored AS (
+    SELECT user_id, status, task_count FROM task_status_counts
+    WHERE (p_user_id IS NULL OR user_id = p_user_id) AND task_count <> 0
+  ), actual_due AS (
+    SELECT user_id, (due_date AT TIME ZONE 'UTC')::date AS due_day, count(*) AS open_count FROM tasks
+    WHERE (p_user_id IS NULL OR user_id = p_user_id) AND status <> 'Done' AND due_date IS NOT NULL
+    GROUP BY 1, 2
+  ), stored_due AS (
+    SELECT user_id, due_day, open_count FROM task_due_counts
+    WHERE (p_user_id IS NULL OR user_id = p_user_id) AND open_count <> 0
+  )
+  SELECT coalesce(a.user_id, s.user_id) AS user_id
+  FROM actual AS a FULL JOIN stored AS s USING (user_id, status)
+  WHERE a.task_count IS DISTINCT FROM s.task_count
+  UNION
+  SELECT coalesce(a.user_id, s.user_id)
+  FROM actual_due AS a FULL JOIN stored_due AS s USING (user_id, due_day)
+  WHERE a.open_count IS DISTINCT FROM s.open_count;
+
+  DELETE FROM task_status_counts WHERE user_id IN (SELECT user_id FROM stale_users);
+  DELETE FROM task_due_counts WHERE user_id IN (SELECT user_id FROM stale_users);
+
+  INSERT INTO task_status_counts (user_id, status, task_count)
+  SELECT user_id, status, count(*) FROM tasks
+  WHERE user_id IN (SELECT user_id FROM stale_users)
+  GROUP BY user_id, status;
+
+  INSERT INTO task_due_counts (user_id, due_day, open_count)
+  SELECT user_id, (due_date AT TIME ZONE 'UTC')::date, count(*) FROM tasks
+  WHERE user_id IN (SELECT user_id FROM stale_users) AND status <> 'Done' AND due_date IS NOT NULL
+  GROUP BY 1, 2;
+
+  SELECT count(*) INTO fixed FROM stale_users;
+  DROP TABLE stale_users;
+  RETURN fixed;
+END;
+$$;
+
+-- Backfill for existing tasks
+SELECT public.reconcile_task_counts();
+
+-- Counts per status and the number of open tasks due before p_now, for
+-- one user. Reads at most one row per status, one per past day with open
+-- tasks, and today's open tasks through the (user_id, due_date) index.
+CREATE OR REPLACE FUNCTION public.task_stats(p_user_id uuid, p_now timestamp with time zone DEFAULT now())
+RETURNS TABLE (status_counts jsonb, overdue bigint)
+LANGUAGE sql STABLE
+AS $$
+  SELECT
+    coalesce((
+      SELECT jsonb_object_agg(c.status, c.task_count) FROM task_status_counts AS c
+      WHERE c.user_id = p_user_id AND c.task_count <> 0
+    ), '{}'::jsonb),
+    coalesce((
+      SELECT sum(d.open_count) FROM task_due_counts AS d
+      WHERE d.user_id = p_user_id AND d.due_day < (p_now AT TIME ZONE 'UTC')::date
+    ), 0)::bigint + (
+      SELECT count(*) FROM tasks AS t
+      WHERE t.user_id = p_user_id AND t.status <> 'Done'
+        AND t.due_date >= date_trunc('day', p_now AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        AND t.due_date < p_now
+    )
+$$;
+
+-- Revoked sessions and used refresh tokens (POST /auth/refresh, /auth/logout)
+--
+-- kind = 'session': every token of a login session is revoked (logout, or
+-- a refresh token replayed after rotation). API workers keep these in
+-- memory and poll for new rows, so access-token checks never query here.
+-- kind = 'refresh': a rotated refresh token; inserting its ID is what
+-- makes it single-use.
+--
+-- Rows are only needed until expires_at (the longest any affected token
+-- can live). Only the API server, using the service role key, reads and
+-- writes this table.
+CREATE TABLE IF NOT EXISTS token_revocations (
+  token_id text PRIMARY KEY,
+  kind text NOT NULL CHECK (kind IN ('session', 'refresh')),
+  user_id uuid NOT NULL,
+  expires_at timestamp with time zone NOT NULL,
+  created_at timestamp with time zone DEFAULT clock_timestamp() NOT NULL
+);
+
+-- Incremental sync: session revocations newer than the last one seen
+CREATE INDEX IF NOT EXISTS token_revocations_session_created_idx
+ON token_revocations (created_at)
+WHERE kind = 'session';
+
+ALTER TABLE token_revocations ENABLE ROW LEVEL SECURITY;
+
+-- Drop revocations of tokens that have expired anyway (run periodically)
+CREATE OR REPLACE FUNCTION purge_token_revocations()
+RETURNS integer AS $$
+DECLARE
+  purged integer;
+BEGIN
+  DELETE FROM token_revocations WHERE expires_at < now();
+  GET DIAGNOSTICS purged = ROW_COUNT;
+  RETURN purged;
+END;
+$$ LANGUAGE plpgsql;
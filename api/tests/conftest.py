@@ -0,0 +1,59 @@
+import os
+import pytest
+from app.cache.backends import create_cache_backend
+from app.config import settings
+from benchmarks.local_postgres import local_postgres, scratch_database
+from benchmarks.redis_standin import RedisStandIn
+from benchmarks.standin import PostgrestStandIn
+
+@pytest.fixture
+def standin(monkeypatch):
+    """A local PostgREST stand-in with the app configured to use it"""
+    with PostgrestStandIn() as server:
+        monkeypatch.setattr(settings, "SUPABASE_URL", server.url)
+        monkeypatch.setattr(settings, "SUPABASE_KEY", "test-key")
+        yield server
+
+# The user the test tokens and seeded tasks belong to
+USER_ID = "180a8d2e-642c-4023-a1dd-008af40b4fd2"
+
+@pytest.fixture
+def redis_standin():
+    """A local Redis-protocol stand-in"""
+    with RedisStandIn() as server:
+        yield server
+
+@pytest.fixture(params=["memory", "redis"])
+def backend_url(request):
+    """Each shared-state backend in turn: in-process, then a Redis stand-in"""
+    if request.param == "memory":
+        yield "memory://"
+    else:
+        pytest.importorskip("redis")
+        yield request.getfixturevalue("redis_standin").url
+
+@pytest.fixture
+def backend_factory(backend_url):
+    """Builds cache backends on each backend_url"""
+    return lambda: create_cache_backend(backend_url)
+
+@pytest.fixture
+def diagnostics_headers(monkeypatch):
+    """Headers for the /diagnostics endpoints, with a token configured"""
+    monkeypatch.setattr(settings, "DIAGNOSTICS_TOKEN", "test-diagnostics-token")
+    return {"X-Diagnostics-Token": "test-diagnostics-token"}
+
+@pytest.fixture(scope="session")
+def postgres_server():
+    """A local Postgres server (TEST_DATABASE_URL or a throwaway pgserver)"""
+    pytest.importorskip("psycopg")
+    if not os.getenv("TEST_DATABASE_URL"):
+        pytest.importorskip("pgserver")
+    with local_postgres() as url:
+        yield url
+
+@pytest.fixture
+def postgres(postgres_server):
+    """An empty scratch database on the local Postgres server"""
+    with scratch_database(postgres_server) as url:
+        yield url
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.audio_capabilities import AudioCapabilities, conversion_strategies, probe_audio_capabilities
+from app.services.audio_pool import AudioWorkerPool
+from app.services.scratch import ScratchSpace
+from app.services.voice_service import VoiceService
+
+FAKE_FFMPEG = '''
+import sys
+if "-version" in sys.argv:
+    print("ffmpeg version 6.1.1-3ubuntu5 Copyright (c) 2000-2023 the FFmpeg developers")
+elif "-decoders" in sys.argv:
+    print("Decoders:\\n A..... = Audio\\n ------\\n V....D h264  H.264\\n A....D aac  AAC\\n A....D opus  Opus")
+elif "-encoders" in sys.argv:
+    print("Encoders:\\n A..... = Audio\\n ------\\n A..... pcm_s16le  PCM signed 16-bit\\n A..... aac  AAC")
+else:
+    sys.exit(1)
+'''
+
+def _script(tmp_path, body: str) -> str:
+    path = tmp_path / "ffmpeg"
+    path.write_text(f"#!{sys.executable}\n{body}")
+    path.chmod(0o755)
+    return str(path)
+
+def test_probe_reads_ffmpeg_version_and_audio_codecs(tmp_path):
+    capabilities = probe_audio_capabilities(_script(tmp_path, FAKE_FFMPEG))
+
+    assert capabilities.ffmpeg_version == "6.1.1-3ubuntu5"
+    assert capabilities.decoders == {"aac", "opus"}
+    assert capabilities.encoders == {"pcm_s16le", "aac"}
+    report = capabilities.report()
+    assert report["conversions"] == {".m4a": True, ".mp3": False, ".mp4": True, ".ogg": True, ".webm": True}
+    assert report["ffmpeg"]["available"] and report["errors"] == []
+
+def test_broken_ffmpeg_is_reported_unavailable(tmp_path):
+    capabilities = probe_audio_capabilities(_script(tmp_path, "import sys; sys.exit(1)"))
+
+    assert capabilities.ffmpeg is None
+    assert "not usable" in capabilities.errors[0]
+
+def test_planner_skips_strategies_that_cannot_work():
+    ffmpeg = AudioCapabilities(ffmpeg="/usr/bin/ffmpeg", decoders=frozenset({"aac"}), encoders=frozenset({"pcm_s16le"}))
+
+    assert conversion_strategies(AudioCapabilities(pydub="0.25.1"), ".m4a") == ["basic_wav"]
+    assert conversion_strategies(ffmpeg, ".m4a") == ["ffmpeg", "basic_wav"]
+    assert conversion_strategies(ffmpeg._replace(pydub="0.25.1"), ".m4a") == ["ffmpeg", "pydub", "basic_wav"]
+    assert conversion_strategies(ffmpeg._replace(pydub="0.25.1"), ".mp3") == ["basic_wav"]
+
+def test_missing_tools_cost_no_subprocesses(monkeypatch, tmp_path):
+    """With nothing installed, a rejected upload goes straight to the WAV wrapper"""
+    calls = []
+
+    def create(model, file):
+        name = file[0] if isinstance(file, tuple) else file.name
+        calls.append(os.path.splitext(name)[1])
+        if len(calls) == 1:
+            raise ValueError("Invalid file format")
+        return SimpleNamespace(text="Call mom")
+
+    spawned = []
+
+    def spawn(command, *args, **kwargs):
+        spawned.append(command[0])
+        raise FileNotFoundError(command[0])
+
+    monkeypatch.setattr(subprocess, "run", spawn)
+    monkeypatch.setattr(subprocess, "check_call", spawn)
+    client = SimpleNamespace(audio=SimpleNamespace(transcriptions=SimpleNamespace(create=create)))
+    service = VoiceService(client=client, capabilities=AudioCapabilities(), scratch=ScratchSpace(str(tmp_path)))
+
+    assert asyncio.run(service.transcribe_audio(b"OggS" + bytes(4096))) == "Call mom"
+    assert calls == [".ogg", ".wav"]
+    assert spawned == []
+
+def test_conversions_run_the_probed_ffmpeg_off_path(tmp_path):
+    """ffmpeg found outside PATH (e.g. a bundled binary) is the one conversions run"""
+    converter = FAKE_FFMPEG.replace("else:\n    sys.exit(1)", (
+        "else:\n"
+        f"    open({str(tmp_path / 'invocations')!r}, 'a').write(sys.argv[0] + '\\n')\n"
+        "    open(sys.argv[-1], 'wb').write(bytes(2000))"
+    ))
+    (tmp_path / "bin").mkdir()
+    ffmpeg = _script(tmp_path / "bin", converter)
+    capabilities = probe_audio_capabilities(ffmpeg)
+
+    def create(model, file):
+        if isinstance(file, tuple):
+            raise ValueError("Invalid file format")
+        return SimpleNamespace(text="Call mom")
+
+    async def scenario():
+        pool = AudioWorkerPool(max_workers=1)
+        client = SimpleNamespace(audio=SimpleNamespace(transcriptions=SimpleNamespace(create=create)))
+        service = VoiceService(client=client, capabilities=capabilities, scratch=ScratchSpace(str(tmp_path / "scratch")), pool=pool)
+        try:
+            return await service.transcribe_audio(b"\0\0\0\x20ftypM4A " + bytes(4096))
+        finally:
+            await pool.close()
+
+    assert asyncio.run(scenario()) == "Call mom"
+    assert (tmp_path / "invocations").read_text().splitlines() == [ffmpeg]
+
+def test_diagnostics_endpoint(standin, diagnostics_headers):
+    with TestClient(app) as client:
+        report = client.get("/api/v1/diagnostics/audio", headers=diagnostics_headers).json()
+        assert report == app.state.audio_capabilities.report()
+    assert set(report) == {"ffmpeg", "pydub", "numpy", "conversions", "errors", "probe_seconds"}
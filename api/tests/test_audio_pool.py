@@ -0,0 +1,120 @@
+import asyncio
+import os
+import sys
+import time
+import pytest
+from app.services.audio_convert import run_ffmpeg, wav_header, write_basic_wav
+from app.services.audio_pool import AudioPoolBusy, AudioPoolTimeout, AudioWorkerPool
+
+def _shm_blocks() -> set:
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+def test_large_buffers_go_through_shared_memory(tmp_path):
+    upload = os.urandom(600 * 1024)
+    before = _shm_blocks()
+
+    async def scenario():
+        pool = AudioWorkerPool(max_workers=1, shm_threshold=512 * 1024)
+        try:
+            large = await pool.run(write_basic_wav, str(tmp_path / "large.wav"), data=upload)
+            small = await pool.run(write_basic_wav, str(tmp_path / "small.wav"), data=upload[:1000])
+            return large, small, pool.stats()
+        finally:
+            await pool.close()
+
+    large, small, stats = asyncio.run(scenario())
+
+    assert open(large, "rb").read() == wav_header(len(upload)) + upload
+    assert open(small, "rb").read() == wav_header(1000) + upload[:1000]
+    assert (stats["tasks"], stats["shared_memory_handoffs"]) == (2, 1)
+    assert _shm_blocks() == before
+
+def test_saturated_pool_rejects_instead_of_queueing():
+    async def scenario():
+        pool = AudioWorkerPool(max_workers=1, max_queue=1)
+        try:
+            await pool.run(os.getpid)  # start the worker process
+            running = [asyncio.create_task(pool.run(time.sleep, 0.5)) for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(AudioPoolBusy):
+                await pool.run(os.getpid)
+            await asyncio.gather(*running)
+            await pool.run(os.getpid)
+            return pool.stats()
+        finally:
+            await pool.close()
+
+    stats = asyncio.run(scenario())
+    assert (stats["busy"], stats["tasks"], stats["in_flight"]) == (1, 4, 0)
+
+def test_overrunning_task_times_out_and_pool_recovers():
+    async def scenario():
+        pool = AudioWorkerPool(max_workers=1, task_timeout=0.5)
+        try:
+            first_pid = await pool.run(os.getpid)
+            start = time.perf_counter()
+            with pytest.raises(AudioPoolTimeout):
+                await pool.run(time.sleep, 30)
+            elapsed = time.perf_counter() - start
+            return first_pid, await pool.run(os.getpid), elapsed, pool.stats()
+        finally:
+            await pool.close()
+
+    first_pid, second_pid, elapsed, stats = asyncio.run(scenario())
+    assert elapsed < 5
+    assert first_pid != second_pid  # the stuck process was replaced
+    assert (stats["timeouts"], stats["recycled"]) == (1, 1)
+
+def test_timeout_only_counts_running_time_and_spares_queued_tasks():
+    async def scenario():
+        pool = AudioWorkerPool(max_workers=1, max_queue=3, task_timeout=0.5)
+        try:
+            await pool.run(os.getpid)
+            stuck = asyncio.create_task(pool.run(time.sleep, 30))
+            await asyncio.sleep(0)
+            # Each waits longer than the timeout behind the stuck task, then runs briefly
+            queued = [asyncio.create_task(pool.run(time.sleep, 0.2)) for _ in range(3)]
+            with pytest.raises(AudioPoolTimeout):
+                await stuck
+            return await asyncio.gather(*queued), pool.stats()
+        finally:
+            await pool.close()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [None, None, None]
+    assert (stats["timeouts"], stats["recycled"], stats["in_flight"]) == (1, 1, 0)
+
+def test_cancelled_caller_keeps_task_counted_until_worker_finishes():
+    async def scenario():
+        pool = AudioWorkerPool(max_workers=1, max_queue=0)
+        try:
+            await pool.run(os.getpid)
+            caller = asyncio.create_task(pool.run(time.sleep, 0.5))
+            await asyncio.sleep(0.1)
+            caller.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await caller
+            # The process is still busy with the abandoned task
+            with pytest.raises(AudioPoolBusy):
+                await pool.run(os.getpid)
+            orphaned = pool.stats()["in_flight"]
+            await asyncio.sleep(0.6)
+            return orphaned, pool.stats()["in_flight"], await pool.run(os.getpid)
+        finally:
+            await pool.close()
+
+    orphaned, finished, pid = asyncio.run(scenario())
+    assert (orphaned, finished) == (1, 0)
+    assert pid > 0
+
+def test_ffmpeg_commands_share_one_deadline(tmp_path):
+    slow = tmp_path / "ffmpeg"
+    slow.write_text(f"#!{sys.executable}\nimport time\ntime.sleep(1)\n")
+    slow.chmod(0o755)
+
+    start = time.time()
+    returncode, stderr = run_ffmpeg([[str(slow)], [str(slow)], [str(slow)]], start + 1.5)
+    elapsed = time.time() - start
+
+    assert returncode == -1 and "timed out" in stderr
+    assert elapsed < 2  # the second command got the 0.5 s left, not a fresh timeout
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.cache.revocations import RevocationList
+from app.db.supabase import create_async_supabase_client
+from app.main import app
+from app.repositories.supabase import SupabaseTokenRevocationRepository
+from app.services.auth_service import AuthService
+from conftest import USER_ID
+
+@pytest.fixture
+def client(standin):
+    with TestClient(app) as test_client:
+        yield test_client
+
+def _login(session_id: str):
+    """Tokens as issued by a successful /auth/login"""
+    return AuthService(supabase=object())._issue_tokens(USER_ID, session_id)
+
+def _bearer(tokens) -> dict:
+    return {"Authorization": f"Bearer {tokens.access_token}"}
+
+def test_refresh_rotates_and_reuse_revokes_session(client, standin):
+    tokens = _login("session-1")
+    assert tokens.expires_in == 15 * 60
+
+    refreshed = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens.refresh_token})
+    assert refreshed.status_code == 200
+    rotated = refreshed.json()
+    assert rotated["refresh_token"] != tokens.refresh_token
+    assert client.get("/api/v1/tasks/", headers={"Authorization": f"Bearer {rotated['access_token']}"}).status_code == 200
+
+    # The first refresh token was copied: replaying it ends the session
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": tokens.refresh_token}).status_code == 401
+    assert client.get("/api/v1/tasks/", headers={"Authorization": f"Bearer {rotated['access_token']}"}).status_code == 401
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+    assert {row["kind"] for row in standin.tables["token_revocations"]} == {"refresh", "session"}
+
+def test_refresh_token_is_not_an_access_token(client):
+    tokens = _login("session-1")
+    response = client.get("/api/v1/tasks/", headers={"Authorization": f"Bearer {tokens.refresh_token}"})
+    assert response.status_code == 401
+
+def test_logout_revokes_only_that_session(client, diagnostics_headers):
+    phone, laptop = _login("phone"), _login("laptop")
+    assert client.get("/api/v1/tasks/", headers=_bearer(phone)).status_code == 200  # now in the token cache
+
+    assert client.post("/api/v1/auth/logout", json={"refresh_token": phone.refresh_token}).status_code == 204
+
+    assert client.get("/api/v1/tasks/", headers=_bearer(phone)).status_code == 401
+    assert client.get("/api/v1/tasks/", headers=_bearer(laptop)).status_code == 200
+    assert client.get("/api/v1/diagnostics/auth-cache", headers=diagnostics_headers).json()["revocations"]["revoked_sessions"] == 1
+
+def test_other_workers_learn_revocations_on_sync(standin):
+    async def scenario():
+        repository = SupabaseTokenRevocationRepository(create_async_supabase_client())
+        evicted = []
+        worker_a, worker_b = RevocationList(repository), RevocationList(repository, on_revoke=evicted.append)
+        await worker_b.sync()
+
+        await AuthService(object(), repository, worker_a).revoke_session(USER_ID, "session-1")
+        assert worker_a.is_revoked("session-1")
+        assert not worker_b.is_revoked("session-1")
+
+        added = await worker_b.sync()
+        queries = len(standin.queries)
+        await worker_b.sync()
+        return added, evicted, worker_b, dict(standin.queries[queries][2])
+
+    added, evicted, worker_b, incremental = asyncio.run(scenario())
+
+    assert added == 1 and worker_b.is_revoked("session-1")
+    assert evicted == [USER_ID]
+    assert incremental["created_at"].startswith("gt.")  # later syncs only read newer rows
@@ -0,0 +1,199 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+from app.dependencies import get_voice_service
+from app.cache.backends import MemoryCacheBackend
+from app.cache.idempotency import IdempotencyStore, IdempotencyKeyReused, IdempotencyInProgress
+from app.config import settings
+from app.main import app
+from app.schemas.task import TaskCreate
+from conftest import USER_ID
+
+def test_concurrent_retry_waits_and_later_repeat_replays(backend_factory):
+    async def scenario():
+        store = IdempotencyStore(backend_factory())
+        calls = []
+
+        async def pipeline():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return {"tasks": ["Call mom"]}
+
+        first, retry = await asyncio.gather(
+            store.run("user:voice", "key-1", "audio", pipeline),
+            store.run("user:voice", "key-1", "audio", pipeline),
+        )
+        repeat = await store.run("user:voice", "key-1", "audio", pipeline)
+        other_user = await store.run("other:voice", "key-1", "audio", pipeline)
+        await store.close()
+        return calls, first, retry, repeat, other_user, store
+
+    calls, first, retry, repeat, other_user, store = asyncio.run(scenario())
+
+    assert len(calls) == 2  # once for the key, once for the other user's scope
+    assert first == ({"tasks": ["Call mom"]}, False)
+    assert retry == repeat == ({"tasks": ["Call mom"]}, True)
+    assert other_user[1] is False
+    assert store.stats()["replays"] == 2 and store.stats()["in_flight"] == 0
+
+def test_waits_for_owner_in_another_worker(backend_factory):
+    """Without an in-process future the waiter polls the shared backend"""
+    async def scenario():
+        backend = backend_factory()
+        owner, waiter = IdempotencyStore(backend), IdempotencyStore(backend, poll_interval=0.01)
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            return "transcribed"
+
+        async def never():
+            raise AssertionError("retry must not run the pipeline")
+
+        first = asyncio.create_task(owner.run("user:voice", "key", "audio", slow))
+        await asyncio.sleep(0.02)
+        retried = await waiter.run("user:voice", "key", "audio", never)
+        return await first, retried, waiter.waits
+
+    first, retried, waits = asyncio.run(scenario())
+
+    assert first == ("transcribed", False)
+    assert retried == ("transcribed", True)
+    assert waits > 1
+
+def test_failure_releases_key_and_reuse_is_rejected(backend_factory):
+    async def scenario():
+        store = IdempotencyStore(backend_factory())
+
+        async def failing():
+            raise RuntimeError("transcription service down")
+
+        async def working():
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            await store.run("user:voice", "key", "audio", failing)
+        result = await store.run("user:voice", "key", "audio", working)
+        with pytest.raises(IdempotencyKeyReused):
+            await store.run("user:voice", "key", "different audio", working)
+        return result
+
+    assert asyncio.run(scenario()) == ("ok", False)
+
+def test_result_that_cannot_be_stored_keeps_the_claim():
+    class FailingWrites(MemoryCacheBackend):
+        async def set(self, key, value, ttl=None):
+            if '"done"' in value:
+                raise ConnectionError("cache unavailable")
+            await super().set(key, value, ttl)
+
+    async def scenario():
+        store = IdempotencyStore(FailingWrites(), wait_timeout=0.05, poll_interval=0.01)
+        calls = []
+
+        async def pipeline():
+            calls.append(1)
+            return "created"
+
+        first = await store.run("user:voice", "key", "audio", pipeline)
+        with pytest.raises(IdempotencyInProgress):
+            await store.run("user:voice", "key", "audio", pipeline)
+        return first, calls
+
+    first, calls = asyncio.run(scenario())
+    assert first == ("created", False)
+    assert len(calls) == 1
+
+def test_pending_claims_are_not_evicted():
+    async def scenario():
+        backend = MemoryCacheBackend(max_entries=2)
+        store = IdempotencyStore(backend)
+        calls = []
+
+        async def pipeline():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "created"
+
+        first = asyncio.create_task(store.run("user:voice", "key", "audio", pipeline))
+        await asyncio.sleep(0)
+        for i in range(3):
+            await backend.set(f"other:{i}", "x")
+        retry = await store.run("user:voice", "key", "audio", pipeline)
+        # Once the result is stored it is an ordinary LRU entry again
+        for i in range(3, 6):
+            await backend.set(f"other:{i}", "x")
+        return await first, retry, calls, await backend.get(IdempotencyStore._store_key("user:voice", "key"))
+
+    first, retry, calls, stored = asyncio.run(scenario())
+    assert first == ("created", False) and retry == ("created", True)
+    assert len(calls) == 1
+    assert stored is None
+
+def test_gives_up_waiting_after_timeout():
+    async def scenario():
+        backend = MemoryCacheBackend()
+        await backend.add(IdempotencyStore._store_key("user:voice", "key"), '{"state": "pending", "fingerprint": "audio"}')
+        store = IdempotencyStore(backend, wait_timeout=0.05, poll_interval=0.01)
+        with pytest.raises(IdempotencyInProgress):
+            await store.run("user:voice", "key", "audio", lambda: None)
+
+    asyncio.run(scenario())
+
+class FakeVoiceService:
+    def __init__(self):
+        self.transcriptions = 0
+
+    async def transcribe_audio(self, audio_content: bytes):
+        self.transcriptions += 1
+        await asyncio.sleep(0.05)
+        return "Call mom tomorrow"
+
+    async def extract_tasks(self, transcription: str, timezone_offset_minutes=None):
+        return [TaskCreate(title="Call mom")]
+
+@pytest.fixture
+def client(standin):
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def auth_headers():
+    expire = datetime.utcnow() + timedelta(minutes=5)
+    token = jwt.encode({"sub": USER_ID, "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+def test_voice_process_retry_does_not_duplicate_tasks(client, auth_headers, standin, monkeypatch):
+    fake = FakeVoiceService()
+    monkeypatch.setitem(app.dependency_overrides, get_voice_service, lambda: fake)
+    headers = {**auth_headers, "Idempotency-Key": "recording-1"}
+    audio = {"audio": ("memo.m4a", b"\0" * 2048, "audio/m4a")}
+
+    first = client.post("/api/v1/voice/process", files=audio, headers=headers)
+    retry = client.post("/api/v1/voice/process", files=audio, headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert first.headers["Idempotent-Replayed"] == "false"
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert fake.transcriptions == 1
+    assert len(standin.tables["tasks"]) == 1
+
+    reused = client.post("/api/v1/voice/process", files={"audio": ("memo.m4a", b"\1" * 2048, "audio/m4a")}, headers=headers)
+    assert reused.status_code == 422
+
+    # Without a key every request runs
+    client.post("/api/v1/voice/process", files=audio, headers=auth_headers)
+    assert fake.transcriptions == 2
+
+def test_create_task_with_idempotency_key(client, auth_headers, standin, diagnostics_headers):
+    headers = {**auth_headers, "Idempotency-Key": "create-1"}
+
+    first = client.post("/api/v1/tasks/", json={"title": "Dentist"}, headers=headers)
+    retry = client.post("/api/v1/tasks/", json={"title": "Dentist"}, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert len(standin.tables["tasks"]) == 1
+    assert client.get("/api/v1/diagnostics/idempotency", headers=diagnostics_headers).json()["replays"] == 1
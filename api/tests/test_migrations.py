@@ -0,0 +1,237 @@
+import json
+import pytest
+from app.db import migrate
+from benchmarks.local_postgres import scratch_database
+
+USER_ID = "00000000-0000-4000-8000-000000000001"
+TASK_ID = "00000000-0000-4000-9000-000000000001"
+CURSOR = "2026-01-01T00:00:00+00:00"
+
+def _connect(url):
+    import psycopg
+    return psycopg.connect(url, autocommit=True)
+
+def test_runner_applies_each_migration_once(postgres):
+    migrations = migrate.load_migrations()
+
+    with _connect(postgres) as conn:
+        assert migrate.migrate(conn) == [m.version for m in migrations]
+        assert migrate.migrate(conn) == []
+        assert set(migrate.applied_migrations(conn)) == {m.version for m in migrations}
+        assert conn.execute("SELECT to_regclass('tasks'), to_regclass('tasks_user_updated_idx')").fetchone() == (
+            "tasks", "tasks_user_updated_idx"
+        )
+
+def test_runner_stops_at_target(postgres):
+    versions = [m.version for m in migrate.load_migrations()]
+
+    with _connect(postgres) as conn:
+        assert migrate.migrate(conn, target="0002") == ["0001", "0002"]
+        assert conn.execute("SELECT to_regclass('task_tombstones')").fetchone() == (None,)
+        assert migrate.migrate(conn) == versions[2:]
+
+def test_baseline_adopts_a_hand_built_database(postgres):
+    migrations = migrate.load_migrations()
+
+    with _connect(postgres) as conn:
+        # A database set up by pasting the schema into the SQL editor
+        for migration in migrations[:4]:
+            conn.execute(migration.sql)
+
+        assert migrate.baseline(conn, "0004") == ["0001", "0002", "0003", "0004"]
+        assert migrate.migrate(conn) == [m.version for m in migrations[4:]]
+
+def test_runner_rejects_edited_migrations(postgres):
+    migrations = migrate.load_migrations()
+
+    with _connect(postgres) as conn:
+        migrate.migrate(conn, migrations, target="0001")
+        edited = [migrations[0]._replace(sql=migrations[0].sql + "\n-- edited\n")] + migrations[1:]
+        with pytest.raises(RuntimeError, match="changed after it was applied"):
+            migrate.migrate(conn, edited)
+
+def test_failed_migration_is_not_recorded(postgres, tmp_path):
+    (tmp_path / "0001_ok.sql").write_text("CREATE TABLE ok (id int);")
+    (tmp_path / "0002_broken.sql").write_text("CREATE TABLE broken (id int); SELECT missing_column FROM ok;")
+    migrations = migrate.load_migrations(tmp_path)
+
+    with _connect(postgres) as conn:
+        with pytest.raises(Exception):
+            migrate.migrate(conn, migrations)
+        assert set(migrate.applied_migrations(conn)) == {"0001"}
+        assert conn.execute("SELECT to_regclass('broken')").fetchone() == (None,)
+
+# EXPLAIN checks: the WHERE / ORDER BY / LIMIT shape PostgREST generates
+# for each repository query used by TaskService, against a seeded table
+# (200 users x 250 tasks), must be served by an index rather than a
+# sequential scan. Shapes flagged as index-ordered must also need no Sort node.
+USER_INDEXES = {"tasks_user_status_due_idx", "tasks_user_updated_idx", "tasks_user_created_idx", "tasks_user_due_idx"}
+
+QUERY_SHAPES = {
+    "list_tasks": (
+        f"SELECT * FROM tasks WHERE user_id = '{USER_ID}'",
+        USER_INDEXES, False
+    ),
+    "list_tasks by status": (
+        f"SELECT * FROM tasks WHERE user_id = '{USER_ID}' AND status = 'Done'",
+        {"tasks_user_status_due_idx"}, False
+    ),
+    "page -updated_at": (
+        f"SELECT * FROM tasks WHERE user_id = '{USER_ID}' ORDER BY updated_at DESC, id DESC LIMIT 51",
+        {"tasks_user_updated_idx"}, True
+    ),
+    "page -updated_at after cursor": (
+        f"SELECT * FROM tasks WHERE user_id = '{USER_ID}' AND updated_at <= '{CURSOR}'"
+        f" AND (updated_at < '{CURSOR}' OR (updated_at = '{CURSOR}' AND id < '{TASK_ID}'))"
+        " ORDER BY updated_at DESC, id DESC LIMIT 51",
+        {"tasks_user_updated_idx"}, True
+    ),
+    "page created_at": (
+        f"SELECT * FROM tasks WHERE user_id = '{USER_ID}' ORDER BY created_at, id LIMIT 51",
+        {"tasks_user_created_idx"}, True
+    ),
+    "page due_date after cursor": (
+        f"SELECT * FROM tasks WHERE user_id = '{USER_ID}'"
+        f" AND (due_date > '{CURSOR}' OR (due_date = '{CURSOR}' AND id > '{TASK_ID}') OR due_date IS NULL)"
+        " ORDER BY due_date ASC NULLS LAST, id LIMIT 51",
+        {"tasks_user_due_idx"}, True
+    ),
+    "page by status": (
+        f"SELECT * FROM tasks WHERE user_id = '{USER_ID}' AND status = 'To Do' ORDER BY updated_at DESC, id DESC LIMIT 51",
+        USER_INDEXES, False
+    ),
+    "version count": (
+        f"SELECT count(*) FROM tasks WHERE user_id = '{USER_ID}'",
+        USER_INDEXES, False
+    ),
+    "version latest": (
+        f"SELECT updated_at FROM tasks WHERE user_id = '{USER_ID}' ORDER BY updated_at DESC LIMIT 1",
+        {"tasks_user_updated_idx"}, True
+    ),
+    "agenda day": (
+        f"SELECT * FROM tasks WHERE user_id = '{USER_ID}' AND due_date >= '{CURSOR}'"
+        f" AND due_date < timestamptz '{CURSOR}' + interval '1 day' ORDER BY due_date, id LIMIT 51",
+        {"tasks_user_due_idx"}, True
+    ),
+    "get_task": (
+        f"SELECT * FROM tasks WHERE id = '{TASK_ID}' AND user_id = '{USER_ID}' LIMIT 1",
+        {"tasks_pkey"}, False
+    ),
+    "get_tasks_by_ids": (
+        f"SELECT * FROM tasks WHERE user_id = '{USER_ID}' AND id IN ('{TASK_ID}', '00000000-0000-4000-9000-000000000002')",
+        {"tasks_pkey"}, False
+    ),
+    "changes since cursor": (
+        f"SELECT * FROM tasks WHERE user_id = '{USER_ID}' AND updated_at >= '{CURSOR}'"
+        f" AND (updated_at > '{CURSOR}' OR (updated_at = '{CURSOR}' AND id > '{TASK_ID}'))"
+        " ORDER BY updated_at, id LIMIT 51",
+        {"tasks_user_updated_idx"}, True
+    ),
+    "tombstones since cursor": (
+        f"SELECT task_id, deleted_at FROM task_tombstones WHERE user_id = '{USER_ID}' AND deleted_at >= '{CURSOR}'"
+        f" AND (deleted_at > '{CURSOR}' OR (deleted_at = '{CURSOR}' AND task_id > '{TASK_ID}'))"
+        " ORDER BY deleted_at, task_id LIMIT 51",
+        {"task_tombstones_user_deleted_idx"}, True
+    ),
+    "search": (
+        f"SELECT * FROM search_tasks('{USER_ID}', 'dentist appointment', 21)",
+        {"tasks_search_idx"}, False
+    ),
+    "applied operations": (
+        f"SELECT op_id, task_id, status FROM task_operations WHERE user_id = '{USER_ID}' AND op_id IN ('op-1', 'op-2')",
+        {"task_operations_pkey"}, False
+    ),
+    "bulk update overdue": (
+        f"UPDATE tasks SET due_date = now() + interval '1 day' WHERE user_id = '{USER_ID}'"
+        " AND status IN ('To Do', 'In Progress') AND due_date < now()",
+        {"tasks_user_status_due_idx", "tasks_user_due_idx"}, False
+    ),
+    "bulk delete by ids": (
+        f"DELETE FROM tasks WHERE user_id = '{USER_ID}' AND id IN ('{TASK_ID}', '00000000-0000-4000-9000-000000000002')",
+        {"tasks_pkey"}, False
+    ),
+}
+
+SEED_SQL = """
+INSERT INTO auth.users (id)
+SELECT ('00000000-0000-4000-8000-' || lpad(u::text, 12, '0'))::uuid FROM generate_series(1, 200) u;
+
+INSERT INTO tasks (id, user_id, title, status, due_date, created_at, updated_at)
+SELECT
+  ('00000000-0000-4000-9000-' || lpad(i::text, 12, '0'))::uuid,
+  ('00000000-0000-4000-8000-' || lpad((1 + i % 200)::text, 12, '0'))::uuid,
+  'Task ' || i,
+  (ARRAY['To Do', 'In Progress', 'Done'])[1 + i % 3],
+  CASE WHEN i % 5 = 0 THEN NULL ELSE now() + (i % 60 - 30) * interval '1 day' END,
+  now() - i * interval '1 minute',
+  now() - i * interval '1 minute'
+FROM generate_series(1, 50000) i;
+
+INSERT INTO task_tombstones (task_id, user_id, deleted_at)
+SELECT gen_random_uuid(), ('00000000-0000-4000-8000-' || lpad((1 + i % 200)::text, 12, '0'))::uuid, now() - i * interval '1 minute'
+FROM generate_series(1, 20000) i;
+
+INSERT INTO task_operations (user_id, op_id, status)
+SELECT ('00000000-0000-4000-8000-' || lpad((1 + i % 200)::text, 12, '0'))::uuid, 'op-' || i, 'applied'
+FROM generate_series(1, 20000) i;
+
+ANALYZE;
+"""
+
+@pytest.fixture(scope="module")
+def seeded_database(postgres_server):
+    with scratch_database(postgres_server) as url:
+        with _connect(url) as conn:
+            migrate.migrate(conn)
+            conn.execute(SEED_SQL)
+        yield url
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+@pytest.mark.parametrize("shape", sorted(QUERY_SHAPES))
+def test_task_query_shapes_use_indexes(seeded_database, shape):
+    sql, indexes, sorted_by_index = QUERY_SHAPES[shape]
+
+    with _connect(seeded_database) as conn:
+        with conn.transaction():
+            [(plan,)] = conn.execute(f"EXPLAIN (FORMAT JSON) {sql}").fetchall()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = list(_plan_nodes(plan[0]["Plan"]))
+
+    node_types = [node["Node Type"] for node in nodes]
+    assert "Seq Scan" not in node_types, node_types
+    assert {node.get("Index Name") for node in nodes} & indexes, nodes
+    if sorted_by_index:
+        assert "Sort" not in node_types and "Incremental Sort" not in node_types, node_types
+
+def test_task_policies_scope_rows_without_per_row_lookups(postgres):
+    from benchmarks.bench_rls_policies import ROLE, ROLE_SQL, SEED_SQL, _user_id
+    import psycopg
+
+    with _connect(postgres) as conn:
+        migrate.migrate(conn)
+        conn.execute(SEED_SQL.format(tasks=3000, users=30))
+        conn.execute(ROLE_SQL)
+
+        with conn.transaction():
+            conn.execute(f"SET LOCAL ROLE {ROLE}")
+            conn.execute("SELECT set_config('request.jwt.claim.sub', %s, true)", (_user_id(1),))
+
+            # Own tasks plus the test user's (user 30), nobody else's
+            visible = conn.execute("SELECT DISTINCT user_id::text FROM tasks ORDER BY 1").fetchall()
+            assert visible == [(_user_id(1),), (_user_id(30),)]
+
+            [(plan,)] = conn.execute("EXPLAIN (FORMAT JSON) SELECT * FROM tasks").fetchall()
+            nodes = list(_plan_nodes(plan[0]["Plan"]))
+            assert "Seq Scan" not in [node["Node Type"] for node in nodes]
+            assert "SubPlan" not in [node.get("Parent Relationship") for node in nodes]
+
+        with pytest.raises(psycopg.errors.InsufficientPrivilege):
+            with conn.transaction():
+                conn.execute(f"SET LOCAL ROLE {ROLE}")
+                conn.execute("SELECT set_config('request.jwt.claim.sub', %s, true)", (_user_id(1),))
+                conn.execute("INSERT INTO tasks (user_id, title) VALUES (%s, 'Not mine')", (_user_id(2),))
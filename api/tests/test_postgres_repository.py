@@ -0,0 +1,328 @@
+import asyncio
+import pytest
+from app.db import migrate
+from app.schemas.task import TaskCreate, TaskOperation, TaskSelection, TaskUpdate
+from app.services.task_service import TaskService
+from conftest import USER_ID
+
+pytest.importorskip("asyncpg")
+
+OTHER_USER_ID = "00000000-0000-4000-8000-000000000002"
+
+@pytest.fixture
+def database(postgres):
+    """A migrated scratch database with two auth users"""
+    import psycopg
+    with psycopg.connect(postgres, autocommit=True) as conn:
+        migrate.migrate(conn)
+        conn.execute(f"INSERT INTO auth.users (id) VALUES ('{USER_ID}'), ('{OTHER_USER_ID}')")
+    return postgres
+
+def _run(database: str, work):
+    """Run work(service) on a fresh engine, disposed within the same event loop"""
+    from app.db.postgres import create_postgres_engine
+    from app.repositories.postgres import PostgresTaskRepository
+
+    async def main():
+        engine = create_postgres_engine(database)
+        try:
+            return await work(TaskService(PostgresTaskRepository(engine)))
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+def test_create_tasks_and_version(database):
+    titles = [f"Task {i}" for i in range(5)]
+
+    async def work(service):
+        before = await service.get_tasks_version(USER_ID)
+        created = await service.create_tasks(USER_ID, [TaskCreate(title=t, due_date="2026-01-02T09:00:00Z") for t in titles])
+        await service.create_tasks(OTHER_USER_ID, [TaskCreate(title="Other")])
+        return before, created, await service.get_tasks(USER_ID), await service.get_tasks_version(USER_ID)
+
+    before, created, listed, after = _run(database, work)
+
+    assert [task["title"] for task in created] == titles
+    assert created[0]["due_date"] == "2026-01-02T09:00:00+00:00"
+    assert {task["id"] for task in listed} == {task["id"] for task in created}
+    assert before == "0:None"
+    assert after.startswith("5:") and after != before
+
+async def _walk_pages(service: TaskService, sort: str, limit: int) -> list:
+    items, cursor = [], None
+    while True:
+        page = await service.get_tasks_page(USER_ID, sort=sort, limit=limit, cursor=cursor)
+        assert len(page["items"]) <= limit
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+@pytest.mark.parametrize("sort", ["due_date", "-due_date", "created_at", "-updated_at"])
+def test_keyset_pagination_visits_every_task_once(database, sort):
+    """Same ordering contract as the PostgREST backend: (sort, id), NULL sort values last"""
+    due_dates = ["2025-01-01T09:00:00+00:00", "2025-01-02T09:00:00+00:00", None]
+
+    async def work(service):
+        await service.create_tasks(USER_ID, [TaskCreate(title=f"Task {i}", due_date=due_dates[i % 3]) for i in range(11)])
+        await service.create_tasks(OTHER_USER_ID, [TaskCreate(title="Other")])
+        return await _walk_pages(service, sort, limit=4), await service.get_tasks(USER_ID)
+
+    items, rows = _run(database, work)
+
+    field, descending = sort.lstrip("-"), sort.startswith("-")
+    present = sorted((r for r in rows if r[field] is not None), key=lambda r: (r[field], r["id"]), reverse=descending)
+    missing = sorted((r for r in rows if r[field] is None), key=lambda r: r["id"], reverse=descending)
+    assert [task["id"] for task in items] == [row["id"] for row in present + missing]
+
+def test_delta_sync_sees_trigger_tombstones(database):
+    async def work(service):
+        first = await service.get_changes(USER_ID)
+        keep, drop = await service.create_tasks(USER_ID, [TaskCreate(title="Keep"), TaskCreate(title="Drop")])
+        assert await service.delete_task(drop["id"], USER_ID)
+        return first, drop, await service.get_changes(USER_ID, first["next_cursor"])
+
+    first, drop, changes = _run(database, work)
+
+    assert first["changes"] == [] and first["deleted"] == []
+    assert [task["title"] for task in changes["changes"]] == ["Keep"]
+    assert [tombstone["id"] for tombstone in changes["deleted"]] == [drop["id"]]
+
+def test_expired_tombstones_are_purged(database):
+    import psycopg
+    from app.services.tombstones import TombstonePurger
+
+    async def delete_two(service):
+        old, recent = await service.create_tasks(USER_ID, [TaskCreate(title="Old"), TaskCreate(title="Recent")])
+        await service.bulk_delete_tasks(USER_ID, TaskSelection(ids=[old["id"], recent["id"]]))
+        return old, recent
+
+    old, recent = _run(database, delete_two)
+    with psycopg.connect(database, autocommit=True) as conn:
+        conn.execute("UPDATE task_tombstones SET deleted_at = now() - interval '31 days' WHERE task_id = %s", (old["id"],))
+
+    async def purge(service):
+        purged = await TombstonePurger(service.repository, retention_days=30).purge()
+        return purged, await service.repository.list_tombstones(USER_ID, 10)
+
+    purged, left = _run(database, purge)
+    assert purged == 1
+    assert [tombstone["task_id"] for tombstone in left] == [recent["id"]]
+
+def test_sync_and_bulk_operations(database):
+    task_id = "00000000-0000-4000-9000-000000000001"
+    operations = [
+        TaskOperation(op_id="op-1", type="create", task_id=task_id, data={"title": "Offline"}),
+        TaskOperation(op_id="op-2", type="update", task_id=task_id, data={"status": "In Progress"}),
+    ]
+
+    async def work(service):
+        applied = await service.apply_operations(USER_ID, operations)
+        replayed = await service.apply_operations(USER_ID, operations)
+        await service.create_tasks(USER_ID, [TaskCreate(title="Second", status="In Progress")])
+        updated = await service.bulk_update_tasks(
+            USER_ID, TaskSelection(status=["In Progress"]), TaskUpdate(status="Done")
+        )
+        deleted = await service.bulk_delete_tasks(USER_ID, TaskSelection(ids=[task_id], returning=True))
+        return applied, replayed, updated, deleted, await service.get_tasks(USER_ID)
+
+    applied, replayed, updated, deleted, remaining = _run(database, work)
+
+    assert [result["status"] for result in applied] == ["applied", "applied"]
+    assert all(result["replayed"] for result in replayed)
+    assert updated["count"] == 2
+    assert deleted["count"] == 1 and deleted["tasks"][0]["status"] == "Done"
+    assert [(task["title"], task["status"]) for task in remaining] == [("Second", "Done")]
+
+def test_sync_cannot_take_over_or_resurrect_tasks(database):
+    async def work(service):
+        [theirs] = await service.create_tasks(OTHER_USER_ID, [TaskCreate(title="Theirs")])
+        [mine] = await service.create_tasks(USER_ID, [TaskCreate(title="Mine")])
+        hijack = await service.apply_operations(USER_ID, [
+            TaskOperation(op_id="op-1", type="create", task_id=theirs["id"], data={"title": "hijacked"}),
+            TaskOperation(op_id="op-2", type="update", task_id=theirs["id"], data={"status": "Done"}),
+            TaskOperation(op_id="op-3", type="update", task_id=mine["id"], data={"title": "Renamed"}),
+        ])
+        # The task is deleted after the batch read it but before the update lands
+        await service.repository.delete_tasks(USER_ID, ids=[mine["id"]])
+        resurrected = await service.repository.update_task_rows(USER_ID, [{"id": mine["id"], "user_id": USER_ID, "title": "Back"}])
+        return hijack, resurrected, await service.get_tasks(OTHER_USER_ID), await service.get_tasks(USER_ID)
+
+    hijack, resurrected, theirs, mine = _run(database, work)
+
+    assert [(r["status"], r["task"]) for r in hijack[:2]] == [("conflict", None), ("conflict", None)]
+    assert hijack[2]["status"] == "applied" and hijack[2]["task"]["title"] == "Renamed"
+    assert [task["title"] for task in theirs] == ["Theirs"]
+    assert resurrected == [] and mine == []
+
+def test_routes_use_postgres_backend(database, monkeypatch):
+    from datetime import datetime, timedelta
+    from fastapi.testclient import TestClient
+    from jose import jwt
+    from app.config import settings
+    from app.main import app
+
+    monkeypatch.setattr(settings, "DATA_BACKEND", "postgres")
+    monkeypatch.setattr(settings, "DATABASE_URL", database)
+    monkeypatch.setattr(settings, "SUPABASE_URL", None)
+    token = jwt.encode({"sub": USER_ID, "exp": datetime.utcnow() + timedelta(minutes=5)}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        created = client.post("/api/v1/tasks/", json={"title": "Direct"}, headers=headers)
+        listed = client.get("/api/v1/tasks/", headers=headers)
+
+    assert created.status_code == 201, created.text
+    assert [task["title"] for task in listed.json()["items"]] == ["Direct"]
+
+def test_search_ranks_stems_and_scopes_to_user(database):
+    async def work(service):
+        await service.create_tasks(USER_ID, [
+            TaskCreate(title="Pay bills", description="Dentist invoice and phone"),
+            TaskCreate(title="Call the dentists", description="Reschedule the cleaning"),
+            TaskCreate(title="Buy groceries"),
+        ])
+        await service.create_tasks(OTHER_USER_ID, [TaskCreate(title="Dentist")])
+        first = await service.search_tasks(USER_ID, "dentist", limit=1)
+        second = await service.search_tasks(USER_ID, "dentist", limit=1, cursor=first["next_cursor"])
+        phrase = await service.search_tasks(USER_ID, '"buy groceries" -milk')
+        return first, second, phrase, await service.get_tasks(USER_ID)
+
+    first, second, phrase, listed = _run(database, work)
+
+    assert [task["title"] for task in first["items"] + second["items"]] == ["Call the dentists", "Pay bills"]
+    assert first["items"][0]["rank"] > second["items"][0]["rank"]
+    assert second["next_cursor"] is None
+    assert [task["title"] for task in phrase["items"]] == ["Buy groceries"]
+    assert all("search_vector" not in task for task in listed)
+
+def test_search_never_matches_another_users_task_by_owner_lexeme(database):
+    async def work(service):
+        # Text quoting the owner id must never stand in for ownership
+        await service.create_tasks(OTHER_USER_ID, [TaskCreate(title=f"Dentist {USER_ID}")])
+        return await service.search_tasks(USER_ID, "dentist")
+
+    assert _run(database, work)["items"] == []
+
+def test_agenda_reads_all_days_in_one_query(database):
+    from datetime import date
+
+    async def work(service):
+        await service.create_tasks(USER_ID, [
+            TaskCreate(title="Late on the 1st", due_date="2026-03-02T06:30:00Z"),
+            TaskCreate(title="Breakfast", due_date="2026-03-02T15:00:00Z"),
+            TaskCreate(title="Lunch", due_date="2026-03-02T19:00:00Z", status="Done"),
+            TaskCreate(title="Dinner", due_date="2026-03-03T02:00:00Z"),
+            TaskCreate(title="Undated"),
+        ])
+        await service.create_tasks(OTHER_USER_ID, [TaskCreate(title="Other", due_date="2026-03-02T15:00:00Z")])
+        first = await service.get_agenda(USER_ID, date(2026, 3, 1), date(2026, 3, 3), 420, limit=2)
+        more = await service.get_agenda(USER_ID, date(2026, 3, 1), date(2026, 3, 3), 420, limit=2, cursor=first["days"][1]["next_cursor"])
+        open_only = await service.get_agenda(USER_ID, date(2026, 3, 2), date(2026, 3, 2), 420, status=["To Do"])
+        return first, more, open_only
+
+    first, more, open_only = _run(database, work)
+
+    assert [(day["date"].isoformat(), [t["title"] for t in day["items"]]) for day in first["days"]] == [
+        ("2026-03-01", ["Late on the 1st"]),
+        ("2026-03-02", ["Breakfast", "Lunch"]),
+        ("2026-03-03", []),
+    ]
+    assert [t["title"] for t in more["days"][0]["items"]] == ["Dinner"]
+    assert [t["title"] for t in open_only["days"][0]["items"]] == ["Breakfast", "Dinner"]
+
+def _stats_from_rows(database: str, user_id: str) -> tuple:
+    import psycopg
+    with psycopg.connect(database, autocommit=True) as conn:
+        counts = dict(conn.execute("SELECT status, count(*) FROM tasks WHERE user_id = %s GROUP BY status", (user_id,)).fetchall())
+        [(overdue,)] = conn.execute(
+            "SELECT count(*) FROM tasks WHERE user_id = %s AND status <> 'Done' AND due_date < now()", (user_id,)
+        ).fetchall()
+    return counts, overdue
+
+def test_stats_counters_follow_every_write_path(database):
+    from datetime import datetime, timedelta, timezone
+    now = datetime.now(timezone.utc)
+    yesterday, earlier, later = now - timedelta(days=1), now - timedelta(minutes=1), now + timedelta(days=2)
+    new_id = "00000000-0000-4000-9000-000000000002"
+
+    async def work(service):
+        snapshots = []
+        created = await service.create_tasks(USER_ID, [
+            TaskCreate(title="Overdue", due_date=yesterday),
+            TaskCreate(title="Due a minute ago", due_date=earlier, status="In Progress"),
+            TaskCreate(title="Upcoming", due_date=later),
+            TaskCreate(title="Undated"),
+        ])
+        await service.create_tasks(OTHER_USER_ID, [TaskCreate(title="Other", due_date=yesterday)])
+        snapshots.append(await service.get_stats(USER_ID))
+
+        await service.update_task(created[0]["id"], USER_ID, TaskUpdate(status="Done"))
+        await service.update_task(created[2]["id"], USER_ID, TaskUpdate(due_date=yesterday))
+        snapshots.append(await service.get_stats(USER_ID))
+
+        await service.bulk_update_tasks(USER_ID, TaskSelection(status=["To Do"]), TaskUpdate(status="In Progress"))
+        await service.apply_operations(USER_ID, [
+            TaskOperation(op_id="op-1", type="create", task_id=new_id, data={"title": "Offline", "due_date": yesterday.isoformat()}),
+            TaskOperation(op_id="op-2", type="update", task_id=created[3]["id"], data={"status": "Done"}),
+        ])
+        snapshots.append(await service.get_stats(USER_ID))
+
+        await service.delete_task(created[1]["id"], USER_ID)
+        await service.bulk_delete_tasks(USER_ID, TaskSelection(status=["Done"]))
+        snapshots.append(await service.get_stats(USER_ID))
+        return snapshots
+
+    snapshots = _run(database, work)
+
+    expected = [
+        ({"To Do": 3, "In Progress": 1}, 2),
+        ({"To Do": 2, "In Progress": 1, "Done": 1}, 2),
+        ({"To Do": 1, "In Progress": 2, "Done": 2}, 3),
+        ({"To Do": 1, "In Progress": 1}, 2),
+    ]
+    for stats, (by_status, overdue) in zip(snapshots, expected):
+        assert {status: count for status, count in stats["by_status"].items() if count} == by_status
+        assert stats["overdue"] == overdue
+    assert snapshots[1]["completion_rate"] == 0.25
+    assert _stats_from_rows(database, USER_ID) == ({"To Do": 1, "In Progress": 1}, 2)
+
+def test_reconcile_repairs_counters(database):
+    import psycopg
+
+    async def work(service):
+        await service.create_tasks(USER_ID, [TaskCreate(title=f"Task {i}") for i in range(3)])
+
+    _run(database, work)
+    with psycopg.connect(database, autocommit=True) as conn:
+        assert conn.execute("SELECT reconcile_task_counts()").fetchone() == (0,)
+        conn.execute("UPDATE task_status_counts SET task_count = 42")
+        assert conn.execute("SELECT reconcile_task_counts()").fetchone() == (1,)
+        assert conn.execute("SELECT status_counts FROM task_stats(%s)", (USER_ID,)).fetchone() == ({"To Do": 3},)
+
+def test_token_revocations_are_single_use_and_listed_incrementally(database):
+    from app.db.postgres import create_postgres_engine
+    from app.repositories.postgres import PostgresTokenRevocationRepository
+
+    def row(token_id, kind, expires_at="2099-01-01T00:00:00+00:00"):
+        return {"token_id": token_id, "kind": kind, "user_id": USER_ID, "expires_at": expires_at}
+
+    async def main():
+        engine = create_postgres_engine(database)
+        try:
+            repository = PostgresTokenRevocationRepository(engine)
+            first = await repository.revoke_tokens([row("jti-1", "refresh")])
+            replay = await repository.revoke_tokens([row("jti-1", "refresh")])
+            await repository.revoke_tokens([row("old-session", "session", "2000-01-01T00:00:00+00:00"), row("session-1", "session")])
+            listed = await repository.list_token_revocations("session", None, "2026-01-01T00:00:00+00:00")
+            later = await repository.list_token_revocations("session", listed[-1]["created_at"], "2026-01-01T00:00:00+00:00")
+            return first, replay, listed, later
+        finally:
+            await engine.dispose()
+
+    first, replay, listed, later = asyncio.run(main())
+
+    assert first == ["jti-1"] and replay == []
+    assert [r["token_id"] for r in listed] == ["session-1"]
+    assert listed[0]["user_id"] == USER_ID
+    assert later == []
@@ -0,0 +1,168 @@
+import asyncio
+import io
+import struct
+import wave
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+from app.dependencies import get_voice_service
+from app.cache.rate_limit import Budget, MemoryRateLimiter, RateLimiter, RateLimitExceeded, RedisRateLimiter, take
+from app.config import settings
+from app.main import app
+from app.schemas.task import TaskCreate
+from app.services.audio import FALLBACK_BYTES_PER_SECOND, MAX_PLAUSIBLE_BYTES_PER_SECOND, audio_duration_seconds
+from conftest import USER_ID
+
+BUDGETS = [Budget("requests", 3, 1.0), Budget("audio_seconds", 60, 0.5)]
+
+def _wav(seconds: float, rate: int = 8000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes(b"\0\0" * int(seconds * rate))
+    return buffer.getvalue()
+
+def _box(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body) + 8) + kind + body
+
+def test_token_bucket_bursts_refills_and_charges_all_or_nothing():
+    state, denied = None, None
+    for _ in range(3):
+        state, denied = take(state, 100.0, BUDGETS, {"requests": 1, "audio_seconds": 10})
+    assert denied is None and state["requests"] == 0 and state["audio_seconds"] == 30
+
+    assert take(state, 100.0, BUDGETS, {"requests": 1}) == (None, ("requests", 1.0))
+    refilled, _ = take(state, 101.0, BUDGETS, {"requests": 1, "audio_seconds": 40})
+    assert refilled is None  # a request token is back, but only 30.5 audio seconds
+
+    later, denied = take(state, 101.0, BUDGETS, {"requests": 1, "audio_seconds": 30})
+    assert denied is None and later["requests"] == 0 and later["audio_seconds"] == 0.5
+
+    # Longer than the whole budget: never taken, even from a full bucket
+    assert take(None, 0.0, BUDGETS, {"audio_seconds": 500})[0] is None
+
+@pytest.fixture
+def backend_factory(backend_url):
+    """Rate-limiter backends on each backend_url; in memory, one shared by every limiter"""
+    if backend_url == "memory://":
+        backend = MemoryRateLimiter()
+        yield lambda: backend
+    else:
+        yield lambda: RedisRateLimiter(backend_url)
+
+def test_concurrent_requests_never_exceed_the_burst(backend_factory):
+    """Each worker has its own client; the shared backend still admits exactly the burst"""
+    async def scenario():
+        limiters = [RateLimiter(backend_factory(), [Budget("requests", 5, 0.001)]) for _ in range(4)]
+
+        async def attempt(limiter):
+            try:
+                await limiter.check(USER_ID)
+                return True
+            except RateLimitExceeded as e:
+                assert e.budget == "requests" and e.retry_after > 0
+                return False
+
+        results = await asyncio.gather(*(attempt(limiters[i % 4]) for i in range(20)))
+        await limiters[0].check("someone-else")
+        for limiter in limiters:
+            await limiter.close()
+        return results
+
+    assert sum(asyncio.run(scenario())) == 5
+
+def test_audio_duration_from_headers():
+    assert audio_duration_seconds(_wav(2.5)) == pytest.approx(2.5)
+
+    mvhd = _box(b"mvhd", bytes(4) + struct.pack(">IIII", 0, 0, 44100, 44100 * 42) + bytes(80))
+    m4a = _box(b"ftyp", b"M4A \0\0\0\0") + _box(b"mdat", bytes(1000)) + _box(b"moov", mvhd)
+    assert audio_duration_seconds(m4a) == pytest.approx(42)
+
+    assert audio_duration_seconds(b"\x1a\x45\xdf\xa3" + bytes(FALLBACK_BYTES_PER_SECOND * 3 - 4)) == 3
+
+def test_audio_duration_does_not_trust_spoofed_headers():
+    size = 10 * 1024 * 1024
+    spoofed_wav = bytearray(_wav(1) + bytes(size))
+    struct.pack_into("<I", spoofed_wav, 28, 0xFFFFFFFF)  # fmt byte rate
+    struct.pack_into("<I", spoofed_wav, 40, 0xFFFFFFFF)  # data size
+    assert audio_duration_seconds(bytes(spoofed_wav)) == len(spoofed_wav) / FALLBACK_BYTES_PER_SECOND
+
+    def m4a(timescale: int, duration: int) -> bytes:
+        mvhd = _box(b"mvhd", bytes(4) + struct.pack(">IIII", 0, 0, timescale, duration) + bytes(80))
+        return _box(b"ftyp", b"M4A \0\0\0\0") + _box(b"mdat", bytes(size)) + _box(b"moov", mvhd)
+
+    assert audio_duration_seconds(m4a(44100, 0)) == len(m4a(44100, 0)) / FALLBACK_BYTES_PER_SECOND
+    # A forged movie header cannot make a large compressed upload cheap
+    assert audio_duration_seconds(m4a(44100, 44100)) == len(m4a(44100, 44100)) / FALLBACK_BYTES_PER_SECOND
+    forged = bytearray(_wav(1) + bytes(size))
+    struct.pack_into("<I", forged, 28, MAX_PLAUSIBLE_BYTES_PER_SECOND)
+    assert audio_duration_seconds(bytes(forged)) == len(forged) / MAX_PLAUSIBLE_BYTES_PER_SECOND
+
+class FakeVoiceService:
+    async def transcribe_audio(self, audio_content: bytes):
+        return "Call mom"
+
+    async def extract_tasks(self, transcription: str, timezone_offset_minutes=None):
+        return [TaskCreate(title="Call mom")]
+
+@pytest.fixture
+def client(standin, monkeypatch):
+    fake = FakeVoiceService()
+    monkeypatch.setitem(app.dependency_overrides, get_voice_service, lambda: fake)
+    monkeypatch.setattr(settings, "VOICE_REQUEST_BURST", 2)
+    monkeypatch.setattr(settings, "VOICE_AUDIO_SECONDS_BURST", 30)
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def auth_headers():
+    expire = datetime.utcnow() + timedelta(minutes=5)
+    token = jwt.encode({"sub": USER_ID, "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+def test_voice_requests_over_budget_get_429(client, auth_headers):
+    audio = {"audio": ("memo.wav", _wav(1), "audio/wav")}
+
+    statuses = [client.post("/api/v1/voice/process", files=audio, headers=auth_headers).status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+    limited = client.post("/api/v1/voice/transcribe", files=audio, headers=auth_headers)
+    assert limited.status_code == 429
+    assert 1 <= int(limited.headers["Retry-After"]) <= 10
+    assert "request" in limited.json()["detail"]
+
+def test_audio_seconds_budget(client, auth_headers, diagnostics_headers):
+    long_memo = {"audio": ("memo.wav", _wav(25), "audio/wav")}
+
+    assert client.post("/api/v1/voice/transcribe", files=long_memo, headers=auth_headers).status_code == 200
+    limited = client.post("/api/v1/voice/transcribe", files=long_memo, headers=auth_headers)
+
+    assert limited.status_code == 429
+    assert "audio seconds" in limited.json()["detail"]
+    # 20 missing seconds at 1800 per hour
+    assert int(limited.headers["Retry-After"]) == 40
+    stats = client.get("/api/v1/diagnostics/rate-limits", headers=diagnostics_headers).json()
+    assert (stats["allowed"], stats["limited"]) == (1, 1)
+
+def test_recording_longer_than_the_budget_gets_413(client, auth_headers):
+    too_long = {"audio": ("memo.wav", _wav(31), "audio/wav")}
+
+    response = client.post("/api/v1/voice/transcribe", files=too_long, headers=auth_headers)
+
+    assert response.status_code == 413
+    assert "audio seconds" in response.json()["detail"]
+    # Nothing was charged: a recording that fits still goes through
+    short = {"audio": ("memo.wav", _wav(25), "audio/wav")}
+    assert client.post("/api/v1/voice/transcribe", files=short, headers=auth_headers).status_code == 200
+
+def test_replayed_requests_are_not_charged(client, auth_headers, diagnostics_headers):
+    audio = {"audio": ("memo.wav", _wav(1), "audio/wav")}
+    headers = {**auth_headers, "Idempotency-Key": "memo-1"}
+
+    statuses = [client.post("/api/v1/voice/process", files=audio, headers=headers).status_code for _ in range(4)]
+
+    assert statuses == [200] * 4
+    assert client.get("/api/v1/diagnostics/rate-limits", headers=diagnostics_headers).json()["allowed"] == 1
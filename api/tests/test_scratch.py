@@ -0,0 +1,119 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+from app.config import settings
+from app.dependencies import get_voice_service
+from app.main import app
+from app.services.audio_capabilities import AudioCapabilities
+from app.services.scratch import ScratchQuotaExceeded, ScratchSpace
+from app.services.voice_service import VoiceService
+
+def test_request_directories_are_removed_on_success_and_failure(tmp_path):
+    scratch = ScratchSpace(str(tmp_path), quota_bytes=1000)
+
+    async def scenario():
+        async with scratch.request(100) as workdir:
+            workdir.write("input.m4a", b"x" * 60)
+            kept = workdir.path
+            assert kept.parent == scratch.worker_dir and kept.is_dir()
+        with pytest.raises(RuntimeError):
+            async with scratch.request(100) as workdir:
+                failed = workdir.path
+                open(workdir.file("ffmpeg_1.wav"), "wb").close()
+                raise RuntimeError("conversion crashed")
+        with pytest.raises(ScratchQuotaExceeded):
+            async with scratch.request(100) as workdir:
+                workdir.write("too-big.wav", b"x" * 101)
+        return kept, failed
+
+    kept, failed = asyncio.run(scenario())
+
+    assert not kept.exists() and not failed.exists()
+    assert list(scratch.worker_dir.iterdir()) == []
+    assert scratch.stats()["reserved_bytes"] == 0
+
+def test_quota_makes_requests_wait_then_rejects(tmp_path):
+    scratch = ScratchSpace(str(tmp_path), quota_bytes=1000, wait_timeout=0.2)
+    order = []
+
+    async def convert(name, size, hold):
+        async with scratch.request(size):
+            order.append(f"{name} start")
+            await asyncio.sleep(hold)
+            order.append(f"{name} end")
+
+    async def scenario():
+        first = asyncio.create_task(convert("first", 600, 0.1))
+        await asyncio.sleep(0)
+        await convert("second", 600, 0)  # waits for the first to release its 600 bytes
+        await first
+        blocker = asyncio.create_task(convert("blocker", 1000, 0.5))
+        await asyncio.sleep(0)
+        with pytest.raises(ScratchQuotaExceeded):
+            await convert("rejected", 1, 0)
+        await blocker
+        with pytest.raises(ScratchQuotaExceeded):
+            await convert("oversized", 1001, 0)
+
+    asyncio.run(scenario())
+
+    assert order == ["first start", "first end", "second start", "second end", "blocker start", "blocker end"]
+    stats = scratch.stats()
+    assert (stats["requests"], stats["waits"], stats["rejected"], stats["reserved_bytes"]) == (3, 2, 2, 0)
+
+def test_reaper_removes_what_crashed_workers_left(tmp_path):
+    scratch = ScratchSpace(str(tmp_path), orphan_age=60)
+    finished = subprocess.Popen([sys.executable, "-c", "pass"])
+    finished.wait()
+    crashed = scratch.base / f"worker-{finished.pid}"
+    (crashed / "request").mkdir(parents=True)
+    (crashed / "request" / "input.m4a").write_bytes(b"x" * 10)
+    alive = scratch.base / f"worker-{os.getppid()}"
+    alive.mkdir()
+    silent = scratch.base / f"worker-{os.getppid() + 100000}"
+    silent.mkdir()
+    stuck = scratch.worker_dir / "stuck-request"
+    stuck.mkdir(parents=True)
+    old = time.time() - 3600
+    os.utime(stuck, (old, old))
+    os.utime(silent, (old, old))
+
+    assert scratch.reap() == 3
+    assert not crashed.exists() and not stuck.exists() and not silent.exists()
+    assert alive.exists() and scratch.worker_dir.exists()
+
+def test_failed_transcription_leaves_no_files(tmp_path):
+    def reject(model, file):
+        raise ValueError("Invalid file format")
+
+    scratch = ScratchSpace(str(tmp_path))
+    client = SimpleNamespace(audio=SimpleNamespace(transcriptions=SimpleNamespace(create=reject)))
+    service = VoiceService(client=client, capabilities=AudioCapabilities(), scratch=scratch)
+
+    assert asyncio.run(service.transcribe_audio(b"\0" * 4096)) is None
+    assert scratch.requests == 1
+    assert list(scratch.worker_dir.iterdir()) == []
+
+def test_voice_endpoint_answers_503_when_scratch_is_full(standin, tmp_path, monkeypatch):
+    def reject(model, file):
+        raise ValueError("Invalid file format")
+
+    client = SimpleNamespace(audio=SimpleNamespace(transcriptions=SimpleNamespace(create=reject)))
+    service = VoiceService(client=client, capabilities=AudioCapabilities(), scratch=ScratchSpace(str(tmp_path), quota_bytes=1024))
+    monkeypatch.setitem(app.dependency_overrides, get_voice_service, lambda: service)
+    token = jwt.encode({"sub": "180a8d2e-642c-4023-a1dd-008af40b4fd2", "exp": datetime.utcnow() + timedelta(minutes=5)},
+                       settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    with TestClient(app) as test_client:
+        response = test_client.post("/api/v1/voice/transcribe", files={"audio": ("memo.m4a", b"\0" * 4096, "audio/m4a")},
+                                    headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
@@ -0,0 +1,94 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+import httpx
+import pytest
+from jose import jwt
+from app import server
+from app.config import settings
+
+API_DIR = Path(__file__).resolve().parent.parent
+
+def _shared_stores(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_CACHE_URL", "redis://localhost:6379/0")
+    monkeypatch.setattr(settings, "IDEMPOTENCY_CACHE_URL", "redis://localhost:6379/0")
+    monkeypatch.setattr(settings, "VOICE_RATE_LIMIT_URL", "")
+
+def test_options_default_to_one_worker_per_core(monkeypatch):
+    monkeypatch.setattr(server, "cpu_count", lambda: 6)
+    _shared_stores(monkeypatch)
+
+    options = server.server_options(server.parse_args(["9000", "--workers", "0", "--limit-concurrency", "0"]))
+    assert (options["port"], options["workers"], options["limit_concurrency"]) == (9000, 6, None)
+    assert (options["loop"], options["http"]) == ("auto", "auto")
+
+    reload = server.server_options(server.parse_args(["--reload", "--workers", "4"]))
+    assert reload["workers"] == 1 and reload["reload"]
+
+    tuned = server.server_options(server.parse_args(["--workers", "3", "--backlog", "64", "--graceful-timeout", "20", "--limit-concurrency", "200"]))
+    assert (tuned["workers"], tuned["backlog"], tuned["timeout_graceful_shutdown"], tuned["limit_concurrency"]) == (3, 64, 20, 200)
+
+def test_memory_caches_are_flagged_as_per_worker(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_CACHE_URL", "redis://localhost:6379/0")
+    monkeypatch.setattr(settings, "IDEMPOTENCY_CACHE_URL", "")
+    monkeypatch.setattr(settings, "VOICE_RATE_LIMIT_URL", "memory://")
+    assert server.per_worker_caches() == ["VOICE_RATE_LIMIT_URL"]
+
+def test_memory_stores_limit_the_server_to_one_worker(monkeypatch):
+    monkeypatch.setattr(server, "cpu_count", lambda: 6)
+    monkeypatch.setattr(settings, "TASK_CACHE_URL", "memory://")
+
+    assert server.server_options(server.parse_args(["--workers", "0"]))["workers"] == 1
+    assert server.server_options(server.parse_args(["--workers", "1"]))["workers"] == 1
+    with pytest.raises(ValueError, match="TASK_CACHE_URL"):
+        server.server_options(server.parse_args(["--workers", "4"]))
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_workers_drain_in_flight_requests_on_sigterm(standin):
+    port = _free_port()
+    env = {**os.environ, "SUPABASE_URL": standin.url, "SUPABASE_KEY": "test-key",
+           "TASK_CACHE_URL": "", "IDEMPOTENCY_CACHE_URL": "", "VOICE_RATE_LIMIT_URL": ""}
+    process = subprocess.Popen(
+        [sys.executable, "run.py", str(port), "--host", "127.0.0.1", "--workers", "2", "--graceful-timeout", "10"],
+        cwd=API_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(100):
+            try:
+                if httpx.get(url).status_code == 200:
+                    break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        else:
+            raise AssertionError("server did not start")
+
+        token = jwt.encode({"sub": "180a8d2e-642c-4023-a1dd-008af40b4fd2", "exp": datetime.utcnow() + timedelta(minutes=5)},
+                           settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        standin.latency = 1.5
+        result = {}
+        request = threading.Thread(target=lambda: result.update(response=httpx.get(
+            f"{url}/api/v1/tasks/", headers={"Authorization": f"Bearer {token}"}, timeout=10)))
+        request.start()
+        time.sleep(0.5)
+
+        process.send_signal(signal.SIGTERM)
+        request.join()
+        output, _ = process.communicate(timeout=15)
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+    assert result["response"].status_code == 200
+    assert process.returncode == 0
+    assert "Workers: 2" in output
@@ -0,0 +1,17 @@
+from benchmarks.bench_startup import import_profile, startup_env, time_to_first_response
+
+# Packages that must not load when the app is imported: they are only
+# needed by a voice request (openai, pydub) or DATA_BACKEND=postgres
+DEFERRED = ("openai", "pydub", "sqlalchemy")
+
+# A coarse ceiling that catches blocking work creeping into startup
+# (typically under 3 s here, mostly interpreter and FastAPI imports)
+FIRST_RESPONSE_BUDGET_SECONDS = 10
+
+def test_import_needs_no_credentials_and_defers_heavy_packages():
+    loaded = {name for _, name, _ in import_profile(env=startup_env())}
+    assert "app.main" in loaded
+    assert [name for name in DEFERRED if name in loaded] == []
+
+def test_time_to_first_response(standin):
+    assert time_to_first_response(startup_env(standin.url)) < FIRST_RESPONSE_BUDGET_SECONDS
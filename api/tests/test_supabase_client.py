@@ -0,0 +1,39 @@
+import asyncio
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.db import supabase as supabase_db
+
+def _configure(monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_URL", "http://127.0.0.1:54321")
+    monkeypatch.setattr(settings, "SUPABASE_KEY", "test-key")
+
+def test_shared_client_is_reused(monkeypatch):
+    """The data client and its HTTP pool are created once and reused"""
+    _configure(monkeypatch)
+    try:
+        client = supabase_db.init_supabase()
+        assert supabase_db.get_supabase_client() is client
+        assert supabase_db.init_supabase() is client
+        assert client.postgrest.session is supabase_db._async_http_client
+
+        auth_client = supabase_db.get_supabase_auth_client()
+        assert auth_client is not client
+        assert auth_client.auth is not client.auth
+    finally:
+        asyncio.run(supabase_db.close_supabase())
+
+    assert supabase_db._supabase_client is None
+    assert supabase_db._async_http_client is None
+
+def test_lifespan_manages_client(monkeypatch):
+    """The FastAPI lifespan creates the shared client and closes it on shutdown"""
+    _configure(monkeypatch)
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        assert app.state.supabase is supabase_db.get_supabase_client()
+        http_client = supabase_db._async_http_client
+        assert test_client.get("/").status_code == 200
+
+    assert http_client.is_closed
+    assert supabase_db._supabase_client is None
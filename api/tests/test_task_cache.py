@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from app.cache.backends import MemoryCacheBackend
+from app.cache.task_cache import TaskCache
+from app.db.supabase import create_async_supabase_client
+from app.repositories.cached import CachedTaskRepository
+from app.repositories.supabase import SupabaseTaskRepository
+from app.schemas.task import TaskCreate, TaskUpdate
+from app.services.task_service import TaskService
+from conftest import USER_ID
+
+def test_reads_are_cached_per_status_and_invalidated_on_writes(standin, backend_factory):
+    """Repeated reads hit the cache; every write path drops the user's entries"""
+    async def scenario():
+        cache = TaskCache(backend_factory())
+        service = TaskService(CachedTaskRepository(SupabaseTaskRepository(create_async_supabase_client()), cache))
+
+        created = await service.create_task(USER_ID, TaskCreate(title="First"))
+        await service.get_tasks_page(USER_ID)
+        await service.get_tasks_page(USER_ID)
+        await service.get_tasks_page(USER_ID, status="Done")
+        queries = standin.request_count
+        assert (cache.hits, cache.misses) == (1, 2)
+
+        # Voice pipeline path (bulk insert) invalidates
+        await service.create_tasks(USER_ID, [TaskCreate(title="From voice")])
+        assert len((await service.get_tasks_page(USER_ID))["items"]) == 2
+
+        # Update invalidates, including single-task reads
+        await service.get_task(created["id"], USER_ID)
+        await service.update_task(created["id"], USER_ID, TaskUpdate(status="Done"))
+        assert (await service.get_task(created["id"], USER_ID))["status"] == "Done"
+        assert len((await service.get_tasks_page(USER_ID, status="Done"))["items"]) == 1
+
+        # Delete invalidates
+        await service.delete_task(created["id"], USER_ID)
+        assert await service.get_task(created["id"], USER_ID) is None
+
+        assert standin.request_count > queries
+        await cache.close()
+
+    asyncio.run(scenario())
+
+def test_memory_backend_is_bounded_lru():
+    async def scenario():
+        backend = MemoryCacheBackend(max_entries=2)
+        await backend.set("a", "1")
+        await backend.set("b", "2")
+        await backend.get("a")
+        await backend.set("c", "3")
+        return backend, [await backend.get(k) for k in ("a", "b", "c")]
+
+    backend, values = asyncio.run(scenario())
+    assert values == ["1", None, "3"]
+    assert backend.evictions == 1
+
+def test_hit_ratio_is_reported():
+    async def scenario():
+        cache = TaskCache(MemoryCacheBackend())
+        for _ in range(4):
+            await cache.get_or_load(USER_ID, ("list", None), lambda: asyncio.sleep(0, result=[]))
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["hits"] == 3 and stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.75
+
+def test_generation_keys_expire():
+    async def scenario():
+        backend = MemoryCacheBackend()
+        cache = TaskCache(backend, ttl=0.01)
+        await cache.get_or_load(USER_ID, ("list", None), lambda: asyncio.sleep(0, result=[]))
+        await cache.invalidate("someone-else")
+        await asyncio.sleep(0.01 * TaskCache.GENERATION_TTL_FACTOR + 0.05)
+        return [await backend.get(TaskCache._generation_key(user)) for user in (USER_ID, "someone-else")]
+
+    assert asyncio.run(scenario()) == [None, None]
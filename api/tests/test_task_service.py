@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from app.db.supabase import create_async_supabase_client
+from app.repositories.supabase import SupabaseTaskRepository
+from app.schemas.task import TaskCreate
+from app.services.task_service import TaskService, _decode_agenda_cursor, _decode_cursor, _decode_search_cursor, _decode_sync_cursor
+from conftest import USER_ID
+
+def _service() -> TaskService:
+    return TaskService(SupabaseTaskRepository(create_async_supabase_client()))
+
+def test_create_tasks_single_round_trip_keeps_order(standin):
+    """All tasks from one note are inserted with one request, in input order"""
+    titles = [f"Task {i}" for i in range(5)]
+    created = asyncio.run(_service().create_tasks(USER_ID, [TaskCreate(title=t) for t in titles]))
+
+    assert [task["title"] for task in created] == titles
+    assert all(task["user_id"] == USER_ID for task in created)
+    assert standin.request_count == 1
+    assert len(standin.tables["tasks"]) == 5
+
+def test_create_tasks_rejects_whole_batch_on_invalid_item(standin):
+    """One invalid item aborts the batch before anything is written"""
+    tasks = [{"title": "Valid"}, {"title": "Bad status", "status": "Someday"}]
+
+    with pytest.raises(ValueError, match="task 1"):
+        asyncio.run(_service().create_tasks(USER_ID, tasks))
+
+    assert standin.request_count == 0
+    assert standin.tables["tasks"] == []
+
+def test_create_tasks_empty_input_skips_database(standin):
+    assert asyncio.run(_service().create_tasks(USER_ID, [])) == []
+    assert standin.request_count == 0
+
+def test_create_tasks_database_error_propagates(standin):
+    """A failed insert creates nothing and surfaces the error"""
+    class FailingRepository(SupabaseTaskRepository):
+        async def insert_tasks(self, rows):
+            raise RuntimeError("insert failed")
+
+    service = TaskService(FailingRepository(create_async_supabase_client()))
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.create_tasks(USER_ID, [TaskCreate(title="Task")]))
+
+    assert standin.tables["tasks"] == []
+
+async def _walk_pages(service: TaskService, sort: str, limit: int) -> list:
+    items, cursor = [], None
+    while True:
+        page = await service.get_tasks_page(USER_ID, sort=sort, limit=limit, cursor=cursor)
+        assert len(page["items"]) <= limit
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+@pytest.mark.parametrize("sort", ["due_date", "-due_date", "updated_at", "-updated_at"])
+def test_keyset_pagination_visits_every_task_once(standin, sort):
+    """Pages follow (sort, id) order with NULL sort values last and no gaps or repeats"""
+    due_dates = ["2025-01-01T09:00:00+00:00", "2025-01-02T09:00:00+00:00", None]
+    standin.seed("tasks", [
+        {"user_id": USER_ID, "title": f"Task {i}", "status": "To Do", "due_date": due_dates[i % 3]}
+        for i in range(11)
+    ])
+    standin.seed("tasks", [{"user_id": "someone-else", "title": "Other", "status": "To Do"}])
+
+    items = asyncio.run(_walk_pages(_service(), sort, limit=4))
+
+    field, descending = sort.lstrip("-"), sort.startswith("-")
+    rows = [row for row in standin.tables["tasks"] if row["user_id"] == USER_ID]
+    present = sorted((r for r in rows if r[field] is not None), key=lambda r: (r[field], r["id"]), reverse=descending)
+    missing = sorted((r for r in rows if r[field] is None), key=lambda r: r["id"], reverse=descending)
+    assert [task["id"] for task in items] == [row["id"] for row in present + missing]
+
+def test_page_size_is_capped(standin, monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "TASKS_PAGE_SIZE_MAX", 3)
+    standin.seed("tasks", [{"user_id": USER_ID, "title": f"Task {i}", "status": "To Do"} for i in range(5)])
+
+    page = asyncio.run(_service().get_tasks_page(USER_ID, limit=100))
+
+    assert len(page["items"]) == 3
+    assert page["next_cursor"] is not None
+
+def test_invalid_cursor_and_sort_are_rejected(standin):
+    service = _service()
+    with pytest.raises(ValueError):
+        asyncio.run(service.get_tasks_page(USER_ID, cursor="not-a-cursor"))
+    with pytest.raises(ValueError):
+        asyncio.run(service.get_tasks_page(USER_ID, sort="title"))
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "%%%", "WzFd", "bnVsbA"])  # garbage, bad base64, [1], null
+def test_every_cursor_rejects_malformed_input_the_same_way(cursor):
+    decoders = [
+        lambda: _decode_cursor("-created_at", cursor),
+        lambda: _decode_search_cursor("milk", cursor),
+        lambda: _decode_agenda_cursor(cursor),
+    ]
+    for decode in decoders:
+        with pytest.raises(ValueError, match="^Invalid cursor$"):
+            decode()
+    with pytest.raises(ValueError, match="^Invalid sync cursor$"):
+        _decode_sync_cursor(cursor)
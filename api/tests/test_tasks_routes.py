@@ -0,0 +1,338 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+from app.config import settings
+from app.main import app
+from conftest import USER_ID
+
+@pytest.fixture
+def client(standin):
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def auth_headers():
+    expire = datetime.utcnow() + timedelta(minutes=5)
+    token = jwt.encode({"sub": USER_ID, "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+def test_sparse_fieldset_projects_query_and_response(client, auth_headers, standin):
+    standin.seed("tasks", [{"user_id": USER_ID, "title": "Dentist", "status": "To Do", "description": "Call first"}])
+
+    response = client.get("/api/v1/tasks/", params={"fields": "title,status"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["items"][0].keys() == {"id", "title", "status"}
+    method, table, params = standin.queries[-1]
+    assert dict(params)["select"] == "id,title,status,updated_at"
+
+def test_sparse_fieldset_on_single_task(client, auth_headers, standin):
+    [task] = standin.seed("tasks", [{"user_id": USER_ID, "title": "Dentist", "status": "To Do"}])
+
+    response = client.get(f"/api/v1/tasks/{task['id']}", params={"fields": "title,due_date"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json() == {"id": task["id"], "title": "Dentist", "due_date": None}
+
+def test_unknown_field_is_rejected(client, auth_headers):
+    response = client.get("/api/v1/tasks/", params={"fields": "title,secret"}, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_cache_hit_ratio_is_exposed(client, auth_headers, diagnostics_headers):
+    client.get("/api/v1/tasks/", headers=auth_headers)
+    client.get("/api/v1/tasks/", headers=auth_headers)
+
+    stats = client.get("/api/v1/diagnostics/cache", headers=diagnostics_headers).json()
+
+    assert stats["enabled"] is True
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["hit_ratio"] == 0.5
+
+def test_diagnostics_require_the_operator_token(client, auth_headers, monkeypatch):
+    assert client.get("/api/v1/diagnostics/cache", headers=auth_headers).status_code == 404
+
+    monkeypatch.setattr(settings, "DIAGNOSTICS_TOKEN", "ops-secret")
+    assert client.get("/api/v1/diagnostics/cache", headers=auth_headers).status_code == 401
+    assert client.get("/api/v1/diagnostics/scratch", headers={"X-Diagnostics-Token": "guess"}).status_code == 401
+    assert client.get("/api/v1/diagnostics/scratch", headers={"X-Diagnostics-Token": "ops-secret"}).status_code == 200
+
+def test_conditional_get_returns_304_until_tasks_change(client, auth_headers, standin):
+    [task] = standin.seed("tasks", [{"user_id": USER_ID, "title": "Dentist", "status": "To Do"}])
+
+    first = client.get("/api/v1/tasks/", headers=auth_headers)
+    etag = first.headers["ETag"]
+    queries = standin.request_count
+
+    cached = client.get("/api/v1/tasks/", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert standin.request_count == queries  # served from the version cache
+
+    # A different query shape has a different ETag
+    other = client.get("/api/v1/tasks/", params={"status": "Done"}, headers={**auth_headers, "If-None-Match": etag})
+    assert other.status_code == 200
+
+    client.put(f"/api/v1/tasks/{task['id']}", json={"status": "Done"}, headers=auth_headers)
+    changed = client.get("/api/v1/tasks/", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+def test_conditional_get_single_task(client, auth_headers, standin):
+    [task] = standin.seed("tasks", [{"user_id": USER_ID, "title": "Dentist", "status": "To Do"}])
+    url = f"/api/v1/tasks/{task['id']}"
+
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+
+    assert client.get(url, headers={**auth_headers, "If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get(url, params={"fields": "title"}, headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+
+def test_delta_sync_returns_only_changes_and_deletions(client, auth_headers, standin, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_SYNC_OVERLAP_SECONDS", 0)
+    tasks = standin.seed("tasks", [{"user_id": USER_ID, "title": f"Task {i}", "status": "To Do"} for i in range(3)])
+
+    # Initial sync, paged
+    first = client.get("/api/v1/tasks/changes", params={"limit": 2}, headers=auth_headers).json()
+    assert len(first["changes"]) == 2 and first["has_more"] is True
+    second = client.get("/api/v1/tasks/changes", params={"since": first["next_cursor"], "limit": 2}, headers=auth_headers).json()
+    assert len(second["changes"]) == 1 and second["has_more"] is False
+    assert {t["id"] for t in first["changes"] + second["changes"]} == {t["id"] for t in tasks}
+
+    client.put(f"/api/v1/tasks/{tasks[0]['id']}", json={"status": "Done"}, headers=auth_headers)
+    client.delete(f"/api/v1/tasks/{tasks[1]['id']}", headers=auth_headers)
+
+    delta = client.get("/api/v1/tasks/changes", params={"since": second["next_cursor"]}, headers=auth_headers).json()
+    assert [t["id"] for t in delta["changes"]] == [tasks[0]["id"]]
+    assert delta["changes"][0]["status"] == "Done"
+    assert [t["id"] for t in delta["deleted"]] == [tasks[1]["id"]]
+
+    # Range scans from the high-water marks, not a full read
+    method, table, params = standin.queries[-1]
+    assert table == "tasks" and "updated_at.gt." in dict(params)["or"]
+
+    empty = client.get("/api/v1/tasks/changes", params={"since": delta["next_cursor"]}, headers=auth_headers).json()
+    assert empty["changes"] == [] and empty["deleted"] == []
+
+def test_delta_sync_skips_old_tombstones_on_initial_sync(client, auth_headers, standin, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_SYNC_OVERLAP_SECONDS", 0)
+    [task] = standin.seed("tasks", [{"user_id": USER_ID, "title": "Gone", "status": "To Do"}])
+    client.delete(f"/api/v1/tasks/{task['id']}", headers=auth_headers)
+
+    initial = client.get("/api/v1/tasks/changes", headers=auth_headers).json()
+    assert initial["changes"] == [] and initial["deleted"] == []
+
+    again = client.get("/api/v1/tasks/changes", params={"since": initial["next_cursor"]}, headers=auth_headers).json()
+    assert again["deleted"] == []
+
+def test_delta_sync_rereads_the_overlap_window_for_late_commits(client, auth_headers, standin):
+    [early] = standin.seed("tasks", [{"user_id": USER_ID, "title": "Early", "status": "To Do"}])
+    cursor = client.get("/api/v1/tasks/changes", headers=auth_headers).json()["next_cursor"]
+
+    # Stamped before the sync above read, but committed after it
+    stamped = (datetime.fromisoformat(early["updated_at"]) - timedelta(seconds=1)).isoformat()
+    [late] = standin.seed("tasks", [{"user_id": USER_ID, "title": "Late", "status": "To Do"}])
+    late["updated_at"] = stamped
+    client.delete(f"/api/v1/tasks/{early['id']}", headers=auth_headers)
+    standin.seed("tasks", [{"id": early["id"], "user_id": USER_ID, "title": "Early again", "status": "To Do"}])
+
+    delta = client.get("/api/v1/tasks/changes", params={"since": cursor}, headers=auth_headers).json()
+
+    assert {t["title"] for t in delta["changes"]} == {"Late", "Early again"}
+    assert delta["deleted"] == []  # the live row wins over its own tombstone
+    repeat = client.get("/api/v1/tasks/changes", params={"since": delta["next_cursor"]}, headers=auth_headers).json()
+    assert {t["title"] for t in repeat["changes"]} == {"Late", "Early again"}  # still inside the window
+
+def test_delta_sync_rejects_bad_and_expired_cursors(client, auth_headers, monkeypatch):
+    assert client.get("/api/v1/tasks/changes", params={"since": "not-a-cursor"}, headers=auth_headers).status_code == 400
+
+    cursor = client.get("/api/v1/tasks/changes", headers=auth_headers).json()["next_cursor"]
+    monkeypatch.setattr(settings, "TASK_TOMBSTONE_RETENTION_DAYS", -1)
+    assert client.get("/api/v1/tasks/changes", params={"since": cursor}, headers=auth_headers).status_code == 410
+
+def test_sync_replays_offline_operations_in_few_round_trips(client, auth_headers, standin):
+    edited, stale, doomed = standin.seed("tasks", [
+        {"user_id": USER_ID, "title": title, "status": "To Do"} for title in ("Edited", "Stale", "Doomed")
+    ])
+    new_id = "7d3f6a52-9a51-4f0e-8a43-3c1f1f1d2b6e"
+    later = (datetime.utcnow() + timedelta(minutes=1)).isoformat()
+    earlier = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    batch = {"operations": [
+        {"op_id": "op-1", "type": "create", "task_id": new_id, "data": {"title": "Offline"}, "updated_at": later},
+        {"op_id": "op-2", "type": "update", "task_id": new_id, "data": {"status": "Done"}, "updated_at": later},
+        {"op_id": "op-3", "type": "update", "task_id": edited["id"], "data": {"title": "Renamed"}, "updated_at": later},
+        {"op_id": "op-4", "type": "update", "task_id": stale["id"], "data": {"title": "Old edit"}, "updated_at": earlier},
+        {"op_id": "op-5", "type": "delete", "task_id": doomed["id"], "updated_at": later},
+        {"op_id": "op-6", "type": "delete", "task_id": "00000000-0000-4000-8000-000000000000"},
+        {"op_id": "op-7", "type": "create", "data": {"title": "Bad", "status": "Someday"}},
+    ]}
+    requests = standin.request_count
+
+    response = client.post("/api/v1/tasks/sync", json=batch, headers=auth_headers)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["applied", "applied", "applied", "conflict", "applied", "not_found", "invalid"]
+    assert standin.request_count - requests <= 6
+    assert results[1]["task"]["status"] == "Done" and results[1]["task"]["title"] == "Offline"
+    assert results[3]["task"]["title"] == "Stale"
+
+    titles = {t["title"]: t for t in standin.tables["tasks"]}
+    assert set(titles) == {"Offline", "Renamed", "Stale"}
+    assert titles["Offline"]["id"] == new_id
+
+    # Replaying the same batch is a no-op that reports the original outcome
+    requests = standin.request_count
+    replay = client.post("/api/v1/tasks/sync", json=batch, headers=auth_headers).json()["results"]
+    assert [r["status"] for r in replay] == [r["status"] for r in results]
+    assert all(r["replayed"] for r in replay)
+    assert standin.request_count - requests == 1
+    assert len(standin.tables["tasks"]) == 3
+
+def test_sync_rejects_oversized_batch(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_SYNC_MAX_OPERATIONS", 1)
+    batch = {"operations": [{"op_id": f"op-{i}", "type": "create", "data": {"title": "x"}} for i in range(2)]}
+    assert client.post("/api/v1/tasks/sync", json=batch, headers=auth_headers).status_code == 400
+
+def test_bulk_update_by_filter_is_one_statement(client, auth_headers, standin):
+    overdue = (datetime.utcnow() - timedelta(days=2)).isoformat()
+    upcoming = (datetime.utcnow() + timedelta(days=2)).isoformat()
+    standin.seed("tasks", [
+        {"user_id": USER_ID, "title": "Late 1", "status": "To Do", "due_date": overdue},
+        {"user_id": USER_ID, "title": "Late 2", "status": "In Progress", "due_date": overdue},
+        {"user_id": USER_ID, "title": "Later", "status": "To Do", "due_date": upcoming},
+        {"user_id": USER_ID, "title": "Finished", "status": "Done", "due_date": overdue},
+        {"user_id": "5b0f4d8e-2222-4c3b-9a1e-000000000001", "title": "Someone else", "status": "To Do", "due_date": overdue},
+    ])
+    tomorrow = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0).isoformat()
+    requests = standin.request_count
+
+    response = client.post("/api/v1/tasks/bulk/update", json={
+        "status": ["To Do", "In Progress"], "due_to": datetime.utcnow().isoformat(),
+        "changes": {"due_date": tomorrow}
+    }, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json() == {"count": 2, "tasks": None}
+    assert standin.request_count - requests == 1
+    rescheduled = sorted(t["title"] for t in standin.tables["tasks"] if t["due_date"] == tomorrow)
+    assert rescheduled == ["Late 1", "Late 2"]
+
+def test_bulk_mark_done_and_delete_by_ids(client, auth_headers, standin):
+    tasks = standin.seed("tasks", [{"user_id": USER_ID, "title": f"Task {i}", "status": "To Do"} for i in range(3)])
+    ids = [t["id"] for t in tasks[:2]]
+
+    done = client.post("/api/v1/tasks/bulk/update", json={
+        "ids": ids, "changes": {"status": "Done"}, "returning": True
+    }, headers=auth_headers).json()
+    assert done["count"] == 2
+    assert {t["id"] for t in done["tasks"]} == set(ids)
+    assert all(t["status"] == "Done" for t in done["tasks"])
+
+    deleted = client.post("/api/v1/tasks/bulk/delete", json={"status": ["Done"]}, headers=auth_headers).json()
+    assert deleted == {"count": 2, "tasks": None}
+    assert [t["id"] for t in standin.tables["tasks"]] == [tasks[2]["id"]]
+    assert {t["task_id"] for t in standin.tables["task_tombstones"]} == set(ids)
+
+def test_bulk_operations_require_a_selection(client, auth_headers):
+    assert client.post("/api/v1/tasks/bulk/delete", json={}, headers=auth_headers).status_code == 400
+    assert client.post("/api/v1/tasks/bulk/update", json={"ids": [], "changes": {}}, headers=auth_headers).status_code == 400
+
+def test_search_is_ranked_paginated_and_user_scoped(client, auth_headers, standin):
+    standin.seed("tasks", [
+        {"user_id": USER_ID, "title": "Call the dentist", "status": "To Do", "description": "Ask about the dentist bill"},
+        {"user_id": USER_ID, "title": "Pay bills", "status": "To Do", "description": "Dentist and phone"},
+        {"user_id": USER_ID, "title": "Book dentist", "status": "Done"},
+        {"user_id": USER_ID, "title": "Buy groceries", "status": "To Do"},
+        {"user_id": "someone-else", "title": "Dentist", "status": "To Do"},
+    ])
+
+    first = client.get("/api/v1/tasks/search", params={"q": "dentist", "limit": 2}, headers=auth_headers).json()
+    second = client.get(
+        "/api/v1/tasks/search", params={"q": "dentist", "limit": 2, "cursor": first["next_cursor"]}, headers=auth_headers
+    ).json()
+
+    ranked = first["items"] + second["items"]
+    assert [task["title"] for task in ranked] == ["Call the dentist", "Book dentist", "Pay bills"]
+    assert ranked[0]["rank"] > ranked[1]["rank"] > ranked[2]["rank"]
+    assert second["next_cursor"] is None
+    method, function, params = standin.queries[-1]
+    assert function == "search_tasks"
+
+def test_search_rejects_blank_query_and_foreign_cursor(client, auth_headers, standin):
+    standin.seed("tasks", [{"user_id": USER_ID, "title": f"Dentist {i}", "status": "To Do"} for i in range(3)])
+    page = client.get("/api/v1/tasks/search", params={"q": "dentist", "limit": 1}, headers=auth_headers).json()
+
+    assert client.get("/api/v1/tasks/search", params={"q": "  "}, headers=auth_headers).status_code == 400
+    assert client.get(
+        "/api/v1/tasks/search", params={"q": "groceries", "cursor": page["next_cursor"]}, headers=auth_headers
+    ).status_code == 400
+
+def test_agenda_groups_by_local_day_and_pages_each_day(client, auth_headers, standin):
+    # UTC-7 (getTimezoneOffset() = 420): local 2026-03-02 is 07:00Z to 07:00Z next day
+    standin.seed("tasks", [
+        {"user_id": USER_ID, "title": "Late on the 1st", "status": "To Do", "due_date": "2026-03-02T06:30:00+00:00"},
+        {"user_id": USER_ID, "title": "Breakfast", "status": "To Do", "due_date": "2026-03-02T15:00:00+00:00"},
+        {"user_id": USER_ID, "title": "Lunch", "status": "Done", "due_date": "2026-03-02T19:00:00+00:00"},
+        {"user_id": USER_ID, "title": "Dinner", "status": "To Do", "due_date": "2026-03-03T02:00:00+00:00"},
+        {"user_id": USER_ID, "title": "Undated", "status": "To Do"},
+        {"user_id": "someone-else", "title": "Other", "status": "To Do", "due_date": "2026-03-02T15:00:00+00:00"},
+    ])
+    params = {"start": "2026-03-01", "end": "2026-03-03", "timezone_offset": 420, "limit": 2}
+
+    agenda = client.get("/api/v1/tasks/agenda", params=params, headers=auth_headers).json()
+
+    assert agenda["timezone_offset"] == 420
+    assert [(day["date"], [t["title"] for t in day["items"]]) for day in agenda["days"]] == [
+        ("2026-03-01", ["Late on the 1st"]),
+        ("2026-03-02", ["Breakfast", "Lunch"]),
+        ("2026-03-03", []),
+    ]
+    assert agenda["days"][0]["next_cursor"] is None
+    cursor = agenda["days"][1]["next_cursor"]
+
+    more = client.get("/api/v1/tasks/agenda", params={**params, "cursor": cursor}, headers=auth_headers).json()
+    assert [(day["date"], [t["title"] for t in day["items"]]) for day in more["days"]] == [("2026-03-02", ["Dinner"])]
+    assert more["days"][0]["next_cursor"] is None
+
+    open_only = client.get(
+        "/api/v1/tasks/agenda", params={**params, "limit": 10, "status": ["To Do", "In Progress"]}, headers=auth_headers
+    ).json()
+    assert [t["title"] for t in open_only["days"][1]["items"]] == ["Breakfast", "Dinner"]
+
+def test_agenda_rejects_bad_ranges_and_foreign_cursors(client, auth_headers, standin, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_AGENDA_MAX_DAYS", 7)
+    standin.seed("tasks", [
+        {"user_id": USER_ID, "title": f"Task {i}", "status": "To Do", "due_date": "2026-03-02T15:00:00+00:00"} for i in range(2)
+    ])
+    params = {"start": "2026-03-02", "end": "2026-03-02", "limit": 1}
+    cursor = client.get("/api/v1/tasks/agenda", params=params, headers=auth_headers).json()["days"][0]["next_cursor"]
+
+    def get(**changes):
+        return client.get("/api/v1/tasks/agenda", params={**params, **changes}, headers=auth_headers).status_code
+
+    assert get(end="2026-03-01") == 400
+    assert get(end="2026-03-09") == 400
+    assert get(timezone_offset=2000) == 422
+    assert get(cursor=cursor, timezone_offset=60) == 400
+    assert get(cursor=cursor, start="2026-03-03", end="2026-03-04") == 400
+    assert get(cursor=cursor) == 200
+
+def test_stats_counts_statuses_and_overdue(client, auth_headers, standin):
+    past, future = [(datetime.utcnow() + timedelta(days=d)).isoformat() + "+00:00" for d in (-1, 1)]
+    standin.seed("tasks", [
+        {"user_id": USER_ID, "title": "Overdue", "status": "To Do", "due_date": past},
+        {"user_id": USER_ID, "title": "Done late", "status": "Done", "due_date": past},
+        {"user_id": USER_ID, "title": "Upcoming", "status": "In Progress", "due_date": future},
+        {"user_id": USER_ID, "title": "Done", "status": "Done"},
+        {"user_id": "someone-else", "title": "Other", "status": "To Do", "due_date": past},
+    ])
+
+    response = client.get("/api/v1/tasks/stats", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 4,
+        "by_status": {"To Do": 1, "In Progress": 1, "Done": 2},
+        "overdue": 1,
+        "completion_rate": 0.5,
+    }
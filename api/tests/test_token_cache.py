@@ -0,0 +1,69 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from app import dependencies
+from app.cache.token_cache import TokenCache
+from app.config import settings
+from conftest import USER_ID
+
+def _token(sub: str = USER_ID, minutes: float = 5) -> str:
+    expire = datetime.utcnow() + timedelta(minutes=minutes)
+    return jwt.encode({"sub": sub, "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+@pytest.fixture
+def decodes(monkeypatch):
+    calls = []
+    decode = dependencies.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return decode(*args, **kwargs)
+    monkeypatch.setattr(dependencies.jwt, "decode", counting_decode)
+    return calls
+
+def test_repeat_requests_skip_verification(decodes):
+    cache = TokenCache()
+    token = _token()
+
+    users = [asyncio.run(dependencies.get_current_user(token, cache)) for _ in range(3)]
+
+    assert users == [USER_ID] * 3
+    assert len(decodes) == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_invalid_tokens_are_not_cached(decodes):
+    cache = TokenCache()
+    forged = jwt.encode({"sub": USER_ID, "exp": time.time() + 300}, "wrong-secret", algorithm=settings.ALGORITHM)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            asyncio.run(dependencies.get_current_user(forged, cache))
+
+    assert len(decodes) == 2 and len(cache) == 0
+
+def test_entries_end_at_token_expiry():
+    cache = TokenCache()
+    cache.set("token", USER_ID, time.time() + 0.05)
+    assert cache.get("token") == USER_ID
+    time.sleep(0.06)
+    assert cache.get("token") is None
+    assert len(cache) == 0
+
+def test_revocation_and_bound():
+    cache = TokenCache(max_entries=2)
+    expires = time.time() + 60
+    cache.set("a1", "alice", expires)
+    cache.set("a2", "alice", expires)
+    cache.set("b1", "bob", expires)
+
+    assert cache.get("a1") is None  # least recently used, evicted by the bound
+    assert cache.evictions == 1
+
+    cache.set("a1", "alice", expires)
+    assert cache.revoke_subject("alice") == 1
+    assert cache.get("a1") is None
+    cache.revoke_token("b1")
+    assert cache.get("b1") is None and len(cache) == 0
@@ -71,8 +71,8 @@ if [ -d "$API_VENV_PATH" ]; then
     source .venv/bin/activate 2>/dev/null || source .venv/Scripts/activate 2>/dev/null || { echo -e "${RED}Failed to activate virtual environment in $APIDIR ${NC}"; cd "$PROJECT_ROOT"; exit 1; }
     
     echo -e "${YELLOW}Starting FastAPI server on port 8001 from $(pwd)...${NC}"
-    echo -e "${BLUE}Running: python $START_API_SCRIPT${NC}"
-    python "$START_API_SCRIPT" &
+    echo -e "${BLUE}Running: python $START_API_SCRIPT --reload${NC}"
+    python "$START_API_SCRIPT" --reload &
     FASTAPI_PID=$!
 
     echo -e "${GREEN}Returning to project root: $PROJECT_ROOT${NC}"
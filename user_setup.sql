@@ -1,5 +1,5 @@
 -- Create a users table that extends the built-in auth.users
-CREATE TABLE public.users (
+CREATE TABLE IF NOT EXISTS public.users (
   id UUID PRIMARY KEY,  -- Remove the foreign key constraint for testing
   email TEXT UNIQUE NOT NULL,
   full_name TEXT,
@@ -42,14 +42,34 @@ ALTER TABLE public.tasks
 -- Add RLS policies to tasks to ensure users can only see/modify their own tasks
 ALTER TABLE public.tasks ENABLE ROW LEVEL SECURITY;
 
+-- Test users are looked up once per statement, not once per task row:
+-- the function and auth.uid() are wrapped in scalar subqueries so they
+-- run as InitPlans and the policy becomes an indexable user_id predicate
+-- (same as api/migrations/0006_task_policies_without_subqueries.sql)
+CREATE INDEX IF NOT EXISTS users_test_user_idx
+ON public.users (id) WHERE is_test_user;
+
+CREATE OR REPLACE FUNCTION public.test_user_ids()
+RETURNS uuid[]
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT coalesce(array_agg(id), '{}') FROM public.users WHERE is_test_user
+$$;
+
+DROP POLICY IF EXISTS task_select_own ON public.tasks;
+DROP POLICY IF EXISTS task_insert_own ON public.tasks;
+DROP POLICY IF EXISTS task_update_own ON public.tasks;
+DROP POLICY IF EXISTS task_delete_own ON public.tasks;
+
 CREATE POLICY task_select_own ON public.tasks 
-  FOR SELECT USING (auth.uid() = user_id OR (SELECT is_test_user FROM public.users WHERE id = user_id));
+  FOR SELECT USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
   
 CREATE POLICY task_insert_own ON public.tasks 
-  FOR INSERT WITH CHECK (auth.uid() = user_id OR (SELECT is_test_user FROM public.users WHERE id = user_id));
+  FOR INSERT WITH CHECK ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
   
 CREATE POLICY task_update_own ON public.tasks 
-  FOR UPDATE USING (auth.uid() = user_id OR (SELECT is_test_user FROM public.users WHERE id = user_id));
+  FOR UPDATE USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
   
 CREATE POLICY task_delete_own ON public.tasks 
-  FOR DELETE USING (auth.uid() = user_id OR (SELECT is_test_user FROM public.users WHERE id = user_id)); 
\ No newline at end of file
+  FOR DELETE USING ((SELECT auth.uid()) = user_id OR user_id = ANY ((SELECT public.test_user_ids())::uuid[]));
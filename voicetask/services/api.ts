@@ -7,8 +7,9 @@ import AsyncStorage from '@react-native-async-storage/async-storage';
 // For development, use your local network IP that can be accessed from your device
 const API_BASE_URL = 'http://192.168.1.214:8001/api/v1'; // Updated port to 8001
 
-// Token storage key
+// Token storage keys
 const AUTH_TOKEN_KEY = 'auth_token';
+const REFRESH_TOKEN_KEY = 'refresh_token';
 
 // Create axios instance with base configuration
 const api = axios.create({
@@ -36,6 +37,45 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// Access tokens are short-lived: on a 401, exchange the stored refresh
+// token for a new pair once (shared by concurrent requests) and retry
+let refreshInFlight: Promise<string | null> | null = null;
+
+async function refreshAccessToken(): Promise<string | null> {
+  const refreshToken = await AsyncStorage.getItem(REFRESH_TOKEN_KEY);
+  if (!refreshToken) {
+    return null;
+  }
+  try {
+    const response = await axios.post(`${API_BASE_URL}/auth/refresh`, { refresh_token: refreshToken });
+    await AsyncStorage.setItem(AUTH_TOKEN_KEY, response.data.access_token);
+    await AsyncStorage.setItem(REFRESH_TOKEN_KEY, response.data.refresh_token);
+    return response.data.access_token;
+  } catch (error) {
+    // Expired or revoked session: the user has to log in again
+    await AsyncStorage.multiRemove([AUTH_TOKEN_KEY, REFRESH_TOKEN_KEY]);
+    return null;
+  }
+}
+
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const request = error.config;
+    if (error.response?.status !== 401 || !request || request._retried) {
+      return Promise.reject(error);
+    }
+    request._retried = true;
+    refreshInFlight = refreshInFlight || refreshAccessToken().finally(() => { refreshInFlight = null; });
+    const token = await refreshInFlight;
+    if (!token) {
+      return Promise.reject(error);
+    }
+    request.headers.Authorization = `Bearer ${token}`;
+    return api(request);
+  }
+);
+
 // Authentication methods
 export const authService = {
   /**
@@ -65,9 +105,10 @@ export const authService = {
         password,
       });
       
-      // Save token to secure storage
-      const { access_token } = response.data;
+      // Save tokens to secure storage
+      const { access_token, refresh_token } = response.data;
       await AsyncStorage.setItem(AUTH_TOKEN_KEY, access_token);
+      await AsyncStorage.setItem(REFRESH_TOKEN_KEY, refresh_token);
       
       return response.data;
     } catch (error) {
@@ -81,7 +122,12 @@ export const authService = {
    */
   async logout() {
     try {
-      await AsyncStorage.removeItem(AUTH_TOKEN_KEY);
+      const refreshToken = await AsyncStorage.getItem(REFRESH_TOKEN_KEY);
+      if (refreshToken) {
+        // End the session on the server too; log out locally regardless
+        await api.post('/auth/logout', { refresh_token: refreshToken }).catch(() => undefined);
+      }
+      await AsyncStorage.multiRemove([AUTH_TOKEN_KEY, REFRESH_TOKEN_KEY]);
     } catch (error) {
       console.error('Error logging out:', error);
       throw error;
@@ -320,6 +366,9 @@ export const apiService = {
       
       let headers: Record<string, string> = {
         'Content-Type': 'multipart/form-data',
+        // Each recording gets its own file, so retries of the same recording
+        // share a key and the server runs the pipeline (and creates tasks) once
+        'Idempotency-Key': `voice-process:${audioUri.split('/').pop()}`,
       };
       
       if (useAuth) {
@@ -384,17 +433,26 @@ export const apiService = {
         throw new Error('No authentication token found');
       }
       
-      // Make request with explicit auth header
-      const response = await api.get('/tasks/', {
-        headers: {
-          'Authorization': `Bearer ${token}`
-        } as Record<string, string>
-      });
-      
-      console.log('🔄 API: Raw backend response:', JSON.stringify(response.data, null, 2));
+      // Make request with explicit auth header, following the
+      // next_cursor of each page until the last one
+      const tasks: any[] = [];
+      let cursor: string | null = null;
+      do {
+        const response: any = await api.get('/tasks/', {
+          headers: {
+            'Authorization': `Bearer ${token}`
+          } as Record<string, string>,
+          params: cursor ? { cursor } : undefined
+        });
+        
+        console.log('🔄 API: Raw backend response:', JSON.stringify(response.data, null, 2));
+        
+        tasks.push(...response.data.items);
+        cursor = response.data.next_cursor;
+      } while (cursor);
       
       // Map backend field names to frontend field names
-      const mappedTasks = response.data.map((task: any) => {
+      const mappedTasks = tasks.map((task: any) => {
         const mapped = {
           ...task,
           dueDate: task.due_date, // Map due_date to dueDate
@@ -420,6 +478,112 @@ export const apiService = {
     }
   },
 
+  /**
+   * Search the user's tasks by title and description on the server
+   * @param query - Search text
+   * @param cursor - next_cursor from the previous page, if any
+   * @returns One page of matching tasks (best match first) and the next cursor
+   */
+  async searchTasks(query: string, cursor?: string | null) {
+    try {
+      const token = await AsyncStorage.getItem(AUTH_TOKEN_KEY);
+      if (!token) {
+        throw new Error('No authentication token found');
+      }
+
+      const response: any = await api.get('/tasks/search', {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        } as Record<string, string>,
+        params: cursor ? { q: query, cursor } : { q: query }
+      });
+
+      return {
+        tasks: response.data.items.map((task: any) => ({
+          ...task,
+          dueDate: task.due_date,
+          completed: task.status === 'Done'
+        })),
+        nextCursor: response.data.next_cursor as string | null
+      };
+    } catch (error) {
+      console.error('❌ API: Error searching tasks:', error);
+      throw new Error('Failed to search tasks');
+    }
+  },
+
+  /**
+   * Get tasks due between two local dates, grouped by local day
+   * @param start - First day, YYYY-MM-DD (inclusive)
+   * @param end - Last day, YYYY-MM-DD (inclusive)
+   * @param statuses - Optional status filter, e.g. ['To Do', 'In Progress'] for overdue
+   * @returns Days in order, each with its tasks and a cursor for more of that day
+   */
+  async getAgenda(start: string, end: string, statuses?: string[]) {
+    try {
+      const token = await AsyncStorage.getItem(AUTH_TOKEN_KEY);
+      if (!token) {
+        throw new Error('No authentication token found');
+      }
+
+      const response: any = await api.get('/tasks/agenda', {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        } as Record<string, string>,
+        params: {
+          start,
+          end,
+          timezone_offset: new Date().getTimezoneOffset(),
+          ...(statuses ? { status: statuses } : {})
+        },
+        // Repeat status=... rather than status[]=...
+        paramsSerializer: { indexes: null }
+      });
+
+      return response.data.days.map((day: any) => ({
+        date: day.date as string,
+        nextCursor: day.next_cursor as string | null,
+        tasks: day.items.map((task: any) => ({
+          ...task,
+          dueDate: task.due_date,
+          completed: task.status === 'Done'
+        }))
+      }));
+    } catch (error) {
+      console.error('❌ API: Error fetching agenda:', error);
+      throw new Error('Failed to fetch agenda');
+    }
+  },
+
+  /**
+   * Get task counts for the dashboard without downloading every task
+   * @returns Total, counts per status, overdue count and completion rate
+   */
+  async getTaskStats() {
+    try {
+      const token = await AsyncStorage.getItem(AUTH_TOKEN_KEY);
+      if (!token) {
+        throw new Error('No authentication token found');
+      }
+
+      const response: any = await api.get('/tasks/stats', {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        } as Record<string, string>
+      });
+
+      return {
+        total: response.data.total as number,
+        byStatus: response.data.by_status as Record<string, number>,
+        overdue: response.data.overdue as number,
+        completionRate: response.data.completion_rate as number
+      };
+    } catch (error) {
+      console.error('❌ API: Error fetching task stats:', error);
+      throw new Error('Failed to fetch task stats');
+    }
+  },
+
   /**
    * Delete a task by ID
    * @param taskId - The ID of the task to delete